@@ -0,0 +1,23 @@
+"""
+********************************************************************************
+benchmarks
+********************************************************************************
+
+Performance benchmarks of form-finding and optimization at increasing model sizes.
+
+The models are parametric topology diagrams: chains, trees, braced towers and
+shells from dual quad meshes. The shells require ``compas_singular``, and are
+skipped otherwise. The cases time building trails, creating a form diagram next
+to a full copy of the topology diagram, computing static equilibrium with and
+without numpy, and solving a constrained form-finding problem with automatic
+and finite differences.
+
+Run from the root of the repository, then compare two runs::
+
+    python -m benchmarks run --sizes medium --output base.json
+    python -m benchmarks run --sizes medium --output head.json
+    python -m benchmarks compare base.json head.json
+
+Every result records the median time of the repetitions and the peak memory
+traced by ``tracemalloc``, next to the git commit and the environment of the run.
+"""
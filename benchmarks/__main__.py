@@ -0,0 +1,47 @@
+import argparse
+
+from benchmarks.models import MODELS
+from benchmarks.cases import CASES
+from benchmarks.runner import run_benchmarks
+from benchmarks.runner import save_results
+from benchmarks.runner import load_results
+from benchmarks.runner import compare_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark form-finding and optimization.")
+    commands = parser.add_subparsers(dest="command")
+
+    run = commands.add_parser("run", help="run the benchmarks and save the results to JSON")
+    run.add_argument("-o", "--output", default="benchmarks.json", help="the output JSON file")
+    run.add_argument("-s", "--sizes", default="small", choices=["small", "medium", "large"], help="the preset of model sizes")
+    run.add_argument("-m", "--models", nargs="+", choices=sorted(MODELS), help="the models to run")
+    run.add_argument("-c", "--cases", nargs="+", choices=[case.name for case in CASES], help="the cases to run")
+    run.add_argument("-r", "--repeat", type=int, default=3, help="the number of timed repetitions")
+    run.add_argument("--no-memory", action="store_true", help="skip tracing the peak memory")
+
+    compare = commands.add_parser("compare", help="compare the median times of two result files")
+    compare.add_argument("base", help="the reference JSON file")
+    compare.add_argument("head", help="the JSON file to compare")
+    compare.add_argument("-t", "--threshold", type=float, default=1.1, help="the ratio that flags a case")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run_benchmarks(args.models, args.cases, args.sizes, args.repeat, not args.no_memory)
+        save_results(results, args.output)
+        print("Saved {} results to {}".format(len(results["results"]), args.output))
+
+    elif args.command == "compare":
+        base = load_results(args.base)
+        head = load_results(args.head)
+        print("base: {}  head: {}".format(base["meta"].get("commit"), head["meta"].get("commit")))
+        for case, model, size, a, b, ratio, verdict in compare_results(base, head, args.threshold):
+            print("{:<26} {:<14} {:>6} {:>12.6f} {:>12.6f} {:>8.2f}x  {}".format(case, model, size, a, b, ratio, verdict))
+
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
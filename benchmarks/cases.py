@@ -0,0 +1,155 @@
+from compas_cem.diagrams import FormDiagram
+
+from compas_cem.equilibrium import static_equilibrium
+from compas_cem.equilibrium import static_equilibrium_numpy
+from compas_cem.equilibrium import static_equilibrium_vectorized
+from compas_cem.equilibrium import static_equilibrium_forward
+
+from compas_cem.optimization import Optimizer
+from compas_cem.optimization import PointConstraint
+from compas_cem.optimization import DeviationEdgeParameter
+from compas_cem.optimization import TrailEdgeParameter
+
+from compas_cem.profiling import Profiler
+
+
+__all__ = ["CASES",
+           "Case"]
+
+# ------------------------------------------------------------------------------
+# Case
+# ------------------------------------------------------------------------------
+
+
+class Case(object):
+    """
+    A benchmark of an operation on a topology diagram.
+
+    Parameters
+    ----------
+    name : ``str``
+        The name of the case.
+    setup : ``function``
+        A function that takes a topology diagram with trails and returns the
+        arguments of ``run``. It is called before every timed repetition, untimed.
+    run : ``function``
+        The timed function.
+    max_nodes : ``int``, optional
+        The largest model to run the case on, in number of nodes.
+        Defaults to ``None``.
+    stats : ``function``, optional
+        A function that takes the output of ``run`` and returns a dictionary of extra results.
+        Defaults to ``None``.
+    """
+    def __init__(self, name, setup, run, max_nodes=None, stats=None):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.max_nodes = max_nodes
+        self.stats = stats
+
+# ------------------------------------------------------------------------------
+# Form-finding
+# ------------------------------------------------------------------------------
+
+
+def _build_trails_setup(topology):
+    return (topology.copy(), )
+
+
+def _build_trails(topology):
+    topology.build_trails()
+    return topology
+
+
+def _topology_setup(topology):
+    return (topology, )
+
+
+def _form_diagram(topology):
+    return FormDiagram.from_topology_diagram(topology)
+
+
+def _topology_copy(topology):
+    return topology.copy(cls=FormDiagram)
+
+
+def _static_equilibrium(topology):
+    return static_equilibrium(topology, tmax=100, eta=1e-6)
+
+
+def _static_equilibrium_numpy(topology):
+    return static_equilibrium_numpy(topology, tmax=100, eta=1e-6)
+
+
+def _static_equilibrium_forward(topology):
+    return static_equilibrium_forward(topology, tmax=100, eta=1e-6)
+
+
+def _static_equilibrium_vectorized(topology, acceleration=None):
+    return static_equilibrium_vectorized(topology, tmax=100, eta=1e-6, profiler=Profiler(), acceleration=acceleration)
+
+
+def _equilibrium_stats(form):
+    return {"iterations": form.stats.series["iterations"][-1],
+            "accelerated_steps": form.stats.counters.get("accelerated_steps", 0)}
+
+# ------------------------------------------------------------------------------
+# Optimization
+# ------------------------------------------------------------------------------
+
+
+def _optimizer_setup(topology, grad):
+    """
+    Match the nodes of the form diagram of a topology with perturbed parameters.
+    """
+    optimizer = Optimizer()
+
+    for edge in topology.trail_edges():
+        optimizer.add_parameter(TrailEdgeParameter(edge, 0.5, 0.5))
+
+    for edge in topology.deviation_edges():
+        optimizer.add_parameter(DeviationEdgeParameter(edge, 0.5, 0.5))
+
+    target = topology.copy()
+    x = optimizer.optimization_parameters(topology)
+    optimizer._update_parameters(target, x + 0.1)
+    form = static_equilibrium(target)
+
+    for node in topology.nodes():
+        if not topology.is_node_support(node):
+            optimizer.add_constraint(PointConstraint(node, form.node_coordinates(node)))
+
+    return optimizer, topology.copy(), grad
+
+
+def _optimizer_solve(optimizer, topology, grad):
+    optimizer.solve(topology, algorithm="SLSQP", grad=grad, iters=20, eps=1e-6)
+    return optimizer
+
+
+def _optimizer_stats(optimizer):
+    return {"penalty": float(optimizer.penalty),
+            "evals": optimizer.evals,
+            "solves": optimizer.solves,
+            "status": optimizer.status}
+
+
+# ------------------------------------------------------------------------------
+# Cases
+# ------------------------------------------------------------------------------
+
+CASES = [Case("build_trails", _build_trails_setup, _build_trails),
+         Case("form_diagram", _topology_setup, _form_diagram),
+         Case("topology_copy", _topology_setup, _topology_copy),
+         Case("static_equilibrium", _topology_setup, _static_equilibrium),
+         Case("static_equilibrium_numpy", _topology_setup, _static_equilibrium_numpy),
+         Case("static_equilibrium_forward", _topology_setup, _static_equilibrium_forward),
+         Case("static_equilibrium_vectorized", _topology_setup, _static_equilibrium_vectorized, stats=_equilibrium_stats),
+         Case("static_equilibrium_anderson", _topology_setup, lambda t: _static_equilibrium_vectorized(t, "anderson"), stats=_equilibrium_stats),
+         Case("optimizer_solve_ad", lambda t: _optimizer_setup(t, "AD"), _optimizer_solve, 300, _optimizer_stats),
+         Case("optimizer_solve_fd", lambda t: _optimizer_setup(t, "FD"), _optimizer_solve, 300, _optimizer_stats)]
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,222 @@
+import os
+
+from math import cos
+from math import sin
+from math import pi
+
+from compas_cem import HOME
+
+from compas_cem.diagrams import TopologyDiagram
+
+from compas_cem.elements import Node
+from compas_cem.elements import TrailEdge
+from compas_cem.elements import DeviationEdge
+
+from compas_cem.loads import NodeLoad
+from compas_cem.supports import NodeSupport
+
+
+__all__ = ["MODELS",
+           "chain",
+           "tree",
+           "braced_tower",
+           "shell"]
+
+
+SHELL_MESH = os.path.join(HOME, "examples", "data", "coarse_quad_mesh_66.json")
+
+# ------------------------------------------------------------------------------
+# Chain
+# ------------------------------------------------------------------------------
+
+
+def chain(size):
+    """
+    A single compression chain, loaded at its top node.
+
+    Parameters
+    ----------
+    size : ``int``
+        The number of trail edges in the chain.
+
+    Returns
+    -------
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`
+        The topology diagram, without trails.
+    """
+    topology = TopologyDiagram()
+
+    for i in range(size + 1):
+        topology.add_node(Node(i, [0.0, float(size - i), 0.0]))
+
+    for i in range(size):
+        topology.add_edge(TrailEdge(i, i + 1, length=-1.0))
+
+    topology.add_support(NodeSupport(size))
+    topology.add_load(NodeLoad(0, [0.1, -1.0, 0.0]))
+
+    return topology
+
+# ------------------------------------------------------------------------------
+# Tree
+# ------------------------------------------------------------------------------
+
+
+def tree(size):
+    """
+    A binary tree of deviation edges, with a short column under every branching node.
+
+    Parameters
+    ----------
+    size : ``int``
+        The number of levels of the tree.
+
+    Returns
+    -------
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`
+        The topology diagram, without trails.
+
+    Notes
+    -----
+    Every branching node is the origin of a single-edge trail.
+    All the deviation edges are direct.
+    """
+    topology = TopologyDiagram()
+
+    branches = 2 ** size - 1
+
+    for node in range(branches):
+        level = len(bin(node + 1)) - 3
+        position = node + 1 - 2 ** level
+        x = (position + 0.5) * 2.0 ** (size - level) - 2.0 ** size / 2.0
+        topology.add_node(Node(node, [x, float(level), 0.0]))
+        topology.add_node(Node(branches + node, [x, float(level) - 0.5, 0.0]))
+
+        topology.add_edge(TrailEdge(node, branches + node, length=-0.5))
+        topology.add_support(NodeSupport(branches + node))
+
+        if node > 0:
+            topology.add_edge(DeviationEdge((node - 1) // 2, node, force=-1.0))
+
+        if 2 * node + 1 >= branches:
+            topology.add_load(NodeLoad(node, [0.0, -1.0, 0.0]))
+
+    return topology
+
+# ------------------------------------------------------------------------------
+# Braced tower
+# ------------------------------------------------------------------------------
+
+
+def braced_tower(size, trails=8):
+    """
+    A ring of vertical trails, braced by horizontal and diagonal deviation edges.
+
+    Parameters
+    ----------
+    size : ``int``
+        The number of levels of the tower.
+    trails : ``int``, optional
+        The number of trails around the ring.
+        Defaults to ``8``.
+
+    Returns
+    -------
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`
+        The topology diagram, without trails.
+
+    Notes
+    -----
+    The diagonal deviation edges are indirect.
+    """
+    topology = TopologyDiagram()
+
+    def key(i, j):
+        return i * (size + 1) + j
+
+    for i in range(trails):
+        angle = 2.0 * pi * i / trails
+        for j in range(size + 1):
+            topology.add_node(Node(key(i, j), [cos(angle), sin(angle), float(size - j)]))
+
+    for i in range(trails):
+        for j in range(size):
+            topology.add_edge(TrailEdge(key(i, j), key(i, j + 1), length=-1.0))
+        topology.add_support(NodeSupport(key(i, size)))
+        topology.add_load(NodeLoad(key(i, 0), [0.0, 0.0, -1.0]))
+
+    for i in range(trails):
+        k = (i + 1) % trails
+        for j in range(size):
+            topology.add_edge(DeviationEdge(key(i, j), key(k, j), force=-0.5))
+            if j < size - 1 and i % 2 == 0:
+                topology.add_edge(DeviationEdge(key(i, j), key(k, j + 1), force=0.1))
+
+    return topology
+
+# ------------------------------------------------------------------------------
+# Shell
+# ------------------------------------------------------------------------------
+
+
+def shell(size):
+    """
+    A shell from the dual of a densified coarse quad mesh, as in the surface structure example.
+
+    Parameters
+    ----------
+    size : ``int``
+        The density of the strips of the coarse quad mesh.
+
+    Returns
+    -------
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`
+        The topology diagram, without trails.
+
+    Notes
+    -----
+    Requires ``compas_singular``.
+    """
+    from compas.datastructures import mesh_dual
+    from compas_singular.datastructures import CoarseQuadMesh
+
+    coarse = CoarseQuadMesh.from_json(SHELL_MESH)
+    coarse.collect_strips()
+    coarse.set_strips_density(size)
+    coarse.densification()
+    mesh = mesh_dual(coarse.get_quad_mesh())
+
+    # every other boundary polyedge is supported
+    supports = []
+    boundary = mesh.vertices_on_boundary()[:-1]
+    for i in range(len(boundary)):
+        u, v = boundary[0:2]
+        polyedge = mesh.collect_polyedge(u, v)
+        if i % 2 == 0:
+            supports += polyedge
+            del boundary[:len(polyedge)]
+        else:
+            del boundary[:len(polyedge) - 2]
+        if not boundary:
+            break
+
+    topology = TopologyDiagram.from_dualquadmesh(mesh, supports, deviation_force=0.1)
+    for node in topology.nodes():
+        if not topology.is_node_support(node):
+            topology.add_load(NodeLoad(node, [0.0, 0.0, -0.5]))
+
+    return topology
+
+
+# ------------------------------------------------------------------------------
+# Sizes
+# ------------------------------------------------------------------------------
+
+MODELS = {"chain": (chain, {"small": [10, 100], "medium": [10, 100, 1000], "large": [10, 100, 1000, 5000]}),
+          "tree": (tree, {"small": [3, 6], "medium": [3, 6, 9], "large": [3, 6, 9, 12]}),
+          "braced_tower": (braced_tower, {"small": [2, 8], "medium": [2, 8, 32], "large": [2, 8, 32, 128]}),
+          "shell": (shell, {"small": [2], "medium": [2, 4], "large": [2, 4, 8]})}
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,316 @@
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from datetime import datetime
+from statistics import mean
+from statistics import median
+
+import numpy as np
+
+import compas
+import compas_cem
+
+from compas_cem import HOME
+
+from benchmarks.models import MODELS
+from benchmarks.cases import CASES
+
+
+__all__ = ["run_benchmarks",
+           "benchmark_case",
+           "environment",
+           "save_results",
+           "load_results",
+           "compare_results"]
+
+
+FORMAT_VERSION = 1
+
+# ------------------------------------------------------------------------------
+# Run
+# ------------------------------------------------------------------------------
+
+
+def run_benchmarks(models=None, cases=None, sizes="small", repeat=3, memory=True, verbose=True):
+    """
+    Run the benchmark cases on the models at increasing sizes.
+
+    Parameters
+    ----------
+    models : ``list``, optional
+        The names of the models to run. Defaults to all of them.
+    cases : ``list``, optional
+        The names of the cases to run. Defaults to all of them.
+    sizes : ``str``, optional
+        The preset of model sizes. Either ``"small"``, ``"medium"`` or ``"large"``.
+        Defaults to ``"small"``.
+    repeat : ``int``, optional
+        The number of timed repetitions of every case.
+        Defaults to ``3``.
+    memory : ``bool``, optional
+        If ``True``, run every case once more to trace its peak memory.
+        Defaults to ``True``.
+    verbose : ``bool``, optional
+        If ``True``, print a line per case.
+        Defaults to ``True``.
+
+    Returns
+    -------
+    results : ``dict``
+        The environment under ``"meta"`` and a list of records under ``"results"``.
+    """
+    models = models or sorted(MODELS)
+    cases = [case for case in CASES if not cases or case.name in cases]
+
+    for name in models:
+        if name not in MODELS:
+            raise KeyError("Unknown model {}. Choose from {}".format(name, sorted(MODELS)))
+
+    records = []
+    for name in models:
+        generator, presets = MODELS[name]
+
+        for size in presets[sizes]:
+            record = {"model": name, "size": size}
+
+            try:
+                topology = generator(size)
+                topology.build_trails()
+            except ImportError as error:
+                for case in cases:
+                    records.append(dict(record, case=case.name, status="skipped", message=str(error)))
+                    _report(records[-1], verbose)
+                continue
+
+            record["nodes"] = topology.number_of_nodes()
+            record["edges"] = topology.number_of_edges()
+
+            for case in cases:
+                if case.max_nodes is not None and record["nodes"] > case.max_nodes:
+                    continue
+                result = dict(record, case=case.name)
+                result.update(benchmark_case(case, topology, repeat, memory))
+                records.append(result)
+                _report(result, verbose)
+
+    return {"meta": environment(sizes=sizes, repeat=repeat), "results": records}
+
+
+def benchmark_case(case, topology, repeat=3, memory=True):
+    """
+    Time a benchmark case on a topology diagram.
+
+    Parameters
+    ----------
+    case : :class:`benchmarks.cases.Case`
+        The benchmark case.
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`
+        A topology diagram with trails.
+    repeat : ``int``, optional
+        The number of timed repetitions.
+        Defaults to ``3``.
+    memory : ``bool``, optional
+        If ``True``, run the case once more to trace its peak memory.
+        Defaults to ``True``.
+
+    Returns
+    -------
+    result : ``dict``
+        The times, in seconds, and their summary, the peak memory, in bytes,
+        and the extra statistics of the case.
+        The ``status`` is ``"error"`` if the case raised an exception.
+    """
+    times = []
+    try:
+        for _ in range(repeat):
+            args = case.setup(topology)
+            start = time.perf_counter()
+            output = case.run(*args)
+            times.append(time.perf_counter() - start)
+
+        peak = None
+        if memory:
+            args = case.setup(topology)
+            tracemalloc.start()
+            try:
+                case.run(*args)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+    except Exception as error:
+        return {"status": "error", "message": "{}: {}".format(type(error).__name__, error)}
+
+    result = {"status": "ok",
+              "times": times,
+              "min": min(times),
+              "median": median(times),
+              "mean": mean(times),
+              "peak_memory": peak}
+
+    if case.stats:
+        result["stats"] = case.stats(output)
+
+    return result
+
+
+def _report(result, verbose):
+    """
+    Print a line for the result of a benchmark case.
+    """
+    if not verbose:
+        return
+
+    line = "{:<26} {:<14} {:>6}".format(result["case"], result["model"], result["size"])
+    if result["status"] != "ok":
+        print("{}  {}: {}".format(line, result["status"], result.get("message")))
+        return
+
+    peak = result["peak_memory"]
+    peak = "" if peak is None else "{:>10.1f} MB".format(peak / 1e6)
+    print("{} {:>8} nodes {:>12.6f} s{}".format(line, result["nodes"], result["median"], peak))
+
+# ------------------------------------------------------------------------------
+# Environment
+# ------------------------------------------------------------------------------
+
+
+def environment(**kwargs):
+    """
+    The environment the benchmarks run in, to tell results apart.
+
+    Parameters
+    ----------
+    **kwargs : ``dict``
+        Extra entries.
+
+    Returns
+    -------
+    meta : ``dict``
+        The time, the git commit and the versions of the interpreter and main dependencies.
+    """
+    meta = {"format": FORMAT_VERSION,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git("rev-parse", "HEAD"),
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "numpy": np.__version__,
+            "compas": compas.__version__,
+            "compas_cem": compas_cem.__version__}
+    meta.update(kwargs)
+
+    try:
+        import resource
+    except ImportError:
+        pass
+    else:
+        # kilobytes on linux, bytes on macos
+        meta["max_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return meta
+
+
+def _git(*args):
+    """
+    The output of a git command in the repository, or ``None`` if it fails.
+    """
+    try:
+        output = subprocess.check_output(("git", ) + args, cwd=HOME, stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode().strip()
+
+# ------------------------------------------------------------------------------
+# Input and output
+# ------------------------------------------------------------------------------
+
+
+def save_results(results, path):
+    """
+    Save benchmark results to a JSON file.
+
+    Parameters
+    ----------
+    results : ``dict``
+        The benchmark results.
+    path : ``str``
+        The path to the JSON file.
+    """
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    """
+    Load benchmark results from a JSON file.
+
+    Parameters
+    ----------
+    path : ``str``
+        The path to the JSON file.
+
+    Returns
+    -------
+    results : ``dict``
+        The benchmark results.
+    """
+    with open(path, "r") as f:
+        return json.load(f)
+
+# ------------------------------------------------------------------------------
+# Comparison
+# ------------------------------------------------------------------------------
+
+
+def compare_results(base, head, threshold=1.1):
+    """
+    Compare the median times of two benchmark runs.
+
+    Parameters
+    ----------
+    base : ``dict``
+        The reference benchmark results.
+    head : ``dict``
+        The benchmark results to compare.
+    threshold : ``float``, optional
+        The ratio of median times above which a case is a regression,
+        and below whose inverse it is an improvement.
+        Defaults to ``1.1``.
+
+    Returns
+    -------
+    rows : ``list``
+        A tuple per case run successfully in both results, with the case,
+        the model, the size, the base and head median times, their ratio and a verdict.
+    """
+    def index(results):
+        return {(r["case"], r["model"], r["size"]): r for r in results["results"] if r["status"] == "ok"}
+
+    base = index(base)
+    head = index(head)
+
+    rows = []
+    for key in sorted(set(base) & set(head)):
+        a = base[key]["median"]
+        b = head[key]["median"]
+        ratio = b / a if a > 0.0 else float("inf")
+
+        verdict = ""
+        if ratio > threshold:
+            verdict = "slower"
+        elif ratio < 1.0 / threshold:
+            verdict = "faster"
+
+        rows.append(key + (a, b, ratio, verdict))
+
+    return rows
+
+
+if __name__ == "__main__":
+    pass
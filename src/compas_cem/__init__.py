@@ -15,6 +15,7 @@ compas_cem
     compas_cem.supports
     compas_cem.equilibrium
     compas_cem.optimization
+    compas_cem.profiling
     compas_cem.plotters
     compas_cem.viewers
 """
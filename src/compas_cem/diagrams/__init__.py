@@ -14,6 +14,17 @@ Diagrams
 
     TopologyDiagram
     FormDiagram
+
+Serialization
+=============
+
+.. autosummary::
+    :toctree: generated/
+    :nosignatures:
+
+    diagram_to_npz
+    diagram_from_npz
+    read_diagram_arrays
 """
 
 from __future__ import absolute_import
@@ -27,5 +38,9 @@ from .diagram import *  # noqa F403
 from .topology import *  # noqa F403
 from .form import *  # noqa F403
 
+import compas
+if not compas.IPY:
+    from .npz import *  # noqa F403
+
 
 __all__ = [name for name in dir() if not name.startswith('_')]
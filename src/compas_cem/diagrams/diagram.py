@@ -40,6 +40,9 @@ class Diagram(Data, NodeMixins, EdgeMixins, Network):
         self.attributes["gkey_node"] = {}
         self.attributes["tol"] = "3f"
 
+        # the adjacency may be shared with another diagram, and it is copied before a structural change
+        self._shared_adjacency = False
+
 # ==============================================================================
 # Properties
 # ==============================================================================
@@ -99,6 +102,100 @@ class Diagram(Data, NodeMixins, EdgeMixins, Network):
             if self.is_node_loaded(node, min_force):
                 yield node
 
+# ==============================================================================
+# Serialization
+# ==============================================================================
+
+    def to_npz(self, filepath, compressed=False):
+        """
+        Save the diagram as a compact binary archive of arrays.
+
+        Parameters
+        ----------
+        filepath : ``str``
+            The path to an ``.npz`` file.
+        compressed : ``bool``, optional
+            If ``True``, compress the arrays. Compressed arrays cannot be memory-mapped.
+            Defaults to ``False``.
+
+        Notes
+        -----
+        This is a faster and smaller alternative to ``to_json`` for large diagrams.
+        See :func:`compas_cem.diagrams.diagram_to_npz`.
+        """
+        from compas_cem.diagrams import diagram_to_npz
+        diagram_to_npz(self, filepath, compressed)
+
+    @classmethod
+    def from_npz(cls, filepath, mmap=False):
+        """
+        Load a diagram from a binary archive of arrays.
+
+        Parameters
+        ----------
+        filepath : ``str``
+            The path to an ``.npz`` file written by :meth:`to_npz`.
+        mmap : ``bool``, optional
+            If ``True``, memory-map the largest arrays while the diagram is built.
+            Defaults to ``False``.
+
+        Returns
+        -------
+        diagram : :class:`compas_cem.diagrams.Diagram`
+            A diagram of this class.
+        """
+        from compas_cem.diagrams import diagram_from_npz
+        return diagram_from_npz(filepath, cls, mmap)
+
+# ==============================================================================
+# Structural changes
+# ==============================================================================
+
+    def add_node(self, *args, **kwargs):
+        """
+        Adds a node.
+        """
+        self._unshare_adjacency()
+        return super(Diagram, self).add_node(*args, **kwargs)
+
+    def add_edge(self, *args, **kwargs):
+        """
+        Adds an edge.
+        """
+        self._unshare_adjacency()
+        return super(Diagram, self).add_edge(*args, **kwargs)
+
+    def delete_node(self, key):
+        """
+        Deletes a node and its connected edges.
+        """
+        self._unshare_adjacency()
+        super(Diagram, self).delete_node(key)
+
+    def delete_edge(self, u, v):
+        """
+        Deletes an edge.
+        """
+        self._unshare_adjacency()
+        super(Diagram, self).delete_edge(u, v)
+
+    def _share_adjacency(self, other):
+        """
+        Share the adjacency of this diagram with another diagram, until either changes its structure.
+        """
+        other.adjacency = self.adjacency
+        other._shared_adjacency = True
+        self._shared_adjacency = True
+
+    def _unshare_adjacency(self):
+        """
+        Copy the adjacency of the diagram, if it is shared with another diagram.
+        """
+        if not self._shared_adjacency:
+            return
+        self.adjacency = {node: dict(nbrs) for node, nbrs in self.adjacency.items()}
+        self._shared_adjacency = False
+
 # ==============================================================================
 # Counters
 # ==============================================================================
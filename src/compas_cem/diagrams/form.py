@@ -23,10 +23,17 @@ class FormDiagram(Diagram):
     -------
     form : :class:`compas_cem.diagrams.FormDiagram`
         A form diagram.
+
+    Attributes
+    ----------
+    stats : :class:`compas_cem.profiling.Stats`
+        The profiling stats of the calculation that created the form diagram, if it was profiled.
     """
     def __init__(self, *args, **kwargs):
         super(FormDiagram, self).__init__(*args, **kwargs)
 
+        self.stats = None
+
 # ==============================================================================
 # Constructors
 # ==============================================================================
@@ -35,16 +42,60 @@ class FormDiagram(Diagram):
     def from_topology_diagram(cls, topology):
         """
         Construct the base of a form diagram from a topology diagram.
+
+        Parameters
+        ----------
+        topology : :class:`compas_cem.diagrams.TopologyDiagram`
+            A topology diagram.
+
+        Returns
+        -------
+        form : :class:`compas_cem.diagrams.FormDiagram`
+            A form diagram.
+
+        Notes
+        -----
+        The form diagram shares the adjacency of the topology diagram until
+        either of them adds or deletes a node or an edge. The attribute
+        dictionaries of the nodes and the edges are copied, and so are the lists,
+        tuples and dictionaries among their values, like the planes of trail edges.
+        This is much faster than a full copy of the topology diagram.
         """
-        form = topology.copy(cls=cls)
+        form = cls()
+
+        attributes = dict(topology.attributes)
+        attributes["gkey_node"] = dict(attributes["gkey_node"])
+        for name in ("_trails", "_auxiliary_trails", "_aux_length", "_aux_vector"):
+            del attributes[name]
+
+        form.attributes = attributes
+        form.default_node_attributes.update(topology.default_node_attributes)
+        form.default_edge_attributes.update(topology.default_edge_attributes)
 
-        del form.attributes["_trails"]
-        del form.attributes["_auxiliary_trails"]
-        del form.attributes["_aux_length"]
-        del form.attributes["_aux_vector"]
+        form.node = {node: _copy_value(attr) for node, attr in topology.node.items()}
+        form.edge = {u: {v: _copy_value(attr) for v, attr in nbrs.items()} for u, nbrs in topology.edge.items()}
+        form._max_node = topology._max_node
+        topology._share_adjacency(form)
 
         return form
 
+# ==============================================================================
+# Helpers
+# ==============================================================================
+
+
+def _copy_value(value):
+    """
+    Copy the lists, tuples and dictionaries nested in an attribute value.
+    """
+    if isinstance(value, list):
+        return [_copy_value(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_copy_value(item) for item in value)
+    if isinstance(value, dict):
+        return {key: _copy_value(item) for key, item in value.items()}
+    return value
+
 # ==============================================================================
 # Main
 # ==============================================================================
@@ -0,0 +1,534 @@
+import io
+import json
+import struct
+import zipfile
+
+from numbers import Integral
+from numbers import Real
+
+import numpy as np
+
+from compas.data import json_dumps
+from compas.data import json_loads
+
+
+__all__ = ["diagram_to_npz",
+           "diagram_from_npz",
+           "read_diagram_arrays"]
+
+
+# the version of the layout of the arrays in a file
+NPZ_VERSION = 1
+
+# node attributes stored side by side in a single column
+NODE_GROUPS = {"xyz": ("x", "y", "z"),
+               "load": ("qx", "qy", "qz"),
+               "reaction": ("rx", "ry", "rz")}
+
+# the arrays that can be memory-mapped by the loaders
+MMAP_ARRAYS = ("node_keys", "node_xyz", "edge_index")
+
+# the states of an attribute of a node or an edge
+ABSENT = 0
+VALUE = 1
+NONE = 2
+
+# a placeholder for missing attributes
+_ABSENT = object()
+
+# ==============================================================================
+# Write
+# ==============================================================================
+
+
+def diagram_to_npz(diagram, file, compressed=False):
+    """
+    Save a diagram as a compact binary archive of arrays.
+
+    Parameters
+    ----------
+    diagram : :class:`compas_cem.diagrams.Diagram`
+        A topology or a form diagram. Its node keys must be integers.
+    file : ``str`` or ``file``
+        A path to a file, or an open binary file object.
+        NumPy appends the ``.npz`` extension to a path if it does not end with it.
+    compressed : ``bool``, optional
+        If ``True``, compress the arrays. Compressed arrays cannot be memory-mapped.
+        Defaults to ``False``.
+
+    Notes
+    -----
+    The archive is an ``.npz`` file. The attributes of the nodes and the edges are stored
+    column by column, the coordinates of the nodes as a ``(n, 3)`` array, the edges and
+    the adjacency as node indices, and the trails as flat tables of nodes with offsets.
+    Attributes that do not fit in a column, like the planes of the edges, are stored
+    with the header of the archive in JSON.
+
+    Integers in columns of floats, like the coordinates of the nodes, are marked value by
+    value and restored as integers. Integers larger than ``2 ** 53`` are never stored as floats.
+    """
+    arrays = diagram_arrays(diagram)
+    arrays["header"] = np.frombuffer(json_dumps(arrays["header"]).encode("utf-8"), dtype=np.uint8)
+
+    save = np.savez_compressed if compressed else np.savez
+    save(file, **arrays)
+
+
+def diagram_arrays(diagram):
+    """
+    The arrays of the binary archive of a diagram, and its header.
+    """
+    keys = list(diagram.node)
+    if not all(isinstance(key, Integral) for key in keys):
+        raise ValueError("Only diagrams with integer node keys can be stored as arrays!")
+
+    index = {key: i for i, key in enumerate(keys)}
+
+    header = {"version": NPZ_VERSION,
+              "class": type(diagram).__name__,
+              "max_node": diagram._max_node,
+              "dna": diagram.default_node_attributes,
+              "dea": diagram.default_edge_attributes}
+
+    arrays = {"node_keys": np.array(keys, dtype=np.int64)}
+
+    # nodes
+    dicts = [diagram.node[key] for key in keys]
+    header["node_columns"], header["node_extra"] = _encode_columns(dicts, NODE_GROUPS, "node", arrays)
+
+    # edges, in the order of the edge dictionary of the diagram
+    edges = [(u, v) for u, nbrs in diagram.edge.items() for v in nbrs]
+    arrays["edge_index"] = _indices([index[node] for edge_key in edges for node in edge_key], len(keys)).reshape((-1, 2))
+    arrays["edge_offsets"] = _offsets(len(diagram.edge[key]) for key in keys)
+
+    dicts = [diagram.edge[u][v] for u, v in edges]
+    header["edge_columns"], header["edge_extra"] = _encode_columns(dicts, {}, "edge", arrays)
+
+    # adjacency, in the order of the neighbors of every node
+    arrays["adjacency"] = _indices([index[nbr] for key in keys for nbr in diagram.adjacency[key]], len(keys))
+    arrays["adjacency_offsets"] = _offsets(len(diagram.adjacency[key]) for key in keys)
+
+    # attributes
+    attributes = dict(diagram.attributes)
+
+    gkey_node = attributes.pop("gkey_node", {})
+    arrays["gkeys"] = _encode_strings(list(gkey_node))
+    arrays["gkey_nodes"] = np.array(list(gkey_node.values()), dtype=np.int64)
+
+    trails = attributes.pop("_trails", None)
+    if trails is not None:
+        arrays["trail_origins"] = np.array(list(trails), dtype=np.int64)
+        arrays["trail_nodes"] = np.array([node for trail in trails.values() for node in trail], dtype=np.int64)
+        arrays["trail_offsets"] = _offsets(len(trail) for trail in trails.values())
+
+    aux_trails = attributes.pop("_auxiliary_trails", None)
+    if aux_trails is not None:
+        arrays["aux_trail_nodes"] = np.array(list(aux_trails), dtype=np.int64)
+        arrays["aux_trail_edges"] = np.array(list(aux_trails.values()), dtype=np.int64).reshape((-1, 2))
+
+    header["attributes"] = attributes
+    header["trails"] = trails is not None
+    header["auxiliary_trails"] = aux_trails is not None
+
+    arrays["header"] = header
+
+    return arrays
+
+# ==============================================================================
+# Read
+# ==============================================================================
+
+
+def read_diagram_arrays(file, mmap=False):
+    """
+    Read the arrays of a diagram from a binary archive, without building the diagram.
+
+    Parameters
+    ----------
+    file : ``str`` or ``file``
+        A path to an ``.npz`` file written by :func:`diagram_to_npz`, or an open binary file object.
+    mmap : ``bool``, optional
+        If ``True``, memory-map the node keys, the node coordinates and the edges
+        instead of reading them, if ``file`` is a path to an uncompressed archive.
+        Defaults to ``False``.
+
+    Returns
+    -------
+    arrays : ``dict``
+        The arrays of the diagram by name, and its decoded ``"header"``.
+        The xyz coordinates of the nodes are in ``"node_xyz"``, an array of shape ``(n, 3)``,
+        and the node indices of the edges are in ``"edge_index"``, an array of shape ``(m, 2)``.
+
+    Examples
+    --------
+    >>> arrays = read_diagram_arrays("shell.npz", mmap=True)  # doctest: +SKIP
+    >>> arrays["node_xyz"].shape  # doctest: +SKIP
+    (100000, 3)
+    """
+    arrays = {}
+    with np.load(file) as archive:
+        for name in archive.files:
+            array = None
+            if mmap and name in MMAP_ARRAYS and isinstance(file, str):
+                array = _memmap_member(file, archive.zip, name)
+            if array is None:
+                array = archive[name]
+            arrays[name] = array
+
+    header = json_loads(arrays["header"].tobytes().decode("utf-8"))
+    if header["version"] > NPZ_VERSION:
+        raise ValueError("Unsupported version of the diagram arrays: {}!".format(header["version"]))
+    arrays["header"] = header
+
+    return arrays
+
+
+def diagram_from_npz(file, cls=None, mmap=False):
+    """
+    Load a diagram from a binary archive of arrays.
+
+    Parameters
+    ----------
+    file : ``str`` or ``file``
+        A path to an ``.npz`` file written by :func:`diagram_to_npz`, or an open binary file object.
+    cls : ``type``, optional
+        The class of the diagram to create.
+        Defaults to ``None``, to create a diagram of the class that was saved.
+    mmap : ``bool``, optional
+        If ``True``, memory-map the largest arrays while the diagram is built.
+        Defaults to ``False``.
+
+    Returns
+    -------
+    diagram : :class:`compas_cem.diagrams.Diagram`
+        The diagram.
+    """
+    return diagram_from_arrays(read_diagram_arrays(file, mmap), cls)
+
+
+def diagram_from_arrays(arrays, cls=None):
+    """
+    Build a diagram from the arrays read from a binary archive.
+    """
+    header = arrays["header"]
+
+    if cls is None:
+        from compas_cem import diagrams
+        cls = getattr(diagrams, header["class"])
+
+    keys = arrays["node_keys"].tolist()
+
+    # nodes
+    nodes = [{} for _ in keys]
+    _decode_columns(nodes, header["node_columns"], header["node_extra"], arrays)
+
+    # edges
+    indices = arrays["edge_index"][:, 1].tolist()
+    edge_nodes = [keys[i] for i in indices]
+    edges = [{} for _ in indices]
+    _decode_columns(edges, header["edge_columns"], header["edge_extra"], arrays)
+
+    edge = {}
+    offsets = arrays["edge_offsets"].tolist()
+    for i, key in enumerate(keys):
+        start, end = offsets[i], offsets[i + 1]
+        edge[key] = dict(zip(edge_nodes[start:end], edges[start:end]))
+
+    # adjacency
+    adjacency = {}
+    nbrs = [keys[i] for i in arrays["adjacency"].tolist()]
+    offsets = arrays["adjacency_offsets"].tolist()
+    for i, key in enumerate(keys):
+        adjacency[key] = dict.fromkeys(nbrs[offsets[i]:offsets[i + 1]])
+
+    # attributes
+    attributes = dict(header["attributes"])
+    attributes["gkey_node"] = dict(zip(_decode_strings(arrays["gkeys"]), arrays["gkey_nodes"].tolist()))
+
+    if header["trails"]:
+        trails = {}
+        trail_nodes = arrays["trail_nodes"].tolist()
+        offsets = arrays["trail_offsets"].tolist()
+        for i, origin in enumerate(arrays["trail_origins"].tolist()):
+            trails[origin] = tuple(trail_nodes[offsets[i]:offsets[i + 1]])
+        attributes["_trails"] = trails
+
+    if header["auxiliary_trails"]:
+        aux_edges = [tuple(edge_key) for edge_key in arrays["aux_trail_edges"].tolist()]
+        attributes["_auxiliary_trails"] = dict(zip(arrays["aux_trail_nodes"].tolist(), aux_edges))
+
+    diagram = cls()
+    diagram.attributes.update(attributes)
+    diagram.default_node_attributes.update(header["dna"])
+    diagram.default_edge_attributes.update(header["dea"])
+    diagram.node = dict(zip(keys, nodes))
+    diagram.edge = edge
+    diagram.adjacency = adjacency
+    diagram._max_node = header["max_node"]
+
+    return diagram
+
+# ==============================================================================
+# Columns
+# ==============================================================================
+
+
+def _encode_columns(dicts, groups, prefix, arrays):
+    """
+    Store the attributes of nodes or edges column by column in a dictionary of arrays.
+    Return the kinds of the columns, and the attributes that do not fit in a column.
+    """
+    names = set()
+    for attr in dicts:
+        names.update(attr)
+
+    columns = {}
+    extra = {}
+
+    for group, group_names in groups.items():
+        if not any(name in names for name in group_names):
+            continue
+        values = [[attr.get(name, _ABSENT) for attr in dicts] for name in group_names]
+        kinds = [_column_kind(column) for column in values]
+        if not all(kind in ("int", "float", "none") for kind, _ in kinds):
+            continue
+        # integers that a float cannot hold exactly are stored in columns of their own
+        if any(kind == "int" and not _fits_float(column) for column, (kind, _) in zip(values, kinds)):
+            continue
+        names.difference_update(group_names)
+
+        encoded = [_encode_column(column, "float", complete) for column, (_, complete) in zip(values, kinds)]
+        column = "{}_{}".format(prefix, group)
+        columns[column] = {"kind": "float", "names": list(group_names)}
+        arrays[column] = np.stack([array for array, _ in encoded], axis=1)
+        if not all(complete for _, complete in kinds):
+            arrays[column + "_states"] = np.stack([states for _, states in encoded], axis=1)
+        if any(_has_ints(column_values) for column_values in values):
+            arrays[column + "_ints"] = np.stack([_int_mask(column_values) for column_values in values], axis=1)
+
+    for name in sorted(names):
+        values = [attr.get(name, _ABSENT) for attr in dicts]
+        kind, complete = _column_kind(values)
+
+        if kind == "extra":
+            extra[name] = {i: value for i, value in enumerate(values) if value is not _ABSENT}
+            continue
+
+        column = "{}_attr_{}".format(prefix, name)
+        columns[column] = {"kind": kind, "names": [name]}
+
+        array, states = _encode_column(values, kind, complete)
+        if kind == "str":
+            array, arrays[column + "_names"] = _encode_labels(array)
+        if kind != "none":
+            arrays[column] = array
+        if states is not None:
+            arrays[column + "_states"] = states
+        if kind == "float" and _has_ints(values):
+            arrays[column + "_ints"] = _int_mask(values)
+
+    return columns, extra
+
+
+def _column_kind(values):
+    """
+    The type of array that stores the values of an attribute,
+    and whether every value is there and is not ``None``.
+    """
+    types = set(map(type, values))
+    complete = not (types & {type(None), type(_ABSENT)})
+    types.difference_update((type(None), type(_ABSENT)))
+
+    if not types:
+        return "none", complete
+    if all(issubclass(cls, str) for cls in types):
+        return "str", complete
+    if any(issubclass(cls, bool) for cls in types):
+        return "extra", complete
+    if all(issubclass(cls, Integral) for cls in types):
+        return "int", complete
+    if all(issubclass(cls, Real) for cls in types):
+        # integers mixed with floats must be held exactly by a float
+        if not _fits_float(values):
+            return "extra", complete
+        return "float", complete
+
+    return "extra", complete
+
+
+def _encode_column(values, kind, complete):
+    """
+    The array of the values of an attribute and the array of their states.
+    """
+    states = None
+    if not complete:
+        states = np.array([ABSENT if value is _ABSENT else NONE if value is None else VALUE for value in values],
+                          dtype=np.uint8)
+        fill = "" if kind == "str" else 0
+        values = [fill if value is _ABSENT or value is None else value for value in values]
+
+    if kind == "none":
+        return np.zeros(len(values)), states
+    if kind == "str":
+        return values, states
+
+    dtype = np.int64 if kind == "int" else np.float64
+    return np.array(values, dtype=dtype), states
+
+
+def _has_ints(values):
+    """
+    Check if a column holds integers.
+    """
+    return any(isinstance(value, Integral) for value in values)
+
+
+def _int_mask(values):
+    """
+    The array that marks the integers of a column stored as floats.
+    """
+    return np.array([isinstance(value, Integral) for value in values], dtype=np.uint8)
+
+
+def _fits_float(values):
+    """
+    Check if a float holds every integer in a column exactly.
+    """
+    return all(abs(value) <= 2 ** 53 for value in values if isinstance(value, Integral))
+
+
+def _encode_labels(values):
+    """
+    Store strings as the indices of their labels in a table of labels.
+    """
+    labels = sorted(set(values))
+    index = {label: i for i, label in enumerate(labels)}
+    codes = np.array([index[value] for value in values], dtype=_index_dtype(len(labels)))
+    return codes, _encode_strings(labels)
+
+
+def _decode_columns(dicts, columns, extra, arrays):
+    """
+    Restore the attributes of nodes or edges from their columns.
+    """
+    for column, spec in columns.items():
+        names = spec["names"]
+        kind = spec["kind"]
+
+        states = arrays.get(column + "_states")
+        if states is not None:
+            states = np.reshape(states, (len(dicts), len(names)))
+
+        if kind == "none":
+            values = np.zeros((len(dicts), len(names)))
+        else:
+            values = np.reshape(arrays[column], (len(dicts), len(names)))
+
+        if kind == "str":
+            labels = _decode_strings(arrays[column + "_names"])
+
+        # the integers among the values of float columns
+        ints = arrays.get(column + "_ints")
+        if ints is not None:
+            ints = np.reshape(ints, (len(dicts), len(names)))
+
+        for j, name in enumerate(names):
+            column_values = values[:, j].tolist()
+            if kind == "str":
+                column_values = [labels[code] for code in column_values]
+            elif ints is not None:
+                column_values = [int(value) if is_int else value for value, is_int in zip(column_values, ints[:, j].tolist())]
+
+            if states is None:
+                for attr, value in zip(dicts, column_values):
+                    attr[name] = value
+                continue
+
+            for i, state in enumerate(states[:, j].tolist()):
+                if state == VALUE:
+                    dicts[i][name] = column_values[i]
+                elif state == NONE:
+                    dicts[i][name] = None
+
+    for name, values in extra.items():
+        for i, value in values.items():
+            dicts[int(i)][name] = value
+
+# ==============================================================================
+# Helpers
+# ==============================================================================
+
+
+def _index_dtype(size):
+    """
+    The smallest integer type that indexes an array of some size.
+    """
+    for dtype in (np.uint8, np.int32):
+        if size <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _indices(values, size):
+    """
+    An array of indices into an array of some size.
+    """
+    return np.array(values, dtype=_index_dtype(size))
+
+
+def _offsets(counts):
+    """
+    The offsets of consecutive groups of items of some sizes in a flat array.
+    """
+    offsets = np.concatenate([[0], np.cumsum(np.fromiter(counts, dtype=np.int64))])
+    return offsets.astype(_index_dtype(offsets[-1]))
+
+
+def _encode_strings(strings):
+    """
+    Store a list of strings as the bytes of a JSON array.
+    """
+    return np.frombuffer(json.dumps(strings).encode("utf-8"), dtype=np.uint8)
+
+
+def _decode_strings(array):
+    """
+    Restore a list of strings from the bytes of a JSON array.
+    """
+    return json.loads(array.tobytes().decode("utf-8"))
+
+
+def _memmap_member(filepath, archive, name):
+    """
+    Memory-map an uncompressed array of an ``.npz`` archive, or return ``None`` if it cannot be.
+    """
+    info = archive.getinfo(name + ".npy")
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+
+    with io.open(filepath, "rb") as f:
+        f.seek(info.header_offset)
+        local = f.read(30)
+        if local[:4] != b"PK\x03\x04":
+            return None
+
+        # the array starts after the local header of the member, its name and its extra field
+        name_length, extra_length = struct.unpack("<HH", local[26:30])
+        f.seek(info.header_offset + 30 + name_length + extra_length)
+
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+
+    if dtype.hasobject or not np.prod(shape):
+        return None
+
+    order = "F" if fortran_order else "C"
+    return np.memmap(filepath, dtype=dtype, mode="r", offset=offset, shape=shape, order=order)
+
+
+if __name__ == "__main__":
+    pass
@@ -36,6 +36,12 @@ class TopologyDiagram(Diagram, MeshMixins):
     """
 
     def __init__(self, *args, **kwargs):
+        # structural version, bumped by every change to nodes, edges, types or sequences
+        # set first, because the parent class sets the default attributes
+        self._version = 0
+        self._trails_stamp = None
+        self._index = None
+
         super(TopologyDiagram, self).__init__(*args, **kwargs)
 
         self.attributes["_trails"] = dict()
@@ -83,6 +89,170 @@ class TopologyDiagram(Diagram, MeshMixins):
         """
         self.attributes["_aux_vector"] = vector
 
+# ==============================================================================
+# Structural changes
+# ==============================================================================
+
+    def add_node(self, node):
+        """
+        Adds a node.
+
+        Parameters
+        ----------
+        node : ``Node``
+            A node element.
+
+        Returns
+        -------
+        key : ``int``
+            The node key.
+        """
+        if node.key is None or node.key not in self.node:
+            self._invalidate()
+        return super(TopologyDiagram, self).add_node(node)
+
+    def add_edge(self, edge):
+        """
+        Adds a deviation or a trail edge.
+
+        Parameters
+        ----------
+        edge : ``Edge``
+            An edge element.
+
+        Returns
+        -------
+        key : ``tuple``
+            An edge key.
+        """
+        self._invalidate()
+        return super(TopologyDiagram, self).add_edge(edge)
+
+    def delete_node(self, key):
+        """
+        Deletes a node and its connected edges.
+
+        Parameters
+        ----------
+        key : ``int``
+            The node key.
+        """
+        self._invalidate()
+        super(TopologyDiagram, self).delete_node(key)
+
+    def delete_edge(self, u, v):
+        """
+        Deletes an edge.
+
+        Parameters
+        ----------
+        u : ``int``
+            The key of the first node of the edge.
+        v : ``int``
+            The key of the second node of the edge.
+        """
+        self._invalidate()
+        super(TopologyDiagram, self).delete_edge(u, v)
+
+    def node_attribute(self, key, name, value=None):
+        """
+        Gets or sets an attribute of a node.
+
+        Notes
+        -----
+        Setting the type or the sequence of a node invalidates the trail, sequence and edge indexes.
+        """
+        if value is not None and name in ("_k", "type"):
+            self._invalidate()
+        return super(TopologyDiagram, self).node_attribute(key, name, value)
+
+    def node_attributes(self, key, names=None, values=None):
+        """
+        Gets or sets multiple attributes of a node.
+
+        Notes
+        -----
+        Setting the type or the sequence of a node invalidates the trail, sequence and edge indexes.
+        """
+        if values is not None and names and ("_k" in names or "type" in names):
+            self._invalidate()
+        return super(TopologyDiagram, self).node_attributes(key, names, values)
+
+    def edge_attribute(self, key, name, value=None):
+        """
+        Gets or sets an attribute of an edge.
+
+        Notes
+        -----
+        Setting the type of an edge invalidates the trail, sequence and edge indexes.
+        """
+        if value is not None and name == "type":
+            self._invalidate()
+        return super(TopologyDiagram, self).edge_attribute(key, name, value)
+
+    def edge_attributes(self, key, names=None, values=None):
+        """
+        Gets or sets multiple attributes of an edge.
+
+        Notes
+        -----
+        Setting the type of an edge invalidates the trail, sequence and edge indexes.
+        """
+        if values is not None and names and "type" in names:
+            self._invalidate()
+        return super(TopologyDiagram, self).edge_attributes(key, names, values)
+
+    def unset_node_attribute(self, key, name):
+        """
+        Unsets an attribute of a node.
+
+        Notes
+        -----
+        Unsetting the type or the sequence of a node invalidates the trail, sequence and edge indexes.
+        """
+        if name in ("_k", "type"):
+            self._invalidate()
+        return super(TopologyDiagram, self).unset_node_attribute(key, name)
+
+    def unset_edge_attribute(self, key, name):
+        """
+        Unsets an attribute of an edge.
+
+        Notes
+        -----
+        Unsetting the type of an edge invalidates the trail, sequence and edge indexes.
+        """
+        if name == "type":
+            self._invalidate()
+        return super(TopologyDiagram, self).unset_edge_attribute(key, name)
+
+    def update_default_node_attributes(self, attr_dict=None, **kwattr):
+        """
+        Updates the default node attributes.
+
+        Notes
+        -----
+        The defaults apply to the nodes without a type or a sequence of their own,
+        so updating them invalidates the trail, sequence and edge indexes.
+        """
+        self._invalidate()
+        return super(TopologyDiagram, self).update_default_node_attributes(attr_dict, **kwattr)
+
+    def update_default_edge_attributes(self, attr_dict=None, **kwattr):
+        """
+        Updates the default edge attributes.
+
+        Notes
+        -----
+        The defaults apply to the edges without a type of their own,
+        so updating them invalidates the trail, sequence and edge indexes.
+        """
+        self._invalidate()
+        return super(TopologyDiagram, self).update_default_edge_attributes(attr_dict, **kwattr)
+
+    update_dna = update_default_node_attributes
+    update_dea = update_default_edge_attributes
+
 # ==============================================================================
 # Node Additions
 # ==============================================================================
@@ -141,7 +311,7 @@ class TopologyDiagram(Diagram, MeshMixins):
         number : ``int``
             The number of trails.
         """
-        return len(list(self.trails()))
+        return len(self.attributes["_trails"])
 
     def number_of_auxiliary_trails(self):
         """
@@ -152,7 +322,7 @@ class TopologyDiagram(Diagram, MeshMixins):
         number : ``int``
             The number of auxiliary trails.
         """
-        return len(list(self.auxiliary_trails()))
+        return len(self.attributes["_auxiliary_trails"])
 
     def number_of_trail_edges(self):
         """
@@ -163,7 +333,7 @@ class TopologyDiagram(Diagram, MeshMixins):
         number : ``int``
             The number of trail edges.
         """
-        return len(list(self.trail_edges()))
+        return len(self._indexes()["edges"]["trail"])
 
     def number_of_deviation_edges(self):
         """
@@ -174,7 +344,7 @@ class TopologyDiagram(Diagram, MeshMixins):
         number : ``int``
             The number of deviation edges.
         """
-        return len(list(self.deviation_edges()))
+        return len(self._indexes()["edges"]["deviation"])
 
     def number_of_direct_deviation_edges(self):
         """
@@ -185,18 +355,18 @@ class TopologyDiagram(Diagram, MeshMixins):
         number : ``int``
             The number of direct deviation edges.
         """
-        return len(list(self.direct_deviation_edges()))
+        return len(self._edges_of_class("direct"))
 
     def number_of_indirect_deviation_edges(self):
         """
-        The number of direct deviation edges in the topology diagram.
+        The number of indirect deviation edges in the topology diagram.
 
         Return
         ------
         number : ``int``
-            The number of direct deviation edges.
+            The number of indirect deviation edges.
         """
-        return len(list(self.indirect_deviation_edges()))
+        return len(self._edges_of_class("indirect"))
 
 # ==============================================================================
 # Trails
@@ -325,8 +495,12 @@ class TopologyDiagram(Diagram, MeshMixins):
         -----
             Origin nodes are computed in automatic as part of the trail-making process.
             Previous trails and auxiliary trails are recalculated every time
-            this function is called.
+            this function is called, unless nothing changed in the diagram since
+            the last time trails were built without auxiliary trails.
         """
+        if not auxiliary_trails and self._is_current(self._trails_stamp):
+            return
+
         trails = {}
 
         # trail search
@@ -417,6 +591,9 @@ class TopologyDiagram(Diagram, MeshMixins):
         # store trails in topology diagram
         self.attributes["_trails"] = trails
 
+        self._invalidate()
+        self._trails_stamp = self._stamp()
+
 # ==============================================================================
 #  Node Collections
 # ==============================================================================
@@ -451,7 +628,7 @@ class TopologyDiagram(Diagram, MeshMixins):
             The keys of the connected deviation edges.
             If no deviation edge is attached, the list will be empty.
         """
-        return self._connected_edges_predicate(node, self.is_deviation_edge)
+        return self._connected_edges_of_class(node, "deviation")
 
     def connected_trail_edges(self, node):
         """
@@ -468,7 +645,7 @@ class TopologyDiagram(Diagram, MeshMixins):
             The keys of the connected trail edges.
             If no trail edge is attached, the list will be empty.
         """
-        return self._connected_edges_predicate(node, self.is_trail_edge)
+        return self._connected_edges_of_class(node, "trail")
 
     def _connected_direct_deviation_edges(self, node):
         """
@@ -490,7 +667,7 @@ class TopologyDiagram(Diagram, MeshMixins):
         Direct deviation edges have both end-nodes with equal topological
         distance to a root node. Distances must be precomputed.
         """
-        return self._connected_edges_predicate(node, self.is_direct_deviation_edge)
+        return self._connected_edges_of_class(node, "direct")
 
     def _connected_indirect_deviation_edges(self, node):
         """
@@ -512,7 +689,7 @@ class TopologyDiagram(Diagram, MeshMixins):
         Indirect deviation edges have both end-nodes with unequal topological
         distance to a root node. Distances must be precomputed.
         """
-        return self._connected_edges_predicate(node, self.is_indirect_deviation_edge)
+        return self._connected_edges_of_class(node, "indirect")
 
     def _connected_edges_predicate(self, node, predicate):
         """
@@ -537,6 +714,33 @@ class TopologyDiagram(Diagram, MeshMixins):
                 deviation_edges.append(edge)
         return deviation_edges
 
+    def _connected_edges_of_class(self, node, edge_class):
+        """
+        Finds the edges of a class connected to a node from the edge indexes.
+
+        Parameters
+        ----------
+        node : ``int``
+            A node key.
+        edge_class : ``str``
+            The edge class. Either ``"trail"``, ``"deviation"``, ``"direct"`` or ``"indirect"``.
+
+        Returns
+        -------
+        selected_edges : ``list``
+            The keys of the selected edges, in the order of ``connected_edges()``.
+        """
+        if node not in self.node:
+            raise KeyError(node)
+
+        indexes = self._indexes()
+        if edge_class in ("direct", "indirect"):
+            edge = indexes["node_unsequenced"].get(node)
+            if edge is not None:
+                self.edge_sequence(edge)
+
+        return list(indexes["node_edges"][edge_class].get(node, ()))
+
 # ==============================================================================
 # Edges
 # ==============================================================================
@@ -558,7 +762,7 @@ class TopologyDiagram(Diagram, MeshMixins):
         attributes : ``dict``
             The attributes of the next trail edge if ``data=True``.
         """
-        return self.edges_where({"type": "trail"}, data)
+        return self._edges_iterator("trail", data)
 
     def deviation_edges(self, data=False):
         """
@@ -577,7 +781,7 @@ class TopologyDiagram(Diagram, MeshMixins):
         attributes : ``dict``
             The attributes of the next deviation edge if ``data=True``.
         """
-        return self.edges_where({"type": "deviation"}, data)
+        return self._edges_iterator("deviation", data)
 
     def direct_deviation_edges(self, data=False):
         """
@@ -596,10 +800,7 @@ class TopologyDiagram(Diagram, MeshMixins):
         attributes : ``dict``
             The attributes of the next direct deviation edge if ``data=True``.
         """
-        def predicate(edge, attr):
-            return self.is_direct_deviation_edge(edge)
-
-        return self.edges_where_predicate(predicate, data)
+        return self._edges_iterator("direct", data)
 
     def indirect_deviation_edges(self, data=False):
         """
@@ -618,10 +819,7 @@ class TopologyDiagram(Diagram, MeshMixins):
         attributes : ``dict``
             The attributes of the next indirect deviation edge if ``data=True``.
         """
-        def predicate(edge, attr):
-            return self.is_indirect_deviation_edge(edge)
-
-        return self.edges_where_predicate(predicate, data)
+        return self._edges_iterator("indirect", data)
 
     def auxiliary_trail_edges(self, data=False):
         """
@@ -640,10 +838,55 @@ class TopologyDiagram(Diagram, MeshMixins):
         attributes : ``dict``
             The attributes of the next auxiliary trail edge if ``data=True``.
         """
-        def predicate(edge, attr):
-            return self.is_auxiliary_trail_edge(edge)
+        return self._edges_iterator("auxiliary", data)
 
-        return self.edges_where_predicate(predicate, data)
+    def _edges_iterator(self, edge_class, data=False):
+        """
+        Iterates over the keys of the edges of a class from the edge indexes.
+
+        Parameters
+        ----------
+        edge_class : ``str``
+            The edge class. Either ``"trail"``, ``"deviation"``, ``"direct"``,
+            ``"indirect"`` or ``"auxiliary"``.
+        data : ``bool``
+            ``True`` if the edges attributes should be yielded simultaneously.
+            Defaults to ``False``.
+
+        Returns
+        -------
+        edges : ``iterator``
+            The keys of the edges, in the order of ``edges()``, and their attributes if ``data=True``.
+        """
+        edges = self._edges_of_class(edge_class)
+        if not data:
+            return iter(edges)
+        return ((edge, self.edge_attributes(edge)) for edge in edges)
+
+    def _edges_of_class(self, edge_class):
+        """
+        The indexed edges of a class.
+
+        Parameters
+        ----------
+        edge_class : ``str``
+            The edge class. Either ``"trail"``, ``"deviation"``, ``"direct"``,
+            ``"indirect"`` or ``"auxiliary"``.
+
+        Returns
+        -------
+        edges : ``list``
+            The keys of the edges. Do not modify.
+
+        Notes
+        -----
+        Splitting the deviation edges into direct and indirect ones requires
+        the sequences of their nodes. A ``ValueError`` is raised if any is missing.
+        """
+        indexes = self._indexes()
+        if edge_class in ("direct", "indirect") and indexes["unsequenced"]:
+            self.edge_sequence(indexes["unsequenced"][0])
+        return indexes["edges"][edge_class]
 
 # ==============================================================================
 # Node Filters
@@ -737,10 +980,7 @@ class TopologyDiagram(Diagram, MeshMixins):
         flag : ``bool``
             ``True``if the edge is in an auxiliary trail. ``False`` otherwise.
         """
-        aux_trails = set([tuple(edge) for edge in self.auxiliary_trails()])
-        if edge in set(aux_trails):
-            return True
-        return False
+        return tuple(edge) in self._indexes()["auxiliary"]
 
     def is_direct_deviation_edge(self, edge):
         """
@@ -757,12 +997,7 @@ class TopologyDiagram(Diagram, MeshMixins):
             ``True``if the deviation edge is direct.
             ``False`` otherwise.
         """
-        def predicate(x):
-            a, b = self.edge_sequence(edge)
-            if a == b:
-                return True
-
-        return self._is_deviation_edge_predicate(edge, predicate)
+        return self._edge_class(edge) == "direct"
 
     def is_indirect_deviation_edge(self, edge):
         """
@@ -779,12 +1014,7 @@ class TopologyDiagram(Diagram, MeshMixins):
             ``True``if the deviation edge is indirect.
             ``False`` otherwise.
         """
-        def predicate(x):
-            a, b = self.edge_sequence(edge)
-            if a != b:
-                return True
-
-        return self._is_deviation_edge_predicate(edge, predicate)
+        return self._edge_class(edge) == "indirect"
 
     def _is_deviation_edge_predicate(self, edge, predicate):
         """
@@ -814,6 +1044,34 @@ class TopologyDiagram(Diagram, MeshMixins):
             return True
         return False
 
+    def _edge_class(self, edge):
+        """
+        The indexed class of an edge.
+
+        Parameters
+        ----------
+        edge : ``tuple``
+            The edge key.
+
+        Returns
+        -------
+        edge_class : ``str``
+            ``"trail"``, ``"direct"`` or ``"indirect"``, or ``None`` for other edges.
+
+        Notes
+        -----
+        A ``ValueError`` is raised for a deviation edge whose nodes have no sequence.
+        A ``KeyError`` is raised if the edge does not exist.
+        """
+        edge = tuple(edge)
+        edge_classes = self._indexes()["edge_class"]
+        if edge not in edge_classes:
+            raise KeyError(edge)
+        edge_class = edge_classes[edge]
+        if edge_class == "deviation":
+            self.edge_sequence(edge)
+        return edge_class
+
 # ==============================================================================
 #  Sequences
 # ==============================================================================
@@ -871,16 +1129,29 @@ class TopologyDiagram(Diagram, MeshMixins):
             Otherwise, a tuple with the sequence key and the corresponding node keys.
         """
         for k in range(self.number_of_sequences()):
-
-            def predicate(node, attr):
-                return self.node_sequence(node) == k
-
-            sequence = tuple(self.nodes_where_predicate(predicate))
+            sequence = self.sequence_nodes(k)
             if not keys:
                 yield sequence
             else:
                 yield k, sequence
 
+    def sequence_nodes(self, k):
+        """
+        The nodes assigned to a sequence.
+
+        Parameters
+        ----------
+        k : ``int``
+            The sequence key.
+
+        Returns
+        -------
+        sequence : ``Tuple[int]``
+            The node keys, in the order of the nodes of the diagram.
+            The tuple is empty if no node is assigned to the sequence.
+        """
+        return self._indexes()["sequence_nodes"].get(k, ())
+
     def number_of_sequences(self):
         """
         The number of sequences in the topology diagram.
@@ -901,14 +1172,34 @@ class TopologyDiagram(Diagram, MeshMixins):
         Returns
         -------
         key : `int`
-            The sequence key.
+            The sequence key. ``-1`` if no node is assigned to a sequence.
         """
-        return max(list(self.nodes_attribute(name="_k")))
+        return self._indexes()["sequence_last"]
 
 # ==============================================================================
 # Mappings
 # ==============================================================================
 
+    def node_trail(self, node):
+        """
+        Gets the trail a node belongs to.
+
+        Parameters
+        ----------
+        node : ``int``
+            The node key.
+
+        Returns
+        -------
+        key : ``int``
+            The trail key, which is equivalent to the key of its origin node.
+        """
+        trail = self._indexes()["node_trail"].get(node)
+        if trail is None:
+            msg = "Node {} doesn't belong to a trail yet. Try adding trails first."
+            raise ValueError(msg.format(node))
+        return trail
+
     def trail_sequences(self, key):
         """
         Create a mapping between topological sequences and the nodes in a trail.
@@ -923,11 +1214,7 @@ class TopologyDiagram(Diagram, MeshMixins):
         sequence_map : ``Dict[int]``
             A dictionary wherein keys are sequences and values are node keys.
         """
-        sequences = dict()
-        for node in self.trail(key):
-            sequences[self.node_sequence(node)] = node
-
-        return sequences
+        return dict(self._indexes()["trails_sequences"][key])
 
     def trails_sequences(self):
         """
@@ -941,12 +1228,132 @@ class TopologyDiagram(Diagram, MeshMixins):
             A dictionary wherein keys are trail keys and values are dictionaries
             wherein keys are sequences and values are node keys.
         """
-        sequences = dict()
+        trails_sequences = self._indexes()["trails_sequences"]
+        return {key: dict(sequences) for key, sequences in trails_sequences.items()}
 
-        for key, trail in self.trails(keys=True):
-            sequences[key] = self.trail_sequences(key)
+# ==============================================================================
+# Indexes
+# ==============================================================================
+
+    def _invalidate(self):
+        """
+        Mark the trail, sequence and edge indexes as outdated.
+        """
+        self._version += 1
+
+    def _stamp(self):
+        """
+        The version of the diagram, and the edge dictionary it applies to.
+        Assigning new data to the diagram replaces the edge dictionary.
+        """
+        return self._version, self.edge
 
-        return sequences
+    def _is_current(self, stamp):
+        """
+        Check if something stamped with :meth:`_stamp` is up to date.
+        """
+        return stamp is not None and stamp[0] == self._version and stamp[1] is self.edge
+
+    def _indexes(self):
+        """
+        The trail, sequence and edge indexes of the diagram, rebuilt if outdated.
+
+        Returns
+        -------
+        indexes : ``dict``
+            The indexes ``node_sequence``, ``sequence_nodes``, ``sequence_last``,
+            ``node_trail`` and ``trails_sequences``.
+            The edge indexes ``edge_class``, ``edges`` and ``node_edges``, per edge class,
+            and the set of ``auxiliary`` trail edges.
+            The deviation edges with nodes without a sequence, in ``unsequenced`` and ``node_unsequenced``.
+
+        Notes
+        -----
+        The indexes are built with a single pass over the nodes, the edges and the trails,
+        and stamped with the version of the diagram they were built at.
+        Edge classes are ``"trail"``, ``"deviation"``, ``"direct"``, ``"indirect"``,
+        and ``"auxiliary"``. A deviation edge is also either direct or indirect.
+        """
+        index = self._index
+        if index is not None and self._is_current(index[0]):
+            return index[1]
+
+        node_sequence = {}
+        sequence_nodes = {}
+        for node, k in zip(self.nodes(), self.nodes_attribute(name="_k")):
+            if k is None:
+                continue
+            node_sequence[node] = k
+            sequence_nodes.setdefault(k, []).append(node)
+
+        node_trail = {}
+        trails_sequences = {}
+        for key, trail in self.trails(keys=True):
+            sequences = {}
+            for node in trail:
+                node_trail[node] = key
+                sequences[self.node_sequence(node)] = node
+            trails_sequences[key] = sequences
+
+        classes = ("trail", "deviation", "direct", "indirect")
+        default = self.default_edge_attributes.get("type")
+
+        edge_class = {}
+        edges = {name: [] for name in classes}
+        unsequenced = []
+        node_unsequenced = {}
+        for edge, attr in self.edges(data=True):
+            edge_type = attr.get("type", default)
+            if edge_type == "trail":
+                edges["trail"].append(edge)
+            elif edge_type == "deviation":
+                edges["deviation"].append(edge)
+                u, v = edge
+                ku = node_sequence.get(u)
+                kv = node_sequence.get(v)
+                if ku is None or kv is None:
+                    unsequenced.append(edge)
+                    node_unsequenced.setdefault(u, edge)
+                    node_unsequenced.setdefault(v, edge)
+                else:
+                    edge_type = "direct" if ku == kv else "indirect"
+                    edges[edge_type].append(edge)
+            else:
+                edge_type = None
+            edge_class[edge] = edge_type
+
+        # follows the order of connected_edges()
+        node_edges = {name: {} for name in classes}
+        for node, nbrs in self.adjacency.items():
+            for nbr in nbrs:
+                edge = (node, nbr) if nbr in self.edge[node] else (nbr, node)
+                edge_type = edge_class[edge]
+                if edge_type is None:
+                    continue
+                if edge_type != "trail":
+                    node_edges["deviation"].setdefault(node, []).append(edge)
+                if edge_type != "deviation":
+                    node_edges[edge_type].setdefault(node, []).append(edge)
+
+        auxiliary = set(tuple(edge) for edge in self.auxiliary_trails())
+        edges["auxiliary"] = [edge for edge in self.edges() if edge in auxiliary]
+
+        indexes = {}
+        indexes["node_sequence"] = node_sequence
+        indexes["sequence_nodes"] = {k: tuple(nodes) for k, nodes in sequence_nodes.items()}
+        indexes["sequence_last"] = max(sequence_nodes) if sequence_nodes else -1
+        indexes["node_trail"] = node_trail
+        indexes["trails_sequences"] = trails_sequences
+        indexes["edge_class"] = edge_class
+        indexes["edges"] = edges
+        indexes["node_edges"] = node_edges
+        indexes["auxiliary"] = auxiliary
+        indexes["unsequenced"] = unsequenced
+        indexes["node_unsequenced"] = node_unsequenced
+
+        self._index = (self._stamp(), indexes)
+
+        return indexes
 
 # ==============================================================================
 # Magic methods
@@ -14,6 +14,51 @@ Equilibrium
 
     static_equilibrium
     static_equilibrium_numpy
+    static_equilibrium_vectorized
+    static_equilibrium_forward
+    static_equilibrium_batch
+
+Iterations
+==========
+
+.. autosummary::
+    :toctree: generated/
+    :nosignatures:
+
+    iter_equilibrium
+    EquilibriumIteration
+
+Acceleration
+============
+
+.. autosummary::
+    :toctree: generated/
+    :nosignatures:
+
+    AndersonAcceleration
+    AitkenAcceleration
+    fixed_point_acceleration
+
+Compiled Problems
+=================
+
+.. autosummary::
+    :toctree: generated/
+    :nosignatures:
+
+    EquilibriumProblem
+    EquilibriumResult
+
+Partial Equilibrium
+===================
+
+.. autosummary::
+    :toctree: generated/
+    :nosignatures:
+
+    PartialSolver
+    dependency_graph
+    influenced_nodes
 
 """
 
@@ -27,7 +72,16 @@ from .force import *  # noqa F403
 
 import compas
 if not compas.IPY:
+    from .problem import *  # noqa F403
+    from .result import *  # noqa F403
+    from .acceleration import *  # noqa F403
     from .force_numpy import *  # noqa F403
+    from .force_vectorized import *  # noqa F403
+    from .force_forward import *  # noqa F403
+    from .force_batch import *  # noqa F403
+    from .force_adjoint import *  # noqa F403
+    from .force_sparsity import *  # noqa F403
+    from .force_partial import *  # noqa F403
 
 
 __all__ = [name for name in dir() if not name.startswith('_')]
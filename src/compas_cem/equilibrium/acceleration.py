@@ -0,0 +1,256 @@
+import numpy
+
+import autograd.numpy as np
+
+from autograd.tracer import getval
+
+
+__all__ = ["AndersonAcceleration",
+           "AitkenAcceleration",
+           "fixed_point_acceleration"]
+
+# ==============================================================================
+# Fixed-point acceleration
+# ==============================================================================
+
+
+class FixedPointAcceleration(object):
+    """
+    Base class of the accelerations of the fixed-point iterations of the equilibrium solvers.
+
+    Parameters
+    ----------
+    restarts : ``int``, optional
+        The number of rejected steps after which plain iterations resume.
+        Defaults to ``2``.
+
+    Attributes
+    ----------
+    steps : ``int``
+        The number of accelerated steps taken in the last calculation.
+    rejections : ``int``
+        The number of accelerated steps rejected in the last calculation.
+
+    Notes
+    -----
+    An accelerated step is rejected if the residual distance at the node
+    positions it extrapolates is larger than the one at the positions it was
+    extrapolated from. The solver then continues from the last plain iterate.
+    """
+    name = None
+
+    def __init__(self, restarts=2):
+        self.restarts = restarts
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the iterates and the counters of the last calculation.
+        """
+        self.steps = 0
+        self.rejections = 0
+        self._residual = None
+        self._plain = None
+        self._accelerated = False
+        self._forget()
+
+    def step(self, xyz, next_xyz):
+        """
+        Compute the node positions to start the next iteration from.
+
+        Parameters
+        ----------
+        xyz : ``np.array``
+            The node positions an iteration started from.
+        next_xyz : ``np.array``
+            The node positions the iteration computed.
+
+        Returns
+        -------
+        xyz : ``np.array``
+            The node positions to start the next iteration from.
+        """
+        shape = xyz.shape
+        x = np.reshape(xyz, (-1, ))
+        g = np.reshape(next_xyz, (-1, ))
+        f = g - x
+        residual = float(getval(np.sqrt(np.sum(np.square(f)))))
+
+        # the last accelerated step went uphill, restart from the last plain iterate
+        if self._accelerated and residual > self._residual:
+            self.rejections += 1
+            self._accelerated = False
+            self._forget()
+            return np.reshape(self._plain, shape)
+
+        self._residual = residual
+        self._plain = g
+        self._accelerated = False
+
+        if self.rejections >= self.restarts:
+            return next_xyz
+
+        x_next = self._extrapolate(x, g, f)
+        if x_next is None:
+            return next_xyz
+
+        if not numpy.all(numpy.isfinite(getval(x_next))):
+            self._forget()
+            return next_xyz
+
+        self.steps += 1
+        self._accelerated = True
+
+        return np.reshape(x_next, shape)
+
+    def _forget(self):
+        """
+        Forget the iterates used to extrapolate.
+        """
+        raise NotImplementedError
+
+    def _extrapolate(self, x, g, f):
+        """
+        Extrapolate the next iterate, or return ``None`` to take a plain step.
+        """
+        raise NotImplementedError
+
+# ------------------------------------------------------------------------------
+# Anderson
+# ------------------------------------------------------------------------------
+
+
+class AndersonAcceleration(FixedPointAcceleration):
+    """
+    Anderson mixing of the last node positions of a fixed-point iteration.
+
+    Parameters
+    ----------
+    memory : ``int``, optional
+        The number of past iterations mixed into the next one.
+        Defaults to ``5``.
+    regularization : ``float``, optional
+        The Tikhonov regularization of the least-squares mixing problem,
+        relative to the scale of the problem.
+        Defaults to ``1e-10``.
+    restarts : ``int``, optional
+        The number of rejected steps after which plain iterations resume.
+        Defaults to ``2``.
+    """
+    name = "anderson"
+
+    def __init__(self, memory=5, regularization=1e-10, restarts=2):
+        self.memory = memory
+        self.regularization = regularization
+        super(AndersonAcceleration, self).__init__(restarts)
+
+    def _forget(self):
+        """
+        """
+        self._residuals = []
+        self._iterates = []
+
+    def _extrapolate(self, x, g, f):
+        """
+        """
+        self._residuals = (self._residuals + [f])[-(self.memory + 1):]
+        self._iterates = (self._iterates + [g])[-(self.memory + 1):]
+
+        if len(self._residuals) < 2:
+            return None
+
+        dfs = np.stack([b - a for a, b in zip(self._residuals[:-1], self._residuals[1:])], axis=1)
+        dgs = np.stack([b - a for a, b in zip(self._iterates[:-1], self._iterates[1:])], axis=1)
+
+        a = np.dot(dfs.T, dfs)
+        scale = max(float(getval(np.trace(a))), 1e-300)
+        a = a + self.regularization * scale * np.eye(a.shape[0])
+        gamma = np.linalg.solve(a, np.dot(dfs.T, f))
+
+        return g - np.dot(dgs, gamma)
+
+# ------------------------------------------------------------------------------
+# Aitken
+# ------------------------------------------------------------------------------
+
+
+class AitkenAcceleration(FixedPointAcceleration):
+    """
+    Aitken's delta-squared extrapolation of a fixed-point iteration, as a dynamic relaxation.
+
+    Parameters
+    ----------
+    bounds : ``tuple``, optional
+        The smallest and largest relaxation factor.
+        Defaults to ``(0.1, 10.0)``.
+    restarts : ``int``, optional
+        The number of rejected steps after which plain iterations resume.
+        Defaults to ``2``.
+
+    Notes
+    -----
+    This is the vector form of Irons and Tuck. A relaxation factor of ``1.0``
+    is a plain iteration.
+    """
+    name = "aitken"
+
+    def __init__(self, bounds=(0.1, 10.0), restarts=2):
+        self.bounds = bounds
+        super(AitkenAcceleration, self).__init__(restarts)
+
+    def _forget(self):
+        """
+        """
+        self._last_residual = None
+        self._omega = 1.0
+
+    def _extrapolate(self, x, g, f):
+        """
+        """
+        last, self._last_residual = self._last_residual, f
+        if last is None:
+            return None
+
+        df = f - last
+        denominator = float(getval(np.sum(np.square(df))))
+        if denominator == 0.0:
+            return None
+
+        omega = -self._omega * float(getval(np.sum(last * df))) / denominator
+        low, high = self.bounds
+        self._omega = min(max(omega, low), high)
+
+        return x + self._omega * f
+
+
+def fixed_point_acceleration(acceleration):
+    """
+    Create the acceleration of the fixed-point iterations of a solver.
+
+    Parameters
+    ----------
+    acceleration : ``str`` or :class:`compas_cem.equilibrium.AndersonAcceleration`
+        Either ``"anderson"``, ``"aitken"``, ``None`` or an acceleration object.
+
+    Returns
+    -------
+    acceleration : ``object``
+        An acceleration object without iterates, or ``None``.
+    """
+    if acceleration is None:
+        return None
+
+    if isinstance(acceleration, FixedPointAcceleration):
+        acceleration.reset()
+        return acceleration
+
+    accelerations = {cls.name: cls for cls in (AndersonAcceleration, AitkenAcceleration)}
+    if acceleration not in accelerations:
+        msg = "Acceleration {} is not supported! Try one of {}"
+        raise ValueError(msg.format(acceleration, sorted(accelerations)))
+
+    return accelerations[acceleration]()
+
+
+if __name__ == "__main__":
+    pass
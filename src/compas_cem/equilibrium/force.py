@@ -1,5 +1,8 @@
 from math import copysign
 from math import fabs
+from math import sqrt
+from math import isinf
+from math import isnan
 
 from compas.geometry import dot_vectors
 from compas.geometry import scale_vector
@@ -11,11 +14,13 @@ from compas.geometry import distance_point_point
 
 from compas_cem.diagrams import FormDiagram
 
+from compas_cem.profiling.profiler import NULL_PROFILER
+
 
 __all__ = ["static_equilibrium"]
 
 
-def static_equilibrium(topology, kmax=None, tmax=100, eta=1e-6, verbose=False, callback=None):
+def static_equilibrium(topology, kmax=None, tmax=100, eta=1e-6, verbose=False, callback=None, profiler=None, acceleration=None):
     """
     Generate a form diagram in static equilibrium.
 
@@ -44,34 +49,53 @@ def static_equilibrium(topology, kmax=None, tmax=100, eta=1e-6, verbose=False, c
     callback : ``function``, optional
         An optional callback function to run at every iteration.
         Defaults to ``None``.
+    profiler : :class:`compas_cem.profiling.Profiler`, optional
+        A profiler to record the phases, iterations and residuals of the calculation.
+        Its stats are attached to the form diagram.
+        Defaults to ``None``.
+    acceleration : ``str``, optional
+        Accelerate the iterations with ``"aitken"`` extrapolation.
+        Anderson mixing needs a least-squares solve and is only available in
+        :func:`compas_cem.equilibrium.static_equilibrium_numpy`.
+        Defaults to ``None``.
 
     Returns
     -------
     form : :class:`compas_cem.diagrams.FormDiagram`
         A form diagram.
     """
-    attrs = equilibrium_state(topology, kmax, tmax, eta, verbose, callback)
-    form = FormDiagram.from_topology_diagram(topology)
-    form_update(form, **attrs)
+    profiler = profiler or NULL_PROFILER
+
+    with profiler.phase("static_equilibrium"):
+        attrs = equilibrium_state(topology, kmax, tmax, eta, verbose, callback, profiler, acceleration)
+        with profiler.phase("form_update"):
+            form = FormDiagram.from_topology_diagram(topology)
+            form_update(form, **attrs)
+
+    form.stats = profiler.stats
     return form
 
 
-def equilibrium_state(topology, kmax=None, tmax=100, eta=1e-6, verbose=False, callback=None):
+def equilibrium_state(topology, kmax=None, tmax=100, eta=1e-6, verbose=False, callback=None, profiler=None, acceleration=None):
     """
     Equilibrate forces at the nodes of a topology diagram.
     """
+    profiler = profiler or NULL_PROFILER
+    acceleration = aitken_relaxation(acceleration)
+
     # there must be at least one trail
     assert topology.number_of_trails() > 0, "No trails in the diagram!"
 
-    # mapping between trails and sequences
-    trails_sequences = topology.trails_sequences()
+    with profiler.phase("preprocessing"):
+        # mapping between trails and sequences
+        trails_sequences = topology.trails_sequences()
 
-    # create data containers that describe equilibrium state
-    reaction_forces = {}
-    trail_forces = {}
-    trail_directions = {}
-    residual_vectors = {node: topology.reaction_force(node) for node in topology.nodes()}
-    node_xyz = {node: topology.node_coordinates(node) for node in topology.nodes()}
+        # create data containers that describe equilibrium state
+        reaction_forces = {}
+        trail_forces = {}
+        trail_directions = {}
+        residual_vectors = {node: topology.reaction_force(node) for node in topology.nodes()}
+        node_xyz = {node: topology.node_coordinates(node) for node in topology.nodes()}
 
     # compute last sequence
     klast = topology.sequence_last()
@@ -82,99 +106,115 @@ def equilibrium_state(topology, kmax=None, tmax=100, eta=1e-6, verbose=False, ca
 
     for t in range(tmax):  # max iterations
 
-        # store last positions for residual
-        last_xyz = {k: v for k, v in node_xyz.items()}
+        with profiler.phase("iteration", t=t):
 
-        for k in range(topology.number_of_sequences()):  # sequences
+            # store last positions for residual
+            last_xyz = {k: v for k, v in node_xyz.items()}
 
-            for key, trail in topology.trails(keys=True):
+            for k in range(topology.number_of_sequences()):  # sequences
+
+                for key, trail in topology.trails(keys=True):
+
+                    # if index is larger than available nodes in trail, skip trail
+                    if k not in trails_sequences[key]:
+                        continue
 
-                # if index is larger than available nodes in trail, skip trail
-                if k not in trails_sequences[key]:
-                    continue
+                    # select node from trail at current sequence
+                    node = trails_sequences[key][k]
 
-                # select node from trail at current sequence
-                node = trails_sequences[key][k]
+                    # get node position
+                    pos = node_xyz[node]
 
-                # get node position
-                pos = node_xyz[node]
+                    # get incoming residual vector
+                    rvec = residual_vectors[node]
 
-                # get incoming residual vector
-                rvec = residual_vectors[node]
+                    # calculate nodal equilibrium to get new residual vector
+                    indirect = True
+                    if t == 0:
+                        indirect = False
+                    rvec = node_equilibrium(topology, node, rvec, node_xyz, indirect)
 
-                # calculate nodal equilibrium to get new residual vector
-                indirect = True
-                if t == 0:
-                    indirect = False
-                rvec = node_equilibrium(topology, node, rvec, node_xyz, indirect)
+                    # if this is the last node, exit loop
+                    if topology.is_node_support(node) or k == kmax:
+                        reaction_forces[node] = rvec
+                        continue
 
-                # if this is the last node, exit loop
-                if topology.is_node_support(node) or k == kmax:
-                    reaction_forces[node] = rvec
-                    continue
+                    # otherwise, pick next node in the trail
+                    next_node = trails_sequences[key][k + 1]
 
-                # otherwise, pick next node in the trail
-                next_node = trails_sequences[key][k + 1]
+                    # correct edge key
+                    edge = (node, next_node)
+                    if not topology.has_edge(*edge):
+                        edge = (next_node, node)
 
-                # correct edge key
-                edge = (node, next_node)
-                if not topology.has_edge(*edge):
-                    edge = (next_node, node)
+                    # query trail edge length
+                    length = topology.edge_attribute(key=edge, name="length")
 
-                # query trail edge length
-                length = topology.edge_attribute(key=edge, name="length")
+                    # query trail edge plane, it takes precedence over length
+                    plane = topology.edge_attribute(key=edge, name="plane")
 
-                # query trail edge plane, it takes precedence over length
-                plane = topology.edge_attribute(key=edge, name="plane")
+                    # override signed length if a plane has been supplied for trail edge
+                    if plane:
+                        # compute length from line plane intersection
+                        plength = trail_length_from_plane_intersection(pos, rvec, plane)
+                        # The intersection length is None or zero
+                        if not plength:
+                            msg = "Warning! No intersection found between vector {} of edge {} and plane {}"
+                            print(msg.format(rvec, edge, plane))
+                            print("Falling back to input length: {}".format(length))
+                        #  valid intersection length exists
+                        else:
+                            # print out warning if there is a swipe in the force state of the edge
+                            if plength * length < 0.:
+                                print("Warning! Force state has flipped for edge {} due to plane intersection".format(edge))
+                            # override signed length
+                            length = plength
 
-                # override signed length if a plane has been supplied for trail edge
-                if plane:
-                    # compute length from line plane intersection
-                    plength = trail_length_from_plane_intersection(pos, rvec, plane)
-                    # The intersection length is None or zero
-                    if not plength:
-                        msg = "Warning! No intersection found between vector {} of edge {} and plane {}"
-                        print(msg.format(rvec, edge, plane))
-                        print("Falling back to input length: {}".format(length))
-                    #  valid intersection length exists
-                    else:
-                        # print out warning if there is a swipe in the force state of the edge
-                        if plength * length < 0.:
-                            print("Warning! Force state has flipped for edge {} due to plane intersection".format(edge))
-                        # override signed length
-                        length = plength
+                    # store next node position
+                    nrvec = normalize_vector(rvec)
+                    next_pos = add_vectors(pos, scale_vector(nrvec, length))
+                    node_xyz[next_node] = next_pos
 
-                # store next node position
-                nrvec = normalize_vector(rvec)
-                next_pos = add_vectors(pos, scale_vector(nrvec, length))
-                node_xyz[next_node] = next_pos
+                    # store trail force
+                    trail_forces[edge] = copysign(length_vector(rvec), length)
 
-                # store trail force
-                trail_forces[edge] = copysign(length_vector(rvec), length)
+                    # store trail direction
+                    trail_directions[edge] = nrvec
 
-                # store trail direction
-                trail_directions[edge] = nrvec
+                    # store residual vector
+                    residual_vectors[next_node] = rvec
 
-                # store residual vector
-                residual_vectors[next_node] = rvec
+                    # do callback
+                    if callback:
+                        callback()
 
-                # do callback
-                if callback:
-                    callback()
+            # if this is the first iteration, move directly to the next one
+            if t == 0:
+                continue
 
-        # if this is the first iteration, move directly to the next one
-        if t == 0:
-            continue
+            # calculate residual distance
+            distance = 0.0
+            for key, pos in node_xyz.items():
+                last_pos = last_xyz[key]
+                distance += distance_point_point(last_pos, pos)
 
-        # calculate residual distance
-        distance = 0.0
-        for key, pos in node_xyz.items():
-            last_pos = last_xyz[key]
-            distance += distance_point_point(last_pos, pos)
+            profiler.record("residual", distance)
 
-        # if residual distance smaller than threshold, stop iterating
-        if distance < eta:
-            break
+            # if residual distance smaller than threshold, stop iterating
+            if distance < eta:
+                break
+
+            # accelerate the positions the next iteration starts from
+            if acceleration is not None:
+                with profiler.phase("acceleration"):
+                    nodes = list(node_xyz.keys())
+                    xyz = acceleration.step([last_xyz[node] for node in nodes], [node_xyz[node] for node in nodes])
+                    node_xyz = {node: pos for node, pos in zip(nodes, xyz)}
+
+    profiler.record("iterations", t + 1)
+    if acceleration is not None:
+        profiler.count("accelerated_steps", acceleration.steps)
+        profiler.count("rejected_steps", acceleration.rejections)
 
     # if residual distance larger than threshold after tmax iterations, raise error
     if t > 0:
@@ -195,6 +235,127 @@ def equilibrium_state(topology, kmax=None, tmax=100, eta=1e-6, verbose=False, ca
     return eq_state
 
 
+# ==============================================================================
+# Acceleration
+# ==============================================================================
+
+
+class AitkenRelaxation(object):
+    """
+    Aitken's delta-squared extrapolation of the node positions, in pure python.
+
+    Parameters
+    ----------
+    bounds : ``tuple``, optional
+        The smallest and largest relaxation factor.
+        Defaults to ``(0.1, 10.0)``.
+    restarts : ``int``, optional
+        The number of rejected steps after which plain iterations resume.
+        Defaults to ``2``.
+
+    Notes
+    -----
+    This mirrors :class:`compas_cem.equilibrium.AitkenAcceleration` without numpy,
+    so that the solver can accelerate its iterations inside Rhino and Grasshopper.
+    """
+    def __init__(self, bounds=(0.1, 10.0), restarts=2):
+        self.bounds = bounds
+        self.restarts = restarts
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the iterates and the counters of the last calculation.
+        """
+        self.steps = 0
+        self.rejections = 0
+        self._residual = None
+        self._plain = None
+        self._accelerated = False
+        self._forget()
+
+    def step(self, xyz, next_xyz):
+        """
+        Compute the node positions to start the next iteration from.
+
+        Parameters
+        ----------
+        xyz : ``list``
+            The node positions an iteration started from.
+        next_xyz : ``list``
+            The node positions the iteration computed.
+
+        Returns
+        -------
+        xyz : ``list``
+            The node positions to start the next iteration from.
+        """
+        f = [subtract_vectors(b, a) for a, b in zip(xyz, next_xyz)]
+        residual = sqrt(sum(dot_vectors(v, v) for v in f))
+
+        # the last accelerated step went uphill, restart from the last plain iterate
+        if self._accelerated and residual > self._residual:
+            self.rejections += 1
+            self._accelerated = False
+            self._forget()
+            return self._plain
+
+        self._residual = residual
+        self._plain = next_xyz
+        self._accelerated = False
+
+        if self.rejections >= self.restarts:
+            return next_xyz
+
+        last, self._last_residual = self._last_residual, f
+        if last is None:
+            return next_xyz
+
+        df = [subtract_vectors(b, a) for a, b in zip(last, f)]
+        denominator = sum(dot_vectors(v, v) for v in df)
+        if denominator == 0.0:
+            return next_xyz
+
+        omega = -self._omega * sum(dot_vectors(a, b) for a, b in zip(last, df)) / denominator
+        low, high = self.bounds
+        self._omega = min(max(omega, low), high)
+
+        x_next = [add_vectors(a, scale_vector(b, self._omega)) for a, b in zip(xyz, f)]
+        if any(isinf(c) or isnan(c) for pos in x_next for c in pos):
+            self._forget()
+            return next_xyz
+
+        self.steps += 1
+        self._accelerated = True
+
+        return x_next
+
+    def _forget(self):
+        """
+        Forget the iterates used to extrapolate.
+        """
+        self._last_residual = None
+        self._omega = 1.0
+
+
+def aitken_relaxation(acceleration):
+    """
+    Create the acceleration of the iterations of the pure python solver.
+    """
+    if acceleration is None:
+        return None
+
+    if isinstance(acceleration, AitkenRelaxation):
+        acceleration.reset()
+        return acceleration
+
+    if acceleration != "aitken":
+        msg = "Acceleration {} is not supported by the pure python solver! Try aitken or static_equilibrium_numpy"
+        raise ValueError(msg.format(acceleration))
+
+    return AitkenRelaxation()
+
+
 def form_update(form, node_xyz, trail_forces, reaction_forces, **kwargs):
     """
     Update the node and edge attributes of a form after equilibrating it.
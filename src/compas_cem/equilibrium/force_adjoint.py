@@ -0,0 +1,301 @@
+import numpy as np
+
+from compas_cem.equilibrium.force_vectorized import sequence_steps
+
+
+__all__ = ["equilibrium_vjp"]
+
+
+def equilibrium_vjp(problem, tape, xyz_bar, forces_bar, directions_bar, reactions_bar, tol=1e-6):
+    """
+    Backpropagate the adjoints of an equilibrium state to the values of an equilibrium problem.
+
+    This is the hand-derived reverse pass of ``equilibrium_vectorized``.
+    It runs backwards over the recorded iterations and sequences of the solver,
+    applying the vector-Jacobian products of node equilibrium, trail normalization,
+    length scaling and plane intersection.
+
+    Parameters
+    ----------
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+        The equilibrium problem that was solved.
+    tape : ``list``
+        The tape recorded by ``equilibrium_vectorized``.
+    xyz_bar : ``np.array``
+        The adjoint of the node positions. Shape ``(n, 3)``.
+    forces_bar : ``np.array``
+        The adjoint of the trail forces.
+    directions_bar : ``np.array``
+        The adjoint of the trail directions.
+    reactions_bar : ``np.array``
+        The adjoint of the reaction forces.
+    tol : ``float``, optional
+        The tolerance used by the solver to intersect trails with planes.
+        Defaults to ``1e-6``.
+
+    Returns
+    -------
+    values_bar : ``dict``
+        The adjoints of ``xyz``, ``loads``, ``residuals``, ``lengths`` and ``forces``.
+
+    Notes
+    -----
+    The cost of a backward pass is a small multiple of the cost of a forward solve.
+    """
+    steps = sequence_steps(problem)
+    ptr = problem.sequence_ptr.tolist()
+
+    values_bar = {name: np.zeros(np.shape(getattr(problem, name))) for name in problem._values}
+
+    # split output adjoints per sequence
+    forces_bar = _split(forces_bar, [len(step.edges) for step in steps])
+    directions_bar = _split(directions_bar, [len(step.edges) for step in steps])
+    reactions_bar = _split(reactions_bar, [len(step.supports) for step in steps])
+
+    xyz_bar = np.array(xyz_bar, dtype=float)
+
+    for t in reversed(range(len(tape))):
+
+        last_xyz, xyz, rvecs, indirect = tape[t]
+
+        # the last iteration is the only one whose outputs are read
+        output = t == len(tape) - 1
+
+        # adjoint of the node positions of the previous iteration
+        last_xyz_bar = np.zeros(xyz_bar.shape)
+
+        # adjoint of the incoming residual vectors of the step after the current one
+        rvecs_bar = np.zeros(np.shape(rvecs[-1]))
+
+        for k in reversed(range(len(steps))):
+
+            step = steps[k]
+            num_moving = len(step.moving)
+
+            # adjoints of the outputs of the step
+            next_xyz_bar = np.zeros((num_moving, 3))
+            next_rvecs_bar = np.zeros((num_moving, 3))
+
+            if step.next_rows is not None:
+                next_xyz_bar = xyz_bar[ptr[k + 1]:ptr[k + 1] + num_moving]
+                next_rvecs_bar = rvecs_bar[:num_moving]
+
+                # trails starting at the next sequence take their values from the problem
+                values_bar["xyz"][step.next_rows] += xyz_bar[step.next_rows]
+                values_bar["residuals"][step.next_rows] += rvecs_bar[num_moving:]
+
+            if output:
+                outputs_bar = (forces_bar[k], directions_bar[k], reactions_bar[k])
+            else:
+                outputs_bar = (np.zeros(num_moving), np.zeros((num_moving, 3)), np.zeros((len(step.supports), 3)))
+
+            # positions seen by the indirect deviation edges
+            nodes_xyz = None
+            if indirect and step.indirect is not None:
+                nodes_xyz = np.concatenate((xyz[:ptr[k + 1]], last_xyz[ptr[k + 1]:]))
+
+            rvecs_bar, block_xyz_bar, nodes_xyz_bar = sequence_step_vjp(problem,
+                                                                        step,
+                                                                        xyz[ptr[k]:ptr[k + 1]],
+                                                                        rvecs[k],
+                                                                        nodes_xyz,
+                                                                        next_rvecs_bar,
+                                                                        next_xyz_bar,
+                                                                        outputs_bar,
+                                                                        values_bar,
+                                                                        tol)
+
+            xyz_bar[ptr[k]:ptr[k + 1]] += block_xyz_bar
+
+            # new positions up to this sequence, old positions afterwards
+            if nodes_xyz_bar is not None:
+                xyz_bar[:ptr[k + 1]] += nodes_xyz_bar[:ptr[k + 1]]
+                last_xyz_bar[ptr[k + 1]:] += nodes_xyz_bar[ptr[k + 1]:]
+
+        # the first sequence takes its values from the problem
+        values_bar["xyz"][steps[0].rows] += xyz_bar[steps[0].rows]
+        values_bar["residuals"][steps[0].rows] += rvecs_bar
+
+        xyz_bar = last_xyz_bar
+
+    # the starting positions of the origin nodes are taken from the problem
+    values_bar["xyz"][problem.origins] += xyz_bar[problem.origins]
+
+    return values_bar
+
+
+def sequence_step_vjp(problem, step, block_xyz, rvecs, xyz, next_rvecs_bar, next_xyz_bar, outputs_bar, values_bar, tol=1e-6):
+    """
+    The vector-Jacobian product of a sequence step.
+
+    Parameters
+    ----------
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+        A compiled equilibrium problem.
+    step : ``SequenceStep``
+        The indices of a sequence step.
+    block_xyz : ``np.array``
+        The positions of the nodes in the sequence.
+    rvecs : ``np.array``
+        The incoming residual vectors at the nodes in the sequence.
+    xyz : ``np.array``
+        The positions of all the nodes seen by the indirect deviation edges.
+        ``None`` if indirect deviation edges were ignored.
+    next_rvecs_bar : ``np.array``
+        The adjoint of the outgoing residual vectors.
+    next_xyz_bar : ``np.array``
+        The adjoint of the positions of the next nodes on the trails.
+    outputs_bar : ``tuple``
+        The adjoints of the trail forces, trail directions and reaction forces of the step.
+    values_bar : ``dict``
+        The adjoints of the problem values. Updated in place.
+    tol : ``float``, optional
+        The tolerance used by the solver to intersect trails with planes.
+        Defaults to ``1e-6``.
+
+    Returns
+    -------
+    rvecs_bar : ``np.array``
+        The adjoint of the incoming residual vectors.
+    block_xyz_bar : ``np.array``
+        The adjoint of the positions of the nodes in the sequence.
+    xyz_bar : ``np.array``
+        The adjoint of the positions seen by the indirect deviation edges, if any.
+    """
+    forces_bar, directions_bar, reactions_bar = outputs_bar
+
+    # --------------------------------------------------------------------------
+    # forward
+    # --------------------------------------------------------------------------
+
+    rd_vecs = 0.0
+    if step.direct is not None:
+        rd_vecs = _deviation_forward(block_xyz, block_xyz[step.direct.nodes], problem.forces, step.direct)
+
+    ri_vecs = 0.0
+    if xyz is not None:
+        ri_vecs = _deviation_forward(block_xyz, xyz[step.indirect.nodes], problem.forces, step.indirect)
+
+    residuals = rvecs - problem.loads[step.rows] - rd_vecs - ri_vecs
+
+    trail_rvecs = residuals[step.moving]
+    pos = block_xyz[step.moving]
+
+    trail_forces = np.sqrt(np.sum(np.square(trail_rvecs), axis=-1))
+    nonzero = trail_forces > 0.0
+    safe_forces = np.where(nonzero, trail_forces, 1.0)
+    directions = trail_rvecs / safe_forces[:, None]
+
+    lengths = problem.lengths[step.edges]
+
+    if step.planes is not None:
+        mask, origins, normals = step.planes
+        cos_nv = np.sum(normals * directions, axis=-1)
+        valid = np.logical_and(mask, np.abs(cos_nv) >= tol)
+        cos_nv = np.where(valid, cos_nv, 1.0)
+        cos_noa = np.sum(normals * (origins - pos), axis=-1)
+        plengths = cos_noa / cos_nv
+        valid = np.logical_and(valid, plengths != 0.0)
+        lengths = np.where(valid, plengths, lengths)
+
+    # --------------------------------------------------------------------------
+    # backward
+    # --------------------------------------------------------------------------
+
+    # next positions
+    pos_bar = np.array(next_xyz_bar)
+    directions_bar = directions_bar + lengths[:, None] * next_xyz_bar
+    lengths_bar = np.sum(next_xyz_bar * directions, axis=-1)
+
+    # signed trail forces
+    trail_forces_bar = np.where(lengths < 0.0, -1.0 * forces_bar, forces_bar)
+
+    # plane intersections
+    if step.planes is not None:
+        plengths_bar = np.where(valid, lengths_bar, 0.0)
+        cos_noa_bar = plengths_bar / cos_nv
+        cos_nv_bar = -1.0 * plengths_bar * cos_noa / np.square(cos_nv)
+        pos_bar -= normals * cos_noa_bar[:, None]
+        directions_bar = directions_bar + normals * cos_nv_bar[:, None]
+        lengths_bar = np.where(valid, 0.0, lengths_bar)
+
+    values_bar["lengths"][step.edges] += lengths_bar
+
+    # trail normalization
+    projection = np.sum(directions * directions_bar, axis=-1)
+    normalized_bar = (directions_bar - directions * projection[:, None]) / safe_forces[:, None]
+    trail_rvecs_bar = np.where(nonzero[:, None], normalized_bar, directions_bar)
+    trail_rvecs_bar += np.where(nonzero, trail_forces_bar, 0.0)[:, None] * directions
+    trail_rvecs_bar += next_rvecs_bar
+
+    # node equilibrium
+    residuals_bar = np.zeros(residuals.shape)
+    residuals_bar[step.moving] = trail_rvecs_bar
+    residuals_bar[step.supports] = reactions_bar
+
+    values_bar["loads"][step.rows] -= residuals_bar
+
+    block_xyz_bar = np.zeros(block_xyz.shape)
+    block_xyz_bar[step.moving] += pos_bar
+
+    # direct deviation edges
+    if step.direct is not None:
+        others = block_xyz[step.direct.nodes]
+        xyz_bar, others_bar = _deviation_vjp(block_xyz, others, problem.forces, step.direct, -residuals_bar, values_bar)
+        block_xyz_bar += xyz_bar
+        np.add.at(block_xyz_bar, step.direct.nodes, others_bar)
+
+    # indirect deviation edges
+    nodes_xyz_bar = None
+    if xyz is not None:
+        others = xyz[step.indirect.nodes]
+        xyz_bar, others_bar = _deviation_vjp(block_xyz, others, problem.forces, step.indirect, -residuals_bar, values_bar)
+        block_xyz_bar += xyz_bar
+        nodes_xyz_bar = np.zeros(xyz.shape)
+        np.add.at(nodes_xyz_bar, step.indirect.nodes, others_bar)
+
+    return residuals_bar, block_xyz_bar, nodes_xyz_bar
+
+# ------------------------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------------------------
+
+
+def _deviation_forward(xyz, others, forces, adjacency):
+    """
+    The resultant vectors of the deviation edges incident to a batch of nodes.
+    """
+    vectors = others - xyz[:, None, :] + adjacency.padding
+    lengths = np.sqrt(np.sum(np.square(vectors), axis=-1))
+    edge_forces = forces[adjacency.edges] * adjacency.mask
+
+    return np.sum((edge_forces / lengths)[..., None] * vectors, axis=-2)
+
+
+def _deviation_vjp(xyz, others, forces, adjacency, rvecs_bar, values_bar):
+    """
+    The vector-Jacobian product of the resultant vectors of the deviation edges.
+    """
+    vectors = others - xyz[:, None, :] + adjacency.padding
+    lengths = np.sqrt(np.sum(np.square(vectors), axis=-1))
+    edge_forces = forces[adjacency.edges] * adjacency.mask
+
+    projection = np.sum(rvecs_bar[:, None, :] * vectors, axis=-1)
+
+    np.add.at(values_bar["forces"], adjacency.edges, adjacency.mask * projection / lengths)
+
+    vectors_bar = (edge_forces / lengths)[..., None] * rvecs_bar[:, None, :]
+    vectors_bar -= (edge_forces * projection / np.power(lengths, 3))[..., None] * vectors
+
+    return -1.0 * np.sum(vectors_bar, axis=-2), vectors_bar
+
+
+def _split(array, sizes):
+    """
+    Split an array into consecutive chunks.
+    """
+    return np.split(np.asarray(array, dtype=float), np.cumsum(sizes)[:-1])
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,239 @@
+import numpy as np
+
+from compas_cem.equilibrium import EquilibriumProblem
+
+from compas_cem.equilibrium.force_vectorized import sequence_steps
+from compas_cem.equilibrium.force_vectorized import sequence_blocks
+from compas_cem.equilibrium.force_vectorized import sequence_sweep
+from compas_cem.equilibrium.force_vectorized import trail_edges
+from compas_cem.equilibrium.force_vectorized import support_nodes
+
+
+__all__ = ["static_equilibrium_batch"]
+
+
+def static_equilibrium_batch(topology, loads=None, lengths=None, forces=None, tmax=100, eta=1e-6, verbose=False):
+    """
+    Compute a state of static equilibrium for several scenarios of a topology diagram at once.
+
+    Parameters
+    ----------
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`
+        A topology diagram.
+    loads : ``np.array``, optional
+        The node loads of every scenario. Shape ``(s, n, 3)``.
+        Nodes are sorted as in ``topology.nodes()``.
+        If ``None``, the loads of the topology diagram are used in every scenario.
+        Defaults to ``None``.
+    lengths : ``np.array``, optional
+        The signed edge lengths of every scenario. Shape ``(s, m)``.
+        Edges are sorted as in ``topology.edges()``. Only trail edges are read.
+        If ``None``, the lengths of the topology diagram are used in every scenario.
+        Defaults to ``None``.
+    forces : ``np.array``, optional
+        The signed edge forces of every scenario. Shape ``(s, m)``.
+        Edges are sorted as in ``topology.edges()``. Only deviation edges are read.
+        If ``None``, the forces of the topology diagram are used in every scenario.
+        Defaults to ``None``.
+    tmax : ``int``, optional
+        Maximum number of iterations the algorithm will run for.
+        Defaults to ``100``.
+    eta : ``float``, optional
+        Distance threshold that marks equilibrium convergence of a scenario.
+        Defaults to ``1e-6``.
+    verbose : ``bool``, optional
+        Flag to print out internal operations.
+        Defaults to ``False``.
+
+    Returns
+    -------
+    eq_states : ``dict``
+        The stacked equilibrium states, with the scenarios along the first axis:
+
+        * ``node_xyz``: the node coordinates. Shape ``(s, n, 3)``.
+        * ``reaction_forces``: the reaction forces, zero at unsupported nodes. Shape ``(s, n, 3)``.
+        * ``edge_forces``: the signed edge forces. Shape ``(s, m)``.
+        * ``edge_lengths``: the signed edge lengths. Shape ``(s, m)``.
+        * ``converged``: a boolean mask with the scenarios that reached ``eta``. Shape ``(s, )``.
+        * ``iterations``: the number of iterations run on every scenario. Shape ``(s, )``.
+        * ``residuals``: the last residual distance of every scenario. Shape ``(s, )``.
+
+    Notes
+    -----
+    A scenario that converges is taken out of the batch, while the rest keep on iterating.
+    Unlike ``static_equilibrium``, no error is raised if a scenario does not converge:
+    check the ``converged`` mask instead.
+    """
+    problem = EquilibriumProblem.from_topology_diagram(topology)
+
+    # map topology node order to problem node order
+    order = np.array([problem.node_index[node] for node in topology.nodes()], dtype=np.int64)
+    rows = np.argsort(order)
+
+    values = {}
+    if loads is not None:
+        values["loads"] = np.asarray(loads, dtype=float)[:, rows, :]
+    if lengths is not None:
+        values["lengths"] = np.asarray(lengths, dtype=float)
+    if forces is not None:
+        values["forces"] = np.asarray(forces, dtype=float)
+
+    batch = _batch_problem(problem, **values)
+
+    xyz, trail_forces, reaction_forces, converged, iterations, residuals = equilibrium_batch(batch, tmax, eta)
+
+    if verbose:
+        msg = "====== Completed Batch Equilibrium. Converged scenarios: {}/{}. Max iters: {}======"
+        print(msg.format(np.sum(converged), len(converged), np.max(iterations)))
+
+    # reaction forces per node
+    num_scenarios = xyz.shape[0]
+    reactions = np.zeros((num_scenarios, problem.number_of_nodes(), 3))
+    reactions[:, support_nodes(problem), :] = reaction_forces
+
+    # edge forces and lengths
+    edge_forces = np.array(batch.forces)
+    edge_forces[:, trail_edges(problem)] = trail_forces
+
+    edges = np.array(problem.edges, dtype=np.int64).reshape((-1, 2))
+    u = np.array([problem.node_index[node] for node in edges[:, 0]], dtype=np.int64)
+    v = np.array([problem.node_index[node] for node in edges[:, 1]], dtype=np.int64)
+    edge_lengths = np.linalg.norm(xyz[:, u, :] - xyz[:, v, :], axis=-1)
+    edge_lengths = np.copysign(edge_lengths, edge_forces)
+
+    eq_states = {}
+    eq_states["node_xyz"] = xyz[:, order, :]
+    eq_states["reaction_forces"] = reactions[:, order, :]
+    eq_states["edge_forces"] = edge_forces
+    eq_states["edge_lengths"] = edge_lengths
+    eq_states["converged"] = converged
+    eq_states["iterations"] = iterations
+    eq_states["residuals"] = residuals
+
+    return eq_states
+
+
+def equilibrium_batch(problem, tmax=100, eta=1e-6):
+    """
+    Equilibrate forces in a batch of compiled equilibrium problems.
+
+    Parameters
+    ----------
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+        A compiled equilibrium problem whose values are stacked along a leading scenario axis.
+    tmax : ``int``, optional
+        Maximum number of iterations the algorithm will run for.
+        Defaults to ``100``.
+    eta : ``float``, optional
+        Distance threshold that marks equilibrium convergence of a scenario.
+        Defaults to ``1e-6``.
+
+    Returns
+    -------
+    xyz : ``np.array``
+        The node positions in problem order. Shape ``(s, n, 3)``.
+    trail_forces : ``np.array``
+        The forces of the trail edges, in the order of ``trail_edges(problem)``.
+    reaction_forces : ``np.array``
+        The reaction forces, in the order of ``support_nodes(problem)``.
+    converged : ``np.array``
+        A boolean mask with the scenarios that converged.
+        Scenarios with a ``NaN`` residual did not converge.
+    iterations : ``np.array``
+        The number of iterations run on every scenario.
+    residuals : ``np.array``
+        The last residual distance of every scenario.
+        ``0.0`` if the problem has no indirect deviation edges.
+        ``NaN`` if only one iteration was run.
+    """
+    num_scenarios = problem.xyz.shape[0]
+    steps = sequence_steps(problem)
+
+    xyz = np.zeros(problem.xyz.shape)
+    trail_forces = np.zeros((num_scenarios, len(trail_edges(problem))))
+    reaction_forces = np.zeros((num_scenarios, len(support_nodes(problem)), 3))
+    iterations = np.zeros(num_scenarios, dtype=np.int64)
+    residuals = np.full(num_scenarios, np.nan)
+
+    # scenarios still iterating
+    active = np.arange(num_scenarios)
+    subproblem = problem
+    blocks = sequence_blocks(problem)
+
+    for t in range(tmax):
+
+        # store last positions for residual
+        last_xyz = np.concatenate(blocks, axis=-2)
+
+        blocks, forces, _, reactions = sequence_sweep(subproblem, steps, blocks, t > 0)
+
+        # store the current state of the active scenarios
+        xyz[active] = np.concatenate(blocks, axis=-2)
+        trail_forces[active] = forces
+        reaction_forces[active] = reactions
+        iterations[active] = t + 1
+
+        # without indirect deviation edges, a single iteration is exact
+        if t == 0:
+            if problem.number_of_indirect_deviation_edges() == 0:
+                residuals[:] = 0.0
+                break
+            continue
+
+        # calculate residual distance per scenario
+        distance = np.sqrt(np.sum(np.square(last_xyz - xyz[active]), axis=(-2, -1)))
+        residuals[active] = distance
+
+        # take converged and diverged scenarios out of the batch
+        keep = np.logical_and(np.isfinite(distance), distance >= eta)
+        if not np.any(keep):
+            break
+
+        if not np.all(keep):
+            active = active[keep]
+            blocks = [block[keep] for block in blocks]
+            subproblem = _subset_problem(problem, active)
+
+    # a NaN residual never converged, be it from a single iteration or a diverged scenario
+    converged = residuals <= eta
+
+    return xyz, trail_forces, reaction_forces, converged, iterations, residuals
+
+# ------------------------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------------------------
+
+
+def _batch_problem(problem, **values):
+    """
+    Stack the values of a problem along a leading scenario axis.
+    """
+    sizes = set(len(value) for value in values.values())
+    if len(sizes) > 1:
+        raise ValueError("The number of scenarios differs across inputs: {}".format(sorted(sizes)))
+
+    num_scenarios = sizes.pop() if sizes else 1
+
+    batch = {}
+    for name in problem._values:
+        value = getattr(problem, name)
+        if name in values:
+            if values[name].shape[1:] != value.shape:
+                msg = "Shape of {} per scenario is {}, expected {}"
+                raise ValueError(msg.format(name, values[name].shape[1:], value.shape))
+            batch[name] = values[name]
+        else:
+            batch[name] = np.broadcast_to(value, (num_scenarios, ) + value.shape)
+
+    return problem.replace(**batch)
+
+
+def _subset_problem(problem, scenarios):
+    """
+    Select a subset of the scenarios of a batched problem.
+    """
+    return problem.replace(**{name: getattr(problem, name)[scenarios] for name in problem._values})
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,302 @@
+from math import sqrt
+
+import numpy as np
+
+from compas_cem.equilibrium import EquilibriumProblem
+from compas_cem.equilibrium import EquilibriumResult
+from compas_cem.equilibrium import fixed_point_acceleration
+
+from compas_cem.equilibrium.force_numpy import _adjacency_lists
+
+from compas_cem.profiling.profiler import NULL_PROFILER
+
+
+__all__ = ["static_equilibrium_forward",
+           "equilibrium_state_forward"]
+
+
+def static_equilibrium_forward(topology, tmax=100, eta=1e-6, verbose=False, callback=None, profiler=None, acceleration=None):
+    """
+    Generate a form diagram in static equilibrium, without support for gradients.
+
+    Parameters
+    ----------
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`
+        A topology diagram.
+    tmax : ``int``, optional
+        Maximum number of iterations the algorithm will run for.
+        Defaults to ``100``.
+    eta : ``float``, optional
+        Distance threshold that marks equilibrium convergence.
+        This threshold is compared against the sum of distances of the nodes'
+        positions from one iteration to the next one.
+        If ``eta`` is hit before consuming ``tmax`` iterations, calculations
+        will stop early.
+        Defaults to ``1e-6``.
+    verbose : ``bool``, optional
+        Flag to print out internal operations.
+        Defaults to ``False``.
+    callback : ``function``, optional
+        An optional callback function to run at every iteration.
+        Defaults to ``None``.
+    profiler : :class:`compas_cem.profiling.Profiler`, optional
+        A profiler to record the phases, iterations and residuals of the calculation.
+        Its stats are attached to the form diagram.
+        Defaults to ``None``.
+    acceleration : ``str``, optional
+        Accelerate the iterations with ``"anderson"`` mixing or ``"aitken"`` extrapolation.
+        Helps the most when indirect deviation edges form feedback loops.
+        Defaults to ``None``.
+
+    Returns
+    -------
+    form : :class:`compas_cem.diagrams.FormDiagram`
+        A form diagram.
+    """
+    profiler = profiler or NULL_PROFILER
+
+    with profiler.phase("static_equilibrium_forward"):
+        result = equilibrium_state_forward(topology, tmax, eta, verbose, callback,
+                                           profiler=profiler,
+                                           compact=True,
+                                           acceleration=acceleration)
+        with profiler.phase("form_update"):
+            form = result.to_form_diagram()
+
+    form.stats = profiler.stats
+    return form
+
+
+def equilibrium_state_forward(topology, tmax=100, eta=1e-6, verbose=False, callback=None, problem=None, profiler=None, compact=False, acceleration=None):
+    """
+    Equilibrate forces in a topology diagram, without support for gradients.
+
+    The node positions, residual vectors, forces and directions live in arrays
+    that are allocated once and updated in place, and the residual distance is
+    accumulated while the nodes move. Use it when no gradients are needed.
+
+    Parameters
+    ----------
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`
+        A topology diagram.
+    tmax : ``int``, optional
+        Maximum number of iterations the algorithm will run for.
+        Defaults to ``100``.
+    eta : ``float``, optional
+        Distance threshold that marks equilibrium convergence.
+        Defaults to ``1e-6``.
+    verbose : ``bool``, optional
+        Flag to print out internal operations.
+        Defaults to ``False``.
+    callback : ``function``, optional
+        An optional callback function to run at every iteration.
+        Defaults to ``None``.
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`, optional
+        A compiled version of the topology diagram.
+        If supplied, the topology diagram is not queried.
+        Defaults to ``None``.
+    profiler : :class:`compas_cem.profiling.Profiler`, optional
+        A profiler to record the phases, iterations and residuals of the calculation.
+        Defaults to ``None``.
+    compact : ``bool``, optional
+        If ``True``, return the equilibrium state as a compact, array-backed result
+        that creates a form diagram only when one is needed.
+        Defaults to ``False``.
+    acceleration : ``str``, optional
+        Accelerate the iterations with ``"anderson"`` mixing or ``"aitken"`` extrapolation.
+        Defaults to ``None``.
+
+    Returns
+    -------
+    eq_state : ``dict`` or :class:`compas_cem.equilibrium.EquilibriumResult`
+        The node positions, trail forces, trail directions and reaction forces.
+
+    Notes
+    -----
+    The equilibrium state matches the one of ``equilibrium_state_numpy``.
+    """
+    profiler = profiler or NULL_PROFILER
+    acceleration = fixed_point_acceleration(acceleration)
+
+    with profiler.phase("preprocessing"):
+        if problem is None:
+            problem = EquilibriumProblem.from_topology_diagram(topology)
+
+        n = problem.number_of_nodes()
+        m = problem.number_of_edges()
+
+        # input, immutable
+        next_nodes = problem.next_nodes.tolist()
+        trail_edges = problem.trail_edges.tolist()
+        supports = problem.supports.tolist()
+        node_direct = _adjacency_lists(problem.direct)
+        node_indirect = _adjacency_lists(problem.indirect)
+        node_loads = np.asarray(problem.loads, dtype=float)
+        edge_lengths = problem.lengths.tolist()
+        edge_forces = problem.forces.tolist()
+
+        # edge planes
+        edge_planes = {}
+        for edge in np.flatnonzero(problem.planes).tolist():
+            edge_planes[edge] = (np.array(problem.plane_origins[edge], dtype=float),
+                                 np.array(problem.plane_normals[edge], dtype=float))
+
+        # buffers, input and output
+        xyz = np.array(problem.xyz, dtype=float)
+        residual_vectors = np.array(problem.residuals, dtype=float)
+        forces = np.array(problem.forces, dtype=float)
+        directions = np.zeros((m, 3))
+        reactions = np.zeros((n, 3))
+
+        # buffers, internal
+        last_xyz = np.empty_like(xyz) if acceleration is not None else None
+        rvec = np.empty(3)
+        vector = np.empty(3)
+
+    for t in range(tmax):  # max iterations
+
+        with profiler.phase("iteration", t=t):
+
+            if last_xyz is not None:
+                np.copyto(last_xyz, xyz)
+
+            # running sum of the squared distances the nodes move
+            distance = 0.0
+
+            # nodes are sorted by sequence
+            for node in range(n):
+
+                pos = xyz[node]
+
+                # incoming residual vector minus the node load
+                np.subtract(residual_vectors[node], node_loads[node], out=rvec)
+
+                # minus the deviation edges vectors, indirect ones after the first iteration
+                _subtract_deviation_vectors(rvec, vector, node, xyz, node_direct[node], edge_forces)
+                if t > 0:
+                    _subtract_deviation_vectors(rvec, vector, node, xyz, node_indirect[node], edge_forces)
+
+                # if this is the last node, store and exit
+                if supports[node]:
+                    reactions[node] = rvec
+                    continue
+
+                next_node = next_nodes[node]
+                edge = trail_edges[node]
+                length = edge_lengths[edge]
+
+                # compute trail force, always positive
+                trail_force = sqrt(np.dot(rvec, rvec))
+
+                # override length if a plane exists
+                plane = edge_planes.get(edge)
+                if plane and trail_force:
+                    plength = _trail_length_from_plane_intersection(pos, rvec, trail_force, plane)
+                    if plength:
+                        length = plength
+
+                # compute trail direction by normalizing residual vector
+                # NOTE: to avoid NaNs, do not normalize residual vector if it is zero length
+                direction = directions[edge]
+                if trail_force:
+                    np.multiply(rvec, 1.0 / trail_force, out=direction)
+                else:
+                    direction[:] = rvec
+
+                # move next node, and add up the distance it moved
+                np.multiply(direction, length, out=vector)
+                vector += pos
+                next_pos = xyz[next_node]
+                next_pos -= vector
+                distance += np.dot(next_pos, next_pos)
+                next_pos[:] = vector
+
+                # correct trail force sign based on trail signed length
+                if trail_force * length < 0.0:
+                    trail_force = -trail_force
+                forces[edge] = trail_force
+
+                # store residual
+                residual_vectors[next_node] = rvec
+
+            # do callback
+            if callback:
+                callback()
+
+            # if this is the first iteration, move directly to the next one
+            if t == 0:
+                continue
+
+            distance = sqrt(distance)
+            profiler.record("residual", distance)
+
+            # if residual distance smaller than threshold, stop iterating
+            if distance < eta:
+                break
+
+            # accelerate the positions the next iteration starts from
+            if acceleration is not None:
+                with profiler.phase("acceleration"):
+                    xyz[:] = acceleration.step(last_xyz, xyz)
+
+    profiler.record("iterations", t + 1)
+    if acceleration is not None:
+        profiler.count("accelerated_steps", acceleration.steps)
+        profiler.count("rejected_steps", acceleration.rejections)
+
+    # if residual distance larger than threshold after tmax iterations, raise error
+    if t > 0:
+        if distance > eta:
+            raise ValueError("Over {} iters. Residual: {} > eta: {}".format(tmax, distance, eta))
+
+    # print log
+    if verbose:
+        msg = "====== Completed Equilibrium in {} iters. Residual: {}======"
+        print(msg.format(t, distance))
+
+    if compact:
+        return EquilibriumResult(problem, xyz, forces, directions, reactions, topology)
+
+    nodes = problem.nodes
+    edges = problem.edges
+    moving = np.flatnonzero(~problem.supports).tolist()
+
+    eq_state = {}
+    eq_state["node_xyz"] = {node: xyz[i] for i, node in enumerate(nodes)}
+    eq_state["trail_forces"] = {edges[trail_edges[i]]: forces[trail_edges[i]] for i in moving}
+    eq_state["trail_directions"] = {edges[trail_edges[i]]: directions[trail_edges[i]] for i in moving}
+    eq_state["reaction_forces"] = {nodes[i]: reactions[i] for i in np.flatnonzero(problem.supports).tolist()}
+
+    return eq_state
+
+# ------------------------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------------------------
+
+
+def _subtract_deviation_vectors(rvec, vector, node, xyz, adjacency, edge_forces):
+    """
+    Subtract the force vectors of the deviation edges incident to a node from a vector, in place.
+    """
+    pos = xyz[node]
+    for other, edge in adjacency:
+        np.subtract(xyz[other], pos, out=vector)
+        np.multiply(vector, edge_forces[edge] / sqrt(np.dot(vector, vector)), out=vector)
+        rvec -= vector
+
+
+def _trail_length_from_plane_intersection(point, vector, norm, plane, tol=1e-6):
+    """
+    Calculates the signed length of a trail edge from a vector-plane intersection.
+    """
+    origin, normal = plane
+    cos_nv = np.dot(normal, vector) / norm
+
+    if abs(cos_nv) < tol:
+        return
+
+    return np.dot(normal, origin - point) / cos_nv
+
+
+if __name__ == "__main__":
+    pass
@@ -2,11 +2,17 @@ import autograd.numpy as np
 
 from compas_cem.diagrams import FormDiagram
 
+from compas_cem.equilibrium import EquilibriumProblem
+from compas_cem.equilibrium import EquilibriumResult
+from compas_cem.equilibrium import fixed_point_acceleration
+
+from compas_cem.profiling.profiler import NULL_PROFILER
+
 
 __all__ = ["static_equilibrium_numpy"]
 
 
-def static_equilibrium_numpy(topology, tmax=100, eta=1e-6, verbose=False, callback=None):
+def static_equilibrium_numpy(topology, tmax=100, eta=1e-6, verbose=False, callback=None, profiler=None, acceleration=None):
     """
     Generate a form diagram in static equilibrium using numpy.
 
@@ -30,170 +36,226 @@ def static_equilibrium_numpy(topology, tmax=100, eta=1e-6, verbose=False, callba
     callback : ``function``, optional
         An optional callback function to run at every iteration.
         Defaults to ``None``.
+    profiler : :class:`compas_cem.profiling.Profiler`, optional
+        A profiler to record the phases, iterations and residuals of the calculation.
+        Its stats are attached to the form diagram.
+        Defaults to ``None``.
+    acceleration : ``str``, optional
+        Accelerate the iterations with ``"anderson"`` mixing or ``"aitken"`` extrapolation.
+        Helps the most when indirect deviation edges form feedback loops.
+        Defaults to ``None``.
 
     Returns
     -------
     form : :class:`compas_cem.diagrams.FormDiagram`
         A form diagram.
     """
-    attrs = equilibrium_state_numpy(topology, tmax, eta, verbose, callback)
-    form = FormDiagram.from_topology_diagram(topology)
-    form_update(form, **attrs)
+    profiler = profiler or NULL_PROFILER
+
+    with profiler.phase("static_equilibrium_numpy"):
+        attrs = equilibrium_state_numpy(topology, tmax, eta, verbose, callback, profiler=profiler, acceleration=acceleration)
+        with profiler.phase("form_update"):
+            form = FormDiagram.from_topology_diagram(topology)
+            form_update(form, **attrs)
+
+    form.stats = profiler.stats
     return form
 
 
-def equilibrium_state_numpy(topology, tmax=100, eta=1e-6, verbose=False, callback=None):
+def equilibrium_state_numpy(topology, tmax=100, eta=1e-6, verbose=False, callback=None, problem=None, profiler=None, compact=False, acceleration=None):
     """
     Equilibrate forces in a topology diagram using numpy.
+
+    Parameters
+    ----------
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`
+        A topology diagram.
+    tmax : ``int``, optional
+        Maximum number of iterations the algorithm will run for.
+        Defaults to ``100``.
+    eta : ``float``, optional
+        Distance threshold that marks equilibrium convergence.
+        Defaults to ``1e-6``.
+    verbose : ``bool``, optional
+        Flag to print out internal operations.
+        Defaults to ``False``.
+    callback : ``function``, optional
+        An optional callback function to run at every iteration.
+        Defaults to ``None``.
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`, optional
+        A compiled version of the topology diagram.
+        If supplied, the solver reads all its input from the problem and
+        the topology diagram is not queried.
+        Defaults to ``None``.
+    profiler : :class:`compas_cem.profiling.Profiler`, optional
+        A profiler to record the phases, iterations and residuals of the calculation.
+        Defaults to ``None``.
+    compact : ``bool``, optional
+        If ``True``, return the equilibrium state as a compact, array-backed result
+        that creates a form diagram only when one is needed.
+        Defaults to ``False``.
+    acceleration : ``str``, optional
+        Accelerate the iterations with ``"anderson"`` mixing or ``"aitken"`` extrapolation.
+        Helps the most when indirect deviation edges form feedback loops.
+        Defaults to ``None``.
+
+    Returns
+    -------
+    eq_state : ``dict`` or :class:`compas_cem.equilibrium.EquilibriumResult`
+        The node positions, trail forces, trail directions and reaction forces.
     """
-    # there must be at least one trail
-    assert topology.number_of_trails() > 0, "No trails in the diagram!"
+    profiler = profiler or NULL_PROFILER
+    acceleration = fixed_point_acceleration(acceleration)
 
-    # mapping between trails and sequences, immutable
-    trails_sequences = topology.trails_sequences()
+    with profiler.phase("preprocessing"):
+        if problem is None:
+            problem = EquilibriumProblem.from_topology_diagram(topology)
 
-    # input, output
-    node_xyz = {n: np.array(topology.node_coordinates(n)) for n in topology.nodes()}
+        nodes = problem.nodes
+        edges = problem.edges
 
-    # output, mutable
-    edge_forces = {e: np.array(topology.edge_force(e)) for e in topology.edges()}
-    edge_lengths = {e: np.array(topology.edge_length_2(e)) for e in topology.edges()}
+        # input, immutable
+        next_nodes = problem.next_nodes.tolist()
+        trail_edges = problem.trail_edges.tolist()
+        supports = problem.supports.tolist()
+        node_direct = _adjacency_lists(problem.direct)
+        node_indirect = _adjacency_lists(problem.indirect)
 
-    # input, immutable
-    # numpy
-    node_loads = {n: np.array(topology.node_load(n)) for n in topology.nodes()}
-    # no numpy
-    node_direct = {n: topology._connected_direct_deviation_edges(n) for n in topology.nodes()}
-    node_indirect = {n: topology._connected_indirect_deviation_edges(n) for n in topology.nodes()}
-    edge_keys = {e for e in topology.edges()}
+        # input, immutable
+        # numpy
+        node_loads = [problem.loads[i] for i in range(len(nodes))]
+        edge_forces = [problem.forces[i] for i in range(len(edges))]
+        edge_lengths = [problem.lengths[i] for i in range(len(edges))]
 
-    # edge planes
-    edge_planes = {}
-    for edge in topology.trail_edges():
-        plane = topology.edge_plane(edge)
-        if not plane:
-            continue
-        plane = [np.array(vector) for vector in plane]
-        edge_planes[edge] = plane
+        # edge planes
+        edge_planes = {}
+        for edge in np.flatnonzero(problem.planes).tolist():
+            edge_planes[edge] = (problem.plane_origins[edge], problem.plane_normals[edge])
 
-    # internals
-    residual_vectors = {node: np.array(topology.reaction_force(node)) for node in topology.nodes()}
+        # input, output
+        node_xyz = [problem.xyz[i] for i in range(len(nodes))]
 
-    # output
-    reaction_forces = {}
-    trail_forces = {}
-    trail_directions = {}
+        # internals
+        residual_vectors = [problem.residuals[i] for i in range(len(nodes))]
+
+        # output
+        reaction_forces = {}
+        trail_forces = {}
+        trail_directions = {}
 
     for t in range(tmax):  # max iterations
 
-        # store last positions for residual
-        last_positions = {k: v for k, v in node_xyz.items()}
+        with profiler.phase("iteration", t=t):
+
+            # store last positions for residual
+            last_positions = list(node_xyz)
 
-        for k in range(topology.number_of_sequences()):  # sequences
+            for k in range(problem.number_of_sequences()):  # sequences
 
-            for key, trail in topology.trails(keys=True):
+                for node in problem.sequence(k):
 
-                # if index is larger than available nodes in trail, skip trail
-                if k not in trails_sequences[key]:
-                    continue
+                    # get node position
+                    pos = node_xyz[node]
 
-                # select node from trail at current sequence
-                node = trails_sequences[key][k]
+                    # get incoming residual vector
+                    rvec = residual_vectors[node]
 
-                # get node position
-                pos = node_xyz[node]
+                    # node load
+                    q_vec = node_loads[node]
 
-                # get incoming residual vector
-                rvec = residual_vectors[node]
+                    # direct deviation edges vector
+                    rd_vec = deviation_edges_resultant_vector_indexed(node, node_xyz, node_direct[node], edge_forces)
 
-                # node load
-                q_vec = node_loads[node]
+                    # indirect deviation edges vector
+                    ri_vec = np.zeros(3)
+                    if t > 0:
+                        ri_vec = deviation_edges_resultant_vector_indexed(node, node_xyz, node_indirect[node], edge_forces)
 
-                # direct deviation edges vector
-                dir_edges = node_direct[node]
-                rd_vec = deviation_edges_resultant_vector(node, node_xyz, dir_edges, edge_forces)
+                    # node equilibrium, bottleneck 60%
+                    rvec = node_equilibrium(rvec, q_vec, rd_vec, ri_vec)
 
-                # indirect deviation edges vector
-                ri_vec = np.zeros(3)
-                if t > 0:
-                    indir_edges = node_indirect[node]
-                    ri_vec = deviation_edges_resultant_vector(node, node_xyz, indir_edges, edge_forces)
+                    # if this is the last node, store and exit
+                    if supports[node]:
+                        reaction_forces[nodes[node]] = rvec
+                        continue
 
-                # node equilibrium, bottleneck 60%
-                rvec = node_equilibrium(rvec, q_vec, rd_vec, ri_vec)
+                    # otherwise, pick next node in the trail
+                    next_node = next_nodes[node]
 
-                # if this is the last node, store and exit
-                if topology.is_node_support(node):
-                    reaction_forces[node] = rvec
-                    continue
+                    # query trail edge
+                    edge = trail_edges[node]
 
-                # otherwise, pick next node in the trail
-                next_node = trails_sequences[key][k + 1]
+                    # query trail edge's length
+                    length = edge_lengths[edge]
 
-                # correct edge key
-                edge = (node, next_node)
-                if edge not in edge_keys:
-                    edge = (next_node, node)
+                    # query trail edge plane, if any
+                    plane = edge_planes.get(edge)
 
-                # query trail edge's length
-                length = edge_lengths[edge]
+                    # override length if a plane exists
+                    if plane:
+                        # get length from line plane intersection
+                        plength = trail_length_from_plane_intersection_numpy(pos, rvec, plane)
 
-                # query trail edge plane, if any
-                plane = edge_planes.get(edge)
+                        # check that returned length is not null
+                        if plength:
+                            length = plength
 
-                # override length if a plane exists
-                if plane:
-                    # get length from line plane intersection
-                    plength = trail_length_from_plane_intersection_numpy(pos, rvec, plane)
+                    # compute trail force
+                    trail_force = length_vector_numpy(rvec)  # always positive
 
-                    # check that returned length is not null
-                    if plength:
-                        length = plength
+                    # compute trail direction by normalizing residual vector
+                    # NOTE: to avoid NaNs, do not normalize residual vector if it is zero length
+                    nrvec = rvec / trail_force
+                    if np.isnan(length_vector_numpy(nrvec)):
+                        nrvec = rvec
 
-                # compute trail force
-                trail_force = length_vector_numpy(rvec)  # always positive
+                    # store trail direction
+                    trail_directions[edges[edge]] = nrvec
 
-                # compute trail direction by normalizing residual vector
-                # NOTE: to avoid NaNs, do not normalize residual vector if it is zero length
-                nrvec = rvec / trail_force
-                if np.isnan(length_vector_numpy(nrvec)):
-                    nrvec = rvec
+                    # store next node position
+                    next_pos = pos + length * nrvec
+                    node_xyz[next_node] = next_pos
 
-                # store trail direction
-                trail_directions[edge] = nrvec
+                    # correct trail force sign based on trail signed length
+                    # NOTE: autograd.np does not support derivatives of copysign
+                    if trail_force * length < 0.0:
+                        trail_force = trail_force * -1.0
 
-                # store next node position
-                next_pos = pos + length * nrvec
-                node_xyz[next_node] = next_pos
+                    # store trail force
+                    trail_forces[edges[edge]] = trail_force
 
-                # correct trail force sign based on trail signed length
-                # NOTE: autograd.np does not support derivatives of copysign
-                if trail_force * length < 0.0:
-                    trail_force = trail_force * -1.0
+                    # store residual
+                    residual_vectors[next_node] = rvec
 
-                # store trail force
-                trail_forces[edge] = trail_force
+                    # do callback
+                    if callback:
+                        callback()
 
-                # store residual
-                residual_vectors[next_node] = rvec
+            # if this is the first iteration, move directly to the next one
+            if t == 0:
+                continue
 
-                # do callback
-                if callback:
-                    callback()
+            pos_array = np.array(node_xyz)
+            last_pos_array = np.array(last_positions)
 
-        # if this is the first iteration, move directly to the next one
-        if t == 0:
-            continue
+            # calculate residual distance
+            distance = np.sqrt(np.sum(np.square(last_pos_array - pos_array)))
+            profiler.record("residual", float(distance))
 
-        # TODO: simplify by iterating only over values?
-        pos_array = np.array([pos for key, pos in node_xyz.items()])
-        last_pos_array = np.array([last_positions[key] for key, pos in node_xyz.items()])
+            # if residual distance smaller than threshold, stop iterating
+            if distance < eta:
+                break
 
-        # calculate residual distance
-        distance = np.sqrt(np.sum(np.square(last_pos_array - pos_array)))
-        # if residual distance smaller than threshold, stop iterating
-        if distance < eta:
-            break
+            # accelerate the positions the next iteration starts from
+            if acceleration is not None:
+                with profiler.phase("acceleration"):
+                    pos_array = acceleration.step(last_pos_array, pos_array)
+                    node_xyz = [pos_array[i] for i in range(len(nodes))]
+
+    profiler.record("iterations", t + 1)
+    if acceleration is not None:
+        profiler.count("accelerated_steps", acceleration.steps)
+        profiler.count("rejected_steps", acceleration.rejections)
 
     # if residual distance larger than threshold after tmax iterations, raise error
     if t > 0:
@@ -206,11 +268,14 @@ def equilibrium_state_numpy(topology, tmax=100, eta=1e-6, verbose=False, callbac
         print(msg.format(t, distance))
 
     eq_state = {}
-    eq_state["node_xyz"] = node_xyz
+    eq_state["node_xyz"] = {node: xyz for node, xyz in zip(nodes, node_xyz)}
     eq_state["trail_forces"] = trail_forces
     eq_state["trail_directions"] = trail_directions
     eq_state["reaction_forces"] = reaction_forces
 
+    if compact:
+        return EquilibriumResult.from_equilibrium_state(problem, eq_state, topology)
+
     # return node_xyz, trail_forces, reaction_forces
     return eq_state
 
@@ -298,6 +363,35 @@ def deviation_edges_resultant_vector(node, node_xyz, deviation_edges, edge_force
     return r_vec
 
 
+def deviation_edges_resultant_vector_indexed(node, node_xyz, adjacency, edge_forces):
+    """
+    Adds up the force vectors of the deviation edges incident to a node.
+
+    Parameters
+    ----------
+    node : ``int``
+        A node index.
+    node_xyz : ``list``
+        The xyz coordinates of the nodes, sorted by node index.
+    adjacency : ``list``
+        A list of ``(neighbor, edge)`` index pairs with the deviation edges incident to the node.
+    edge_forces : ``list``
+        The forces of the edges, sorted by edge index.
+
+    Returns
+    -------
+    rvec : ``np.array``
+        The resulting force vector.
+    """
+    r_vec = np.zeros(3)
+
+    for other, edge in adjacency:
+        vector = vector_two_nodes(node_xyz[other], node_xyz[node], normalize=True)
+        r_vec = r_vec + edge_forces[edge] * vector
+
+    return r_vec
+
+
 def direct_deviation_edges_resultant_vector(topology, node, node_xyz):
     """
     Adds up the force vectors of the direct deviation edges incident to a node.
@@ -368,6 +462,16 @@ def trail_vector_out(tvec_in, q_vec, rd_vec, ri_vec):
 # ------------------------------------------------------------------------------
 
 
+def _adjacency_lists(csr):
+    """
+    Unpack a CSR adjacency into one list of ``(neighbor, edge)`` pairs per node.
+    """
+    ptr, neighbors, edges = (array.tolist() for array in csr)
+    pairs = list(zip(neighbors, edges))
+
+    return [pairs[start:end] for start, end in zip(ptr[:-1], ptr[1:])]
+
+
 def incoming_edge_vectors(node, node_xyz, edges, normalize=False):
     """
     Temporary alternative to Diagram.incoming_edge_vectors()
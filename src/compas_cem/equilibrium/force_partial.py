@@ -0,0 +1,441 @@
+import numpy as np
+
+from scipy.sparse import csr_matrix
+
+from compas_cem.equilibrium.force_vectorized import Adjacency
+from compas_cem.equilibrium.force_vectorized import SequenceStep
+from compas_cem.equilibrium.force_vectorized import equilibrium_vectorized
+from compas_cem.equilibrium.force_vectorized import sequence_step
+from compas_cem.equilibrium.force_vectorized import sequence_steps
+from compas_cem.equilibrium.force_vectorized import trail_edges
+from compas_cem.equilibrium.force_vectorized import support_nodes
+
+
+__all__ = ["PartialSolver",
+           "dependency_graph",
+           "changed_nodes",
+           "influenced_nodes",
+           "equilibrium_partial"]
+
+# ------------------------------------------------------------------------------
+# Partial solver
+# ------------------------------------------------------------------------------
+
+
+class PartialSolver(object):
+    """
+    A solver that re-solves only the nodes of an equilibrium problem influenced by changed values.
+
+    Parameters
+    ----------
+    tmax : ``int``, optional
+        Maximum number of iterations the algorithm will run for.
+        Defaults to ``100``.
+    eta : ``float``, optional
+        Distance threshold that marks equilibrium convergence.
+        Defaults to ``1e-6``.
+    threshold : ``float``, optional
+        The fraction of nodes to re-solve above which a perturbed problem is solved from scratch instead.
+        Defaults to ``0.5``.
+
+    Attributes
+    ----------
+    region : ``np.array``
+        A boolean mask with the nodes re-solved by the last call, in problem order.
+
+    Notes
+    -----
+    The solver keeps a reference equilibrium state, solved from scratch.
+    Every perturbed problem is compared value by value against the reference, and only
+    the nodes influenced by the differences are solved again, starting from the reference.
+    Therefore, a series of small perturbations of the same problem, like finite differences,
+    re-solves one small region per perturbation.
+
+    A perturbed problem is solved from scratch if its region is too large, or if the
+    region does not converge from the reference. Its state never becomes the reference.
+    """
+    def __init__(self, tmax=100, eta=1e-6, threshold=0.5):
+        self.tmax = tmax
+        self.eta = eta
+        self.threshold = threshold
+        self.region = None
+
+        self._reference = None
+
+    def solve(self, problem, xyz=None, reference=False):
+        """
+        Equilibrate forces in a compiled equilibrium problem.
+
+        Parameters
+        ----------
+        problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+            A compiled equilibrium problem.
+        xyz : ``np.array``, optional
+            The node positions to warm-start from if the problem is solved as a reference.
+            Defaults to ``None``.
+        reference : ``bool``, optional
+            If ``True``, solve the problem from scratch and make it the new reference.
+            Otherwise, the problem is a perturbation of the reference.
+            Problems without a valid reference always become the reference.
+            Defaults to ``False``.
+
+        Returns
+        -------
+        arrays : ``tuple``
+            The node positions, trail forces, trail directions and reaction forces,
+            like ``equilibrium_vectorized``.
+        """
+        last = self._reference
+
+        if reference or last is None or not _shares_structure(problem, last[0]):
+            # solve from scratch, recording the incoming residual vectors
+            tape = []
+            arrays = equilibrium_vectorized(problem, self.tmax, self.eta, tape=tape, xyz=xyz)
+            rvecs = np.concatenate(tape[-1][2], axis=-2)
+
+            self._reference = (problem, arrays, rvecs)
+            self.region = np.ones(problem.number_of_nodes(), dtype=bool)
+
+            return arrays
+
+        region = influenced_nodes(problem, changed_nodes(problem, last[0]))
+        self.region = region
+
+        if np.count_nonzero(region) <= self.threshold * region.size:
+            try:
+                arrays, _ = _equilibrium_partial(problem, last[1], region, self.tmax, self.eta, last[2])
+                return arrays
+            except ValueError:
+                pass
+
+        # a large region, or one that does not converge from the reference, is solved from scratch
+        self.region = np.ones(problem.number_of_nodes(), dtype=bool)
+
+        return equilibrium_vectorized(problem, self.tmax, self.eta)
+
+    def clear(self):
+        """
+        Discard the reference equilibrium state.
+        """
+        self._reference = None
+        self.region = None
+
+# ------------------------------------------------------------------------------
+# Dependency graph
+# ------------------------------------------------------------------------------
+
+
+def dependency_graph(problem):
+    """
+    The direct dependencies between the nodes of an equilibrium problem.
+
+    Parameters
+    ----------
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+        A compiled equilibrium problem.
+
+    Returns
+    -------
+    graph : ``scipy.sparse.csr_matrix``
+        A boolean matrix of shape ``(n, n)``.
+        Entry ``(i, j)`` is ``True`` if the equilibrium of node ``j`` reads the state of node ``i``.
+
+    Notes
+    -----
+    A node passes its position and its residual vector to the next node on its trail,
+    and its position to the nodes it shares a deviation edge with.
+    The graph is cached on the problem.
+    """
+    return problem.cached("dependency_graph", _dependency_graph)
+
+
+def changed_nodes(problem, other):
+    """
+    Find the nodes whose inputs differ between two problems with the same structure.
+
+    Parameters
+    ----------
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+        A compiled equilibrium problem.
+    other : :class:`compas_cem.equilibrium.EquilibriumProblem`
+        Another problem with the same structure.
+
+    Returns
+    -------
+    nodes : ``np.array``
+        A boolean mask with the changed nodes, in problem order.
+
+    Notes
+    -----
+    A node changes if its load or initial residual vector changes, or if it is
+    an origin node and its position changes.
+    Both ends of an edge change if its length or its force changes.
+    """
+    nodes = np.zeros(problem.number_of_nodes(), dtype=bool)
+
+    nodes |= np.any(problem.xyz != other.xyz, axis=-1) & problem.origins
+    nodes |= np.any(problem.loads != other.loads, axis=-1)
+    nodes |= np.any(problem.residuals != other.residuals, axis=-1)
+
+    edges = (problem.lengths != other.lengths) | (problem.forces != other.forces)
+    nodes[_edge_rows(problem)[edges].ravel()] = True
+
+    return nodes
+
+
+def influenced_nodes(problem, nodes):
+    """
+    Find the nodes whose equilibrium may change after a change at some nodes.
+
+    Parameters
+    ----------
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+        A compiled equilibrium problem.
+    nodes : ``np.array``
+        A boolean mask with the changed nodes, in problem order.
+
+    Returns
+    -------
+    region : ``np.array``
+        A boolean mask with the changed nodes and all the nodes that depend on them.
+    """
+    graph = dependency_graph(problem).T.tocsr()
+
+    region = np.array(nodes, dtype=bool)
+    frontier = region.copy()
+
+    while np.any(frontier):
+        reached = (graph @ frontier) > 0
+        frontier = reached & ~region
+        region |= reached
+
+    return region
+
+# ------------------------------------------------------------------------------
+# Partial equilibrium
+# ------------------------------------------------------------------------------
+
+
+def equilibrium_partial(problem, arrays, region, tmax=100, eta=1e-6, rvecs=None):
+    """
+    Equilibrate forces only at some nodes of a compiled problem, reusing an equilibrium state elsewhere.
+
+    Parameters
+    ----------
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+        A compiled equilibrium problem.
+    arrays : ``tuple``
+        The node positions, trail forces, trail directions and reaction forces
+        of a previous problem with the same structure, like ``equilibrium_vectorized`` outputs them.
+    region : ``np.array``
+        A boolean mask with the nodes to solve again.
+        It must contain all the nodes that depend on the changes between the problems.
+    tmax : ``int``, optional
+        Maximum number of iterations the algorithm will run for.
+        Defaults to ``100``.
+    eta : ``float``, optional
+        Distance threshold that marks equilibrium convergence.
+        Defaults to ``1e-6``.
+    rvecs : ``np.array``, optional
+        The incoming residual vectors at every node of the previous equilibrium state.
+        If ``None``, they are recovered from the trail forces and directions.
+        Defaults to ``None``.
+
+    Returns
+    -------
+    arrays : ``tuple``
+        The node positions, trail forces, trail directions and reaction forces.
+
+    Notes
+    -----
+    Without indirect deviation edges, a single sweep over the sequences of the region is exact.
+    Otherwise, the region is swept until the positions of its nodes converge.
+    The nodes outside the region keep their previous state.
+    """
+    arrays, _ = _equilibrium_partial(problem, arrays, region, tmax, eta, rvecs)
+
+    return arrays
+
+# ------------------------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------------------------
+
+
+def _equilibrium_partial(problem, arrays, region, tmax, eta, rvecs):
+    """
+    Equilibrate forces at the nodes of a region, and return the incoming residual vectors at all the nodes too.
+    """
+    xyz, forces, directions, reactions = (np.array(array, dtype=float) for array in arrays)
+
+    if rvecs is None:
+        rvecs = _incoming_residuals(problem, forces, directions)
+    rvecs = np.array(rvecs, dtype=float)
+
+    # trails that start inside the region take their values from the problem
+    origins = region & problem.origins
+    xyz[origins] = problem.xyz[origins]
+    rvecs[origins] = problem.residuals[origins]
+
+    steps = _region_steps(problem, region)
+    if not steps:
+        return (xyz, forces, directions, reactions), rvecs
+
+    trail_index, support_index = _output_index(problem)
+    indirect = any(step.indirect is not None for step in steps)
+
+    for t in range(tmax):
+
+        last_xyz = xyz[region]
+
+        for step in steps:
+
+            others = None if step.indirect is None else xyz
+            out = sequence_step(problem, step, xyz[step.rows], rvecs[step.rows], others)
+            next_rvecs, next_xyz, tforces, tdirections, rforces = out
+
+            moving = step.rows[step.moving]
+            next_rows = problem.next_nodes[moving]
+
+            xyz[next_rows] = next_xyz
+            rvecs[next_rows] = next_rvecs
+
+            forces[trail_index[moving]] = tforces
+            directions[trail_index[moving]] = tdirections
+            reactions[support_index[step.rows[step.supports]]] = rforces
+
+        if not indirect:
+            break
+
+        distance = np.sqrt(np.sum(np.square(last_xyz - xyz[region])))
+        if distance < eta:
+            break
+
+    if indirect and distance > eta:
+        raise ValueError("Over {} iters. Residual: {} > eta: {}".format(tmax, distance, eta))
+
+    return (xyz, forces, directions, reactions), rvecs
+
+
+def _shares_structure(problem, other):
+    """
+    Check if two problems have the same structure, without comparing arrays if they share a cache.
+    """
+    return problem._cache is other._cache or problem.has_same_structure(other)
+
+
+def _incoming_residuals(problem, forces, directions):
+    """
+    Recover the incoming residual vectors of the nodes from the trail forces and directions.
+    """
+    trail_index, _ = _output_index(problem)
+
+    rvecs = np.array(problem.residuals, dtype=float)
+
+    moving = np.flatnonzero(trail_index >= 0)
+    index = trail_index[moving]
+    rvecs[problem.next_nodes[moving]] = np.abs(forces[index])[:, None] * directions[index]
+
+    return rvecs
+
+
+def _region_steps(problem, region):
+    """
+    The sequence steps restricted to the nodes of a region, with global deviation adjacencies.
+    """
+    ptr = problem.sequence_ptr.tolist()
+
+    steps = []
+    for k, step in enumerate(sequence_steps(problem)):
+
+        local = np.flatnonzero(region[ptr[k]:ptr[k + 1]])
+        if local.size == 0:
+            continue
+
+        rows = step.rows[local]
+        supports = np.flatnonzero(problem.supports[rows])
+        moving = np.flatnonzero(~problem.supports[rows])
+        edges = problem.trail_edges[rows[moving]]
+
+        # direct and indirect deviation edges see the positions of all the nodes
+        adjacencies = []
+        if step.direct is not None:
+            adjacencies.append(step.direct._replace(nodes=step.direct.nodes + ptr[k]))
+        if step.indirect is not None:
+            adjacencies.append(step.indirect)
+
+        adjacency = None
+        if adjacencies:
+            fields = [np.concatenate([adj[i][local] for adj in adjacencies], axis=1) for i in range(4)]
+            adjacency = Adjacency(*fields)
+
+        planes = None
+        if step.planes is not None:
+            mask, origins, normals = step.planes
+            index = np.searchsorted(step.moving, local[moving])
+            planes = (mask[index], origins[index], normals[index])
+
+        steps.append(SequenceStep(rows, moving, supports, edges, None, None, adjacency, planes))
+
+    return steps
+
+
+def _output_index(problem):
+    """
+    The rows of every node in the trail arrays and in the reaction arrays output by a vectorized solver.
+    """
+    return problem.cached("output_index_partial", _output_index_factory)
+
+
+def _output_index_factory(problem):
+    """
+    """
+    n = problem.number_of_nodes()
+
+    trail_index = np.full(n, -1, dtype=np.int64)
+    trail_rows = np.concatenate([step.rows[step.moving] for step in sequence_steps(problem)])
+    trail_index[trail_rows] = np.arange(len(trail_edges(problem)))
+
+    support_index = np.full(n, -1, dtype=np.int64)
+    support_index[support_nodes(problem)] = np.arange(len(support_nodes(problem)))
+
+    return trail_index, support_index
+
+
+def _edge_rows(problem):
+    """
+    The rows of the end nodes of every edge.
+    """
+    return problem.cached("edge_rows", _edge_rows_factory)
+
+
+def _edge_rows_factory(problem):
+    """
+    """
+    index = problem.node_index
+    return np.array([(index[u], index[v]) for u, v in problem.edges], dtype=np.int64).reshape((-1, 2))
+
+
+def _dependency_graph(problem):
+    """
+    """
+    n = problem.number_of_nodes()
+
+    # next node on the trail
+    sources = [np.flatnonzero(problem.next_nodes >= 0)]
+    targets = [problem.next_nodes[sources[0]]]
+
+    # deviation edges, both ways
+    for ptr, nodes, _ in (problem.direct, problem.indirect):
+        degrees = np.diff(ptr)
+        sources.append(np.repeat(np.arange(n), degrees))
+        targets.append(np.asarray(nodes, dtype=np.int64))
+
+    sources = np.concatenate(sources)
+    targets = np.concatenate(targets)
+    data = np.ones(sources.size, dtype=bool)
+
+    return csr_matrix((data, (sources, targets)), shape=(n, n))
+
+
+if __name__ == "__main__":
+    pass
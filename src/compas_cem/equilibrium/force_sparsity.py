@@ -0,0 +1,129 @@
+import numpy as np
+
+from compas_cem.equilibrium.force_vectorized import sequence_steps
+from compas_cem.equilibrium.force_vectorized import support_nodes
+
+
+__all__ = ["equilibrium_sparsity"]
+
+
+def equilibrium_sparsity(problem, patterns):
+    """
+    Trace which inputs of an equilibrium problem every output of the vectorized solver depends on.
+
+    Parameters
+    ----------
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+        A compiled equilibrium problem.
+    patterns : ``dict``
+        The boolean dependency patterns of the problem values on some inputs, such as optimization parameters.
+        A pattern has one row per node for ``xyz``, ``loads`` and ``residuals``,
+        one row per edge for ``lengths`` and ``forces``, and one column per input.
+        Missing values do not depend on any input.
+
+    Returns
+    -------
+    patterns : ``tuple``
+        The boolean dependency patterns of the node positions, the trail forces,
+        the trail directions and the reaction forces, in the order output by ``equilibrium_vectorized``.
+
+    Notes
+    -----
+    The patterns are traced along the trails, sequence by sequence, like the solver does.
+    A change at a node only reaches the nodes downstream on its trail,
+    and the nodes connected to them by deviation edges.
+    With indirect deviation edges, the trace is repeated until the patterns stop growing.
+    The patterns are structural: entries that vanish numerically, for example
+    where a trail is projected onto a plane, are kept.
+    """
+    num_inputs = _number_of_inputs(patterns)
+    steps = sequence_steps(problem)
+    ptr = problem.sequence_ptr.tolist()
+
+    n = problem.number_of_nodes()
+    m = len(problem.edges)
+
+    def pattern(name, size):
+        if name in patterns:
+            return np.asarray(patterns[name], dtype=bool)
+        return np.zeros((size, num_inputs), dtype=bool)
+
+    xyz_in = pattern("xyz", n)
+    loads_in = pattern("loads", n)
+    residuals_in = pattern("residuals", n)
+    lengths_in = pattern("lengths", m)
+    forces_in = pattern("forces", m)
+
+    # the positions of the origin nodes are inputs
+    xyz = np.where(problem.origins[:, None], xyz_in, False)
+    residuals = np.zeros((n, num_inputs), dtype=bool)
+
+    while True:
+        last_xyz = xyz.copy()
+        last_residuals = residuals.copy()
+
+        rvecs = residuals_in[ptr[0]:ptr[1]]
+
+        for k, step in enumerate(steps):
+
+            block = xyz[ptr[k]:ptr[k + 1]]
+            block_residuals = rvecs | loads_in[step.rows]
+
+            if step.direct is not None:
+                block_residuals |= _deviation_sparsity(block, block, forces_in, step.direct)
+
+            if step.indirect is not None:
+                block_residuals |= _deviation_sparsity(block, xyz, forces_in, step.indirect)
+
+            residuals[step.rows] = block_residuals
+
+            if step.next_rows is None:
+                continue
+
+            # next positions, and residuals for the trails that start at the next sequence
+            moving = block_residuals[step.moving]
+            num_moving = len(step.moving)
+
+            xyz[ptr[k + 1]:ptr[k + 1] + num_moving] = block[step.moving] | moving | lengths_in[step.edges]
+            rvecs = np.concatenate((moving, residuals_in[step.next_rows]))
+
+        if np.array_equal(xyz, last_xyz) and np.array_equal(residuals, last_residuals):
+            break
+
+    trail_rows = np.concatenate([step.rows[step.moving] for step in steps])
+    trail = residuals[trail_rows]
+
+    return xyz, trail, trail, residuals[support_nodes(problem)]
+
+# ------------------------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------------------------
+
+
+def _number_of_inputs(patterns):
+    """
+    The number of columns of a dictionary of dependency patterns.
+    """
+    sizes = set(np.shape(pattern)[-1] for pattern in patterns.values())
+    if len(sizes) != 1:
+        raise ValueError("The dependency patterns must have the same number of columns: {}".format(sorted(sizes)))
+
+    return sizes.pop()
+
+
+def _deviation_sparsity(block, xyz, forces, adjacency):
+    """
+    The dependency pattern of the resultant vectors of the deviation edges incident to a batch of nodes.
+    """
+    mask = np.asarray(adjacency.mask, dtype=bool)[..., None]
+    others = np.any(xyz[adjacency.nodes] & mask, axis=1)
+    edges = np.any(forces[adjacency.edges] & mask, axis=1)
+
+    # only nodes with deviation edges depend on their own position
+    block = block & np.any(mask, axis=1)
+
+    return block | others | edges
+
+
+if __name__ == "__main__":
+    pass
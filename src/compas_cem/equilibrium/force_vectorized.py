@@ -0,0 +1,764 @@
+from collections import namedtuple
+
+import numpy
+import autograd.numpy as np
+
+from autograd.tracer import getval
+
+from compas_cem.diagrams import FormDiagram
+
+from compas_cem.equilibrium import EquilibriumProblem
+from compas_cem.equilibrium import EquilibriumResult
+from compas_cem.equilibrium import fixed_point_acceleration
+from compas_cem.equilibrium.force_numpy import form_update
+
+from compas_cem.profiling.profiler import NULL_PROFILER
+
+
+__all__ = ["static_equilibrium_vectorized",
+           "equilibrium_state_vectorized",
+           "iter_equilibrium",
+           "EquilibriumIteration"]
+
+
+def static_equilibrium_vectorized(topology, tmax=100, eta=1e-6, verbose=False, callback=None, profiler=None, acceleration=None):
+    """
+    Generate a form diagram in static equilibrium, one sequence at a time.
+
+    Parameters
+    ----------
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`
+        A topology diagram.
+    tmax : ``int``, optional
+        Maximum number of iterations the algorithm will run for.
+        Defaults to ``100``.
+    eta : ``float``, optional
+        Distance threshold that marks equilibrium convergence.
+        This threshold is compared against the sum of distances of the nodes'
+        positions from one iteration to the next one.
+        If ``eta`` is hit before consuming ``tmax`` iterations, calculations
+        will stop early.
+        Defaults to ``1e-6``.
+    verbose : ``bool``, optional
+        Flag to print out internal operations.
+        Defaults to ``False``.
+    callback : ``function``, optional
+        An optional callback function to run at every sequence.
+        Defaults to ``None``.
+    profiler : :class:`compas_cem.profiling.Profiler`, optional
+        A profiler to record the phases, iterations and residuals of the calculation.
+        Its stats are attached to the form diagram.
+        Defaults to ``None``.
+    acceleration : ``str``, optional
+        Accelerate the iterations with ``"anderson"`` mixing or ``"aitken"`` extrapolation.
+        Helps the most when indirect deviation edges form feedback loops.
+        Defaults to ``None``.
+
+    Returns
+    -------
+    form : :class:`compas_cem.diagrams.FormDiagram`
+        A form diagram.
+    """
+    profiler = profiler or NULL_PROFILER
+
+    with profiler.phase("static_equilibrium_vectorized"):
+        attrs = equilibrium_state_vectorized(topology, tmax, eta, verbose, callback, profiler=profiler, acceleration=acceleration)
+        with profiler.phase("form_update"):
+            form = FormDiagram.from_topology_diagram(topology)
+            form_update(form, **attrs)
+
+    form.stats = profiler.stats
+    return form
+
+
+def equilibrium_state_vectorized(topology, tmax=100, eta=1e-6, verbose=False, callback=None, problem=None, profiler=None, compact=False, acceleration=None):
+    """
+    Equilibrate forces in a topology diagram, one sequence at a time.
+
+    All the nodes of a sequence are processed as a batch: the deviation forces,
+    the residual vectors, the trail directions, the plane intersections and the
+    new node positions are computed with a single vectorized operation per sequence.
+
+    Parameters
+    ----------
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`
+        A topology diagram.
+    tmax : ``int``, optional
+        Maximum number of iterations the algorithm will run for.
+        Defaults to ``100``.
+    eta : ``float``, optional
+        Distance threshold that marks equilibrium convergence.
+        Defaults to ``1e-6``.
+    verbose : ``bool``, optional
+        Flag to print out internal operations.
+        Defaults to ``False``.
+    callback : ``function``, optional
+        An optional callback function to run at every sequence.
+        Defaults to ``None``.
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`, optional
+        A compiled version of the topology diagram.
+        If supplied, the topology diagram is not queried.
+        Defaults to ``None``.
+    profiler : :class:`compas_cem.profiling.Profiler`, optional
+        A profiler to record the phases, iterations and residuals of the calculation.
+        Defaults to ``None``.
+    compact : ``bool``, optional
+        If ``True``, return the equilibrium state as a compact, array-backed result
+        that creates a form diagram only when one is needed.
+        Defaults to ``False``.
+    acceleration : ``str``, optional
+        Accelerate the iterations with ``"anderson"`` mixing or ``"aitken"`` extrapolation.
+        Helps the most when indirect deviation edges form feedback loops.
+        Defaults to ``None``.
+
+    Returns
+    -------
+    eq_state : ``dict`` or :class:`compas_cem.equilibrium.EquilibriumResult`
+        The node positions, trail forces, trail directions and reaction forces.
+
+    Notes
+    -----
+    This solver is compatible with ``autograd``.
+
+    The indirect deviation edges of a sequence see the positions of the nodes
+    of the following sequences computed in the previous iteration. The
+    equilibrium state matches the one of ``equilibrium_state_numpy``, but the
+    number of iterations to reach it may differ slightly.
+    """
+    profiler = profiler or NULL_PROFILER
+
+    if problem is None:
+        with profiler.phase("preprocessing"):
+            problem = EquilibriumProblem.from_topology_diagram(topology)
+
+    xyz, forces, directions, reactions = equilibrium_vectorized(problem, tmax, eta, verbose, callback, profiler=profiler, acceleration=acceleration)
+
+    if compact:
+        return EquilibriumResult.from_arrays(problem, xyz, forces, directions, reactions, topology)
+
+    return equilibrium_state_from_arrays(problem, xyz, forces, directions, reactions)
+
+
+def equilibrium_vectorized(problem, tmax=100, eta=1e-6, verbose=False, callback=None, tape=None, xyz=None, profiler=None, acceleration=None):
+    """
+    Equilibrate forces in a compiled equilibrium problem.
+
+    Parameters
+    ----------
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+        A compiled equilibrium problem.
+    tmax : ``int``, optional
+        Maximum number of iterations the algorithm will run for.
+        Defaults to ``100``.
+    eta : ``float``, optional
+        Distance threshold that marks equilibrium convergence.
+        Defaults to ``1e-6``.
+    verbose : ``bool``, optional
+        Flag to print out internal operations.
+        Defaults to ``False``.
+    callback : ``function``, optional
+        An optional callback function to run at every sequence.
+        Defaults to ``None``.
+    tape : ``list``, optional
+        If a list is supplied, the node positions and the incoming residual
+        vectors of every iteration are appended to it, to run a backward pass later.
+        Defaults to ``None``.
+    xyz : ``np.array``, optional
+        The node positions of a previous equilibrium state to warm-start the solver from.
+        The positions of the origin nodes are always taken from the problem.
+        If supplied, indirect deviation edges are considered from the first iteration on.
+        Defaults to ``None``.
+    profiler : :class:`compas_cem.profiling.Profiler`, optional
+        A profiler to record the iterations and their residuals.
+        Defaults to ``None``.
+    acceleration : ``str`` or :class:`compas_cem.equilibrium.AndersonAcceleration`, optional
+        Accelerate the iterations with ``"anderson"`` mixing or ``"aitken"`` extrapolation.
+        Cannot be combined with a ``tape``.
+        Defaults to ``None``.
+
+    Returns
+    -------
+    xyz : ``np.array``
+        The node positions in problem order. Shape ``(n, 3)``.
+    trail_forces : ``np.array``
+        The forces of the trail edges, in the order of ``trail_edges(problem)``.
+    trail_directions : ``np.array``
+        The unit directions of the trail edges, in the order of ``trail_edges(problem)``.
+    reaction_forces : ``np.array``
+        The reaction forces, in the order of ``support_nodes(problem)``.
+    """
+    profiler = profiler or NULL_PROFILER
+
+    if acceleration is not None and tape is not None:
+        raise ValueError("An accelerated calculation cannot be taped for a backward pass!")
+    acceleration = fixed_point_acceleration(acceleration)
+
+    distance = None
+    sweeps = sequence_sweeps(problem, tmax, callback, tape, xyz, profiler, acceleration)
+    for t, distance, next_xyz, forces, directions, reactions in sweeps:
+        # if residual distance smaller than threshold, stop iterating
+        if distance is not None and distance < eta:
+            break
+
+    profiler.record("iterations", t + 1)
+    if acceleration is not None:
+        profiler.count("accelerated_steps", acceleration.steps)
+        profiler.count("rejected_steps", acceleration.rejections)
+
+    # if residual distance larger than threshold after tmax iterations, raise error
+    if distance is not None and distance > eta:
+        raise ValueError("Over {} iters. Residual: {} > eta: {}".format(tmax, distance, eta))
+
+    # print log
+    if verbose:
+        msg = "====== Completed Equilibrium in {} iters. Residual: {}======"
+        print(msg.format(t, distance))
+
+    return next_xyz, forces, directions, reactions
+
+
+def equilibrium_state_from_arrays(problem, xyz, forces, directions, reactions):
+    """
+    Convert the arrays output by a vectorized solver into an equilibrium state.
+    """
+    nodes = problem.nodes
+    edges = problem.edges
+
+    eq_state = {}
+    eq_state["node_xyz"] = {node: xyz[i] for i, node in enumerate(nodes)}
+    eq_state["trail_forces"] = {edges[e]: forces[i] for i, e in enumerate(trail_edges(problem))}
+    eq_state["trail_directions"] = {edges[e]: directions[i] for i, e in enumerate(trail_edges(problem))}
+    eq_state["reaction_forces"] = {nodes[n]: reactions[i] for i, n in enumerate(support_nodes(problem))}
+
+    return eq_state
+
+
+def equilibrium_state_index(problem):
+    """
+    Map the keys of an equilibrium state to the rows of the arrays output by a vectorized solver.
+
+    Returns
+    -------
+    index : ``dict``
+        A dictionary with one ``{key: row}`` dictionary per equilibrium state entry.
+    """
+    return problem.cached("equilibrium_state_index", _equilibrium_state_index)
+
+# ------------------------------------------------------------------------------
+# Iterations
+# ------------------------------------------------------------------------------
+
+
+def iter_equilibrium(topology, tmax=100, eta=1e-6, positions=False, problem=None, xyz=None, acceleration=None):
+    """
+    Equilibrate forces in a topology diagram, yielding a snapshot after every iteration.
+
+    Parameters
+    ----------
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`
+        A topology diagram.
+    tmax : ``int``, optional
+        Maximum number of iterations the algorithm will run for.
+        Defaults to ``100``.
+    eta : ``float``, optional
+        Distance threshold that marks equilibrium convergence.
+        The iterations stop after the first one with a smaller residual distance.
+        If ``None``, the iterations only stop after ``tmax`` iterations, or when the caller stops iterating.
+        Defaults to ``1e-6``.
+    positions : ``bool``, optional
+        If ``True``, every snapshot holds the node positions of its iteration.
+        Defaults to ``False``.
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`, optional
+        A compiled version of the topology diagram.
+        If supplied, the topology diagram is not queried.
+        Defaults to ``None``.
+    xyz : ``np.array``, optional
+        The node positions of a previous equilibrium state to warm-start the solver from.
+        Defaults to ``None``.
+    acceleration : ``str``, optional
+        Accelerate the iterations with ``"anderson"`` mixing or ``"aitken"`` extrapolation.
+        Helps the most when indirect deviation edges form feedback loops.
+        Defaults to ``None``.
+
+    Yields
+    ------
+    snapshot : :class:`compas_cem.equilibrium.EquilibriumIteration`
+        The index, the residual distance and optionally the node positions of the next iteration.
+
+    Notes
+    -----
+    Unlike ``equilibrium_state_vectorized``, no error is raised if the iterations
+    do not converge. The equilibrium state of any snapshot is available from
+    :meth:`EquilibriumIteration.result`.
+
+    Examples
+    --------
+    >>> for snapshot in iter_equilibrium(topology, eta=None):  # doctest: +SKIP
+    ...     if snapshot.residual is not None and snapshot.residual < 1e-3:
+    ...         break
+    >>> form = snapshot.result().form  # doctest: +SKIP
+    """
+    if problem is None:
+        problem = EquilibriumProblem.from_topology_diagram(topology)
+
+    acceleration = fixed_point_acceleration(acceleration)
+    sweeps = sequence_sweeps(problem, tmax, xyz=xyz, acceleration=acceleration)
+
+    for t, distance, next_xyz, forces, directions, reactions in sweeps:
+
+        if distance is not None:
+            distance = float(distance)
+
+        arrays = (next_xyz, forces, directions, reactions)
+        yield EquilibriumIteration(t, distance, next_xyz if positions else None, problem, arrays, topology)
+
+        if eta is not None and distance is not None and distance < eta:
+            break
+
+
+class EquilibriumIteration(object):
+    """
+    A snapshot of an iteration of the vectorized equilibrium solver.
+
+    Attributes
+    ----------
+    t : ``int``
+        The index of the iteration.
+    residual : ``float``
+        The distance the nodes moved since the last iteration.
+        ``None`` in the first iteration of a cold start, which ignores the indirect deviation edges.
+    xyz : ``np.array``
+        The node positions in problem order, if requested. ``None`` otherwise.
+    """
+    __slots__ = ("t", "residual", "xyz", "_problem", "_arrays", "_topology")
+
+    def __init__(self, t, residual, xyz, problem, arrays, topology):
+        self.t = t
+        self.residual = residual
+        self.xyz = xyz
+        self._problem = problem
+        self._arrays = arrays
+        self._topology = topology
+
+    def result(self):
+        """
+        The equilibrium state at this iteration.
+
+        Returns
+        -------
+        result : :class:`compas_cem.equilibrium.EquilibriumResult`
+            The compact equilibrium result.
+        """
+        return EquilibriumResult.from_arrays(self._problem, *self._arrays, topology=self._topology)
+
+    def __repr__(self):
+        """
+        """
+        return "{}(t={}, residual={})".format(self.__class__.__name__, self.t, self.residual)
+
+# ------------------------------------------------------------------------------
+# Sequence sweep
+# ------------------------------------------------------------------------------
+
+
+def sequence_sweeps(problem, tmax, callback=None, tape=None, xyz=None, profiler=NULL_PROFILER, acceleration=None):
+    """
+    Sweep over all the sequences of a problem up to ``tmax`` times, one iteration at a time.
+
+    Parameters
+    ----------
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+        A compiled equilibrium problem.
+    tmax : ``int``
+        Maximum number of iterations.
+    callback : ``function``, optional
+        An optional callback function to run at every sequence.
+    tape : ``list``, optional
+        If a list is supplied, the node positions and the incoming residual
+        vectors of every iteration are appended to it.
+    xyz : ``np.array``, optional
+        The node positions of a previous equilibrium state to warm-start from.
+    profiler : :class:`compas_cem.profiling.Profiler`, optional
+        A profiler to record the iterations and their residuals.
+    acceleration : :class:`compas_cem.equilibrium.AndersonAcceleration`, optional
+        An acceleration object to compute the positions every iteration after the first one starts from.
+
+    Yields
+    ------
+    iteration : ``tuple``
+        The iteration index, the residual distance, the node positions, the
+        trail forces, the trail directions and the reaction forces. The residual
+        distance is ``None`` in the first iteration of a cold start.
+    """
+    steps = sequence_steps(problem)
+
+    blocks = sequence_blocks(problem, xyz)
+
+    for t in range(tmax):  # max iterations
+
+        with profiler.phase("iteration", t=t):
+
+            # store last positions for residual
+            last_xyz = np.concatenate(blocks, axis=-2)
+
+            # a warm start already knows where the indirect deviation edges are
+            indirect = t > 0 or xyz is not None
+
+            rvecs = None if tape is None else []
+
+            blocks, forces, directions, reactions = sequence_sweep(problem, steps, blocks, indirect, callback, rvecs)
+            next_xyz = np.concatenate(blocks, axis=-2)
+
+            if tape is not None:
+                tape.append((last_xyz, next_xyz, rvecs, indirect))
+
+            # the first cold iteration has no residual, and moves directly to the next one
+            distance = None
+            if indirect:
+                distance = np.sqrt(np.sum(np.square(last_xyz - next_xyz)))
+                profiler.record("residual", float(getval(distance)))
+
+        yield t, distance, next_xyz, forces, directions, reactions
+
+        # the caller asked for another iteration, so the positions did not converge yet
+        if acceleration is not None and distance is not None:
+            with profiler.phase("acceleration"):
+                blocks = sequence_blocks(problem, acceleration.step(last_xyz, next_xyz))
+
+
+def sequence_sweep(problem, steps, blocks, indirect, callback=None, tape=None):
+    """
+    Sweep over all the sequences of a problem once.
+
+    Parameters
+    ----------
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+        A compiled equilibrium problem.
+    steps : ``list``
+        The sequence steps of the problem.
+    blocks : ``list``
+        The node positions of every sequence block from the last sweep.
+    indirect : ``bool``
+        Flag to consider indirect deviation edges in the calculation.
+    callback : ``function``, optional
+        An optional callback function to run at every sequence.
+    tape : ``list``, optional
+        If a list is supplied, the incoming residual vectors of every sequence are appended to it.
+
+    Returns
+    -------
+    blocks : ``list``
+        The new node positions of every sequence block.
+    trail_forces : ``np.array``
+        The forces of the trail edges.
+    trail_directions : ``np.array``
+        The unit directions of the trail edges.
+    reaction_forces : ``np.array``
+        The reaction forces at the supports.
+    """
+    blocks = list(blocks)
+
+    forces = []
+    directions = []
+    reactions = []
+
+    rvecs = problem.residuals[..., steps[0].rows, :]
+
+    for k, step in enumerate(steps):
+
+        # concatenate new and old positions for indirect deviation edges
+        xyz = None
+        if indirect and step.indirect is not None:
+            xyz = np.concatenate(blocks, axis=-2)
+
+        if tape is not None:
+            tape.append(rvecs)
+
+        rvecs, next_xyz, tforces, tdirections, rforces = sequence_step(problem, step, blocks[k], rvecs, xyz)
+
+        forces.append(tforces)
+        directions.append(tdirections)
+        reactions.append(rforces)
+
+        if step.next_rows is not None:
+            # new block is made of the continued trails and the starting trails
+            blocks[k + 1] = np.concatenate((next_xyz, problem.xyz[..., step.next_rows, :]), axis=-2)
+            rvecs = np.concatenate((rvecs, problem.residuals[..., step.next_rows, :]), axis=-2)
+
+        if callback:
+            callback()
+
+    forces = np.concatenate(forces, axis=-1)
+    directions = np.concatenate(directions, axis=-2)
+    reactions = np.concatenate(reactions, axis=-2)
+
+    return blocks, forces, directions, reactions
+
+
+def sequence_step(problem, step, block_xyz, rvecs, xyz=None, tol=1e-6):
+    """
+    Calculate equilibrium at all the nodes of a sequence at once.
+
+    Parameters
+    ----------
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+        A compiled equilibrium problem.
+    step : ``SequenceStep``
+        The indices of a sequence step.
+    block_xyz : ``np.array``
+        The positions of the nodes in the sequence.
+    rvecs : ``np.array``
+        The incoming residual vectors at the nodes in the sequence.
+    xyz : ``np.array``, optional
+        The positions of all the nodes, to compute the indirect deviation forces.
+        If ``None``, indirect deviation edges are ignored.
+    tol : ``float``, optional
+        A tolerance to check if a trail and the normal of its projection plane are orthogonal.
+        Defaults to ``1e-6``.
+
+    Returns
+    -------
+    rvecs : ``np.array``
+        The outgoing residual vectors of the nodes that continue on a trail.
+    next_xyz : ``np.array``
+        The positions of the next nodes on the trails.
+    trail_forces : ``np.array``
+        The forces in the trail edges that leave the sequence.
+    trail_directions : ``np.array``
+        The unit directions of the trail edges that leave the sequence.
+    reaction_forces : ``np.array``
+        The reaction forces at the support nodes in the sequence.
+    """
+    # node loads
+    q_vecs = problem.loads[..., step.rows, :]
+
+    # direct deviation edges vectors
+    rd_vecs = 0.0
+    if step.direct is not None:
+        others = block_xyz[..., step.direct.nodes, :]
+        rd_vecs = deviation_edges_resultant_vectors(block_xyz, others, problem.forces, step.direct)
+
+    # indirect deviation edges vectors
+    ri_vecs = 0.0
+    if xyz is not None:
+        others = xyz[..., step.indirect.nodes, :]
+        ri_vecs = deviation_edges_resultant_vectors(block_xyz, others, problem.forces, step.indirect)
+
+    # node equilibrium
+    rvecs = rvecs - q_vecs - rd_vecs - ri_vecs
+
+    # reaction forces at support nodes
+    reaction_forces = rvecs[..., step.supports, :]
+
+    # continue on trail
+    rvecs = rvecs[..., step.moving, :]
+    pos = block_xyz[..., step.moving, :]
+
+    # compute trail forces, always positive
+    trail_forces = np.sqrt(np.sum(np.square(rvecs), axis=-1))
+
+    # compute trail directions by normalizing residual vectors
+    # NOTE: to avoid NaNs, do not normalize residual vectors if they are zero length
+    trail_directions = rvecs / np.where(trail_forces > 0.0, trail_forces, 1.0)[..., None]
+
+    # query trail edges' lengths
+    lengths = problem.lengths[..., step.edges]
+
+    # override lengths if planes exist
+    if step.planes is not None:
+        mask, origins, normals = step.planes
+        cos_nv = np.sum(normals * trail_directions, axis=-1)
+        valid = np.logical_and(mask, np.abs(cos_nv) >= tol)
+        cos_noa = np.sum(normals * (origins - pos), axis=-1)
+        plengths = cos_noa / np.where(valid, cos_nv, 1.0)
+        valid = np.logical_and(valid, plengths != 0.0)
+        lengths = np.where(valid, plengths, lengths)
+
+    # next node positions
+    next_xyz = pos + lengths[..., None] * trail_directions
+
+    # correct trail force sign based on trail signed length
+    trail_forces = np.where(lengths < 0.0, -1.0 * trail_forces, trail_forces)
+
+    return rvecs, next_xyz, trail_forces, trail_directions, reaction_forces
+
+
+def deviation_edges_resultant_vectors(xyz, others, forces, adjacency):
+    """
+    Add up the force vectors of the deviation edges incident to a batch of nodes.
+
+    Parameters
+    ----------
+    xyz : ``np.array``
+        The positions of the nodes. Shape ``(..., b, 3)``.
+    others : ``np.array``
+        The positions of the neighbors of the nodes on the deviation edges. Shape ``(..., b, d, 3)``.
+    forces : ``np.array``
+        The forces of all the edges in the problem. Shape ``(..., m)``.
+    adjacency : ``Adjacency``
+        The padded adjacency of the deviation edges.
+
+    Returns
+    -------
+    rvecs : ``np.array``
+        The resulting force vectors. Shape ``(..., b, 3)``.
+    """
+    # padded entries point along a dummy unit vector to avoid zero-length vectors
+    vectors = others - xyz[..., None, :] + adjacency.padding
+    lengths = np.sqrt(np.sum(np.square(vectors), axis=-1))
+
+    edge_forces = forces[..., adjacency.edges] * adjacency.mask
+
+    return np.sum((edge_forces / lengths)[..., None] * vectors, axis=-2)
+
+# ------------------------------------------------------------------------------
+# Sequence steps
+# ------------------------------------------------------------------------------
+
+
+SequenceStep = namedtuple("SequenceStep", ["rows", "moving", "supports", "edges", "next_rows", "direct", "indirect", "planes"])
+
+Adjacency = namedtuple("Adjacency", ["nodes", "edges", "mask", "padding"])
+
+
+def sequence_steps(problem):
+    """
+    Compile the indices of every sequence step of an equilibrium problem.
+
+    Parameters
+    ----------
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+        A compiled equilibrium problem.
+
+    Returns
+    -------
+    steps : ``list`` of ``SequenceStep``
+        The indices of the sequence steps.
+
+    Notes
+    -----
+    The steps are cached on the problem and shared with the problems made by ``problem.replace()``.
+    """
+    return problem.cached("sequence_steps", _sequence_steps)
+
+
+def sequence_blocks(problem, xyz=None):
+    """
+    Split the node positions of a problem into sequence blocks.
+
+    If other node positions are supplied, only the positions of the origin nodes are taken from the problem.
+    """
+    if xyz is not None:
+        xyz = np.where(problem.origins[:, None], problem.xyz, xyz)
+    else:
+        xyz = problem.xyz
+
+    ptr = problem.sequence_ptr.tolist()
+    return [xyz[..., start:end, :] for start, end in zip(ptr[:-1], ptr[1:])]
+
+
+def trail_edges(problem):
+    """
+    The indices of the trail edges in the order output by a vectorized solver.
+    """
+    return problem.cached("trail_edges_vectorized", _trail_edges)
+
+
+def support_nodes(problem):
+    """
+    The indices of the support nodes in the order output by a vectorized solver.
+    """
+    return problem.cached("support_nodes_vectorized", _support_nodes)
+
+
+def _equilibrium_state_index(problem):
+    """
+    """
+    edges = {problem.edges[e]: i for i, e in enumerate(trail_edges(problem))}
+
+    index = {}
+    index["node_xyz"] = problem.node_index
+    index["trail_forces"] = edges
+    index["trail_directions"] = edges
+    index["reaction_forces"] = {problem.nodes[n]: i for i, n in enumerate(support_nodes(problem))}
+
+    return index
+
+
+def _trail_edges(problem):
+    """
+    """
+    return numpy.concatenate([step.edges for step in sequence_steps(problem)])
+
+
+def _support_nodes(problem):
+    """
+    """
+    return numpy.concatenate([step.rows[step.supports] for step in sequence_steps(problem)])
+
+
+def _sequence_steps(problem):
+    """
+    """
+    ptr = problem.sequence_ptr.tolist()
+    steps = []
+
+    for k in range(problem.number_of_sequences()):
+
+        start, end = ptr[k], ptr[k + 1]
+        rows = numpy.arange(start, end)
+
+        supports = numpy.flatnonzero(problem.supports[start:end])
+        moving = numpy.flatnonzero(~problem.supports[start:end])
+        edges = problem.trail_edges[rows[moving]]
+
+        # origin nodes that start their trails at the next sequence
+        next_rows = None
+        if k + 1 < problem.number_of_sequences():
+            next_rows = numpy.arange(ptr[k + 1] + len(moving), ptr[k + 2])
+
+        # direct deviation edges, local to the sequence block
+        direct = _padded_adjacency(problem.direct, rows, offset=start)
+
+        # indirect deviation edges, global
+        indirect = _padded_adjacency(problem.indirect, rows)
+
+        # projection planes
+        planes = None
+        mask = problem.planes[edges]
+        if numpy.any(mask):
+            planes = (mask, problem.plane_origins[edges], problem.plane_normals[edges])
+
+        step = SequenceStep(rows, moving, supports, edges, next_rows, direct, indirect, planes)
+        steps.append(step)
+
+    return steps
+
+
+def _padded_adjacency(csr, rows, offset=0):
+    """
+    Pad the CSR adjacency of a batch of nodes to the largest number of neighbors.
+    """
+    ptr, neighbors, edges = csr
+
+    degrees = ptr[rows + 1] - ptr[rows]
+    degree = int(degrees.max()) if len(rows) else 0
+    if degree == 0:
+        return None
+
+    slots = numpy.arange(degree)
+    mask = slots[None, :] < degrees[:, None]
+    index = numpy.where(mask, ptr[rows][:, None] + slots[None, :], 0)
+
+    # padded entries point from a node to itself, shifted by a unit x vector
+    padded_nodes = numpy.where(mask, neighbors[index], rows[:, None]) - offset
+    padded_edges = numpy.where(mask, edges[index], 0)
+
+    padding = numpy.zeros(mask.shape + (3, ))
+    padding[..., 0] = numpy.where(mask, 0.0, 1.0)
+
+    return Adjacency(padded_nodes, padded_edges, mask.astype(float), padding)
+
+
+if __name__ == "__main__":
+    pass
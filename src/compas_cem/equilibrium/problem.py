@@ -0,0 +1,460 @@
+import numpy as np
+
+import autograd.numpy as anp
+
+
+__all__ = ["EquilibriumProblem"]
+
+# ==============================================================================
+# Equilibrium Problem
+# ==============================================================================
+
+
+class EquilibriumProblem(object):
+    """
+    An immutable, array-compiled representation of a topology diagram.
+
+    Parameters
+    ----------
+    nodes : ``tuple``
+        The node keys, sorted in solver order.
+    edges : ``tuple``
+        The edge keys, in the order of the topology diagram.
+    sequence_ptr : ``np.ndarray``
+        The row offsets of every sequence block in the node arrays.
+    next_nodes : ``np.ndarray``
+        The index of the next node in the trail of every node. ``-1`` at support nodes.
+    trail_edges : ``np.ndarray``
+        The index of the trail edge that leaves every node. ``-1`` at support nodes.
+    origins : ``np.ndarray``
+        A boolean mask with the origin nodes.
+    supports : ``np.ndarray``
+        A boolean mask with the support nodes.
+    direct : ``tuple``
+        The CSR adjacency ``(ptr, nodes, edges)`` of the direct deviation edges.
+    indirect : ``tuple``
+        The CSR adjacency ``(ptr, nodes, edges)`` of the indirect deviation edges.
+    xyz : ``np.ndarray``
+        The node coordinates. Shape ``(n, 3)``.
+    loads : ``np.ndarray``
+        The node loads. Shape ``(n, 3)``.
+    residuals : ``np.ndarray``
+        The initial residual vectors at the nodes. Shape ``(n, 3)``.
+    lengths : ``np.ndarray``
+        The signed edge lengths. Shape ``(m, )``.
+    forces : ``np.ndarray``
+        The signed edge forces. Shape ``(m, )``.
+    planes : ``np.ndarray``
+        A boolean mask with the trail edges that have a projection plane.
+    plane_origins : ``np.ndarray``
+        The origin of the projection plane of every edge. Shape ``(m, 3)``.
+    plane_normals : ``np.ndarray``
+        The normal of the projection plane of every edge. Shape ``(m, 3)``.
+
+    Notes
+    -----
+    Nodes are sorted by sequence. Inside a sequence block, the nodes that
+    continue a trail from the previous sequence come first, in the same
+    order as their predecessors, followed by the origin nodes of the trails
+    that start at that sequence. This ordering lets a solver assemble a
+    sequence block by stacking the positions computed in the previous step.
+
+    Use :meth:`EquilibriumProblem.from_topology_diagram` to compile a problem.
+    """
+    _structure = ("nodes",
+                  "edges",
+                  "sequence_ptr",
+                  "next_nodes",
+                  "trail_edges",
+                  "origins",
+                  "supports",
+                  "direct",
+                  "indirect",
+                  "planes",
+                  "plane_origins",
+                  "plane_normals")
+
+    _values = ("xyz", "loads", "residuals", "lengths", "forces")
+
+    def __init__(self, **kwargs):
+        for name in self._structure + self._values:
+            value = kwargs[name]
+            _freeze(value)
+            self.__dict__[name] = value
+
+        self.__dict__["node_index"] = {node: index for index, node in enumerate(self.nodes)}
+        self.__dict__["edge_index"] = {edge: index for index, edge in enumerate(self.edges)}
+        self.__dict__["_cache"] = {}
+
+# ==============================================================================
+# Constructors
+# ==============================================================================
+
+    @classmethod
+    def from_topology_diagram(cls, topology):
+        """
+        Compile a topology diagram into an equilibrium problem.
+
+        Parameters
+        ----------
+        topology : :class:`compas_cem.diagrams.TopologyDiagram`
+            A topology diagram with trails.
+
+        Returns
+        -------
+        problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+            The compiled equilibrium problem.
+        """
+        assert topology.number_of_trails() > 0, "No trails in the diagram!"
+
+        # map every node to the next node in its trail
+        next_map = {}
+        for trail in topology.trails():
+            for u, v in zip(trail[:-1], trail[1:]):
+                next_map[u] = v
+
+        # trail origins by starting sequence
+        origin_map = {}
+        for trail in topology.trails():
+            origin = trail[0]
+            origin_map.setdefault(topology.node_sequence(origin), []).append(origin)
+
+        # sort nodes in solver order, one sequence block at a time
+        nodes = []
+        sequence_ptr = [0]
+        block = []
+        for k in range(topology.number_of_sequences()):
+            block = [next_map[node] for node in block if node in next_map]
+            block.extend(origin_map.get(k, []))
+            nodes.extend(block)
+            sequence_ptr.append(len(nodes))
+
+        msg = "Nodes {} haven't been assigned to a trail. Check your topology!"
+        assert len(nodes) == topology.number_of_nodes(), msg.format(set(topology.nodes()) - set(nodes))
+
+        node_index = {node: index for index, node in enumerate(nodes)}
+        edges = list(topology.edges())
+        edge_index = {edge: index for index, edge in enumerate(edges)}
+
+        n = len(nodes)
+        m = len(edges)
+
+        # trail connectivity
+        next_nodes = np.full(n, -1, dtype=np.int64)
+        trail_edges = np.full(n, -1, dtype=np.int64)
+        for trail in topology.trails():
+            for u, v in zip(trail[:-1], trail[1:]):
+                edge = (u, v)
+                if edge not in edge_index:
+                    edge = (v, u)
+                next_nodes[node_index[u]] = node_index[v]
+                trail_edges[node_index[u]] = edge_index[edge]
+
+        origins = np.array([topology.is_node_origin(node) for node in nodes], dtype=bool)
+        supports = np.array([topology.is_node_support(node) for node in nodes], dtype=bool)
+
+        # deviation adjacency
+        direct = _csr(nodes, node_index, edge_index, topology._connected_direct_deviation_edges)
+        indirect = _csr(nodes, node_index, edge_index, topology._connected_indirect_deviation_edges)
+
+        # node values
+        xyz = _array([topology.node_coordinates(node) for node in nodes])
+        loads = _array([topology.node_load(node) for node in nodes])
+        residuals = _array([topology.reaction_force(node) for node in nodes])
+
+        # edge values
+        lengths = _array([topology.edge_length_2(edge) for edge in edges])
+        forces = _array([topology.edge_force(edge) for edge in edges])
+
+        # projection planes
+        planes = np.zeros(m, dtype=bool)
+        plane_origins = np.zeros((m, 3))
+        plane_normals = np.zeros((m, 3))
+        for edge in topology.trail_edges():
+            plane = topology.edge_plane(edge)
+            if not plane:
+                continue
+            index = edge_index[edge]
+            origin, normal = plane
+            planes[index] = True
+            plane_origins[index] = origin
+            plane_normals[index] = normal
+
+        return cls(nodes=tuple(nodes),
+                   edges=tuple(edges),
+                   sequence_ptr=np.array(sequence_ptr, dtype=np.int64),
+                   next_nodes=next_nodes,
+                   trail_edges=trail_edges,
+                   origins=origins,
+                   supports=supports,
+                   direct=direct,
+                   indirect=indirect,
+                   xyz=xyz,
+                   loads=loads,
+                   residuals=residuals,
+                   lengths=lengths,
+                   forces=forces,
+                   planes=planes,
+                   plane_origins=plane_origins,
+                   plane_normals=plane_normals)
+
+# ==============================================================================
+# Copies
+# ==============================================================================
+
+    def replace(self, **values):
+        """
+        Create a new problem that shares the structure of this one but has other values.
+
+        Parameters
+        ----------
+        **values : ``dict``
+            New arrays for any of ``xyz``, ``loads``, ``residuals``, ``lengths`` or ``forces``.
+            The arrays must have the same shape as the ones they replace.
+            They can be ``autograd`` arrays.
+
+        Returns
+        -------
+        problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+            The new problem.
+        """
+        for name in values:
+            if name not in self._values:
+                raise KeyError("{} is not a replaceable problem value!".format(name))
+
+        problem = self.__class__.__new__(self.__class__)
+        problem.__dict__.update(self.__dict__)
+        problem.__dict__.update(values)
+
+        return problem
+
+# ==============================================================================
+# Counters
+# ==============================================================================
+
+    def number_of_nodes(self):
+        """
+        The number of nodes in the problem.
+        """
+        return len(self.nodes)
+
+    def number_of_edges(self):
+        """
+        The number of edges in the problem.
+        """
+        return len(self.edges)
+
+    def number_of_sequences(self):
+        """
+        The number of sequences in the problem.
+        """
+        return len(self.sequence_ptr) - 1
+
+    def number_of_indirect_deviation_edges(self):
+        """
+        The number of indirect deviation edges in the problem.
+        """
+        return int(len(self.indirect[2]) / 2)
+
+# ==============================================================================
+# Queries
+# ==============================================================================
+
+    def sequence(self, k):
+        """
+        The node indices in a sequence block.
+
+        Parameters
+        ----------
+        k : ``int``
+            The sequence key.
+
+        Returns
+        -------
+        indices : ``range``
+            The node indices.
+        """
+        return range(self.sequence_ptr[k], self.sequence_ptr[k + 1])
+
+    def attribute_index(self, key, name):
+        """
+        Locate a topology diagram attribute in the value arrays of the problem.
+
+        Parameters
+        ----------
+        key : ``int`` or ``tuple``
+            A node key or an edge key.
+        name : ``str``
+            The attribute name.
+            Supported names are ``x``, ``y``, ``z``, ``qx``, ``qy``, ``qz``, ``length`` and ``force``.
+
+        Returns
+        -------
+        field : ``str``
+            The name of the value array that stores the attribute.
+        index : ``int``
+            The index of the attribute in the flattened value array.
+        """
+        node_fields = {"x": ("xyz", 0),
+                       "y": ("xyz", 1),
+                       "z": ("xyz", 2),
+                       "qx": ("loads", 0),
+                       "qy": ("loads", 1),
+                       "qz": ("loads", 2)}
+
+        edge_fields = {"length": "lengths",
+                       "force": "forces"}
+
+        if name in node_fields:
+            field, axis = node_fields[name]
+            return field, self.node_index[key] * 3 + axis
+
+        if name in edge_fields:
+            return edge_fields[name], self.edge_index[tuple(key)]
+
+        raise KeyError("Attribute {} is not part of the equilibrium problem!".format(name))
+
+    def has_same_structure(self, other):
+        """
+        Check if another problem has the same structure as this one.
+
+        Parameters
+        ----------
+        other : :class:`compas_cem.equilibrium.EquilibriumProblem`
+            Another equilibrium problem.
+
+        Returns
+        -------
+        flag : ``bool``
+            ``True`` if the node ordering, trails, sequences, deviation edges and planes match.
+            ``False`` otherwise.
+
+        Notes
+        -----
+        The values of the problems, such as loads or lengths, are not compared.
+        """
+        for name in self._structure:
+            if not _equal(getattr(self, name), getattr(other, name)):
+                return False
+        return True
+
+    def cached(self, name, factory):
+        """
+        Query a structural quantity derived from the problem, computing it only once.
+
+        Parameters
+        ----------
+        name : ``str``
+            The name of the quantity.
+        factory : ``function``
+            A function that takes the problem as input and returns the quantity.
+
+        Returns
+        -------
+        value : ``object``
+            The cached quantity.
+
+        Notes
+        -----
+        The cache is shared by all the problems created with :meth:`EquilibriumProblem.replace`.
+        Therefore, ``factory`` must only depend on the structure of the problem, not on its values.
+        """
+        if name not in self._cache:
+            self._cache[name] = factory(self)
+        return self._cache[name]
+
+# ==============================================================================
+# Magic methods
+# ==============================================================================
+
+    def __setattr__(self, name, value):
+        """
+        """
+        raise AttributeError("An equilibrium problem is immutable. Use replace() instead.")
+
+    def __repr__(self):
+        """
+        """
+        tpl = "{}(nodes={}, edges={}, sequences={}, indirect deviation edges={})"
+        return tpl.format(self.__class__.__name__,
+                          self.number_of_nodes(),
+                          self.number_of_edges(),
+                          self.number_of_sequences(),
+                          self.number_of_indirect_deviation_edges())
+
+# ==============================================================================
+# Helpers
+# ==============================================================================
+
+
+def _csr(nodes, node_index, edge_index, connected_edges):
+    """
+    Assemble a compressed sparse row adjacency from a connected-edges query.
+    """
+    ptr = [0]
+    neighbors = []
+    edges = []
+
+    for node in nodes:
+        for u, v in connected_edges(node):
+            other = u if u != node else v
+            neighbors.append(node_index[other])
+            edges.append(edge_index[(u, v)])
+        ptr.append(len(neighbors))
+
+    ptr = np.array(ptr, dtype=np.int64)
+    neighbors = np.array(neighbors, dtype=np.int64)
+    edges = np.array(edges, dtype=np.int64)
+
+    return ptr, neighbors, edges
+
+
+def _array(values):
+    """
+    Pack topology values into a float array.
+
+    Notes
+    -----
+    Values that are being traced by ``autograd`` are packed into an ``autograd`` array.
+    """
+    try:
+        return np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        return anp.array(values)
+
+
+def _equal(value, other):
+    """
+    Compare two structural values of a problem.
+    """
+    if value is other:
+        return True
+
+    if isinstance(value, tuple) and isinstance(other, tuple):
+        if len(value) != len(other):
+            return False
+        return all(_equal(a, b) for a, b in zip(value, other))
+
+    if isinstance(value, np.ndarray) or isinstance(other, np.ndarray):
+        return np.array_equal(value, other)
+
+    return value == other
+
+
+def _freeze(value):
+    """
+    Make numpy arrays read-only.
+    """
+    if isinstance(value, tuple):
+        for item in value:
+            _freeze(item)
+    elif isinstance(value, np.ndarray):
+        value.flags.writeable = False
+
+# ==============================================================================
+# Main
+# ==============================================================================
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,358 @@
+import numpy as np
+
+from compas_cem.diagrams import FormDiagram
+
+
+__all__ = ["EquilibriumResult"]
+
+# ==============================================================================
+# Equilibrium Result
+# ==============================================================================
+
+
+class EquilibriumResult(object):
+    """
+    A compact equilibrium state, stored in arrays that share the index maps of a problem.
+
+    Parameters
+    ----------
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+        The compiled problem that was equilibrated.
+    xyz : ``np.ndarray``
+        The node coordinates. Shape ``(n, 3)``.
+    forces : ``np.ndarray``
+        The signed edge forces. Shape ``(m, )``.
+    directions : ``np.ndarray``
+        The unit direction of every trail edge. Zero at deviation edges. Shape ``(m, 3)``.
+    reactions : ``np.ndarray``
+        The reaction forces. Zero away from the support nodes. Shape ``(n, 3)``.
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`, optional
+        The topology diagram the problem was compiled from.
+        It is required to materialise a form diagram.
+        Defaults to ``None``.
+
+    Attributes
+    ----------
+    lengths : ``np.ndarray``
+        The edge lengths, signed like the edge forces. Shape ``(m, )``.
+    form : :class:`compas_cem.diagrams.FormDiagram`
+        The form diagram of the equilibrium state, created on first access.
+
+    Notes
+    -----
+    Rows follow ``problem.nodes`` and ``problem.edges``. Use ``problem.node_index``
+    and ``problem.edge_index`` to map node and edge keys to rows.
+
+    The queries of a result are answered from its arrays. Any other attribute,
+    like the methods of the network API, is looked up on ``form``. The topology
+    diagram must not be modified before the form diagram is materialised.
+    """
+    def __init__(self, problem, xyz, forces, directions, reactions, topology=None):
+        self.problem = problem
+        self.topology = topology
+
+        self.xyz = xyz
+        self.forces = forces
+        self.directions = directions
+        self.reactions = reactions
+
+        rows = problem.cached("edge_node_rows", _edge_node_rows)
+        lengths = np.linalg.norm(xyz[rows[:, 0]] - xyz[rows[:, 1]], axis=1)
+        self.lengths = np.copysign(lengths, forces)
+
+        self._form = None
+
+# ==============================================================================
+# Constructors
+# ==============================================================================
+
+    @classmethod
+    def from_arrays(cls, problem, xyz, trail_forces, trail_directions, reactions, topology=None):
+        """
+        Create a result from the arrays output by a vectorized solver.
+
+        Parameters
+        ----------
+        problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+            The compiled problem that was equilibrated.
+        xyz : ``np.ndarray``
+            The node coordinates, in problem order. Shape ``(n, 3)``.
+        trail_forces : ``np.ndarray``
+            The forces of the trail edges, in the order of the nodes they leave.
+        trail_directions : ``np.ndarray``
+            The directions of the trail edges, in the order of the nodes they leave.
+        reactions : ``np.ndarray``
+            The reaction forces of the support nodes, in problem order.
+        topology : :class:`compas_cem.diagrams.TopologyDiagram`, optional
+            The topology diagram the problem was compiled from.
+            Defaults to ``None``.
+
+        Returns
+        -------
+        result : :class:`compas_cem.equilibrium.EquilibriumResult`
+            The equilibrium result.
+        """
+        edges = problem.trail_edges[~problem.supports]
+        nodes = np.flatnonzero(problem.supports)
+
+        return cls._from_rows(problem, xyz, edges, trail_forces, trail_directions, nodes, reactions, topology)
+
+    @classmethod
+    def from_equilibrium_state(cls, problem, eq_state, topology=None):
+        """
+        Create a result from an equilibrium state.
+
+        Parameters
+        ----------
+        problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+            The compiled problem that was equilibrated.
+        eq_state : ``dict``
+            The node positions, trail forces, trail directions and reaction forces.
+        topology : :class:`compas_cem.diagrams.TopologyDiagram`, optional
+            The topology diagram the problem was compiled from.
+            Defaults to ``None``.
+
+        Returns
+        -------
+        result : :class:`compas_cem.equilibrium.EquilibriumResult`
+            The equilibrium result.
+        """
+        node_xyz = eq_state["node_xyz"]
+        xyz = np.array([node_xyz[node] for node in problem.nodes], dtype=float).reshape((-1, 3))
+
+        trail_forces = eq_state["trail_forces"]
+        trail_directions = eq_state["trail_directions"]
+        reaction_forces = eq_state["reaction_forces"]
+
+        edges = [problem.edge_index[edge] for edge in trail_forces]
+        directions = [trail_directions[edge] for edge in trail_forces]
+        nodes = [problem.node_index[node] for node in reaction_forces]
+
+        return cls._from_rows(problem,
+                              xyz,
+                              edges,
+                              list(trail_forces.values()),
+                              directions,
+                              nodes,
+                              list(reaction_forces.values()),
+                              topology)
+
+    @classmethod
+    def _from_rows(cls, problem, xyz, edges, trail_forces, trail_directions, nodes, reactions, topology):
+        """
+        Scatter the values of the trail edges and the support nodes into full arrays.
+        """
+        n = problem.number_of_nodes()
+        m = problem.number_of_edges()
+
+        forces = np.array(problem.forces, dtype=float)
+        forces[edges] = np.reshape(trail_forces, (-1, ))
+
+        directions = np.zeros((m, 3))
+        directions[edges] = np.reshape(trail_directions, (-1, 3))
+
+        reaction_forces = np.zeros((n, 3))
+        reaction_forces[nodes] = np.reshape(reactions, (-1, 3))
+
+        return cls(problem, np.array(xyz, dtype=float), forces, directions, reaction_forces, topology)
+
+# ==============================================================================
+# Queries
+# ==============================================================================
+
+    def number_of_nodes(self):
+        """
+        The number of nodes.
+        """
+        return self.problem.number_of_nodes()
+
+    def number_of_edges(self):
+        """
+        The number of edges.
+        """
+        return self.problem.number_of_edges()
+
+    def nodes(self):
+        """
+        Iterate over the node keys, in problem order.
+        """
+        return iter(self.problem.nodes)
+
+    def edges(self):
+        """
+        Iterate over the edge keys, in problem order.
+        """
+        return iter(self.problem.edges)
+
+    def node_coordinates(self, node):
+        """
+        Gets the xyz coordinates of a node.
+
+        Parameters
+        ----------
+        node : ``int``
+            A node key.
+
+        Returns
+        -------
+        xyz : ``list``
+            The coordinates of the node.
+        """
+        return self.xyz[self.problem.node_index[node]].tolist()
+
+    def reaction_force(self, node):
+        """
+        Gets the reaction force vector at a node.
+
+        Parameters
+        ----------
+        node : ``int``
+            A node key.
+
+        Returns
+        -------
+        reaction : ``list``
+            The reaction force vector. Zero if the node is not a support.
+        """
+        return self.reactions[self.problem.node_index[node]].tolist()
+
+    def edge_force(self, edge):
+        """
+        Gets the force value at an edge.
+
+        Parameters
+        ----------
+        edge : ``tuple``
+            The u, v edge key.
+
+        Returns
+        -------
+        force : ``float``
+            The force value in the edge.
+        """
+        return float(self.forces[self.problem.edge_index[tuple(edge)]])
+
+    def edge_length_2(self, edge):
+        """
+        Gets the length of an edge, signed like its force.
+
+        Parameters
+        ----------
+        edge : ``tuple``
+            The u, v edge key.
+
+        Returns
+        -------
+        length : ``float``
+            The edge length.
+        """
+        return float(self.lengths[self.problem.edge_index[tuple(edge)]])
+
+# ==============================================================================
+# Conversions
+# ==============================================================================
+
+    def to_equilibrium_state(self):
+        """
+        Convert the result into an equilibrium state dictionary.
+
+        Returns
+        -------
+        eq_state : ``dict``
+            The node positions, trail forces, trail directions and reaction forces.
+        """
+        problem = self.problem
+        nodes = problem.nodes
+        edges = problem.edges
+        trail_edges = problem.trail_edges[~problem.supports].tolist()
+        supports = np.flatnonzero(problem.supports).tolist()
+
+        eq_state = {}
+        eq_state["node_xyz"] = {node: self.xyz[i] for i, node in enumerate(nodes)}
+        eq_state["trail_forces"] = {edges[e]: self.forces[e] for e in trail_edges}
+        eq_state["trail_directions"] = {edges[e]: self.directions[e] for e in trail_edges}
+        eq_state["reaction_forces"] = {nodes[n]: self.reactions[n] for n in supports}
+
+        return eq_state
+
+    def to_form_diagram(self):
+        """
+        Create a new form diagram with the equilibrium state of the result.
+
+        Returns
+        -------
+        form : :class:`compas_cem.diagrams.FormDiagram`
+            A form diagram.
+        """
+        if self.topology is None:
+            raise ValueError("A form diagram needs the topology diagram the result was computed from!")
+
+        form = FormDiagram.from_topology_diagram(self.topology)
+
+        # write the attribute dictionaries directly, one row at a time
+        for node, (x, y, z) in zip(self.problem.nodes, self.xyz.tolist()):
+            attr = form.node[node]
+            attr["x"] = x
+            attr["y"] = y
+            attr["z"] = z
+
+        for n in np.flatnonzero(self.problem.supports).tolist():
+            rx, ry, rz = self.reactions[n].tolist()
+            attr = form.node[self.problem.nodes[n]]
+            attr["rx"] = rx
+            attr["ry"] = ry
+            attr["rz"] = rz
+
+        for (u, v), force, length in zip(self.problem.edges, self.forces.tolist(), self.lengths.tolist()):
+            attr = form.edge[u][v]
+            attr["force"] = force
+            attr["length"] = length
+
+        return form
+
+    @property
+    def form(self):
+        """
+        The form diagram of the equilibrium state, materialised once on first access.
+        """
+        if self._form is None:
+            self._form = self.to_form_diagram()
+        return self._form
+
+# ==============================================================================
+# Magic methods
+# ==============================================================================
+
+    def __getattr__(self, name):
+        """
+        Look up the attributes that a result does not have on its form diagram.
+        """
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.form, name)
+
+    def __repr__(self):
+        """
+        """
+        tpl = "{}(nodes={}, edges={}, materialised={})"
+        return tpl.format(self.__class__.__name__,
+                          self.number_of_nodes(),
+                          self.number_of_edges(),
+                          self._form is not None)
+
+# ==============================================================================
+# Helpers
+# ==============================================================================
+
+
+def _edge_node_rows(problem):
+    """
+    The rows of the two nodes of every edge.
+    """
+    index = problem.node_index
+    rows = [(index[u], index[v]) for u, v in problem.edges]
+    return np.array(rows, dtype=np.int64).reshape((-1, 2))
+
+
+if __name__ == "__main__":
+    pass
@@ -5,6 +5,7 @@ from ghpythonlib.componentbase import executingcomponent as component
 from scriptcontext import sticky
 
 from compas.rpc import Proxy
+from compas_cem import PROXY_PORT
 
 
 class ConstrainedFormFindingComponent(component):
@@ -19,36 +20,112 @@ class ConstrainedFormFindingComponent(component):
         if not (solve and topology and constraints and parameters):
             return
 
-        topology = topology.copy()
+        # clean constraints and parameters from None and repetitions
+        constraints = unique_elements(constraints)
+        parameters = unique_elements(parameters)
 
-        # clean constraints and parameters from None
-        constraints = [c for c in constraints if c is not None]
-        parameters = [p for p in parameters if p is not None]
-
-        # fetch optimization proxy from scriptcontext
+        # fetch optimization proxy from scriptcontext, and keep a new one alive
         opt = sticky.get("proxy_cem")
-        proxy_temp_exists = opt is not None
+        if opt is None:
+            opt = Proxy("compas_cem.optimization", port=PROXY_PORT)
+            sticky["proxy_cem"] = opt
+
+        # the session of this component resident on the proxy server
+        session_key = "proxy_cem_session_{}".format(self.InstanceGuid)
+        state = sticky.get(session_key)
+
+        session = None
+        if state is not None:
+            if state["proxy"] is opt:
+                session = state["session"]
+                try:
+                    elements = update_session(opt, session, state, topology, constraints, parameters)
+                except Exception:
+                    session = None
+            # do not leave a stale session behind on the server
+            if session is None:
+                close_session(state)
+
+        # ship the whole problem only if there is no session to update
+        if session is None:
+            session, ids = opt.session_start_proxy(topology=topology,
+                                                   constraints=constraints,
+                                                   parameters=parameters)
+            elements = {"constraints": dict(zip(ids["constraints"], constraints)),
+                        "parameters": dict(zip(ids["parameters"], parameters))}
 
-        # create temporary proxy server if unavailable from scriptcontext
-        if not proxy_temp_exists:
-            opt = Proxy("compas_cem.optimization")
+        sticky[session_key] = {"proxy": opt,
+                               "session": session,
+                               "topology": topology,
+                               "constraints": elements["constraints"],
+                               "parameters": elements["parameters"]}
 
         # solve constrained form-finding problem
-        solution = opt.solve_proxy(topology=topology,
-                                   constraints=constraints,
-                                   parameters=parameters,
-                                   algorithm=algorithm,
-                                   iters=iters_max,
-                                   eps=eps,
-                                   kappa=kappa,
-                                   tmax=tmax,
-                                   eta=eta)
-
-        # shut down temporary proxy
-        if not proxy_temp_exists:
-            opt.stop_server()
+        solution = opt.session_solve_proxy(session=session,
+                                           algorithm=algorithm,
+                                           iters=iters_max,
+                                           eps=eps,
+                                           kappa=kappa,
+                                           tmax=tmax,
+                                           eta=eta)
 
         # unpack solution
         topology, form, objective, grad_norm, iters, time, status = solution
 
         return topology, form, objective, grad_norm, iters, time, status
+
+
+def unique_elements(elements):
+    """
+    The constraints or the parameters of a list, without None and without repeated objects.
+    """
+    seen = set()
+    unique = []
+    for element in elements:
+        if element is None or id(element) in seen:
+            continue
+        seen.add(id(element))
+        unique.append(element)
+    return unique
+
+
+def update_session(opt, session, state, topology, constraints, parameters):
+    """
+    Send the constraints and parameters that changed since the last solve to a session.
+    Return the elements of the session by their id.
+
+    Elements are matched by object identity, because upstream components create new
+    objects every time their inputs change.
+    """
+    elements = {}
+    added = {}
+    removed = []
+
+    for name, current in (("constraints", constraints), ("parameters", parameters)):
+        last = state[name]
+        current_ids = set(id(e) for e in current)
+        last_ids = set(id(e) for e in last.values())
+        elements[name] = dict((eid, e) for eid, e in last.items() if id(e) in current_ids)
+        added[name] = [e for e in current if id(e) not in last_ids]
+        removed.extend(eid for eid, e in last.items() if id(e) not in current_ids)
+
+    ids = opt.session_update_proxy(session=session,
+                                   topology=topology if topology is not state["topology"] else None,
+                                   constraints=added["constraints"] or None,
+                                   parameters=added["parameters"] or None,
+                                   remove=removed or None)
+
+    for name in ("constraints", "parameters"):
+        elements[name].update(zip(ids[name], added[name]))
+
+    return elements
+
+
+def close_session(state):
+    """
+    Discard the session of a component on its proxy server, if the server is still there.
+    """
+    try:
+        state["proxy"].session_close_proxy(session=state["session"])
+    except Exception:
+        pass
@@ -12,7 +12,22 @@ Optimizers
     :nosignatures:
 
     Optimizer
+    FiniteDifferencesPool
+    iter_multistart
+    levenberg_marquardt
+    jacobian_row_groups
     solve_proxy
+    OptimizationSession
+    session_start_proxy
+    session_update_proxy
+    session_solve_proxy
+    session_close_proxy
+    OptimizationJob
+    job_submit_proxy
+    job_poll_proxy
+    job_cancel_proxy
+    job_latest_proxy
+    job_result_proxy
 
 Optimization Constraints
 ========================
@@ -24,9 +39,15 @@ Optimization Constraints
     PointConstraint
     LineConstraint
     PlaneConstraint
+    PolylineConstraint
+    PolylineIndex
+    TrimeshConstraint
+    MeshIndex
     DeviationEdgeLengthConstraint
     TrailEdgeForceConstraint
     ReactionForceConstraint
+    ConstraintGroup
+    compile_constraints
 
 Optimization Parameters
 =======================
@@ -60,7 +81,13 @@ if not compas.IPY:
     from .nlopt import *  # noqa F403
     from .objective_func import *  # noqa F403
     from .grad import *  # noqa F403
+    from .constraint_groups import *  # noqa F403
+    from .least_squares import *  # noqa F403
+    from .grad_parallel import *  # noqa F403
+    from .multistart import *  # noqa F403
     from .optimizer import *  # noqa F403
+    from .session import *  # noqa F403
+    from .jobs import *  # noqa F403
 
 
 __all__ = [name for name in dir() if not name.startswith('_')]
@@ -0,0 +1,502 @@
+import numpy as np
+
+import autograd.numpy as anp
+
+from compas_cem.equilibrium.force_vectorized import equilibrium_state_index
+
+from compas_cem.optimization.constraints import PointConstraint
+from compas_cem.optimization.constraints import PlaneConstraint
+from compas_cem.optimization.constraints import LineConstraint
+from compas_cem.optimization.constraints import PolylineConstraint
+from compas_cem.optimization.constraints import TrimeshConstraint
+from compas_cem.optimization.constraints import TrailEdgeForceConstraint
+from compas_cem.optimization.constraints import ReactionForceConstraint
+from compas_cem.optimization.constraints import DeviationEdgeLengthConstraint
+from compas_cem.optimization.constraints import EdgeDirectionConstraint
+
+
+__all__ = ["ConstraintGroup",
+           "PointConstraintGroup",
+           "PlaneConstraintGroup",
+           "LineConstraintGroup",
+           "PolylineConstraintGroup",
+           "TrimeshConstraintGroup",
+           "TrailEdgeForceConstraintGroup",
+           "ReactionForceConstraintGroup",
+           "DeviationEdgeLengthConstraintGroup",
+           "EdgeDirectionConstraintGroup",
+           "compile_constraints"]
+
+# ------------------------------------------------------------------------------
+# Compilation
+# ------------------------------------------------------------------------------
+
+
+def compile_constraints(constraints, problem):
+    """
+    Compile constraints into groups that evaluate all the constraints of a type at once.
+
+    Parameters
+    ----------
+    constraints : ``list``
+        The constraints to compile.
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+        The equilibrium problem the constraints are evaluated on.
+
+    Returns
+    -------
+    groups : ``list``
+        The constraint groups, one per constraint type.
+    ungrouped : ``list``
+        The constraints without a group, to evaluate one by one on an equilibrium state.
+
+    Notes
+    -----
+    Constraints are grouped by their exact type.
+    Instances of subclasses of the built-in constraints are left ungrouped,
+    because they may redefine how their penalty is calculated.
+    """
+    groups_cls = {group_cls.constraint_type: group_cls for group_cls in CONSTRAINT_GROUPS}
+
+    members = {}
+    ungrouped = []
+    for constraint in constraints:
+        group_cls = groups_cls.get(type(constraint))
+        if group_cls is None:
+            ungrouped.append(constraint)
+            continue
+        members.setdefault(group_cls, []).append(constraint)
+
+    groups = [group_cls(members[group_cls], problem) for group_cls in CONSTRAINT_GROUPS if group_cls in members]
+
+    return groups, ungrouped
+
+# ------------------------------------------------------------------------------
+# Base group
+# ------------------------------------------------------------------------------
+
+
+class ConstraintGroup(object):
+    """
+    The blueprint of a group of constraints of the same type.
+
+    Parameters
+    ----------
+    constraints : ``list``
+        The constraints in the group.
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+        The equilibrium problem the constraints are evaluated on.
+
+    Notes
+    -----
+    A group reads the arrays output by ``equilibrium_vectorized``, that is,
+    the node positions, the trail forces, the trail directions and the reaction forces.
+    Its residuals are a single vectorized expression that ``autograd`` can differentiate.
+    The penalty of the group is the sum of the squares of its residuals.
+    """
+    constraint_type = None
+
+    def __init__(self, constraints, problem):
+        self.index = equilibrium_state_index(problem)
+        self.weights = np.array([constraint.weight for constraint in constraints], dtype=float)
+        self.scales = np.sqrt(self.weights)
+
+    def __len__(self):
+        return len(self.weights)
+
+    def number_of_residuals(self):
+        """
+        The number of residual components of the group.
+        """
+        return len(self) * self.residual_size
+
+    def residuals(self, arrays):
+        """
+        The weighted residual components of the constraints in the group.
+
+        Parameters
+        ----------
+        arrays : ``tuple``
+            The node positions, trail forces, trail directions and reaction forces.
+
+        Returns
+        -------
+        residuals : ``np.array``
+            The residual components, constraint by constraint.
+        """
+        raise NotImplementedError
+
+    def residuals_vjp(self, arrays, residuals_bar, arrays_bar):
+        """
+        Accumulate the vector-Jacobian product of the residuals with respect to the arrays of an equilibrium state.
+
+        Parameters
+        ----------
+        arrays : ``tuple``
+            The node positions, trail forces, trail directions and reaction forces.
+        residuals_bar : ``np.array``
+            The adjoint of the residuals.
+        arrays_bar : ``tuple``
+            The adjoints of the arrays. Updated in place.
+        """
+        raise NotImplementedError
+
+    def sparsity(self, patterns):
+        """
+        The parameters every residual component depends on.
+
+        Parameters
+        ----------
+        patterns : ``tuple``
+            The boolean dependency patterns of the arrays of an equilibrium state on some parameters,
+            with one row per array row and one column per parameter.
+
+        Returns
+        -------
+        pattern : ``np.array``
+            The boolean dependency pattern of the residuals, one row per residual component.
+        """
+        raise NotImplementedError
+
+    def penalty(self, arrays):
+        """
+        The sum of the penalties of the constraints in the group.
+
+        Parameters
+        ----------
+        arrays : ``tuple``
+            The node positions, trail forces, trail directions and reaction forces.
+
+        Returns
+        -------
+        penalty : ``float``
+            The penalty.
+        """
+        residuals = self.residuals(arrays)
+        return anp.sum(residuals * residuals)
+
+    def gradient(self, arrays, arrays_bar):
+        """
+        Accumulate the gradient of the penalty with respect to the arrays of an equilibrium state.
+
+        Parameters
+        ----------
+        arrays : ``tuple``
+            The node positions, trail forces, trail directions and reaction forces.
+        arrays_bar : ``tuple``
+            The gradients of the arrays. Updated in place.
+        """
+        self.residuals_vjp(arrays, 2.0 * self.residuals(arrays), arrays_bar)
+
+    def _rows(self, name, keys):
+        """
+        The rows of the arrays of an equilibrium state that correspond to some keys.
+        """
+        index = self.index[name]
+        return np.array([index[key] for key in keys], dtype=np.int64)
+
+    def _edge_rows(self, keys):
+        """
+        The rows of the start and end nodes of some edges.
+        """
+        u, v = zip(*keys)
+        return self._rows("node_xyz", u), self._rows("node_xyz", v)
+
+# ------------------------------------------------------------------------------
+# Node groups
+# ------------------------------------------------------------------------------
+
+
+class PointConstraintGroup(ConstraintGroup):
+    """
+    A group of point constraints.
+    """
+    constraint_type = PointConstraint
+    residual_size = 3
+
+    def __init__(self, constraints, problem):
+        super(PointConstraintGroup, self).__init__(constraints, problem)
+        self.rows = self._rows("node_xyz", [constraint.key() for constraint in constraints])
+        self.points = np.array([list(constraint.target()) for constraint in constraints], dtype=float)
+
+    def residuals(self, arrays):
+        return anp.ravel(self.scales[:, None] * (arrays[0][self.rows] - self.points))
+
+    def residuals_vjp(self, arrays, residuals_bar, arrays_bar):
+        np.add.at(arrays_bar[0], self.rows, self.scales[:, None] * np.reshape(residuals_bar, (-1, 3)))
+
+    def sparsity(self, patterns):
+        return np.repeat(patterns[0][self.rows], 3, axis=0)
+
+
+class PlaneConstraintGroup(ConstraintGroup):
+    """
+    A group of plane constraints.
+    """
+    constraint_type = PlaneConstraint
+    residual_size = 1
+
+    def __init__(self, constraints, problem):
+        super(PlaneConstraintGroup, self).__init__(constraints, problem)
+        self.rows = self._rows("node_xyz", [constraint.key() for constraint in constraints])
+
+        origins, normals = zip(*[constraint._target for constraint in constraints])
+        normals = np.array([list(normal) for normal in normals], dtype=float)
+
+        self.origins = np.array([list(origin) for origin in origins], dtype=float)
+        self.normals = normals / np.linalg.norm(normals, axis=1, keepdims=True)
+
+    def residuals(self, arrays):
+        return self.scales * anp.sum((arrays[0][self.rows] - self.origins) * self.normals, axis=1)
+
+    def residuals_vjp(self, arrays, residuals_bar, arrays_bar):
+        np.add.at(arrays_bar[0], self.rows, (self.scales * residuals_bar)[:, None] * self.normals)
+
+    def sparsity(self, patterns):
+        return patterns[0][self.rows]
+
+
+class LineConstraintGroup(ConstraintGroup):
+    """
+    A group of line constraints.
+    """
+    constraint_type = LineConstraint
+    residual_size = 3
+
+    def __init__(self, constraints, problem):
+        super(LineConstraintGroup, self).__init__(constraints, problem)
+        self.rows = self._rows("node_xyz", [constraint.key() for constraint in constraints])
+
+        starts, ends = zip(*[constraint._target for constraint in constraints])
+        starts = np.array([list(start) for start in starts], dtype=float)
+        directions = np.array([list(end) for end in ends], dtype=float) - starts
+
+        self.starts = starts
+        self.directions = directions / np.linalg.norm(directions, axis=1, keepdims=True)
+
+    def residuals(self, arrays):
+        vectors = arrays[0][self.rows] - self.starts
+        return anp.ravel(self.scales[:, None] * self._project(vectors))
+
+    def residuals_vjp(self, arrays, residuals_bar, arrays_bar):
+        # the projection on the normal plane of a line is symmetric
+        vectors_bar = self.scales[:, None] * np.reshape(residuals_bar, (-1, 3))
+        np.add.at(arrays_bar[0], self.rows, self._project(vectors_bar))
+
+    def sparsity(self, patterns):
+        return np.repeat(patterns[0][self.rows], 3, axis=0)
+
+    def _project(self, vectors):
+        """
+        Project vectors onto the planes normal to the lines.
+        """
+        projections = anp.sum(vectors * self.directions, axis=1)
+        return vectors - projections[:, None] * self.directions
+
+
+class _ClosestPointConstraintGroup(ConstraintGroup):
+    """
+    The blueprint of a group of constraints that pull nodes to the closest points on indexed targets.
+
+    Notes
+    -----
+    The closest points of all the nodes pulled to the same target are found
+    with a single query to the spatial index of the target.
+    """
+    residual_size = 3
+
+    def __init__(self, constraints, problem):
+        super(_ClosestPointConstraintGroup, self).__init__(constraints, problem)
+        self.rows = self._rows("node_xyz", [constraint.key() for constraint in constraints])
+
+        # one index per distinct target, with the positions of its constraints in the group
+        indices = {}
+        positions = {}
+        for position, constraint in enumerate(constraints):
+            target = id(constraint._target)
+            if target not in indices:
+                indices[target] = constraint.index()
+            positions.setdefault(target, []).append(position)
+
+        self.targets = [(indices[target], np.array(positions[target], dtype=np.int64)) for target in indices]
+
+        order = np.concatenate([positions for _, positions in self.targets])
+        self.order = np.argsort(order)
+
+    def residuals(self, arrays):
+        points = arrays[0][self.rows]
+        closest = anp.concatenate([index.closest_points(points[positions]) for index, positions in self.targets])
+        return anp.ravel(self.scales[:, None] * (points - closest[self.order]))
+
+    def residuals_vjp(self, arrays, residuals_bar, arrays_bar):
+        points = arrays[0][self.rows]
+        vectors_bar = self.scales[:, None] * np.reshape(residuals_bar, (-1, 3))
+
+        # remove the components along which the closest points slide with the nodes
+        for index, positions in self.targets:
+            tangents = np.reshape(index.tangents(points[positions]), (len(positions), -1, 3))
+            projections = np.einsum("nij,nj->ni", tangents, vectors_bar[positions])
+            vectors_bar[positions] -= np.einsum("nij,ni->nj", tangents, projections)
+
+        np.add.at(arrays_bar[0], self.rows, vectors_bar)
+
+    def sparsity(self, patterns):
+        return np.repeat(patterns[0][self.rows], 3, axis=0)
+
+
+class PolylineConstraintGroup(_ClosestPointConstraintGroup):
+    """
+    A group of polyline constraints.
+    """
+    constraint_type = PolylineConstraint
+
+
+class TrimeshConstraintGroup(_ClosestPointConstraintGroup):
+    """
+    A group of triangle mesh constraints.
+    """
+    constraint_type = TrimeshConstraint
+
+
+class ReactionForceConstraintGroup(ConstraintGroup):
+    """
+    A group of reaction force constraints.
+    """
+    constraint_type = ReactionForceConstraint
+    residual_size = 3
+
+    def __init__(self, constraints, problem):
+        super(ReactionForceConstraintGroup, self).__init__(constraints, problem)
+        self.rows = self._rows("reaction_forces", [constraint.key() for constraint in constraints])
+        self.vectors = np.array([list(constraint.target()) for constraint in constraints], dtype=float)
+
+    def residuals(self, arrays):
+        return anp.ravel(self.scales[:, None] * (arrays[3][self.rows] - self.vectors))
+
+    def residuals_vjp(self, arrays, residuals_bar, arrays_bar):
+        np.add.at(arrays_bar[3], self.rows, self.scales[:, None] * np.reshape(residuals_bar, (-1, 3)))
+
+    def sparsity(self, patterns):
+        return np.repeat(patterns[3][self.rows], 3, axis=0)
+
+# ------------------------------------------------------------------------------
+# Edge groups
+# ------------------------------------------------------------------------------
+
+
+class TrailEdgeForceConstraintGroup(ConstraintGroup):
+    """
+    A group of trail edge force constraints.
+    """
+    constraint_type = TrailEdgeForceConstraint
+    residual_size = 1
+
+    def __init__(self, constraints, problem):
+        super(TrailEdgeForceConstraintGroup, self).__init__(constraints, problem)
+        self.rows = self._rows("trail_forces", [constraint.key() for constraint in constraints])
+        self.forces = np.array([constraint.target() for constraint in constraints], dtype=float)
+
+    def residuals(self, arrays):
+        return self.scales * (arrays[1][self.rows] - self.forces)
+
+    def residuals_vjp(self, arrays, residuals_bar, arrays_bar):
+        np.add.at(arrays_bar[1], self.rows, self.scales * residuals_bar)
+
+    def sparsity(self, patterns):
+        return patterns[1][self.rows]
+
+
+class DeviationEdgeLengthConstraintGroup(ConstraintGroup):
+    """
+    A group of deviation edge length constraints.
+    """
+    constraint_type = DeviationEdgeLengthConstraint
+    residual_size = 1
+
+    def __init__(self, constraints, problem):
+        super(DeviationEdgeLengthConstraintGroup, self).__init__(constraints, problem)
+        self.rows_u, self.rows_v = self._edge_rows([constraint.key() for constraint in constraints])
+        self.lengths = np.array([constraint.target() for constraint in constraints], dtype=float)
+
+    def residuals(self, arrays):
+        xyz = arrays[0]
+        lengths = anp.linalg.norm(xyz[self.rows_u] - xyz[self.rows_v], axis=1)
+        return self.scales * (lengths - self.lengths)
+
+    def residuals_vjp(self, arrays, residuals_bar, arrays_bar):
+        xyz = arrays[0]
+        vectors = xyz[self.rows_u] - xyz[self.rows_v]
+        lengths = np.linalg.norm(vectors, axis=1)
+        vectors = (self.scales * residuals_bar / lengths)[:, None] * vectors
+        np.add.at(arrays_bar[0], self.rows_u, vectors)
+        np.add.at(arrays_bar[0], self.rows_v, -vectors)
+
+    def sparsity(self, patterns):
+        return patterns[0][self.rows_u] | patterns[0][self.rows_v]
+
+
+class EdgeDirectionConstraintGroup(ConstraintGroup):
+    """
+    A group of edge direction constraints.
+    """
+    constraint_type = EdgeDirectionConstraint
+    residual_size = 3
+
+    def __init__(self, constraints, problem):
+        super(EdgeDirectionConstraintGroup, self).__init__(constraints, problem)
+        self.rows_u, self.rows_v = self._edge_rows([constraint.key() for constraint in constraints])
+
+        vectors = np.array([list(constraint._target) for constraint in constraints], dtype=float)
+        self.vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def residuals(self, arrays):
+        units, _ = self._units(arrays[0])
+        return anp.ravel(self.scales[:, None] * (units - self._targets(units)))
+
+    def residuals_vjp(self, arrays, residuals_bar, arrays_bar):
+        units, lengths = self._units(arrays[0])
+        units_bar = self.scales[:, None] * np.reshape(residuals_bar, (-1, 3))
+
+        # chain through the normalization of the edge vectors
+        projections = np.sum(units * units_bar, axis=1)
+        vectors_bar = (units_bar - projections[:, None] * units) / lengths[:, None]
+        np.add.at(arrays_bar[0], self.rows_v, vectors_bar)
+        np.add.at(arrays_bar[0], self.rows_u, -vectors_bar)
+
+    def sparsity(self, patterns):
+        return np.repeat(patterns[0][self.rows_u] | patterns[0][self.rows_v], 3, axis=0)
+
+    def _units(self, xyz):
+        """
+        The unit vectors of the edges, pointing from their start to their end nodes.
+        """
+        vectors = xyz[self.rows_v] - xyz[self.rows_u]
+        lengths = anp.linalg.norm(vectors, axis=1)
+        return vectors / lengths[:, None], lengths
+
+    def _targets(self, units):
+        """
+        The target unit vectors, flipped to point in the same direction as the edges.
+        """
+        signs = anp.where(anp.sum(units * self.vectors, axis=1) < 0.0, -1.0, 1.0)
+        return signs[:, None] * self.vectors
+
+
+# ------------------------------------------------------------------------------
+# Registry
+# ------------------------------------------------------------------------------
+
+# the constraint groups, in the order they are evaluated
+CONSTRAINT_GROUPS = [PointConstraintGroup,
+                     PlaneConstraintGroup,
+                     LineConstraintGroup,
+                     PolylineConstraintGroup,
+                     TrimeshConstraintGroup,
+                     TrailEdgeForceConstraintGroup,
+                     ReactionForceConstraintGroup,
+                     DeviationEdgeLengthConstraintGroup,
+                     EdgeDirectionConstraintGroup]
+
+
+if __name__ == "__main__":
+    pass
@@ -36,9 +36,11 @@ from .force import *  # noqa F403
 from .length import *  # noqa F403
 from .direction import *  # noqa F403
 from .polyline import *  # noqa F403
+from .mesh import *  # noqa F403
 
-# import compas
-# if not compas.IPY:
-#     from .mesh import *
+import compas
+if not compas.IPY:
+    from .polyline_index import *  # noqa F403
+    from .mesh_index import *  # noqa F403
 
 __all__ = [name for name in dir() if not name.startswith('_')]
@@ -1,9 +1,13 @@
 from abc import abstractmethod
 from ast import literal_eval
 
+from math import sqrt
+
 from compas.data.encoders import cls_from_dtype
 
 from compas.geometry import distance_point_point_sqrd
+from compas.geometry import subtract_vectors
+from compas.geometry import scale_vector
 
 from compas_cem.data import Data
 
@@ -55,6 +59,45 @@ class Constraint(Data):
         """
         raise NotImplementedError
 
+    def residual(self, data):
+        """
+        Calculate the residual components of the constraint.
+
+        Parameters
+        ----------
+        data : ``dict``
+            An equilibrium state.
+
+        Returns
+        -------
+        residual : ``list``
+            The weighted residual components.
+            The penalty of the constraint is the sum of their squares.
+        """
+        raise NotImplementedError
+
+    def gradient(self, data):
+        """
+        Calculate the gradient of the penalty with respect to an equilibrium state.
+
+        Parameters
+        ----------
+        data : ``dict``
+            An equilibrium state.
+
+        Returns
+        -------
+        gradient : ``dict``
+            The partial derivatives of the penalty, keyed like the equilibrium state.
+            For example, ``{"node_xyz": {node: [dx, dy, dz]}}``.
+
+        Notes
+        -----
+        Constraints without an analytic gradient raise a ``NotImplementedError``.
+        In that case, optimizers fall back to automatic differentiation.
+        """
+        raise NotImplementedError
+
     @property
     def data(self):
         """
@@ -101,6 +144,22 @@ class Constraint(Data):
         target_cls = cls_from_dtype(data["target_dtype"])
         self._target = target_cls.from_data(data["target"])
 
+    def __getstate__(self):
+        """
+        The state of the constraint for pickling.
+
+        Notes
+        -----
+        Unlike ``data``, the state also supports targets that are plain sequences of numbers.
+        """
+        return self.__dict__
+
+    def __setstate__(self, state):
+        """
+        Restore the state of the constraint after unpickling.
+        """
+        self.__dict__.update(state)
+
     def __repr__(self):
         st = "{0}(key={1!r}, target={2!r}, weight={3!r})"
         return st.format(self.__class__.__name__, self._key, self._target, self._weight)
@@ -134,6 +193,39 @@ class VectorConstraint(Constraint):
 
         return distance_point_point_sqrd(vec_a, vec_b) * self.weight
 
+    def penalty_gradient(self, data):
+        """
+        The derivative of the penalty with respect to the reference vector.
+
+        Notes
+        -----
+        This is exact for constant targets and for targets that are the closest
+        point to the reference on a plane, a line, a polyline or a mesh.
+        """
+        vec_a = self.reference(data)
+        vec_b = self.target(vec_a)
+
+        return scale_vector(subtract_vectors(vec_a, vec_b), 2.0 * self.weight)
+
+    def residual(self, data):
+        """
+        The difference between the current and the target vector, scaled by the square root of the weight.
+        """
+        vec_a = self.reference(data)
+        vec_b = self.target(vec_a)
+
+        return scale_vector(subtract_vectors(vec_a, vec_b), sqrt(self.weight))
+
+    def gradient(self, data):
+        """
+        The gradient of the penalty with respect to the position of the node of the constraint.
+
+        Notes
+        -----
+        Constraints whose reference is not the position of a node override this method.
+        """
+        return {"node_xyz": {self.key(): self.penalty_gradient(data)}}
+
 # ------------------------------------------------------------------------------
 # Float Constraint
 # ------------------------------------------------------------------------------
@@ -164,6 +256,18 @@ class FloatConstraint(Constraint):
 
         return diff * diff * self.weight
 
+    def penalty_gradient(self, data):
+        """
+        The derivative of the penalty with respect to the reference float.
+        """
+        return 2.0 * (self.reference(data) - self.target()) * self.weight
+
+    def residual(self, data):
+        """
+        The difference between the current and the target float, scaled by the square root of the weight.
+        """
+        return [(self.reference(data) - self.target()) * sqrt(self.weight)]
+
     @property
     def data(self):
         """
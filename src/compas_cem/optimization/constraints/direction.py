@@ -35,6 +35,21 @@ class EdgeDirectionConstraint(VectorConstraint):
         vector = self._vector_two_points(self.key(), data)
         return self._unitized_vector(vector)
 
+    def gradient(self, data):
+        """
+        The gradient of the penalty with respect to the positions of the edge nodes.
+        """
+        u, v = self.key()
+        vector = self._vector_two_points(self.key(), data)
+        unit = self._unitized_vector(vector)
+
+        # chain the penalty gradient through the normalization of the edge vector
+        grad = self.penalty_gradient(data)
+        grad = subtract_vectors(grad, scale_vector(unit, dot_vectors(unit, grad)))
+        grad = scale_vector(grad, 1.0 / (length_vector_sqrd(vector) ** 0.5))
+
+        return {"node_xyz": {u: scale_vector(grad, -1.0), v: grad}}
+
     @staticmethod
     def _vector_two_points(edge, data):
         """
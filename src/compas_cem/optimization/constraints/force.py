@@ -18,6 +18,12 @@ class TrailEdgeForceConstraint(FloatConstraint):
         """
         return data["trail_forces"][self.key()]
 
+    def gradient(self, data):
+        """
+        The gradient of the penalty with respect to the trail force.
+        """
+        return {"trail_forces": {self.key(): self.penalty_gradient(data)}}
+
 
 class ReactionForceConstraint(VectorConstraint):
     """
@@ -31,6 +37,12 @@ class ReactionForceConstraint(VectorConstraint):
         """
         return data["reaction_forces"][self.key()]
 
+    def gradient(self, data):
+        """
+        The gradient of the penalty with respect to the reaction force.
+        """
+        return {"reaction_forces": {self.key(): self.penalty_gradient(data)}}
+
 
 if __name__ == "__main__":
 
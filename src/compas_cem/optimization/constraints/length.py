@@ -1,4 +1,6 @@
 from compas.geometry import distance_point_point
+from compas.geometry import subtract_vectors
+from compas.geometry import scale_vector
 
 from compas_cem.optimization.constraints import FloatConstraint
 
@@ -29,6 +31,16 @@ class DeviationEdgeLengthConstraint(FloatConstraint):
 
         return length
 
+    def gradient(self, data):
+        """
+        The gradient of the penalty with respect to the positions of the edge nodes.
+        """
+        u, v = self.key()
+        vector = subtract_vectors(data["node_xyz"][u], data["node_xyz"][v])
+        vector = scale_vector(vector, self.penalty_gradient(data) / self.reference(data))
+
+        return {"node_xyz": {u: vector, v: scale_vector(vector, -1.0)}}
+
 
 if __name__ == "__main__":
     pass
@@ -1,4 +1,4 @@
-from compas_cem.optimization.constraint import VectorConstraint
+from compas_cem.optimization.constraints import VectorConstraint
 
 
 __all__ = ["TrimeshConstraint"]
@@ -8,24 +8,44 @@ class TrimeshConstraint(VectorConstraint):
     """
     Pulls the xyz position of a node to a target triangular mesh.
 
-    TODO: trimesh complaints with autograd boxes when parsing into array.
+    Notes
+    -----
+    The target is a :class:`compas.datastructures.Mesh`, a ``trimesh.Trimesh``,
+    or a tuple with the vertices and the faces of a mesh.
+    The triangles of the mesh are indexed once, on the first evaluation.
+    The target mesh is assumed not to change after that.
     """
     def __init__(self, node=None, trimesh=None, weight=1.0):
         super(TrimeshConstraint, self).__init__(node, trimesh, weight)
+        self._index = None
 
     def reference(self, data):
         """
+        The current xyz coordinates of the node.
         """
         return data["node_xyz"][self.key()]
 
-    def target(self, ref):
+    def target(self, reference):
         """
+        The closest point on the target mesh.
         """
-        points = [ref]
-        trimesh = self._target
-        closest, dist, _ = trimesh.nearest.on_surface(points)
+        return self.index().closest_point(reference)
 
-        return closest.tolist().pop()
+    def index(self):
+        """
+        The bounding volume hierarchy of the triangles of the target mesh.
+
+        Returns
+        -------
+        index : :class:`compas_cem.optimization.MeshIndex`
+            The index, built on the first call.
+        """
+        index = getattr(self, "_index", None)
+        if index is None or index.mesh is not self._target:
+            from compas_cem.optimization.constraints.mesh_index import MeshIndex
+            index = MeshIndex(self._target)
+            self._index = index
+        return index
 
 
 if __name__ == "__main__":
@@ -0,0 +1,428 @@
+import numpy as np
+
+import autograd.numpy as anp
+
+from autograd.extend import primitive
+from autograd.extend import defvjp
+from autograd.tracer import getval
+
+
+__all__ = ["MeshIndex"]
+
+# ==============================================================================
+# Mesh Index
+# ==============================================================================
+
+
+class MeshIndex(object):
+    """
+    The triangles of a mesh stored in arrays, and a bounding volume hierarchy that indexes them.
+
+    Parameters
+    ----------
+    mesh : :class:`compas.datastructures.Mesh` or ``tuple``
+        A mesh, a ``trimesh.Trimesh``, or the vertices and the faces of a mesh.
+        Faces with more than three vertices are split into triangle fans.
+    leaf_size : ``int``, optional
+        The largest number of triangles in a leaf of the hierarchy.
+        Defaults to ``8``.
+
+    Attributes
+    ----------
+    triangles : ``np.array``
+        The xyz coordinates of the corners of the triangles. Shape ``(t, 3, 3)``.
+
+    Notes
+    -----
+    The hierarchy is built once. The closest point queries of many points are
+    answered in one call, that descends the hierarchy for all the points at once
+    and skips the boxes that are farther away from a point than the closest
+    triangle found so far.
+
+    The closest points are differentiable with ``autograd``. Their derivative
+    with respect to a point is the projection onto the plane of the closest
+    triangle, onto the closest edge, or zero at the closest vertex.
+
+    Examples
+    --------
+    >>> index = MeshIndex(([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], [[0, 1, 2]]))
+    >>> index.closest_points([[0.25, 0.5, 1.0], [2.0, -1.0, 0.0]]).tolist()
+    [[0.25, 0.5, 0.0], [1.0, 0.0, 0.0]]
+    """
+    def __init__(self, mesh, leaf_size=8):
+        vertices, faces = _vertices_and_faces(mesh)
+
+        triangles = []
+        for face in faces:
+            for i in range(1, len(face) - 1):
+                triangles.append((face[0], face[i], face[i + 1]))
+
+        if not triangles:
+            raise ValueError("A mesh needs at least one face to be indexed!")
+
+        self.mesh = mesh
+        self.leaf_size = leaf_size
+        self.triangles = np.asarray(vertices, dtype=float)[np.array(triangles, dtype=np.int64)]
+
+        self._build_hierarchy()
+
+    def number_of_triangles(self):
+        """
+        The number of triangles of the mesh.
+        """
+        return len(self.triangles)
+
+# ==============================================================================
+# Queries
+# ==============================================================================
+
+    def closest_triangles(self, points):
+        """
+        Find the triangles of the mesh closest to some points.
+
+        Parameters
+        ----------
+        points : ``np.array``
+            The xyz coordinates of the points. Shape ``(n, 3)``.
+
+        Returns
+        -------
+        triangles : ``np.array``
+            The index of the closest triangle to every point. Shape ``(n, )``.
+        """
+        points = np.reshape(np.asarray(getval(points), dtype=float), (-1, 3))
+        n = len(points)
+
+        best = np.full(n, -1, dtype=np.int64)
+        best_distances = np.full(n, np.inf)
+
+        # a first guess, from the leaf reached by descending into the closest child box
+        nodes = np.zeros(n, dtype=np.int64)
+        inner = self._lefts[nodes] >= 0
+        while np.any(inner):
+            lefts = self._lefts[nodes[inner]]
+            rights = self._rights[nodes[inner]]
+            closer = self._box_distances(points[inner], lefts) <= self._box_distances(points[inner], rights)
+            nodes[inner] = np.where(closer, lefts, rights)
+            inner = self._lefts[nodes] >= 0
+
+        self._search_leaves(points, np.arange(n), nodes, best, best_distances)
+
+        # descend again, skipping the boxes that cannot hold a closer triangle
+        owners = np.arange(n)
+        nodes = np.zeros(n, dtype=np.int64)
+        while len(owners):
+            keep = self._box_distances(points[owners], nodes) < best_distances[owners]
+            owners, nodes = owners[keep], nodes[keep]
+
+            leaves = self._lefts[nodes] < 0
+            self._search_leaves(points, owners[leaves], nodes[leaves], best, best_distances)
+
+            owners = np.repeat(owners[~leaves], 2)
+            nodes = np.ravel(np.column_stack((self._lefts[nodes[~leaves]], self._rights[nodes[~leaves]])))
+
+        return best
+
+    def closest_points(self, points):
+        """
+        Find the closest points on the mesh to some points.
+
+        Parameters
+        ----------
+        points : ``np.array``
+            The xyz coordinates of the points. Shape ``(n, 3)``.
+
+        Returns
+        -------
+        closest : ``np.array``
+            The xyz coordinates of the closest points. Shape ``(n, 3)``.
+
+        Notes
+        -----
+        The closest points are differentiable with ``autograd`` with respect to the points.
+        """
+        points = anp.reshape(points, (-1, 3))
+        return closest_points_on_triangles(points, self.triangles[self.closest_triangles(points)])
+
+    def closest_point(self, point):
+        """
+        Find the closest point on the mesh to a point.
+
+        Parameters
+        ----------
+        point : ``list``
+            The xyz coordinates of a point.
+
+        Returns
+        -------
+        closest : ``np.array``
+            The xyz coordinates of the closest point.
+        """
+        return self.closest_points(anp.reshape(point, (1, 3)))[0]
+
+    def tangents(self, points):
+        """
+        The orthonormal vectors that span the directions in which the closest points to some points slide.
+
+        Parameters
+        ----------
+        points : ``np.array``
+            The xyz coordinates of the points. Shape ``(n, 3)``.
+
+        Returns
+        -------
+        tangents : ``np.array``
+            Two vectors per point. Shape ``(n, 2, 3)``.
+            Both span the plane of the closest triangle if a closest point is inside it,
+            the first one is the direction of the closest edge if the point is on an edge,
+            and the unused vectors are zero.
+        """
+        points = np.reshape(np.asarray(getval(points), dtype=float), (-1, 3))
+        _, tangents = _closest_points_on_triangles(points, self.triangles[self.closest_triangles(points)])
+        return tangents
+
+# ==============================================================================
+# Hierarchy
+# ==============================================================================
+
+    def _build_hierarchy(self):
+        """
+        Split the triangles into a binary tree of bounding boxes, at the median of their centroids.
+        """
+        centroids = np.mean(self.triangles, axis=1)
+        lows = np.amin(self.triangles, axis=1)
+        highs = np.amax(self.triangles, axis=1)
+
+        order = np.arange(len(self.triangles))
+
+        box_lows = []
+        box_highs = []
+        lefts = []
+        rights = []
+        spans = []
+
+        stack = [(0, len(order), None)]
+        while stack:
+            start, end, parent = stack.pop()
+
+            node = len(lefts)
+            if parent is not None:
+                parent_node, side = parent
+                side[parent_node] = node
+
+            members = order[start:end]
+            box_lows.append(np.amin(lows[members], axis=0))
+            box_highs.append(np.amax(highs[members], axis=0))
+            lefts.append(-1)
+            rights.append(-1)
+            spans.append((start, end))
+
+            if end - start <= self.leaf_size:
+                continue
+
+            # split at the median along the longest axis of the centroids
+            axis = np.argmax(np.ptp(centroids[members], axis=0))
+            middle = (end - start) // 2
+            split = np.argpartition(centroids[members, axis], middle)
+            order[start:end] = members[split]
+
+            stack.append((start + middle, end, (node, rights)))
+            stack.append((start, start + middle, (node, lefts)))
+
+        self._order = order
+        self._box_lows = np.array(box_lows)
+        self._box_highs = np.array(box_highs)
+        self._lefts = np.array(lefts, dtype=np.int64)
+        self._rights = np.array(rights, dtype=np.int64)
+        self._spans = np.array(spans, dtype=np.int64)
+
+    def _box_distances(self, points, nodes):
+        """
+        The squared distances between points and the boxes of some nodes, pair by pair.
+        """
+        gaps = np.maximum(self._box_lows[nodes] - points, 0.0) + np.maximum(points - self._box_highs[nodes], 0.0)
+        return np.sum(gaps ** 2, axis=1)
+
+    def _search_leaves(self, points, owners, leaves, best, best_distances):
+        """
+        Update the closest triangles to some points with the triangles of some leaves, pair by pair.
+        """
+        if not len(owners):
+            return
+
+        starts, ends = self._spans[leaves, 0], self._spans[leaves, 1]
+        counts = ends - starts
+
+        owners = np.repeat(owners, counts)
+        shifts = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        candidates = self._order[shifts + np.arange(len(shifts))]
+
+        closest, _ = _closest_points_on_triangles(points[owners], self.triangles[candidates], tangents=False)
+        distances = np.sum((points[owners] - closest) ** 2, axis=1)
+
+        # the closest candidate of every point
+        order = np.lexsort((distances, owners))
+        owners, firsts = np.unique(owners[order], return_index=True)
+        nearest = order[firsts]
+
+        closer = distances[nearest] < best_distances[owners]
+        best[owners[closer]] = candidates[nearest[closer]]
+        best_distances[owners[closer]] = distances[nearest[closer]]
+
+    def __repr__(self):
+        """
+        """
+        tpl = "{}(triangles={}, nodes={})"
+        return tpl.format(self.__class__.__name__, self.number_of_triangles(), len(self._lefts))
+
+# ==============================================================================
+# Closest points on triangles
+# ==============================================================================
+
+
+@primitive
+def closest_points_on_triangles(points, triangles):
+    """
+    The closest points on triangles to some points, pair by pair.
+
+    Parameters
+    ----------
+    points : ``np.array``
+        The xyz coordinates of the points. Shape ``(n, 3)``.
+    triangles : ``np.array``
+        The xyz coordinates of the corners of the triangles. Shape ``(n, 3, 3)``.
+
+    Returns
+    -------
+    closest : ``np.array``
+        The xyz coordinates of the closest points. Shape ``(n, 3)``.
+
+    Notes
+    -----
+    This is an ``autograd`` primitive, differentiable with respect to the points.
+    """
+    closest, _ = _closest_points_on_triangles(points, triangles, tangents=False)
+    return closest
+
+
+def _closest_points_on_triangles_vjp(ans, points, triangles):
+    """
+    The vector-Jacobian product of the closest points, a projection onto the tangent directions.
+    """
+    _, tangents = _closest_points_on_triangles(points, triangles)
+
+    def vjp(g):
+        projections = np.einsum("nij,nj->ni", tangents, g)
+        return np.einsum("nij,ni->nj", tangents, projections)
+
+    return vjp
+
+
+defvjp(closest_points_on_triangles, _closest_points_on_triangles_vjp)
+
+# ==============================================================================
+# Helpers
+# ==============================================================================
+
+
+def _closest_points_on_triangles(points, triangles, tangents=True):
+    """
+    The closest points on triangles to some points, and the tangent directions at them, pair by pair.
+
+    Notes
+    -----
+    The corner, edge and face regions of a triangle are classified as in
+    Ericson's Real-Time Collision Detection.
+    """
+    a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+
+    ab = b - a
+    ac = c - a
+    bc = c - b
+    ap = points - a
+    bp = points - b
+    cp = points - c
+
+    d1 = np.sum(ab * ap, axis=1)
+    d2 = np.sum(ac * ap, axis=1)
+    d3 = np.sum(ab * bp, axis=1)
+    d4 = np.sum(ac * bp, axis=1)
+    d5 = np.sum(ab * cp, axis=1)
+    d6 = np.sum(ac * cp, axis=1)
+
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+
+    # the regions, in the order they are tested
+    in_a = (d1 <= 0.0) & (d2 <= 0.0)
+    in_b = (d3 >= 0.0) & (d4 <= d3)
+    in_ab = (vc <= 0.0) & (d1 >= 0.0) & (d3 <= 0.0)
+    in_c = (d6 >= 0.0) & (d5 <= d6)
+    in_ac = (vb <= 0.0) & (d2 >= 0.0) & (d6 <= 0.0)
+    in_bc = (va <= 0.0) & (d4 - d3 >= 0.0) & (d5 - d6 >= 0.0)
+
+    regions = np.select([in_a, in_b, in_ab, in_c, in_ac, in_bc], [0, 1, 2, 3, 4, 5], 6)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_ab = d1 / (d1 - d3)
+        t_ac = d2 / (d2 - d6)
+        t_bc = (d4 - d3) / ((d4 - d3) + (d5 - d6))
+        denominator = va + vb + vc
+        v = vb / denominator
+        w = vc / denominator
+
+    conditions = [regions == region for region in range(6)]
+    closest = np.select([condition[:, None] for condition in conditions],
+                        [a,
+                         b,
+                         a + t_ab[:, None] * ab,
+                         c,
+                         a + t_ac[:, None] * ac,
+                         b + t_bc[:, None] * bc],
+                        a + v[:, None] * ab + w[:, None] * ac)
+
+    # degenerate triangles without an interior
+    closest = np.where(np.isfinite(closest), closest, a)
+
+    if not tangents:
+        return closest, None
+
+    tangents = np.zeros((len(points), 2, 3))
+
+    edges = np.select([conditions[2][:, None], conditions[4][:, None]], [ab, ac], bc)
+    on_edge = conditions[2] | conditions[4] | conditions[5]
+    tangents[on_edge, 0] = _unitize(edges[on_edge])
+
+    inside = (regions == 6) & (denominator != 0.0)
+    first = _unitize(ab[inside])
+    second = ac[inside] - np.sum(ac[inside] * first, axis=1)[:, None] * first
+    tangents[inside, 0] = first
+    tangents[inside, 1] = _unitize(second)
+
+    return closest, tangents
+
+
+def _unitize(vectors):
+    """
+    Scale vectors to unit length, leaving zero vectors untouched.
+    """
+    lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, lengths, out=np.zeros_like(vectors), where=lengths > 0.0)
+
+
+def _vertices_and_faces(mesh):
+    """
+    The vertices and the faces of a mesh.
+    """
+    if isinstance(mesh, (tuple, list)):
+        return mesh
+
+    if hasattr(mesh, "to_vertices_and_faces"):
+        return mesh.to_vertices_and_faces()
+
+    return mesh.vertices, mesh.faces
+
+
+if __name__ == "__main__":
+    pass
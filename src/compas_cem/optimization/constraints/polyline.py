@@ -1,8 +1,3 @@
-from compas.geometry import closest_point_on_segment
-from compas.geometry._core.distance import closest_points_in_cloud_numpy
-
-from compas.utilities import pairwise
-
 from compas_cem.optimization.constraints import VectorConstraint
 
 
@@ -12,9 +7,15 @@ __all__ = ["PolylineConstraint"]
 class PolylineConstraint(VectorConstraint):
     """
     Pulls the xyz position of a node to a target polyline.
+
+    Notes
+    -----
+    The segments of the polyline are indexed once, on the first evaluation.
+    The target polyline is assumed not to change after that.
     """
     def __init__(self, node=None, polyline=None, weight=1.0):
         super(PolylineConstraint, self).__init__(node, polyline, weight)
+        self._index = None
 
     def reference(self, data):
         """
@@ -26,27 +27,23 @@ class PolylineConstraint(VectorConstraint):
         """
         The closest point on the target polyline.
         """
-        polyline = self._target
-        return self._closest_point_on_polyline(reference, polyline)
+        return self.index().closest_point(reference)
 
-    @staticmethod
-    def _closest_point_on_polyline(point, polyline):
+    def index(self):
         """
-        The closest point on a polyline.
+        The spatial index of the segments of the target polyline.
 
-        Notes
-        -----
-        This is a reimplementation of a compas method.
-        The compas method did not support autograd transforms.
+        Returns
+        -------
+        index : :class:`compas_cem.optimization.PolylineIndex`
+            The index, built on the first call.
         """
-        cloud = []
-
-        for segment in pairwise(polyline):
-            cloud.append(closest_point_on_segment(point, segment))
-
-        indices = closest_points_in_cloud_numpy([point], cloud, distances=False)
-
-        return cloud[indices[0]]
+        index = getattr(self, "_index", None)
+        if index is None or index.polyline is not self._target:
+            from compas_cem.optimization.constraints.polyline_index import PolylineIndex
+            index = PolylineIndex(self._target)
+            self._index = index
+        return index
 
 
 if __name__ == "__main__":
@@ -60,6 +57,8 @@ if __name__ == "__main__":
     from random import random
     from random import seed
 
+    from compas.utilities import pairwise
+
     from compas.geometry import add_vectors
     from compas.geometry import Point
     from compas.geometry import Polyline
@@ -0,0 +1,313 @@
+import numpy as np
+
+import autograd.numpy as anp
+
+from autograd.tracer import getval
+
+
+__all__ = ["PolylineIndex"]
+
+# ==============================================================================
+# Polyline Index
+# ==============================================================================
+
+
+class PolylineIndex(object):
+    """
+    The segments of a polyline stored in arrays, and a uniform grid that indexes them.
+
+    Parameters
+    ----------
+    polyline : :class:`compas.geometry.Polyline` or ``list``
+        A polyline, or the xyz coordinates of its points.
+    cell_size : ``float``, optional
+        The size of the cells of the grid.
+        Defaults to the mean length of the segments.
+
+    Attributes
+    ----------
+    starts : ``np.array``
+        The start points of the segments. Shape ``(s, 3)``.
+    vectors : ``np.array``
+        The vectors from the start to the end points of the segments. Shape ``(s, 3)``.
+
+    Notes
+    -----
+    The index is built once and answers the closest point queries of many points
+    in one vectorized call. Segments are registered in every cell they cross.
+    The search around a point grows ring by ring until the closest segment found
+    is provably the closest one, and falls back to a brute force search for the
+    points that are far away from the polyline.
+
+    Examples
+    --------
+    >>> index = PolylineIndex([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [1.0, 1.0, 0.0]])
+    >>> index.closest_points([[2.0, 0.5, 0.0], [0.5, -1.0, 0.0]]).tolist()
+    [[1.0, 0.5, 0.0], [0.5, 0.0, 0.0]]
+    """
+    # the largest ring of cells searched around a point, before a brute force search
+    max_ring = 4
+
+    def __init__(self, polyline, cell_size=None):
+        points = np.array([list(point) for point in polyline], dtype=float).reshape((-1, 3))
+        if len(points) < 2:
+            raise ValueError("A polyline needs at least two points, got {}!".format(len(points)))
+
+        self.polyline = polyline
+        self.starts = points[:-1]
+        self.vectors = points[1:] - points[:-1]
+
+        lengths_sqrd = np.sum(self.vectors ** 2, axis=1)
+        self._inverse_lengths_sqrd = np.divide(1.0, lengths_sqrd, out=np.zeros_like(lengths_sqrd), where=lengths_sqrd > 0.0)
+
+        if cell_size is None:
+            cell_size = np.mean(np.sqrt(lengths_sqrd))
+        if not cell_size > 0.0:
+            cell_size = 1.0
+
+        self.cell_size = float(cell_size)
+        self._build_grid(points)
+
+    def number_of_segments(self):
+        """
+        The number of segments of the polyline.
+        """
+        return len(self.starts)
+
+# ==============================================================================
+# Queries
+# ==============================================================================
+
+    def closest_segments(self, points):
+        """
+        Find the segments of the polyline closest to some points.
+
+        Parameters
+        ----------
+        points : ``np.array``
+            The xyz coordinates of the points. Shape ``(n, 3)``.
+
+        Returns
+        -------
+        segments : ``np.array``
+            The index of the closest segment to every point. Shape ``(n, )``.
+        """
+        points = np.reshape(np.asarray(getval(points), dtype=float), (-1, 3))
+
+        segments = np.zeros(len(points), dtype=np.int64)
+        distances = np.full(len(points), np.inf)
+
+        cells = np.floor((points - self._origin) / self.cell_size).astype(np.int64)
+
+        # points too far away from the grid to find any segment around them
+        ring = self.max_ring
+        near = np.all((cells >= -ring) & (cells < self._shape + ring), axis=1)
+        active = np.flatnonzero(near)
+
+        ring = 1
+        while len(active) and ring <= self.max_ring:
+            found, found_distances = self._search_ring(points[active], cells[active], ring)
+            segments[active] = found
+            distances[active] = found_distances
+
+            # a closer segment would cross a cell of the ring
+            active = active[found_distances > ring * self.cell_size]
+            ring *= 2
+
+        rest = np.concatenate([np.flatnonzero(~near), active])
+        if len(rest):
+            segments[rest] = self._search_all(points[rest])
+
+        return segments
+
+    def closest_points(self, points):
+        """
+        Find the closest points on the polyline to some points.
+
+        Parameters
+        ----------
+        points : ``np.array``
+            The xyz coordinates of the points. Shape ``(n, 3)``.
+
+        Returns
+        -------
+        closest : ``np.array``
+            The xyz coordinates of the closest points. Shape ``(n, 3)``.
+
+        Notes
+        -----
+        The closest points are differentiable with ``autograd`` with respect to the points.
+        """
+        points = anp.reshape(points, (-1, 3))
+        segments = self.closest_segments(points)
+
+        starts = self.starts[segments]
+        vectors = self.vectors[segments]
+        params = anp.sum((points - starts) * vectors, axis=1) * self._inverse_lengths_sqrd[segments]
+
+        return starts + anp.clip(params, 0.0, 1.0)[:, None] * vectors
+
+    def closest_point(self, point):
+        """
+        Find the closest point on the polyline to a point.
+
+        Parameters
+        ----------
+        point : ``list``
+            The xyz coordinates of a point.
+
+        Returns
+        -------
+        closest : ``np.array``
+            The xyz coordinates of the closest point.
+        """
+        return self.closest_points(anp.reshape(point, (1, 3)))[0]
+
+    def tangents(self, points):
+        """
+        The unit vectors of the segments along which the closest points to some points slide.
+
+        Parameters
+        ----------
+        points : ``np.array``
+            The xyz coordinates of the points. Shape ``(n, 3)``.
+
+        Returns
+        -------
+        tangents : ``np.array``
+            The unit vectors of the closest segments. Shape ``(n, 3)``.
+            Zero where a closest point is the end of a segment, where it does not move.
+        """
+        points = np.reshape(np.asarray(getval(points), dtype=float), (-1, 3))
+        segments = self.closest_segments(points)
+
+        vectors = self.vectors[segments]
+        inverse = self._inverse_lengths_sqrd[segments]
+        params = np.sum((points - self.starts[segments]) * vectors, axis=1) * inverse
+
+        inside = (params > 0.0) & (params < 1.0)
+        return vectors * (np.sqrt(inverse) * inside)[:, None]
+
+# ==============================================================================
+# Grid
+# ==============================================================================
+
+    def _build_grid(self, points):
+        """
+        Register the segments in the cells of the grid they cross.
+        """
+        size = self.cell_size
+        self._origin = np.amin(points, axis=0)
+        self._shape = np.floor((np.amax(points, axis=0) - self._origin) / size).astype(np.int64) + 1
+
+        # split the segments into pieces that are not longer than a cell
+        lengths = np.linalg.norm(self.vectors, axis=1)
+        pieces = np.maximum(np.ceil(lengths / size), 1).astype(np.int64)
+        segments = np.repeat(np.arange(len(pieces)), pieces)
+        steps = np.arange(len(segments)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+
+        vectors = self.vectors[segments] / pieces[segments, None]
+        starts = self.starts[segments] + steps[:, None] * vectors
+        ends = starts + vectors
+
+        low = np.floor((np.minimum(starts, ends) - self._origin) / size).astype(np.int64)
+        high = np.floor((np.maximum(starts, ends) - self._origin) / size).astype(np.int64)
+
+        # a piece crosses at most two cells per axis
+        keys = []
+        values = []
+        for offset in np.ndindex(2, 2, 2):
+            cells = low + offset
+            crossed = np.all(cells <= high, axis=1)
+            keys.append(self._cell_keys(cells[crossed]))
+            values.append(segments[crossed])
+
+        keys = np.concatenate(keys)
+        values = np.concatenate(values)
+
+        order = np.lexsort((values, keys))
+        keys, values = keys[order], values[order]
+        unique = np.ones(len(keys), dtype=bool)
+        unique[1:] = (keys[1:] != keys[:-1]) | (values[1:] != values[:-1])
+        keys, values = keys[unique], values[unique]
+
+        self._cells, self._cell_starts = np.unique(keys, return_index=True)
+        self._cell_ends = np.append(self._cell_starts[1:], len(keys))
+        self._cell_segments = values
+
+    def _cell_keys(self, cells):
+        """
+        A unique integer key for every cell, including the cells in the rings around the grid.
+        """
+        pad = 2 * self.max_ring + 1
+        shape = self._shape + 2 * pad
+        cells = cells + pad
+        return (cells[:, 0] * shape[1] + cells[:, 1]) * shape[2] + cells[:, 2]
+
+    def _search_ring(self, points, cells, ring):
+        """
+        The closest segments registered in the cells within a ring of cells around some points.
+        """
+        span = np.arange(-ring, ring + 1)
+        offsets = np.stack(np.meshgrid(span, span, span, indexing="ij"), axis=-1).reshape((-1, 3))
+
+        # look up the cells around every point
+        keys = self._cell_keys(np.reshape(cells[:, None, :] + offsets, (-1, 3)))
+        slots = np.minimum(np.searchsorted(self._cells, keys), len(self._cells) - 1)
+        hit = self._cells[slots] == keys
+        counts = np.where(hit, self._cell_ends[slots] - self._cell_starts[slots], 0)
+
+        # gather the candidate segments of every point
+        owners = np.repeat(np.repeat(np.arange(len(points)), len(offsets)), counts)
+        shifts = np.repeat(self._cell_starts[slots] - np.cumsum(counts) + counts, counts)
+        candidates = self._cell_segments[shifts + np.arange(len(shifts))]
+
+        distances = self._distances_sqrd(points[owners], candidates)
+
+        # keep the closest candidate of every point
+        segments = np.zeros(len(points), dtype=np.int64)
+        distances_min = np.full(len(points), np.inf)
+        if len(candidates):
+            order = np.lexsort((distances, owners))
+            owners, firsts = np.unique(owners[order], return_index=True)
+            closest = order[firsts]
+            segments[owners] = candidates[closest]
+            distances_min[owners] = np.sqrt(distances[closest])
+
+        return segments, distances_min
+
+    def _search_all(self, points, chunk=1024):
+        """
+        The closest segments to some points, checking all the segments.
+        """
+        segments = np.arange(self.number_of_segments())
+        closest = []
+        for i in range(0, len(points), chunk):
+            block = points[i:i + chunk]
+            owners = np.repeat(np.arange(len(block)), len(segments))
+            candidates = np.tile(segments, len(block))
+            distances = self._distances_sqrd(block[owners], candidates)
+            closest.append(np.argmin(np.reshape(distances, (len(block), -1)), axis=1))
+
+        return np.concatenate(closest)
+
+    def _distances_sqrd(self, points, segments):
+        """
+        The squared distances between points and segments, pair by pair.
+        """
+        starts = self.starts[segments]
+        vectors = self.vectors[segments]
+        params = np.sum((points - starts) * vectors, axis=1) * self._inverse_lengths_sqrd[segments]
+        closest = starts + np.clip(params, 0.0, 1.0)[:, None] * vectors
+
+        return np.sum((points - closest) ** 2, axis=1)
+
+    def __repr__(self):
+        """
+        """
+        tpl = "{}(segments={}, cell_size={})"
+        return tpl.format(self.__class__.__name__, self.number_of_segments(), self.cell_size)
+
+
+if __name__ == "__main__":
+    pass
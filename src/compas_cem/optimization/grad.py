@@ -2,7 +2,10 @@ import numpy as np
 
 
 __all__ = ["grad_finite_differences",
-           "grad_autograd"]
+           "grad_autograd",
+           "value_and_grad_finite_differences",
+           "finite_differences_points",
+           "finite_differences_gradient"]
 
 # ------------------------------------------------------------------------------
 # Gradient calculation with finite differences
@@ -23,27 +26,92 @@ def grad_autograd(x, grad, grad_func, **kwargs):
 # ------------------------------------------------------------------------------
 
 
-def grad_finite_differences(x, grad, x_func, step_size, **kwargs):
+def grad_finite_differences(x, grad, x_func, step_size, scheme="forward", perturbed_func=None, **kwargs):
     """
-    Approximate the gradient of a blackbox function using forward finite differences.
+    Approximate the gradient of a blackbox function using finite differences.
     This function updates grad in place.
     """
+    _, grad[:] = value_and_grad_finite_differences(x, x_func, step_size, scheme, perturbed_func)
+
+    return grad
+
+
+def value_and_grad_finite_differences(x, x_func, step_size, scheme="forward", perturbed_func=None, **kwargs):
+    """
+    Evaluate a blackbox function and approximate its gradient using finite differences.
+    The value of the function at x is reused by forward finite differences.
+
+    The perturbed points are evaluated with ``perturbed_func``, if supplied, always after ``x``.
+    For example, with a function that reuses the calculations made at ``x``.
+    """
+    perturbed_func = perturbed_func or x_func
+
     fx0 = x_func(x)
+    values = [perturbed_func(point) for point in finite_differences_points(x, step_size, scheme)]
+
+    return fx0, finite_differences_gradient(fx0, values, step_size, scheme)
+
+
+def finite_differences_points(x, step_size, scheme="forward"):
+    """
+    The perturbed points to evaluate a function at to approximate its gradient.
+
+    Parameters
+    ----------
+    x : ``np.array``
+        The point to approximate the gradient at.
+    step_size : ``float``
+        The size of the perturbation.
+    scheme : ``str``, optional
+        The finite differences scheme, either "forward" or "central".
+        Forward differences take ``n`` points, central differences ``2n``.
+        Defaults to "forward".
+
+    Returns
+    -------
+    points : ``np.array``
+        The perturbed points, one per row.
+    """
+    if scheme not in ("forward", "central"):
+        raise ValueError("Finite differences scheme {} is not supported!".format(scheme))
+
     # NOTE: We make an editable copy of x because NLOpt makes x a read-only vector
-    _x = np.copy(x)
+    points = np.array(x, dtype=float) + np.eye(len(x)) * step_size
 
-    for i in range(len(x)):
+    if scheme == "central":
+        points = np.concatenate((points, points - 2.0 * np.eye(len(x)) * step_size))
 
-        _xi = _x[i]
-        _x[i] += step_size
+    return points
 
-        fx1 = x_func(_x)
 
-        delta_fx = (fx1 - fx0) / step_size
-        grad[i] = delta_fx
-        _x[i] = _xi
+def finite_differences_gradient(fx0, values, step_size, scheme="forward"):
+    """
+    Approximate a gradient from the values of a function at perturbed points.
+
+    Parameters
+    ----------
+    fx0 : ``float``
+        The value of the function at the unperturbed point.
+    values : ``list``
+        The values of the function at ``finite_differences_points``.
+    step_size : ``float``
+        The size of the perturbation.
+    scheme : ``str``, optional
+        The finite differences scheme, either "forward" or "central".
+        Defaults to "forward".
+
+    Returns
+    -------
+    grad : ``np.array``
+        The approximated gradient.
+    """
+    values = np.asarray(values, dtype=float)
 
-    return grad
+    if scheme == "central":
+        forward, backward = np.split(values, 2)
+        return (forward - backward) / (2.0 * step_size)
+
+    return (values - fx0) / step_size
 
 
 # ------------------------------------------------------------------------------
@@ -0,0 +1,184 @@
+import pickle
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from compas_cem.equilibrium import PartialSolver
+
+from compas_cem.optimization import finite_differences_points
+from compas_cem.optimization import finite_differences_gradient
+
+
+__all__ = ["FiniteDifferencesPool"]
+
+# ------------------------------------------------------------------------------
+# Worker state
+# ------------------------------------------------------------------------------
+
+# the optimizer, topology, problem and solver settings of a worker process
+_WORKER = {}
+
+# ------------------------------------------------------------------------------
+# Finite differences pool
+# ------------------------------------------------------------------------------
+
+
+class FiniteDifferencesPool(object):
+    """
+    A persistent pool of processes that approximates gradients with finite differences.
+
+    Parameters
+    ----------
+    optimizer : :class:`compas_cem.optimization.Optimizer`
+        The optimizer whose penalty function to differentiate.
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`
+        A topology diagram.
+    problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+        The equilibrium problem compiled by the optimizer.
+    workers : ``int``
+        The number of worker processes.
+    step_size : ``float``, optional
+        The step size of the finite differences.
+        Defaults to ``1e-6``.
+    scheme : ``str``, optional
+        The finite differences scheme, either "forward" or "central".
+        Defaults to "forward".
+    chunksize : ``int``, optional
+        The number of perturbed points a worker evaluates per task.
+        If ``None``, the points are split evenly across the workers.
+        Defaults to ``None``.
+    tmax : ``int``, optional
+        The maximum number of iterations of the CEM form-finding algorithm.
+        Defaults to ``100``.
+    eta : ``float``, optional
+        The numerical converge threshold of the CEM form-finding algorithm.
+        Defaults to ``1e-6``.
+
+    Notes
+    -----
+    Every worker unpickles its own copy of the topology diagram, the optimization
+    parameters and the constraints once, when the pool starts.
+    After that, only the perturbed points and the penalties travel between processes.
+    The value at the unperturbed point is calculated by the calling process
+    while the workers evaluate the perturbed points.
+    """
+    def __init__(self, optimizer, topology, problem, workers, step_size=1e-6, scheme="forward", chunksize=None, tmax=100, eta=1e-6):
+        if workers < 1:
+            raise ValueError("The number of workers must be positive: {}".format(workers))
+        if chunksize is not None and chunksize < 1:
+            raise ValueError("The chunk size must be positive: {}".format(chunksize))
+
+        self.workers = workers
+        self.step_size = step_size
+        self.scheme = scheme
+        self.chunksize = chunksize
+
+        self._optimizer = optimizer
+        self._topology = topology.copy()
+        self._problem = problem
+        self._tmax = tmax
+        self._eta = eta
+
+        state = {"cls": type(optimizer),
+                 "parameters": optimizer.parameters,
+                 "constraints": optimizer.constraints,
+                 "topology": self._topology,
+                 "warm_start": optimizer._warm_start,
+                 "partial": optimizer._partial is not None,
+                 "tmax": tmax,
+                 "eta": eta}
+
+        self._executor = ProcessPoolExecutor(max_workers=workers,
+                                             initializer=_initialize_worker,
+                                             initargs=(pickle.dumps(state), ))
+
+    def __call__(self, x):
+        """
+        Evaluate the penalty function and approximate its gradient.
+
+        Parameters
+        ----------
+        x : ``np.array``
+            The optimization parameters.
+
+        Returns
+        -------
+        fx0 : ``float``
+            The value of the penalty function.
+        grad : ``np.array``
+            The gradient of the penalty function.
+        """
+        points = finite_differences_points(x, self.step_size, self.scheme)
+
+        chunksize = self.chunksize
+        if chunksize is None:
+            chunksize = -(-len(points) // self.workers)
+
+        chunks = [points[i:i + chunksize] for i in range(0, len(points), chunksize)]
+        results = self._executor.map(_evaluate_points, [x] * len(chunks), chunks)
+
+        optimizer = self._optimizer
+        fx0 = optimizer._optimize_form(x, self._topology, self._tmax, self._eta, self._problem)
+
+        values = np.concatenate(list(results))
+        optimizer._num_solves += len(values)
+        optimizer._profiler.count("forward_solves", len(values))
+
+        return fx0, finite_differences_gradient(fx0, values, self.step_size, self.scheme)
+
+    def close(self):
+        """
+        Shut down the worker processes.
+        """
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+# ------------------------------------------------------------------------------
+# Worker functions
+# ------------------------------------------------------------------------------
+
+
+def _initialize_worker(state):
+    """
+    Unpickle the optimization problem of a worker process.
+    """
+    state = pickle.loads(state)
+
+    optimizer = state["cls"]()
+    optimizer.parameters = state["parameters"]
+    optimizer.constraints = state["constraints"]
+    optimizer._warm_start = state["warm_start"]
+    if state["partial"]:
+        optimizer._partial = PartialSolver(state["tmax"], state["eta"])
+
+    topology = state["topology"]
+
+    _WORKER["optimizer"] = optimizer
+    _WORKER["topology"] = topology
+    _WORKER["problem"] = optimizer.equilibrium_problem(topology)
+    _WORKER["tmax"] = state["tmax"]
+    _WORKER["eta"] = state["eta"]
+
+
+def _evaluate_points(x, points):
+    """
+    Evaluate the penalty function at a chunk of points perturbed around x in a worker process.
+    """
+    optimizer = _WORKER["optimizer"]
+    args = (_WORKER["topology"], _WORKER["tmax"], _WORKER["eta"], _WORKER["problem"])
+
+    # the perturbed points only re-solve the nodes they influence from the state at x
+    if optimizer._partial is not None:
+        optimizer._optimize_form(x, *args)
+
+    return np.array([optimizer._optimize_form(point, *args, perturbed=True) for point in points], dtype=float)
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,263 @@
+import traceback
+
+from threading import Event
+from threading import Lock
+from threading import Thread
+
+from time import time
+
+import numpy as np
+
+from compas_cem.equilibrium import static_equilibrium_forward
+
+
+__all__ = ["OptimizationJob"]
+
+# ==============================================================================
+# Optimization Job
+# ==============================================================================
+
+
+class OptimizationJob(object):
+    """
+    A constrained form-finding problem solved by an optimizer on a background thread.
+
+    Parameters
+    ----------
+    optimizer : :class:`compas_cem.optimization.Optimizer`
+        An optimizer with constraints and parameters.
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`
+        A topology diagram. It is copied before solving.
+    **kwargs : ``dict``, optional
+        The arguments of :meth:`compas_cem.optimization.Optimizer.solve`.
+
+    Attributes
+    ----------
+    status : ``str``
+        Either ``"pending"``, ``"running"``, ``"done"``, ``"cancelled"`` or ``"failed"``.
+    evals : ``int``
+        The number of evaluations of the objective function so far.
+    x_best : ``np.array``
+        The parameters with the smallest value of the objective function so far, or ``None``.
+    penalty_best : ``float``
+        The smallest value of the objective function so far.
+    error : ``str``
+        The traceback of the exception that made the job fail, or ``None``.
+
+    Notes
+    -----
+    A job is cancelled by forcing the NLopt solver to stop after its running evaluation.
+    Levenberg-Marquardt runs to completion.
+    """
+    def __init__(self, optimizer, topology, **kwargs):
+        self.optimizer = optimizer
+        self.topology = topology
+        self.kwargs = kwargs
+
+        self.status = "pending"
+        self.evals = 0
+        self.x_best = None
+        self.penalty_best = float("inf")
+        self.error = None
+
+        self.result_topology = None
+        self.form = None
+
+        self._lock = Lock()
+        self._cancel = Event()
+        self._thread = None
+        self._start = None
+        self._duration = None
+
+# ==============================================================================
+# Control
+# ==============================================================================
+
+    def start(self):
+        """
+        Start solving on a background thread.
+        """
+        if self._thread is not None:
+            raise ValueError("The job was already started!")
+
+        self.status = "running"
+        self._start = time()
+        self._thread = Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def cancel(self):
+        """
+        Ask the solver to stop after its running evaluation.
+        """
+        self._cancel.set()
+
+    def wait(self, timeout=None):
+        """
+        Wait for the job to finish.
+
+        Parameters
+        ----------
+        timeout : ``float``, optional
+            The longest time to wait for, in seconds.
+            Defaults to ``None``, to wait until the job finishes.
+
+        Returns
+        -------
+        finished : ``bool``
+            ``True`` if the job finished.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.finished()
+
+    def finished(self):
+        """
+        Check if the job finished, one way or another.
+        """
+        return self.status in ("done", "cancelled", "failed")
+
+# ==============================================================================
+# Results
+# ==============================================================================
+
+    def progress(self):
+        """
+        The progress of the job.
+
+        Returns
+        -------
+        progress : ``dict``
+            The ``"status"``, the number of ``"evals"``, the smallest ``"penalty"`` so far,
+            the parameters ``"x"`` that yield it, the elapsed ``"time"`` in seconds and the ``"error"``.
+        """
+        with self._lock:
+            x_best = None if self.x_best is None else self.x_best.tolist()
+            penalty = self.penalty_best
+            evals = self.evals
+
+        elapsed = 0.0
+        if self._start is not None:
+            elapsed = self._duration if self._duration is not None else time() - self._start
+
+        return {"status": self.status,
+                "evals": evals,
+                "penalty": penalty,
+                "x": x_best,
+                "time": elapsed,
+                "error": self.error}
+
+    def latest(self):
+        """
+        The topology and the form diagrams at the best parameters found so far.
+
+        Returns
+        -------
+        topology : :class:`compas_cem.diagrams.TopologyDiagram`
+            A copy of the topology diagram with the best parameters, or ``None`` if there are none yet.
+        form : :class:`compas_cem.diagrams.FormDiagram`
+            The form diagram in equilibrium, or ``None`` if there are no parameters yet.
+        penalty : ``float``
+            The value of the objective function at the best parameters.
+        """
+        with self._lock:
+            x_best = self.x_best
+            penalty = self.penalty_best
+
+        if x_best is None:
+            return None, None, penalty
+
+        topology = self.topology.copy()
+        self.optimizer._update_parameters(topology, x_best)
+
+        return topology, static_equilibrium_forward(topology), penalty
+
+    def result(self):
+        """
+        The results of a finished job.
+
+        Returns
+        -------
+        topology : :class:`compas_cem.diagrams.TopologyDiagram`
+            The topology diagram with the optimal parameters.
+        form : :class:`compas_cem.diagrams.FormDiagram`
+            The constrained form diagram.
+        objective : ``float``
+            The final value of the objective function.
+        grad_norm : ``float``
+            The norm of the gradient of the objective function, or ``None`` if the job was cancelled.
+        evals : ``int``
+            The number of evaluations of the objective function.
+        duration : ``float``
+            The total optimization time in seconds.
+        status : ``str``
+            The final status of the optimization problem, or of the job if it did not end by itself.
+
+        Notes
+        -----
+        The results of a cancelled job are those of the best parameters found before it stopped.
+        """
+        if self.status == "failed":
+            raise ValueError("The job failed!\n{}".format(self.error))
+
+        if not self.finished():
+            raise ValueError("The job is still {}!".format(self.status))
+
+        if self.status == "cancelled":
+            topology, form, penalty = self.latest()
+            return topology, form, penalty, None, self.evals, self._duration, self.status
+
+        optimizer = self.optimizer
+        return (self.result_topology,
+                self.form,
+                optimizer.penalty,
+                optimizer.gradient_norm,
+                optimizer.evals,
+                optimizer.time_opt,
+                optimizer.status)
+
+# ==============================================================================
+# Worker
+# ==============================================================================
+
+    def _run(self):
+        """
+        Solve the problem of the job, on the background thread.
+        """
+        optimizer = self.optimizer
+        optimizer._stop = self._cancel.is_set
+
+        try:
+            topology = self.topology.copy()
+            form = optimizer.solve(topology, callback=self._record, **self.kwargs)
+        except Exception:
+            self.error = traceback.format_exc()
+            status = "failed"
+        else:
+            self.result_topology = topology
+            self.form = form
+            status = "cancelled" if self._cancel.is_set() else "done"
+
+        optimizer._stop = None
+        self._duration = time() - self._start
+        self.status = status
+
+    def _record(self, x, fx):
+        """
+        Keep the best parameters found so far.
+        """
+        with self._lock:
+            self.evals += 1
+            if fx < self.penalty_best:
+                self.penalty_best = float(fx)
+                self.x_best = np.array(x, dtype=float)
+
+    def __repr__(self):
+        """
+        """
+        tpl = "{}(status={!r}, evals={}, penalty={})"
+        return tpl.format(self.__class__.__name__, self.status, self.evals, self.penalty_best)
+
+
+if __name__ == "__main__":
+    pass
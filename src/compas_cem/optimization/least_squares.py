@@ -0,0 +1,165 @@
+import numpy as np
+
+
+__all__ = ["levenberg_marquardt",
+           "jacobian_row_groups"]
+
+# ------------------------------------------------------------------------------
+# Levenberg-Marquardt
+# ------------------------------------------------------------------------------
+
+
+def levenberg_marquardt(residuals_func, x0, bounds_low, bounds_up, iters=100, eps=1e-6, ftol=1e-8, damping=1e-3):
+    """
+    Minimize a sum of squared residuals with a damped Gauss-Newton method.
+
+    Parameters
+    ----------
+    residuals_func : ``function``
+        A function that takes the parameters and returns the residual vector,
+        and a function without arguments that returns the Jacobian of the residuals.
+        The Jacobian is only requested for accepted steps.
+    x0 : ``np.array``
+        The starting parameters.
+    bounds_low : ``np.array``
+        The lower bounds of the parameters.
+    bounds_up : ``np.array``
+        The upper bounds of the parameters.
+    iters : ``int``, optional
+        The maximum number of evaluations of the residuals.
+        Defaults to ``100``.
+    eps : ``float``, optional
+        The sum of squared residuals to stop at.
+        Defaults to ``1e-6``.
+    ftol : ``float``, optional
+        The smallest decrease of the sum of squared residuals by an accepted step.
+        Defaults to ``1e-8``.
+    damping : ``float``, optional
+        The initial damping factor.
+        Defaults to ``1e-3``.
+
+    Returns
+    -------
+    x : ``np.array``
+        The optimal parameters.
+    cost : ``float``
+        The sum of squared residuals at the optimal parameters.
+    status : ``str``
+        The reason the solver stopped.
+    evals : ``int``
+        The number of evaluations of the residuals.
+
+    Notes
+    -----
+    The damping is scaled by the diagonal of the Gauss-Newton matrix, as proposed by Marquardt.
+    Steps that leave the bounds are clipped back onto them.
+    The damping is decreased after a successful step and increased, at a growing rate, after a rejected one.
+    """
+    bounds_low = np.asarray(bounds_low, dtype=float)
+    bounds_up = np.asarray(bounds_up, dtype=float)
+
+    x = np.clip(np.array(x0, dtype=float), bounds_low, bounds_up)
+    residuals, jacobian_func = residuals_func(x)
+    cost = residuals @ residuals
+    jacobian = jacobian_func()
+    evals = 1
+
+    growth = 2.0
+    status = "ITERSMAX_REACHED"
+
+    while True:
+
+        if eps is not None and cost <= eps:
+            status = "EPSVAL_REACHED"
+            break
+
+        if evals >= iters:
+            break
+
+        # gauss-newton system
+        hessian = jacobian.T @ jacobian
+        if hasattr(hessian, "toarray"):
+            hessian = hessian.toarray()
+        gradient = jacobian.T @ residuals
+
+        scale = np.diag(hessian).copy()
+        scale[scale <= 0.0] = 1.0
+
+        step = np.linalg.solve(hessian + damping * np.diag(scale), -gradient)
+        x_new = np.clip(x + step, bounds_low, bounds_up)
+
+        if np.allclose(x_new, x, rtol=0.0, atol=1e-14):
+            status = "XTOL_REACHED"
+            break
+
+        residuals_new, jacobian_func = residuals_func(x_new)
+        cost_new = residuals_new @ residuals_new
+        evals += 1
+
+        # reject step and damp more
+        if not cost_new < cost:
+            damping *= growth
+            growth *= 2.0
+            if damping > 1e16:
+                status = "ROUNDOFF_LIMITED"
+                break
+            continue
+
+        # accept step and damp less
+        decrease = cost - cost_new
+        x, residuals, cost = x_new, residuals_new, cost_new
+        jacobian = jacobian_func()
+
+        damping = max(damping / 3.0, 1e-12)
+        growth = 2.0
+
+        if ftol is not None and decrease < ftol:
+            status = "FTOL_REACHED"
+            break
+
+    return x, cost, status, evals
+
+# ------------------------------------------------------------------------------
+# Jacobian compression
+# ------------------------------------------------------------------------------
+
+
+def jacobian_row_groups(pattern):
+    """
+    Group the rows of a sparse Jacobian that do not share any column.
+
+    Parameters
+    ----------
+    pattern : ``np.array``
+        The boolean sparsity pattern of the Jacobian.
+
+    Returns
+    -------
+    groups : ``list``
+        The indices of the rows in every group.
+
+    Notes
+    -----
+    The rows in a group can be recovered from a single vector-Jacobian product,
+    seeded with ones at all the rows of the group.
+    The groups are built greedily, row by row.
+    """
+    pattern = np.asarray(pattern, dtype=bool)
+
+    groups = []
+    columns = []
+    for row in range(pattern.shape[0]):
+        for group, used in zip(groups, columns):
+            if not np.any(used & pattern[row]):
+                group.append(row)
+                used |= pattern[row]
+                break
+        else:
+            groups.append([row])
+            columns.append(pattern[row].copy())
+
+    return [np.array(group, dtype=np.int64) for group in groups]
+
+
+if __name__ == "__main__":
+    pass
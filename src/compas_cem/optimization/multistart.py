@@ -0,0 +1,263 @@
+import os
+import pickle
+
+from time import time
+
+from multiprocessing import Event
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+
+import numpy as np
+
+
+__all__ = ["latin_hypercube_samples",
+           "sobol_samples",
+           "iter_multistart"]
+
+# ------------------------------------------------------------------------------
+# Worker state
+# ------------------------------------------------------------------------------
+
+# the optimizer, topology and solver settings of a worker process
+_WORKER = {}
+
+# ------------------------------------------------------------------------------
+# Sampling
+# ------------------------------------------------------------------------------
+
+
+def latin_hypercube_samples(bounds_low, bounds_up, num, seed=None):
+    """
+    Sample points inside a box with a Latin hypercube design.
+
+    Parameters
+    ----------
+    bounds_low : ``np.array``
+        The lower bounds of the box.
+    bounds_up : ``np.array``
+        The upper bounds of the box.
+    num : ``int``
+        The number of points to sample.
+    seed : ``int``, optional
+        The seed of the random number generator.
+        Defaults to ``None``.
+
+    Returns
+    -------
+    samples : ``np.array``
+        The sampled points, one per row. Shape ``(num, dims)``.
+
+    Notes
+    -----
+    Every dimension is split into ``num`` intervals of equal size,
+    and every interval is sampled exactly once.
+    """
+    bounds_low, bounds_up = _check_bounds(bounds_low, bounds_up)
+    dims = bounds_low.size
+
+    rng = np.random.default_rng(seed)
+    strata = np.array([rng.permutation(num) for _ in range(dims)]).reshape((dims, num)).T
+    samples = (strata + rng.random((num, dims))) / num
+
+    return bounds_low + samples * (bounds_up - bounds_low)
+
+
+def sobol_samples(bounds_low, bounds_up, num, seed=None):
+    """
+    Sample points inside a box with a scrambled Sobol sequence.
+
+    Parameters
+    ----------
+    bounds_low : ``np.array``
+        The lower bounds of the box.
+    bounds_up : ``np.array``
+        The upper bounds of the box.
+    num : ``int``
+        The number of points to sample.
+        The sequence is best balanced if this is a power of two.
+    seed : ``int``, optional
+        The seed of the scrambling.
+        Defaults to ``None``.
+
+    Returns
+    -------
+    samples : ``np.array``
+        The sampled points, one per row. Shape ``(num, dims)``.
+
+    Notes
+    -----
+    This function requires ``scipy>=1.7``.
+    """
+    from scipy.stats import qmc
+
+    bounds_low, bounds_up = _check_bounds(bounds_low, bounds_up)
+
+    sampler = qmc.Sobol(d=bounds_low.size, scramble=True, seed=seed)
+    samples = sampler.random(num)
+
+    return bounds_low + samples * (bounds_up - bounds_low)
+
+# ------------------------------------------------------------------------------
+# Multi-start
+# ------------------------------------------------------------------------------
+
+
+def iter_multistart(optimizer, topology, x_starts, workers=None, stop_early=False, **kwargs):
+    """
+    Run local optimizations from several starting points in parallel processes.
+
+    Parameters
+    ----------
+    optimizer : :class:`compas_cem.optimization.Optimizer`
+        An optimizer with parameters and constraints.
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`
+        A topology diagram. It is not modified.
+    x_starts : ``np.array``
+        The starting optimization parameters, one run per row.
+    workers : ``int``, optional
+        The number of worker processes.
+        If ``None``, as many as processors, but no more than runs.
+        Defaults to ``None``.
+    stop_early : ``bool``, optional
+        If ``True``, the remaining runs are cancelled once a run reaches a penalty below ``eps``.
+        Runs in progress are stopped at their next evaluation.
+        Defaults to ``False``.
+    kwargs : ``dict``, optional
+        The keyword arguments of ``Optimizer.solve`` for every local run.
+
+    Yields
+    ------
+    result : ``dict``
+        The result of a local run, as soon as it completes:
+
+        * ``index``: the row of the starting point in ``x_starts``.
+        * ``x_start``: the starting optimization parameters.
+        * ``x_opt``: the optimal parameters. ``None`` if the run failed.
+        * ``penalty``: the optimal value of the objective function. ``inf`` if the run failed.
+        * ``status``: the status string reported by NLopt.
+        * ``evals``: the number of evaluations of the objective function.
+        * ``time``: the runtime of the run in seconds.
+
+    Notes
+    -----
+    Every worker unpickles its own copy of the topology diagram, the optimization
+    parameters and the constraints once.
+    Runs that never started after an early stop are not yielded.
+    """
+    x_starts = np.atleast_2d(np.asarray(x_starts, dtype=float))
+    eps = kwargs.get("eps", 1e-6)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(x_starts)))
+
+    kwargs["verbose"] = False
+
+    state = {"cls": type(optimizer),
+             "parameters": optimizer.parameters,
+             "constraints": optimizer.constraints,
+             "topology": topology,
+             "kwargs": kwargs}
+
+    stop = Event()
+
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_initialize_worker,
+                             initargs=(pickle.dumps(state), stop)) as executor:
+        futures = [executor.submit(_solve_start, index, x) for index, x in enumerate(x_starts)]
+
+        try:
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+
+                result = future.result()
+                if result is None:
+                    continue
+
+                yield result
+
+                if stop_early and result["penalty"] <= eps:
+                    stop.set()
+                    for other in futures:
+                        other.cancel()
+        finally:
+            # stop runs in progress if the caller stops iterating
+            stop.set()
+            for future in futures:
+                future.cancel()
+
+# ------------------------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------------------------
+
+
+def _check_bounds(bounds_low, bounds_up):
+    """
+    Verify that the bounds of a sampling box are finite.
+    """
+    bounds_low = np.asarray(bounds_low, dtype=float)
+    bounds_up = np.asarray(bounds_up, dtype=float)
+
+    if not np.all(np.isfinite(bounds_low)) or not np.all(np.isfinite(bounds_up)):
+        raise ValueError("Sampling requires finite lower and upper bounds on every parameter")
+
+    return bounds_low, bounds_up
+
+# ------------------------------------------------------------------------------
+# Worker functions
+# ------------------------------------------------------------------------------
+
+
+def _initialize_worker(state, stop):
+    """
+    Unpickle the optimization problem of a worker process.
+    """
+    state = pickle.loads(state)
+
+    optimizer = state["cls"]()
+    optimizer.parameters = state["parameters"]
+    optimizer.constraints = state["constraints"]
+    optimizer._stop = stop.is_set
+
+    _WORKER["optimizer"] = optimizer
+    _WORKER["topology"] = state["topology"]
+    _WORKER["kwargs"] = state["kwargs"]
+
+
+def _solve_start(index, x_start):
+    """
+    Run a local optimization from a starting point in a worker process.
+    Returns ``None`` if the runs were stopped before this one started.
+    """
+    optimizer = _WORKER["optimizer"]
+    if optimizer._stop():
+        return
+
+    optimizer.x_opt = None
+    optimizer.penalty = None
+    optimizer.evals = None
+    optimizer.status = None
+
+    start = time()
+    optimizer.solve(_WORKER["topology"].copy(), x0=x_start, **_WORKER["kwargs"])
+
+    result = {"index": index,
+              "x_start": x_start,
+              "x_opt": None,
+              "penalty": float("inf"),
+              "status": "NLOPT_GENERIC_FAILURE",
+              "evals": optimizer.evals,
+              "time": time() - start}
+
+    if optimizer.x_opt is not None:
+        result["x_opt"] = np.array(optimizer.x_opt, dtype=float)
+        result["penalty"] = float(optimizer.penalty)
+        result["status"] = optimizer.status
+
+    return result
+
+
+if __name__ == "__main__":
+    pass
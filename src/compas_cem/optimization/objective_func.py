@@ -1,4 +1,10 @@
-__all__ = ["objective_function_numpy"]
+import numpy as np
+
+
+__all__ = ["objective_function_numpy",
+           "objective_function_fused",
+           "objective_function_stoppable",
+           "objective_function_callback"]
 
 
 def objective_function_numpy(x, grad, x_func, grad_func):
@@ -11,6 +17,102 @@ def objective_function_numpy(x, grad, x_func, grad_func):
 
     return fx
 
+
+def objective_function_fused(x, grad, x_func, value_grad_func):
+    """
+    Evaluate an objective function and its gradient in a single pass.
+
+    Parameters
+    ----------
+    x : ``np.array``
+        The optimization parameters.
+    grad : ``np.array``
+        The gradient to update in place. If empty, no gradient is computed.
+    x_func : ``function``
+        A function that computes the value of the objective function only.
+    value_grad_func : ``function``
+        A function that computes the value and the gradient of the objective function at once.
+
+    Returns
+    -------
+    fx : ``float``
+        The value of the objective function.
+    """
+    if grad.size > 0:
+        fx, grad[:] = value_grad_func(x)
+        return fx
+
+    return x_func(x)
+
+
+def objective_function_stoppable(x, grad, f, solver, stop, best=None):
+    """
+    Evaluate an objective function, unless a running solver was asked to stop.
+
+    Parameters
+    ----------
+    x : ``np.array``
+        The optimization parameters.
+    grad : ``np.array``
+        The gradient to update in place. If empty, no gradient is computed.
+    f : ``function``
+        The objective function.
+    solver : ``nlopt.opt``
+        The solver that calls the objective function.
+    stop : ``function``
+        A function without arguments that returns ``True`` to stop the solver.
+    best : ``dict``, optional
+        A dictionary to keep the best parameters evaluated so far in, under ``"x"``,
+        and their value of the objective function, under ``"fx"``.
+        Defaults to ``None``.
+
+    Returns
+    -------
+    fx : ``float``
+        The value of the objective function.
+
+    Notes
+    -----
+    The solver stops after this evaluation, raising a ``nlopt.ForcedStop`` exception.
+    The last parameters evaluated are then not necessarily the best ones.
+    """
+    if stop():
+        solver.force_stop()
+
+    fx = f(x, grad)
+
+    if best is not None and ("fx" not in best or fx < best["fx"]):
+        best["x"] = np.array(x, dtype=float)
+        best["fx"] = float(fx)
+
+    return fx
+
+
+def objective_function_callback(x, grad, f, callback):
+    """
+    Evaluate an objective function, and report the evaluation to a callback function.
+
+    Parameters
+    ----------
+    x : ``np.array``
+        The optimization parameters.
+    grad : ``np.array``
+        The gradient to update in place. If empty, no gradient is computed.
+    f : ``function``
+        The objective function.
+    callback : ``function``
+        A function that takes the optimization parameters and the value of the objective function.
+
+    Returns
+    -------
+    fx : ``float``
+        The value of the objective function.
+    """
+    fx = f(x, grad)
+    callback(x, fx)
+
+    return fx
+
 # ------------------------------------------------------------------------------
 # Main
 # ------------------------------------------------------------------------------
@@ -5,22 +5,44 @@ from functools import partial
 import autograd.numpy as np
 
 from autograd import grad as agrad
+from autograd import value_and_grad
+from autograd import make_vjp
+from autograd.tracer import getval
 
-from compas_cem.data import Data
+from scipy.sparse import csr_matrix
 
-from compas_cem.equilibrium import static_equilibrium
-from compas_cem.equilibrium.force_numpy import equilibrium_state_numpy
+from compas_cem.data import Data
 
-from compas_cem.optimization import grad_autograd
-from compas_cem.optimization import grad_finite_differences
-from compas_cem.optimization import objective_function_numpy
+from compas_cem.equilibrium import static_equilibrium_forward
+from compas_cem.equilibrium import EquilibriumProblem
+from compas_cem.equilibrium import PartialSolver
+from compas_cem.equilibrium.force_vectorized import equilibrium_state_from_arrays
+from compas_cem.equilibrium.force_vectorized import equilibrium_state_index
+from compas_cem.equilibrium.force_vectorized import equilibrium_vectorized
+from compas_cem.equilibrium.force_adjoint import equilibrium_vjp
+from compas_cem.equilibrium.force_sparsity import equilibrium_sparsity
+
+from compas_cem.optimization import value_and_grad_finite_differences
+from compas_cem.optimization import FiniteDifferencesPool
+from compas_cem.optimization import latin_hypercube_samples
+from compas_cem.optimization import sobol_samples
+from compas_cem.optimization import iter_multistart
+from compas_cem.optimization import compile_constraints
+from compas_cem.optimization import levenberg_marquardt
+from compas_cem.optimization import jacobian_row_groups
+from compas_cem.optimization import objective_function_fused
+from compas_cem.optimization import objective_function_stoppable
+from compas_cem.optimization import objective_function_callback
 from compas_cem.optimization import nlopt_solver
 from compas_cem.optimization import nlopt_status
 
 from compas_cem.optimization.parameters import EdgeParameter
 from compas_cem.optimization.parameters import NodeParameter
 
+from compas_cem.profiling.profiler import NULL_PROFILER
+
 from nlopt import RoundoffLimited
+from nlopt import ForcedStop
 
 
 __all__ = ["Optimizer"]
@@ -46,10 +68,26 @@ class Optimizer(Data):
         self.evals = None
         self.gradient_norm = None
         self.status = None
+        self.solves = None
+        self.results = None
+        self.stats = None
 
         self._ckey = -1
         self._pkey = -1
 
+        self._gathers = {}
+        self._groups = ([], [])
+        self._jacobian_layout = None
+        self._num_solves = 0
+
+        self._warm_start = False
+        self._warm_state = None
+        self._partial = None
+
+        self._stop = None
+        self._callback = None
+        self._profiler = NULL_PROFILER
+
 # ------------------------------------------------------------------------------
 # Counters
 # ------------------------------------------------------------------------------
@@ -108,30 +146,55 @@ class Optimizer(Data):
 # Objective Function
 # ------------------------------------------------------------------------------
 
-    def objective_func(self, topology, grad_func, tmax, eta):
+    def objective_func(self, topology, value_grad_func, tmax, eta, problem=None):
         """
         The objective function to minimize.
+
+        Notes
+        -----
+        When NLopt asks for a gradient, the value of the objective function
+        and its gradient are computed with a single forward solve.
         """
-        f = objective_function_numpy
-        x_func = partial(self._optimize_form, topology=topology, tmax=tmax, eta=eta)
-        return partial(f, x_func=x_func, grad_func=grad_func)
+        f = objective_function_fused
+        x_func = partial(self._optimize_form, topology=topology, tmax=tmax, eta=eta, problem=problem)
+        value_grad_func = partial(self._value_and_gradient, topology=topology, value_grad_func=value_grad_func)
+        return partial(f, x_func=x_func, value_grad_func=value_grad_func)
 
 # ------------------------------------------------------------------------------
 # Gradient Function
 # ------------------------------------------------------------------------------
 
-    def gradient_func(self, grad_f, topology, tmax, eta, step_size):
+    def gradient_func(self, grad_f, topology, tmax, eta, step_size, problem=None, scheme="forward"):
         """
-        The objective function to calculate gradients from.
+        The objective function to calculate values and gradients from.
         """
-        x_func = partial(self._optimize_form, topology=topology, tmax=tmax, eta=eta)
-        return partial(grad_f, x_func=x_func, step_size=step_size)
+        x_func = partial(self._optimize_form, topology=topology, tmax=tmax, eta=eta, problem=problem)
+        perturbed_func = partial(x_func, perturbed=True)
+        return partial(grad_f, x_func=x_func, step_size=step_size, scheme=scheme, perturbed_func=perturbed_func)
 
 # ---------------------- --------------------------------------------------------
 # Solver
 # ------------------------------------------------------------------------------
 
-    def solve(self, topology, algorithm="SLSQP", grad="AD", step_size=1e-6, iters=100, eps=1e-6, kappa=1e-8, tmax=100, eta=1e-6, verbose=False):
+    def solve(self,
+              topology,
+              algorithm="SLSQP",
+              grad="AD",
+              step_size=1e-6,
+              iters=100,
+              eps=1e-6,
+              kappa=1e-8,
+              tmax=100,
+              eta=1e-6,
+              warm_start=False,
+              workers=1,
+              scheme="forward",
+              chunksize=None,
+              x0=None,
+              verbose=False,
+              profiler=None,
+              problem=None,
+              callback=None):
         """
         Solve a constrained form-finding problem using gradient-based optimization.
 
@@ -149,15 +212,19 @@ class Optimizer(Data):
             - TNEWTON: Preconditioned Truncated Newton
             - AUGLAG: Augmented Lagrangian
             - VAR: Limited-Memory Variable-Metric Algorithm
+            - LM: Levenberg-Marquardt, a damped Gauss-Newton method on the residuals of the constraints
 
             Defaults to "SLSQP".
             Refer to the NLopt `documentation <https://nlopt.readthedocs.io/en/latest/>`_ for more details on their theoretical underpinnings.
+            The LM algorithm is not part of NLopt. It always computes the Jacobian of
+            the residuals with the adjoint method, and ignores ``grad``.
         grad : ``str``, optional
             The method to compute the gradient of the objective function.
             The currently available methods are:
 
             - AD: Automatic differentiation
-            - FD: Finite differences
+            - FD: Finite differences. A perturbed parameter only re-solves the nodes it influences.
+            - ADJOINT: Adjoint method, a hand-derived backward pass over the equilibrium iterations
 
             Defaults to "AD".
         iters : ``int``, optional
@@ -181,15 +248,71 @@ class Optimizer(Data):
             The numerical converge threshold of the CEM form-finding algorithm.
             If ``tmax`` is hit first, the form-finding algorithm will stop early.
             Defaults to ``1e-6``.
+        warm_start : ``bool``, optional
+            A flag to start every equilibrium calculation from the last converged equilibrium state.
+            It only applies to topologies with indirect deviation edges, and it does not always
+            take fewer form-finding iterations than a cold start: when the indirect deviation edges
+            couple distant nodes, a seeded calculation can take more.
+            A seeded calculation that does not converge within ``tmax`` is repeated from scratch.
+            The cached state is discarded if the structure of the topology diagram changes.
+            Defaults to ``False``.
+        workers : ``int``, optional
+            The number of processes to evaluate finite differences with.
+            If larger than ``1``, a pool of processes is kept alive for the whole optimization run.
+            It becomes active only if ``grad="FD"``. It is otherwise ignored by this function.
+            Defaults to ``1``.
+        scheme : ``str``, optional
+            The finite differences scheme, either "forward" or "central".
+            Central differences are more accurate, but take twice as many equilibrium solves.
+            It becomes active only if ``grad="FD"``. It is otherwise ignored by this function.
+            Defaults to "forward".
+        chunksize : ``int``, optional
+            The number of perturbed points sent to a worker process at once.
+            If ``None``, the points are split evenly across the workers.
+            It becomes active only if ``grad="FD"`` and ``workers > 1``.
+            Defaults to ``None``.
+        x0 : ``np.array``, optional
+            The optimization parameters to start the optimization from.
+            If ``None``, the start values are read from the topology diagram.
+            The bounds of the parameters are always computed from the topology diagram.
+            Defaults to ``None``.
         verbose : ``bool``, optional
             A flag to prints statistics of the optimization process.
             Defaults to ``True``.
+        profiler : :class:`compas_cem.profiling.Profiler`, optional
+            A profiler to record the time spent compiling the problem, in forward solves,
+            penalty and gradient evaluations, and backward passes, and to count them.
+            Its stats are attached to the optimizer and to the form diagram.
+            Defaults to ``None``.
+        problem : :class:`compas_cem.equilibrium.EquilibriumProblem`, optional
+            A compiled version of the topology diagram, to skip compiling it again.
+            It must match the topology diagram, values included.
+            Defaults to ``None``.
+        callback : ``function``, optional
+            A function to call after every evaluation of the objective function,
+            with the optimization parameters and the value of the objective function.
+            The parameters array may be reused by the solver. Copy it to keep it.
+            Defaults to ``None``.
 
         Returns
         -------
         form : :class:`compas_cem.diagrams.FormDiagram`
             A form diagram.
         """
+        self._profiler = profiler or NULL_PROFILER
+        self.stats = self._profiler.stats
+        self._callback = callback
+
+        try:
+            return self._solve_profiled(topology, algorithm, grad, step_size, iters, eps, kappa, tmax, eta, warm_start, workers, scheme, chunksize, x0, verbose, problem)
+        finally:
+            self._profiler = NULL_PROFILER
+            self._callback = None
+
+    def _solve_profiled(self, topology, algorithm, grad, step_size, iters, eps, kappa, tmax, eta, warm_start, workers, scheme, chunksize, x0, verbose, problem):
+        """
+        Solve a constrained form-finding problem, recording into the profiler of the optimizer.
+        """
         if verbose:
             print("----------")
             print("Optimization with {} started!".format(algorithm))
@@ -198,25 +321,67 @@ class Optimizer(Data):
         # test for bad stuff before going any further
         self.check_optimization_sanity()
 
+        # compile topology into an equilibrium problem only once
+        with self._profiler.phase("preprocessing"):
+            problem = self.equilibrium_problem(topology, problem)
+
+        # reset counter of forward equilibrium solves
+        self._num_solves = 0
+
+        # enable warm starts, if requested
+        self._warm_start = warm_start
+
+        # re-solve only the nodes influenced by a finite differences perturbation
+        self._partial = None
+        if grad == "FD":
+            self._partial = PartialSolver(tmax, eta)
+
+        # solve as a nonlinear least-squares problem
+        if algorithm == "LM":
+            if verbose:
+                print("Solving a nonlinear least-squares problem with Levenberg-Marquardt!")
+            return self._solve_least_squares(topology, problem, iters, eps, kappa, tmax, eta, x0, verbose)
+
         # compose gradient and objective functions
-        if grad not in ("AD", "FD"):
+        pool = None
+        if grad not in ("AD", "FD", "ADJOINT"):
             raise ValueError(f"Gradient method {grad} is not supported!")
         if grad == "AD":
             if verbose:
                 print("Computing gradients using automatic differentiation!")
-            x_func = partial(self._optimize_form, topology=topology.copy(), tmax=tmax, eta=eta)
-            grad_func = partial(grad_autograd, grad_func=agrad(x_func))  # x, grad, x_func
+            x_func = partial(self._optimize_form, topology=topology.copy(), tmax=tmax, eta=eta, problem=problem)
+            value_grad_func = value_and_grad(x_func)
+
+        elif grad == "ADJOINT":
+            if verbose:
+                print("Computing gradients using the adjoint method!")
+            value_grad_func = partial(self._value_and_gradient_adjoint, tmax=tmax, eta=eta, problem=problem)
 
         elif grad == "FD":
             if verbose:
                 print(f"Warning: Calculating gradients using finite differences with step size {step_size}. This may take a while...")
-            grad_func = self.gradient_func(grad_finite_differences, topology.copy(), tmax, eta, step_size)
+            if workers > 1:
+                if verbose:
+                    print(f"Evaluating finite differences on {workers} processes")
+                pool = FiniteDifferencesPool(self, topology, problem, workers, step_size, scheme, chunksize, tmax, eta)
+                value_grad_func = pool
+            else:
+                value_grad_func = self.gradient_func(value_and_grad_finite_differences, topology.copy(), tmax, eta, step_size, problem, scheme)
 
-        # grad_func = self.gradient_func(grad_func, topology.copy(), tmax, eta, step_size)
-        obj_func = self.objective_func(topology, grad_func, tmax, eta)
+        try:
+            return self._solve(topology, algorithm, value_grad_func, iters, eps, kappa, tmax, eta, problem, x0, verbose)
+        finally:
+            if pool is not None:
+                pool.close()
+
+    def _solve(self, topology, algorithm, value_grad_func, iters, eps, kappa, tmax, eta, problem, x0, verbose):
+        """
+        Run an NLopt solver on the objective function of a topology diagram.
+        """
+        obj_func = self.objective_func(topology, value_grad_func, tmax, eta, problem)
 
         # generate optimization variables
-        x = self.optimization_parameters(topology)
+        x = self._start_parameters(topology, x0)
 
         # extract the lower and upper bounds to optimization variables
         bounds_low, bounds_up = self.optimization_bounds(topology)
@@ -234,27 +399,51 @@ class Optimizer(Data):
         # assemble optimization solver
         solver = nlopt_solver(**hyper_parameters)
 
+        # report every evaluation, if requested
+        if self._callback is not None:
+            obj_func = partial(objective_function_callback, f=obj_func, callback=self._callback)
+            solver.set_min_objective(obj_func)
+
+        # stop the solver from the outside, if requested, keeping track of the best evaluation
+        best = {}
+        if self._stop is not None:
+            solver.set_min_objective(partial(objective_function_stoppable, f=obj_func, solver=solver, stop=self._stop, best=best))
+
         # solve optimization problem
         x_opt = None
+        stopped = False
         start = time()
         try:
-            x_opt = solver.optimize(x)
+            with self._profiler.phase("optimization", algorithm=algorithm):
+                x_opt = solver.optimize(x)
             if verbose:
                 print("Optimization ended correctly!")
         except RoundoffLimited:
             print("Optimization was halted because roundoff errors limited progress")
             print("Results may still be useful though!")
             x_opt = self.optimization_parameters(topology)
+        except ForcedStop:
+            if verbose:
+                print("Optimization was stopped before convergence")
+            # the topology holds the last evaluation, not the best one
+            x_opt = best.get("x")
+            if x_opt is None:
+                x_opt = self.optimization_parameters(topology)
+            self._update_parameters(topology, x_opt)
+            stopped = True
         except RuntimeError:
             print("Optimization failed due to a runtime error!")
             print(f"Optimization total runtime: {round(time() - start, 4)} seconds")
-            return static_equilibrium(topology)
+            return static_equilibrium_forward(topology, profiler=self._profiler)
 
         # fetch last optimum value of loss function
         time_opt = time() - start
         loss_opt = solver.last_optimum_value()
+        if stopped and best:
+            loss_opt = best["fx"]
         evals = solver.get_numevals()
         status = nlopt_status(solver.last_optimize_result())
+        self._profiler.count("evaluations", evals)
 
         # set optimizer attributes
         self.time_opt = time_opt
@@ -262,22 +451,171 @@ class Optimizer(Data):
         self.penalty = loss_opt
         self.evals = evals
         self.status = status
+        self.solves = self._num_solves
 
-        # set norm of the gradient
-        # NOTE: np.zeros is a dummy array (signature requirement set by nlopt)
-        self.gradient = grad_func(x_opt, np.zeros(x_opt.size))
-        self.gradient_norm = np.linalg.norm(self.gradient)
+        # set norm of the gradient, unless the optimization was stopped from the outside
+        self.gradient = None
+        self.gradient_norm = None
+        if not stopped:
+            _, self.gradient = self._value_and_gradient(x_opt, topology, value_grad_func)
+            self.gradient_norm = np.linalg.norm(self.gradient)
 
         if verbose:
             print(f"Optimization total runtime: {round(time_opt, 6)} seconds")
             print("Number of evaluations incurred: {}".format(evals))
+            print("Number of forward equilibrium solves: {}".format(self.solves))
             print(f"Final value of the objective function: {round(loss_opt, 6)}")
-            print(f"Norm of the gradient of the objective function: {round(self.gradient_norm, 6)}")
+            if not stopped:
+                print(f"Norm of the gradient of the objective function: {round(self.gradient_norm, 6)}")
             print(f"Optimization status: {status}".format(status))
             print("----------")
 
         # exit like a champion
-        return static_equilibrium(topology)
+        return static_equilibrium_forward(topology, profiler=self._profiler)
+
+    def _solve_least_squares(self, topology, problem, iters, eps, kappa, tmax, eta, x0, verbose):
+        """
+        Minimize the squared residuals of the constraints with Levenberg-Marquardt.
+        """
+        x = self._start_parameters(topology, x0)
+        bounds_low, bounds_up = self.optimization_bounds(topology)
+
+        def residuals_func(parameters):
+            self._update_parameters(topology, parameters)
+            residuals, jacobian_func = self._residuals_and_jacobian(parameters, tmax, eta, problem)
+            if self._callback is not None:
+                self._callback(parameters, float(residuals @ residuals))
+            return residuals, jacobian_func
+
+        start = time()
+        with self._profiler.phase("optimization", algorithm="LM"):
+            x_opt, loss_opt, status, evals = levenberg_marquardt(residuals_func, x, bounds_low, bounds_up, iters, eps, kappa)
+        self._profiler.count("evaluations", evals)
+
+        # set optimizer attributes
+        self.time_opt = time() - start
+        self.x_opt = x_opt
+        self.penalty = loss_opt
+        self.evals = evals
+        self.status = status
+        self.solves = self._num_solves
+
+        # set norm of the gradient
+        self._update_parameters(topology, x_opt)
+        residuals, jacobian_func = self._residuals_and_jacobian(x_opt, tmax, eta, problem)
+        self.gradient = 2.0 * (jacobian_func().T @ residuals)
+        self.gradient_norm = np.linalg.norm(self.gradient)
+
+        if verbose:
+            print(f"Optimization total runtime: {round(self.time_opt, 6)} seconds")
+            print("Number of evaluations incurred: {}".format(evals))
+            print("Number of forward equilibrium solves: {}".format(self.solves))
+            print(f"Final value of the objective function: {round(loss_opt, 6)}")
+            print(f"Norm of the gradient of the objective function: {round(self.gradient_norm, 6)}")
+            print(f"Optimization status: {status}")
+            print("----------")
+
+        return static_equilibrium_forward(topology, profiler=self._profiler)
+
+# ------------------------------------------------------------------------------
+# Multi-start solver
+# ------------------------------------------------------------------------------
+
+    def solve_multistart(self, topology, starts=8, sampling="LHS", seed=None, workers=None, stop_early=False, callback=None, verbose=False, **kwargs):
+        """
+        Solve a constrained form-finding problem from multiple starting points in parallel.
+
+        Parameters
+        ----------
+        topology : :class:`compas_cem.diagrams.TopologyDiagram`
+            A topology diagram.
+        starts : ``int``, optional
+            The number of starting points to sample inside the bounds of the optimization parameters.
+            Defaults to ``8``.
+        sampling : ``str``, optional
+            The sampling method of the starting points.
+            The currently available methods are:
+
+            - LHS: Latin hypercube sampling
+            - SOBOL: Scrambled Sobol sequence. Requires ``scipy``.
+
+            Defaults to "LHS".
+        seed : ``int``, optional
+            The seed of the sampling method.
+            Defaults to ``None``.
+        workers : ``int``, optional
+            The number of processes to run local optimizations on.
+            If ``None``, as many as processors, but no more than starting points.
+            Defaults to ``None``.
+        stop_early : ``bool``, optional
+            If ``True``, the remaining runs are cancelled once a run reaches a penalty below ``eps``.
+            Defaults to ``False``.
+        callback : ``function``, optional
+            A function to call with the result dictionary of every local run, as soon as it completes.
+            See ``iter_multistart`` for the contents of a result.
+            Defaults to ``None``.
+        verbose : ``bool``, optional
+            A flag to prints statistics of the optimization process.
+            Defaults to ``False``.
+        kwargs : ``dict``, optional
+            The keyword arguments of ``Optimizer.solve`` for every local run,
+            such as ``algorithm``, ``grad``, ``iters`` or ``eps``.
+
+        Returns
+        -------
+        form : :class:`compas_cem.diagrams.FormDiagram`
+            The form diagram of the run with the lowest penalty.
+
+        Notes
+        -----
+        The results of all the runs are stored in ``Optimizer.results``, in order of completion.
+        The other attributes of the optimizer are set from the best run.
+        """
+        samplers = {"LHS": latin_hypercube_samples, "SOBOL": sobol_samples}
+        if sampling not in samplers:
+            raise ValueError(f"Sampling method {sampling} is not supported!")
+
+        # test for bad stuff before going any further
+        self.check_optimization_sanity()
+
+        bounds_low, bounds_up = self.optimization_bounds(topology)
+        x_starts = samplers[sampling](bounds_low, bounds_up, starts, seed)
+
+        if verbose:
+            print("----------")
+            print(f"Multi-start optimization from {starts} starting points started!")
+
+        results = []
+        start = time()
+        for result in iter_multistart(self, topology, x_starts, workers, stop_early, **kwargs):
+            results.append(result)
+            if verbose:
+                print("Run {}: penalty {:.6g}, {} evaluations, {}".format(result["index"], result["penalty"], result["evals"], result["status"]))
+            if callback:
+                callback(result)
+
+        best = min(results, key=lambda result: result["penalty"])
+        if best["x_opt"] is None:
+            raise RuntimeError("All the optimization runs failed!")
+
+        # set optimizer attributes
+        self.time_opt = time() - start
+        self.x_opt = best["x_opt"]
+        self.penalty = best["penalty"]
+        self.evals = best["evals"]
+        self.status = best["status"]
+        self.solves = None
+        self.gradient_norm = None
+        self.results = results
+
+        if verbose:
+            print(f"Multi-start optimization total runtime: {round(self.time_opt, 6)} seconds")
+            print("Best run: {}, with a final value of the objective function of {:.6g}".format(best["index"], self.penalty))
+            print("----------")
+
+        self._update_parameters(topology, self.x_opt)
+
+        return static_equilibrium_forward(topology)
 
 # ------------------------------------------------------------------------------
 # Optimization parameters
@@ -310,6 +648,227 @@ class Optimizer(Data):
 
         return bounds_low, bounds_up
 
+    def _start_parameters(self, topology, x0):
+        """
+        The optimization parameters to start from, read from the topology diagram if ``x0`` is ``None``.
+        """
+        if x0 is None:
+            return self.optimization_parameters(topology)
+
+        x = np.array(x0, dtype=float)
+        if x.shape != (self.number_of_parameters(), ):
+            msg = "Expected {} start values, got array of shape {}"
+            raise ValueError(msg.format(self.number_of_parameters(), x.shape))
+
+        return x
+
+# ------------------------------------------------------------------------------
+# Equilibrium problem
+# ------------------------------------------------------------------------------
+
+    def equilibrium_problem(self, topology, problem=None):
+        """
+        Compile a topology diagram into an equilibrium problem for optimization.
+
+        Parameters
+        ----------
+        topology : :class:`compas_cem.diagrams.TopologyDiagram`
+            A topology diagram.
+        problem : :class:`compas_cem.equilibrium.EquilibriumProblem`, optional
+            A compiled version of the topology diagram.
+            If supplied, the topology diagram is not compiled again.
+            Defaults to ``None``.
+
+        Returns
+        -------
+        problem : :class:`compas_cem.equilibrium.EquilibriumProblem`
+            The compiled equilibrium problem.
+
+        Notes
+        -----
+        This also maps the optimization parameters to the value arrays of the problem,
+        and compiles the constraints into groups of the same type.
+        Both are reused by every evaluation of the objective function.
+        """
+        if problem is None:
+            problem = EquilibriumProblem.from_topology_diagram(topology)
+
+        gathers = {}
+        for pkey, parameter in self.parameters.items():
+            field, index = problem.attribute_index(parameter.key(), parameter.attr_name())
+            if field not in gathers:
+                size = getattr(problem, field).size
+                gathers[field] = np.arange(size)
+            gathers[field][index] = gathers[field].size + pkey
+
+        self._gathers = gathers
+        self._groups = compile_constraints(self.constraints.values(), problem)
+        self._jacobian_layout = None
+
+        return problem
+
+# ------------------------------------------------------------------------------
+# Residuals
+# ------------------------------------------------------------------------------
+
+    def residuals_jacobian(self, topology, tmax=100, eta=1e-6):
+        """
+        Calculate the residuals of the constraints and their Jacobian with respect to the optimization parameters.
+
+        Parameters
+        ----------
+        topology : :class:`compas_cem.diagrams.TopologyDiagram`
+            A topology diagram.
+        tmax : ``int``, optional
+            The maximum number of iterations the CEM form-finding algorithm will run for.
+            Defaults to ``100``.
+        eta : ``float``, optional
+            The numerical converge threshold of the CEM form-finding algorithm.
+            Defaults to ``1e-6``.
+
+        Returns
+        -------
+        residuals : ``np.array``
+            The weighted residual components of all the constraints.
+            Their sum of squares is the value of the objective function.
+        jacobian : ``scipy.sparse.csr_matrix``
+            The Jacobian of the residuals, one column per optimization parameter.
+
+        Notes
+        -----
+        The residuals of the built-in constraints are sorted by constraint type.
+        A parameter only influences the nodes downstream on its trail and the nodes
+        connected to them by deviation edges, so the Jacobian is mostly empty.
+        Rows without common parameters are computed together, with one backward pass
+        of the adjoint method per group of rows.
+        """
+        self.check_optimization_sanity()
+
+        problem = self.equilibrium_problem(topology)
+        x = self.optimization_parameters(topology)
+
+        residuals, jacobian_func = self._residuals_and_jacobian(x, tmax, eta, problem)
+
+        return residuals, jacobian_func()
+
+    def _residuals_and_jacobian(self, parameters, tmax, eta, problem):
+        """
+        Calculate the residuals of the constraints, and a function to calculate their Jacobian.
+        The Jacobian reuses the forward solve of the residuals.
+        """
+        problem = self._update_problem(problem, parameters)
+
+        # forward pass, recording the equilibrium iterations
+        tape = []
+        arrays = self._equilibrium(problem, tmax, eta, tape)
+        residuals = self._residuals_arrays(problem, arrays)
+
+        def jacobian_func():
+            sparsity, row_groups = self._residuals_layout(problem, residuals.size)
+
+            rows, cols, values = [], [], []
+            for group in row_groups:
+                seed = np.zeros(residuals.size)
+                seed[group] = 1.0
+
+                with self._profiler.phase("backward"):
+                    arrays_bar = self._residuals_vjp(problem, arrays, seed)
+                    gradient = self._parameters_gradient(equilibrium_vjp(problem, tape, *arrays_bar))
+                self._profiler.count("backward_solves")
+
+                group_rows, group_cols = np.nonzero(sparsity[group])
+                rows.append(group[group_rows])
+                cols.append(group_cols)
+                values.append(gradient[group_cols])
+
+            shape = (residuals.size, self.number_of_parameters())
+            return csr_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))), shape=shape)
+
+        return residuals, jacobian_func
+
+    def _residuals_arrays(self, problem, arrays):
+        """
+        Calculate the residuals of the constraints on the arrays of an equilibrium state.
+        """
+        groups, ungrouped = self._groups
+
+        with self._profiler.phase("penalty"):
+            residuals = [group.residuals(arrays) for group in groups]
+            if ungrouped:
+                residuals.append(self._ungrouped_residuals(arrays, problem))
+
+            return np.concatenate(residuals)
+
+    def _ungrouped_residuals(self, arrays, problem):
+        """
+        Calculate the residuals of the constraints without a group, one by one.
+        """
+        _, ungrouped = self._groups
+        eq_state = equilibrium_state_from_arrays(problem, *arrays)
+
+        return np.concatenate([np.array(constraint.residual(eq_state)) for constraint in ungrouped])
+
+    def _residuals_vjp(self, problem, arrays, residuals_bar):
+        """
+        Backpropagate the adjoint of the residuals to the arrays of an equilibrium state.
+
+        Notes
+        -----
+        The residuals of the constraints without a group are differentiated with ``autograd``.
+        """
+        groups, ungrouped = self._groups
+
+        arrays_bar = [np.zeros(np.shape(array)) for array in arrays]
+
+        start = 0
+        for group in groups:
+            end = start + group.number_of_residuals()
+            group.residuals_vjp(arrays, residuals_bar[start:end], arrays_bar)
+            start = end
+
+        if ungrouped and np.any(residuals_bar[start:]):
+            vjp, _ = make_vjp(self._ungrouped_residuals)(arrays, problem)
+            for array_bar, autograd_bar in zip(arrays_bar, vjp(residuals_bar[start:])):
+                array_bar += autograd_bar
+
+        return arrays_bar
+
+    def _residuals_layout(self, problem, num_residuals):
+        """
+        The sparsity pattern of the Jacobian of the residuals, and the groups of rows without common parameters.
+        """
+        if self._jacobian_layout is None:
+            sparsity = self._residuals_sparsity(problem, num_residuals)
+            self._jacobian_layout = (sparsity, jacobian_row_groups(sparsity))
+
+        return self._jacobian_layout
+
+    def _residuals_sparsity(self, problem, num_residuals):
+        """
+        Trace the optimization parameters every residual depends on.
+        The residuals of the constraints without a group depend on all the parameters.
+        """
+        num_parameters = self.number_of_parameters()
+
+        # dependency of the rows of the problem values on the parameters
+        patterns = {}
+        for field, gather in self._gathers.items():
+            num_rows = len(getattr(problem, field))
+            entries = np.flatnonzero(gather >= gather.size)
+            pattern = np.zeros((num_rows, num_parameters), dtype=bool)
+            pattern[entries // (gather.size // num_rows), gather[entries] - gather.size] = True
+            patterns[field] = pattern
+
+        arrays_patterns = equilibrium_sparsity(problem, patterns)
+
+        groups, _ = self._groups
+        sparsity = [group.sparsity(arrays_patterns) for group in groups]
+
+        num_ungrouped = num_residuals - sum(group.number_of_residuals() for group in groups)
+        sparsity.append(np.ones((num_ungrouped, num_parameters), dtype=bool))
+
+        return np.concatenate(sparsity)
+
 # ------------------------------------------------------------------------------
 # Updates
 # ------------------------------------------------------------------------------
@@ -332,6 +891,18 @@ class Optimizer(Data):
                 msg = "Parameter {} is neither a node nor an edge parameter! {}"
                 raise TypeError(msg.format(type(parameter)))
 
+    def _update_problem(self, problem, parameters):
+        """
+        Update the defined design parameters in an equilibrium problem.
+        """
+        values = {}
+        for field, gather in self._gathers.items():
+            array = getattr(problem, field)
+            stack = np.concatenate((np.ravel(array), parameters))
+            values[field] = np.reshape(stack[gather], array.shape)
+
+        return problem.replace(**values)
+
 # ------------------------------------------------------------------------------
 # Penalty function
 # ------------------------------------------------------------------------------
@@ -345,18 +916,190 @@ class Optimizer(Data):
 
         return penalty
 
+    def _calculate_penalty_arrays(self, problem, arrays):
+        """
+        Calculate the penalty of the compiled constraint groups on the arrays of an equilibrium state.
+        The constraints without a group are evaluated one by one.
+        """
+        groups, ungrouped = self._groups
+
+        with self._profiler.phase("penalty"):
+            penalty = 0.0
+            for group in groups:
+                penalty = penalty + group.penalty(arrays)
+
+            if ungrouped:
+                eq_state = equilibrium_state_from_arrays(problem, *arrays)
+                for constraint in ungrouped:
+                    penalty = penalty + constraint.penalty(eq_state)
+
+            return penalty
+
 # ------------------------------------------------------------------------------
 # Optimization
 # ------------------------------------------------------------------------------
 
-    def _optimize_form(self, parameters, topology, tmax, eta):
+    def _optimize_form(self, parameters, topology, tmax, eta, problem=None, perturbed=False):
+        """
+        Calculate the penalty of the constraints at some optimization parameters.
+        Perturbed parameters, like those of finite differences, may only re-solve the nodes they influence.
+        """
+        self._update_parameters(topology, parameters)
+
+        if problem is None:
+            problem = EquilibriumProblem.from_topology_diagram(topology)
+            self._groups = compile_constraints(self.constraints.values(), problem)
+        else:
+            problem = self._update_problem(problem, parameters)
+
+        arrays = self._equilibrium(problem, tmax, eta, perturbed=perturbed)
+
+        return self._calculate_penalty_arrays(problem, arrays)
+
+    def _equilibrium(self, problem, tmax, eta, tape=None, perturbed=False):
+        """
+        Calculate a state of equilibrium, warm-starting from the last one if enabled.
+        With finite differences, a perturbed problem only re-solves the nodes influenced by its perturbation.
+        """
+        self._num_solves += 1
+        self._profiler.count("forward_solves")
+
+        with self._profiler.phase("forward"):
+            xyz = self._warm_xyz(problem, tmax)
+            try:
+                arrays = self._forward(problem, tmax, eta, tape, xyz, perturbed)
+            except ValueError:
+                if xyz is None:
+                    raise
+                # a warm start may converge slower than a cold one, or not at all
+                if tape is not None:
+                    del tape[:]
+                arrays = self._forward(problem, tmax, eta, tape, None, perturbed)
+
+        if self._warm_start and not perturbed:
+            values = {name: getval(getattr(problem, name)) for name in problem._values}
+            self._warm_state = (problem.replace(**values), getval(arrays[0]))
+
+        return arrays
+
+    def _forward(self, problem, tmax, eta, tape, xyz, perturbed):
+        """
+        Run the forward solver that fits an equilibrium calculation.
+        """
+        if tape is None and self._partial is not None:
+            return self._partial.solve(problem, xyz=xyz, reference=not perturbed)
+
+        return equilibrium_vectorized(problem, tmax, eta, tape=tape, xyz=xyz, profiler=self._profiler)
+
+    def _warm_xyz(self, problem, tmax):
+        """
+        The node positions of the last converged equilibrium state, if still valid.
+        """
+        if not self._warm_start or self._warm_state is None:
+            return
+
+        warm_problem, xyz = self._warm_state
+        if not warm_problem.has_same_structure(problem):
+            self._warm_state = None
+            return
+
+        # a single iteration, or no indirect deviation edges, leave nothing to warm
+        if tmax < 2 or problem.number_of_indirect_deviation_edges() == 0:
+            return
+
+        return xyz
+
+    def _value_and_gradient(self, parameters, topology, value_grad_func):
         """
+        Calculate the value and the gradient of the penalty function.
+        The parameters are written to the topology diagram, like in a value-only evaluation.
         """
         self._update_parameters(topology, parameters)
 
-        eq_state = equilibrium_state_numpy(topology, tmax, eta)
+        with self._profiler.phase("gradient"):
+            return value_grad_func(parameters)
+
+    def _value_and_gradient_adjoint(self, parameters, tmax, eta, problem):
+        """
+        Calculate the value and the gradient of the penalty function with the adjoint method.
+        """
+        problem = self._update_problem(problem, parameters)
+
+        # forward pass, recording the equilibrium iterations
+        tape = []
+        arrays = self._equilibrium(problem, tmax, eta, tape)
+
+        penalty = self._calculate_penalty_arrays(problem, arrays)
+
+        with self._profiler.phase("backward"):
+            # adjoint of the equilibrium state
+            arrays_bar = self._penalty_gradient(problem, arrays)
+
+            # backward pass
+            values_bar = equilibrium_vjp(problem, tape, *arrays_bar)
+        self._profiler.count("backward_solves")
+
+        return penalty, self._parameters_gradient(values_bar)
+
+    def _penalty_gradient(self, problem, arrays):
+        """
+        Calculate the gradient of the penalty function with respect to the arrays of an equilibrium state.
+
+        Notes
+        -----
+        Constraints that are not part of a group and do not implement an analytic gradient
+        are differentiated with ``autograd``.
+        """
+        groups, ungrouped = self._groups
+
+        arrays_bar = [np.zeros(np.shape(array)) for array in arrays]
+        for group in groups:
+            group.gradient(arrays, arrays_bar)
+
+        if not ungrouped:
+            return arrays_bar
+
+        names = ("node_xyz", "trail_forces", "trail_directions", "reaction_forces")
+        eq_state = equilibrium_state_from_arrays(problem, *arrays)
+        index = equilibrium_state_index(problem)
+
+        arrays_bar = dict(zip(names, arrays_bar))
+
+        constraints = []
+        for constraint in ungrouped:
+            try:
+                gradient = constraint.gradient(eq_state)
+            except NotImplementedError:
+                constraints.append(constraint)
+                continue
+
+            for name, partials in gradient.items():
+                for key, partial_value in partials.items():
+                    arrays_bar[name][index[name][key]] += partial_value
+
+        arrays_bar = [arrays_bar[name] for name in names]
+
+        if constraints:
+            def penalty(arrays):
+                eq_state = equilibrium_state_from_arrays(problem, *arrays)
+                return sum(constraint.penalty(eq_state) for constraint in constraints)
+
+            for array_bar, autograd_bar in zip(arrays_bar, agrad(penalty)(arrays)):
+                array_bar += autograd_bar
+
+        return arrays_bar
+
+    def _parameters_gradient(self, values_bar):
+        """
+        Gather the gradient of the optimization parameters from the adjoints of a problem.
+        """
+        gradient = np.zeros(self.number_of_parameters())
+
+        for field, gather in self._gathers.items():
+            mask = gather >= gather.size
+            gradient[gather[mask] - gather.size] += np.ravel(values_bar[field])[mask]
 
-        return self._calculate_penalty(eq_state)
+        return gradient
 
 # ------------------------------------------------------------------------------
 # Sanity Check
@@ -1,4 +1,23 @@
-__all__ = ["solve_proxy"]
+from uuid import uuid4
+
+
+__all__ = ["solve_proxy",
+           "session_start_proxy",
+           "session_update_proxy",
+           "session_solve_proxy",
+           "session_close_proxy",
+           "job_submit_proxy",
+           "job_poll_proxy",
+           "job_cancel_proxy",
+           "job_latest_proxy",
+           "job_result_proxy"]
+
+
+# the optimization sessions resident in the process of a proxy server
+SESSIONS = {}
+
+# the optimization jobs running in the process of a proxy server
+JOBS = {}
 
 
 # ------------------------------------------------------------------------------
@@ -95,6 +114,264 @@ def solve_proxy(topology, constraints, parameters, algorithm, iters, eps=1e-6, k
 
     return topology, form, objective, grad_norm, evals, duration, status
 
+# ------------------------------------------------------------------------------
+# Sessions
+# ------------------------------------------------------------------------------
+
+
+def session_start_proxy(topology, constraints, parameters):
+    """
+    Start an optimization session that stays resident in the process of a Proxy server.
+
+    Parameters
+    ----------
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`
+        A topology diagram.
+    constraints : ``list``
+        A list with the constraints to optimize for.
+    parameters : ``list``
+        A list of optimization parameters.
+
+    Returns
+    -------
+    session : ``str``
+        The key of the session.
+    ids : ``dict``
+        The ids of the ``"constraints"`` and ``"parameters"`` in the session, in order.
+        Use them to remove or to replace the elements later on.
+    """
+    from compas_cem.optimization import OptimizationSession
+
+    session = uuid4().hex
+    SESSIONS[session] = OptimizationSession(topology)
+    ids = SESSIONS[session].update(constraints=constraints, parameters=parameters)
+
+    return session, ids
+
+
+def session_update_proxy(session, topology=None, constraints=None, parameters=None, remove=None):
+    """
+    Send the changes of a constrained form-finding problem to a resident optimization session.
+
+    Parameters
+    ----------
+    session : ``str``
+        The key of the session.
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`, optional
+        A new topology diagram.
+        Defaults to ``None``.
+    constraints : ``list``, optional
+        The new or changed constraints.
+        Defaults to ``None``.
+    parameters : ``list``, optional
+        The new or changed parameters.
+        Defaults to ``None``.
+    remove : ``list``, optional
+        The ids of the constraints and parameters to remove, including the ones changed.
+        Defaults to ``None``.
+
+    Returns
+    -------
+    ids : ``dict``
+        The ids of the new ``"constraints"`` and ``"parameters"``, in order.
+
+    Notes
+    -----
+    A ``KeyError`` is raised if the session does not exist, for example after the server restarted.
+    """
+    return _session(session).update(topology, constraints, parameters, remove)
+
+
+def session_solve_proxy(session, algorithm, iters, eps=1e-6, kappa=1e-8, tmax=100, eta=1e-6):
+    """
+    Solve the constrained form-finding problem of a resident optimization session.
+
+    Parameters
+    ----------
+    session : ``str``
+        The key of the session.
+
+    See :func:`solve_proxy` for the other parameters and the return values.
+    """
+    optimizer, topology, form = _session(session).solve(algorithm=algorithm,
+                                                        iters=iters,
+                                                        eps=eps,
+                                                        kappa=kappa,
+                                                        tmax=tmax,
+                                                        eta=eta)
+
+    duration = optimizer.time_opt
+    objective = optimizer.penalty
+    evals = optimizer.evals
+    grad_norm = optimizer.gradient_norm
+    status = optimizer.status
+
+    return topology, form, objective, grad_norm, evals, duration, status
+
+
+def session_close_proxy(session):
+    """
+    Discard a resident optimization session.
+
+    Parameters
+    ----------
+    session : ``str``
+        The key of the session.
+    """
+    SESSIONS.pop(session, None)
+
+
+def _session(session):
+    """
+    Fetch a resident optimization session.
+    """
+    if session not in SESSIONS:
+        raise KeyError("Optimization session {} does not exist!".format(session))
+    return SESSIONS[session]
+
+# ------------------------------------------------------------------------------
+# Jobs
+# ------------------------------------------------------------------------------
+
+
+def job_submit_proxy(topology, constraints, parameters, algorithm, iters, eps=1e-6, kappa=1e-8, tmax=100, eta=1e-6):
+    """
+    Start solving a constrained form-finding problem in the background of a Proxy server.
+
+    Parameters
+    ----------
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`
+        A topology diagram.
+    constraints : ``list``
+        A list with the constraints to optimize for.
+    parameters : ``list``
+        A list of optimization parameters.
+
+    See :func:`solve_proxy` for the other parameters.
+
+    Returns
+    -------
+    job : ``str``
+        The key of the job.
+    """
+    from compas_cem.optimization import Optimizer
+    from compas_cem.optimization import OptimizationJob
+
+    optimizer = Optimizer()
+
+    for constraint in constraints:
+        optimizer.add_constraint(constraint)
+
+    for parameter in parameters:
+        optimizer.add_parameter(parameter)
+
+    job = uuid4().hex
+    JOBS[job] = OptimizationJob(optimizer,
+                                topology,
+                                algorithm=algorithm,
+                                iters=iters,
+                                eps=eps,
+                                kappa=kappa,
+                                tmax=tmax,
+                                eta=eta)
+    JOBS[job].start()
+
+    return job
+
+
+def job_poll_proxy(job):
+    """
+    Check the progress of a job without waiting for it.
+
+    Parameters
+    ----------
+    job : ``str``
+        The key of the job.
+
+    Returns
+    -------
+    progress : ``dict``
+        The status, the number of evaluations, and the best penalty and parameters so far.
+        See :meth:`compas_cem.optimization.OptimizationJob.progress`.
+    """
+    return _job(job).progress()
+
+
+def job_cancel_proxy(job):
+    """
+    Stop a job after the running evaluation of its objective function.
+
+    Parameters
+    ----------
+    job : ``str``
+        The key of the job.
+    """
+    _job(job).cancel()
+
+
+def job_latest_proxy(job):
+    """
+    Fetch the form diagram at the best parameters a job found so far.
+
+    Parameters
+    ----------
+    job : ``str``
+        The key of the job.
+
+    Returns
+    -------
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`
+        The topology diagram with the best parameters so far, or ``None``.
+    form : :class:`compas_cem.diagrams.FormDiagram`
+        The form diagram at the best parameters so far, or ``None``.
+    objective : ``float``
+        The value of the objective function at the best parameters so far.
+    """
+    return _job(job).latest()
+
+
+def job_result_proxy(job, timeout=0.0):
+    """
+    Fetch the results of a finished job, and discard it.
+
+    Parameters
+    ----------
+    job : ``str``
+        The key of the job.
+    timeout : ``float``, optional
+        The longest time to wait for the job to finish, in seconds.
+        Defaults to ``0.0``.
+
+    Returns
+    -------
+    solution : ``tuple``
+        The results of the job, like those of :func:`solve_proxy`.
+
+    Notes
+    -----
+    A ``ValueError`` is raised if the job failed or did not finish in time.
+    A job that failed is discarded too.
+    """
+    optimization_job = _job(job)
+    optimization_job.wait(timeout)
+
+    if optimization_job.status == "failed":
+        del JOBS[job]
+
+    solution = optimization_job.result()
+    del JOBS[job]
+
+    return solution
+
+
+def _job(job):
+    """
+    Fetch a running or finished optimization job.
+    """
+    if job not in JOBS:
+        raise KeyError("Optimization job {} does not exist!".format(job))
+    return JOBS[job]
+
 # ------------------------------------------------------------------------------
 # Main
 # ------------------------------------------------------------------------------
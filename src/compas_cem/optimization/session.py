@@ -0,0 +1,263 @@
+import numpy as np
+
+from compas_cem.equilibrium import EquilibriumProblem
+
+from compas_cem.optimization import Optimizer
+
+
+__all__ = ["OptimizationSession"]
+
+# ==============================================================================
+# Optimization Session
+# ==============================================================================
+
+
+class OptimizationSession(object):
+    """
+    A constrained form-finding problem that stays resident between solves.
+
+    Parameters
+    ----------
+    topology : :class:`compas_cem.diagrams.TopologyDiagram`
+        A topology diagram.
+    constraints : ``list``, optional
+        The constraints to optimize for.
+        Defaults to ``None``.
+    parameters : ``list``, optional
+        The optimization parameters.
+        Defaults to ``None``.
+
+    Attributes
+    ----------
+    constraints : ``dict``
+        The constraints of the session, by their id.
+    parameters : ``dict``
+        The parameters of the session, by their id.
+    x_opt : ``np.array``
+        The optimal parameters of the last solve, or ``None``.
+    solves : ``int``
+        The number of solves of the session.
+
+    Notes
+    -----
+    A session keeps the topology diagram, its compiled equilibrium problem,
+    the optimum of the last solve and the equilibrium state at that optimum,
+    so that later solves only need the changes to its constraints and parameters.
+
+    Every constraint and parameter added to a session gets an id, unique to the session.
+    To change a target or the bounds of a parameter, remove the old element by its id
+    and add the new one in the same update.
+
+    The topology diagram of a session is never modified by a solve.
+    """
+    def __init__(self, topology, constraints=None, parameters=None):
+        self._topology = None
+        self._problem = None
+
+        self.constraints = {}
+        self.parameters = {}
+        self._eid = -1
+
+        self.x_opt = None
+        self.solves = 0
+        self._parameter_keys = None
+        self._warm_state = None
+
+        self.topology = topology
+        self.update(constraints=constraints, parameters=parameters)
+
+    @staticmethod
+    def element_key(element):
+        """
+        The type and the key of the node or the edge of a constraint or a parameter.
+
+        Parameters
+        ----------
+        element : ``object``
+            A constraint or a parameter.
+
+        Returns
+        -------
+        key : ``tuple``
+            The name of the type and the key of the element.
+
+        Notes
+        -----
+        The optimum of the last solve is reused as a start only if the parameters
+        of the session still have the same types and keys, in the same order.
+        """
+        key = element.key()
+        if isinstance(key, list):
+            key = tuple(key)
+        return type(element).__name__, key
+
+# ==============================================================================
+# Properties
+# ==============================================================================
+
+    @property
+    def topology(self):
+        """
+        The topology diagram of the session.
+        Setting a new one discards its compiled problem, the last optimum and its equilibrium state.
+        """
+        return self._topology
+
+    @topology.setter
+    def topology(self, topology):
+        self._topology = topology
+        self._problem = None
+        self.x_opt = None
+        self._warm_state = None
+
+    @property
+    def problem(self):
+        """
+        The equilibrium problem compiled from the topology diagram, once.
+        """
+        if self._problem is None:
+            self._problem = EquilibriumProblem.from_topology_diagram(self._topology)
+        return self._problem
+
+# ==============================================================================
+# Changes
+# ==============================================================================
+
+    def update(self, topology=None, constraints=None, parameters=None, remove=None):
+        """
+        Apply changes to the problem of the session.
+
+        Parameters
+        ----------
+        topology : :class:`compas_cem.diagrams.TopologyDiagram`, optional
+            A new topology diagram.
+            Defaults to ``None``.
+        constraints : ``list``, optional
+            The constraints to add.
+            Defaults to ``None``.
+        parameters : ``list``, optional
+            The parameters to add.
+            Defaults to ``None``.
+        remove : ``list``, optional
+            The ids of the constraints and parameters to remove.
+            They are removed before the new elements are added.
+            Defaults to ``None``.
+
+        Returns
+        -------
+        ids : ``dict``
+            The ids of the added ``"constraints"`` and ``"parameters"``, in order.
+        """
+        if topology is not None:
+            self.topology = topology
+
+        for eid in remove or []:
+            self.constraints.pop(eid, None)
+            self.parameters.pop(eid, None)
+
+        ids = {"constraints": [], "parameters": []}
+
+        for constraint in constraints or []:
+            self._eid += 1
+            self.constraints[self._eid] = constraint
+            ids["constraints"].append(self._eid)
+
+        for parameter in parameters or []:
+            self._eid += 1
+            self.parameters[self._eid] = parameter
+            ids["parameters"].append(self._eid)
+
+        return ids
+
+# ==============================================================================
+# Solve
+# ==============================================================================
+
+    def solve(self, algorithm="SLSQP", iters=100, eps=1e-6, kappa=1e-8, tmax=100, eta=1e-6, warm_start=True, **kwargs):
+        """
+        Solve the constrained form-finding problem of the session.
+
+        Parameters
+        ----------
+        algorithm : ``str``, optional
+            The name of the optimization algorithm to use.
+            Defaults to "SLSQP".
+        iters : ``int``, optional
+            The maximum number of iterations to run the optimization algorithm for.
+            Defaults to ``100``.
+        eps : ``float``, optional
+            The convergence threshold for the output value of the objective function.
+            Defaults to ``1e-6``.
+        kappa : ``float``, optional
+            The convergence threshold for the norm of the gradient of the objective function.
+            Defaults to ``1e-8``.
+        tmax : ``int``, optional
+            The maximum number of iterations the CEM form-finding algorithm will run for.
+            Defaults to ``100``.
+        eta : ``float``, optional
+            The numerical converge threshold of the CEM form-finding algorithm.
+            Defaults to ``1e-6``.
+        warm_start : ``bool``, optional
+            If ``True``, start from the optimum of the last solve, clipped to the current bounds,
+            if the parameters did not change since. The equilibrium calculations are
+            warm-started too, from the last equilibrium state of the session.
+            Defaults to ``True``.
+        **kwargs : ``dict``, optional
+            Other arguments for :meth:`compas_cem.optimization.Optimizer.solve`.
+
+        Returns
+        -------
+        optimizer : :class:`compas_cem.optimization.Optimizer`
+            The optimizer, with the results of the solve.
+        topology : :class:`compas_cem.diagrams.TopologyDiagram`
+            A copy of the topology diagram with the optimal parameters.
+        form : :class:`compas_cem.diagrams.FormDiagram`
+            The constrained form diagram.
+        """
+        optimizer = Optimizer()
+        if warm_start:
+            optimizer._warm_state = self._warm_state
+
+        for constraint in self.constraints.values():
+            optimizer.add_constraint(constraint)
+
+        parameter_keys = [self.element_key(parameter) for parameter in self.parameters.values()]
+        for parameter in self.parameters.values():
+            optimizer.add_parameter(parameter)
+
+        x0 = None
+        if warm_start and self.x_opt is not None and self._parameter_keys == parameter_keys:
+            bounds_low, bounds_up = optimizer.optimization_bounds(self._topology)
+            x0 = np.clip(self.x_opt, bounds_low, bounds_up)
+
+        topology = self._topology.copy()
+        form = optimizer.solve(topology,
+                               algorithm=algorithm,
+                               iters=iters,
+                               eps=eps,
+                               kappa=kappa,
+                               tmax=tmax,
+                               eta=eta,
+                               x0=x0,
+                               warm_start=warm_start,
+                               problem=self.problem,
+                               **kwargs)
+
+        # a failed optimization leaves no optimum to start from
+        if optimizer.x_opt is not None:
+            self.x_opt = np.array(optimizer.x_opt, dtype=float)
+            self._parameter_keys = parameter_keys
+        self._warm_state = optimizer._warm_state
+        self.solves += 1
+
+        return optimizer, topology, form
+
+    def __repr__(self):
+        """
+        """
+        tpl = "{}(constraints={}, parameters={}, solves={})"
+        return tpl.format(self.__class__.__name__, len(self.constraints), len(self.parameters), self.solves)
+
+
+if __name__ == "__main__":
+    pass
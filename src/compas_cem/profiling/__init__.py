@@ -0,0 +1,44 @@
+"""
+compas_cem.profiling
+****************************
+
+.. currentmodule:: compas_cem.profiling
+
+Profiling is opt-in. Pass a profiler to ``static_equilibrium``,
+``static_equilibrium_numpy``, ``static_equilibrium_vectorized`` or
+``Optimizer.solve`` to record the time spent in every phase of a solve,
+the number of iterations and the residual of every iteration, and the
+number of forward and backward solves of an optimization. The stats are
+attached to the returned form diagram and to the optimizer.
+
+Profiler
+========
+
+.. autosummary::
+    :toctree: generated/
+    :nosignatures:
+
+    Profiler
+    Stats
+
+Sinks
+=====
+
+.. autosummary::
+    :toctree: generated/
+    :nosignatures:
+
+    ChromeTraceSink
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+
+# from .<module> import *
+from .profiler import *  # noqa F403
+from .trace import *  # noqa F403
+
+
+__all__ = [name for name in dir() if not name.startswith('_')]
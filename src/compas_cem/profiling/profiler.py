@@ -0,0 +1,346 @@
+import json
+
+from timeit import default_timer
+
+
+__all__ = ["Profiler",
+           "Stats"]
+
+# ==============================================================================
+# Stats
+# ==============================================================================
+
+
+class Stats(object):
+    """
+    The timings, counters and series of values recorded by a profiler.
+
+    Attributes
+    ----------
+    timings : ``dict``
+        The number of calls, and the total, smallest and largest duration
+        in seconds of every phase, as a list.
+    counters : ``dict``
+        The running total of every counter.
+    series : ``dict``
+        The recorded values of every series, in order.
+    """
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+        self.series = {}
+
+    def add_time(self, name, duration):
+        """
+        Add the duration of a call to a phase.
+
+        Parameters
+        ----------
+        name : ``str``
+            The phase name.
+        duration : ``float``
+            The duration in seconds.
+        """
+        timing = self.timings.get(name)
+        if timing is None:
+            self.timings[name] = [1, duration, duration, duration]
+            return
+
+        timing[0] += 1
+        timing[1] += duration
+        timing[2] = min(timing[2], duration)
+        timing[3] = max(timing[3], duration)
+
+    def add_count(self, name, value=1):
+        """
+        Increment a counter.
+
+        Parameters
+        ----------
+        name : ``str``
+            The counter name.
+        value : ``int``, optional
+            The increment.
+            Defaults to ``1``.
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_value(self, name, value):
+        """
+        Append a value to a series.
+
+        Parameters
+        ----------
+        name : ``str``
+            The series name.
+        value : ``float``
+            The value.
+        """
+        self.series.setdefault(name, []).append(value)
+
+    def time(self, name):
+        """
+        The total time spent in a phase.
+
+        Parameters
+        ----------
+        name : ``str``
+            The phase name.
+
+        Returns
+        -------
+        time : ``float``
+            The total duration in seconds, or ``0.0`` if the phase never ran.
+        """
+        timing = self.timings.get(name)
+        if timing is None:
+            return 0.0
+        return timing[1]
+
+    def calls(self, name):
+        """
+        The number of calls to a phase.
+
+        Parameters
+        ----------
+        name : ``str``
+            The phase name.
+
+        Returns
+        -------
+        calls : ``int``
+            The number of calls.
+        """
+        timing = self.timings.get(name)
+        if timing is None:
+            return 0
+        return timing[0]
+
+    @property
+    def data(self):
+        """
+        The recorded statistics as a dictionary of builtin types.
+
+        Returns
+        -------
+        data : ``dict``
+            The ``timings``, ``counters`` and ``series``.
+        """
+        timings = {}
+        for name, (calls, total, smallest, largest) in self.timings.items():
+            timings[name] = {"calls": calls,
+                             "total": total,
+                             "mean": total / calls,
+                             "min": smallest,
+                             "max": largest}
+
+        return {"timings": timings,
+                "counters": dict(self.counters),
+                "series": {name: list(values) for name, values in self.series.items()}}
+
+    def to_json(self, filepath):
+        """
+        Save the recorded statistics to a JSON file.
+
+        Parameters
+        ----------
+        filepath : ``str``
+            The path to the JSON file.
+        """
+        with open(filepath, "w") as f:
+            json.dump(self.data, f, indent=2, sort_keys=True)
+
+    def __str__(self):
+        """
+        A table of the timings, slowest phases first, and the counters.
+        """
+        lines = ["{:<30} {:>8} {:>12} {:>12}".format("phase", "calls", "total [s]", "mean [s]")]
+        for name, timing in sorted(self.timings.items(), key=lambda item: -item[1][1]):
+            calls, total = timing[0], timing[1]
+            lines.append("{:<30} {:>8} {:>12.6f} {:>12.6f}".format(name, calls, total, total / calls))
+
+        for name, value in sorted(self.counters.items()):
+            lines.append("{:<30} {:>8}".format(name, value))
+
+        return "\n".join(lines)
+
+# ==============================================================================
+# Profiler
+# ==============================================================================
+
+
+class Profiler(object):
+    """
+    An opt-in recorder of timed phases, counters and series of values.
+
+    Parameters
+    ----------
+    sinks : ``list``, optional
+        Functions that take every recorded event as a dictionary.
+        Defaults to ``None``.
+    series : ``bool``, optional
+        If ``False``, recorded values only go to the sinks, and are not kept in the stats.
+        Defaults to ``True``.
+
+    Attributes
+    ----------
+    stats : :class:`compas_cem.profiling.Stats`
+        The recorded statistics.
+
+    Notes
+    -----
+    An event has a ``"type"``, either ``"phase"``, ``"counter"`` or ``"value"``,
+    a ``"name"`` and a ``"start"`` time in seconds since the profiler was created.
+    Phases also have a ``"duration"``, a nesting ``"depth"`` and the ``"args"`` they were opened with.
+    Counters and values have a ``"value"``, which is the running total for counters.
+
+    Examples
+    --------
+    >>> profiler = Profiler()
+    >>> with profiler.phase("solve"):
+    ...     profiler.count("iterations", 3)
+    >>> profiler.stats.calls("solve"), profiler.stats.counters["iterations"]
+    (1, 3)
+    """
+    def __init__(self, sinks=None, series=True):
+        self.stats = Stats()
+        self.sinks = list(sinks or [])
+        self.series = series
+        self._origin = default_timer()
+        self._depth = 0
+
+    def phase(self, name, **kwargs):
+        """
+        A context manager that times a phase.
+
+        Parameters
+        ----------
+        name : ``str``
+            The phase name.
+        **kwargs : ``dict``
+            Arguments attached to the event of the phase.
+
+        Returns
+        -------
+        phase : ``context manager``
+            The phase.
+        """
+        return _Phase(self, name, kwargs)
+
+    def count(self, name, value=1):
+        """
+        Increment a counter.
+
+        Parameters
+        ----------
+        name : ``str``
+            The counter name.
+        value : ``int``, optional
+            The increment.
+            Defaults to ``1``.
+        """
+        self.stats.add_count(name, value)
+        if self.sinks:
+            self._emit({"type": "counter",
+                        "name": name,
+                        "start": default_timer() - self._origin,
+                        "value": self.stats.counters[name]})
+
+    def record(self, name, value):
+        """
+        Record a value of a series, like the residual of an iteration.
+
+        Parameters
+        ----------
+        name : ``str``
+            The series name.
+        value : ``float``
+            The value.
+        """
+        if self.series:
+            self.stats.add_value(name, value)
+        if self.sinks:
+            self._emit({"type": "value",
+                        "name": name,
+                        "start": default_timer() - self._origin,
+                        "value": value})
+
+    def _emit(self, event):
+        """
+        Send an event to all the sinks.
+        """
+        for sink in self.sinks:
+            sink(event)
+
+
+class _Phase(object):
+    """
+    A timed phase of a profiler.
+    """
+    __slots__ = ("profiler", "name", "args", "start")
+
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.profiler._depth += 1
+        self.start = default_timer()
+        return self
+
+    def __exit__(self, *args):
+        duration = default_timer() - self.start
+        profiler = self.profiler
+        profiler._depth -= 1
+        profiler.stats.add_time(self.name, duration)
+
+        if profiler.sinks:
+            profiler._emit({"type": "phase",
+                            "name": self.name,
+                            "start": self.start - profiler._origin,
+                            "duration": duration,
+                            "depth": profiler._depth,
+                            "args": self.args})
+
+# ==============================================================================
+# Null profiler
+# ==============================================================================
+
+
+class _NullPhase(object):
+    """
+    A phase that records nothing.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class _NullProfiler(object):
+    """
+    A profiler that records nothing, used when profiling is off.
+    """
+    stats = None
+    _phase = _NullPhase()
+
+    def phase(self, name, **kwargs):
+        return self._phase
+
+    def count(self, name, value=1):
+        pass
+
+    def record(self, name, value):
+        pass
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,110 @@
+import json
+import os
+
+
+__all__ = ["ChromeTraceSink"]
+
+# ==============================================================================
+# Chrome trace
+# ==============================================================================
+
+
+class ChromeTraceSink(object):
+    """
+    A profiler sink that collects events in the Chrome trace event format.
+
+    Parameters
+    ----------
+    filepath : ``str``, optional
+        The path to the JSON file to write the trace to with ``save()``.
+        Defaults to ``None``.
+
+    Attributes
+    ----------
+    events : ``list``
+        The trace events.
+
+    Notes
+    -----
+    Phases become complete events and counters and values become counter events.
+    The saved files open in ``chrome://tracing`` or `Perfetto <https://ui.perfetto.dev>`_.
+    """
+    def __init__(self, filepath=None):
+        self.filepath = filepath
+        self.events = []
+        self._pid = os.getpid()
+
+    def __call__(self, event):
+        """
+        Collect a profiler event.
+
+        Parameters
+        ----------
+        event : ``dict``
+            A profiler event.
+        """
+        trace_event = {"name": event["name"],
+                       "ts": event["start"] * 1e6,
+                       "pid": self._pid,
+                       "tid": 0}
+
+        if event["type"] == "phase":
+            trace_event["ph"] = "X"
+            trace_event["dur"] = event["duration"] * 1e6
+            trace_event["args"] = {key: _builtin(value) for key, value in event["args"].items()}
+        else:
+            trace_event["ph"] = "C"
+            trace_event["args"] = {event["name"]: _builtin(event["value"])}
+
+        self.events.append(trace_event)
+
+    @property
+    def data(self):
+        """
+        The trace as a dictionary.
+
+        Returns
+        -------
+        data : ``dict``
+            The trace events and the time unit to display them in.
+        """
+        return {"traceEvents": self.events, "displayTimeUnit": "ms"}
+
+    def save(self, filepath=None):
+        """
+        Write the trace to a JSON file.
+
+        Parameters
+        ----------
+        filepath : ``str``, optional
+            The path to the JSON file.
+            Defaults to the path the sink was created with.
+        """
+        filepath = filepath or self.filepath
+        if filepath is None:
+            raise ValueError("No file path to save the trace to!")
+
+        with open(filepath, "w") as f:
+            json.dump(self.data, f)
+
+    def clear(self):
+        """
+        Discard all the collected events.
+        """
+        self.events = []
+
+
+def _builtin(value):
+    """
+    Convert numpy scalars, and anything that is not a number, to builtin types.
+    """
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+if __name__ == "__main__":
+    pass
@@ -176,6 +176,15 @@ def test(ctx, checks=False, doctest=False):
         ctx.run(' '.join(cmd))
 
 
+@task(help={
+      'sizes': 'The preset of model sizes: small, medium or large.',
+      'output': 'The JSON file to save the results to.'})
+def benchmark(ctx, sizes='small', output='benchmarks.json'):
+    """Run the performance benchmarks."""
+    with chdir(BASE_FOLDER):
+        ctx.run('python -m benchmarks run --sizes {} --output {}'.format(sizes, output))
+
+
 @task
 def prepare_changelog(ctx):
     """Prepare changelog for next release."""
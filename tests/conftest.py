@@ -3,6 +3,7 @@ from math import sqrt
 import pytest
 
 from compas.geometry import Plane
+from compas.geometry import Point
 
 from compas_cem.diagrams import TopologyDiagram
 from compas_cem.elements import Node
@@ -11,6 +12,13 @@ from compas_cem.elements import DeviationEdge
 from compas_cem.loads import NodeLoad
 from compas_cem.supports import NodeSupport
 
+from compas_cem.optimization import Optimizer
+from compas_cem.optimization import PointConstraint
+from compas_cem.optimization import TrailEdgeParameter
+from compas_cem.optimization import DeviationEdgeParameter
+from compas_cem.optimization import OriginNodeXParameter
+from compas_cem.optimization import NodeLoadYParameter
+
 # ==============================================================================
 # Fixtures
 # ==============================================================================
@@ -258,3 +266,72 @@ def unsupported_topology():
     topology.add_load(NodeLoad(0, [0, -1.0, 0.0]))
 
     return topology
+
+
+@pytest.fixture
+def crossed_trails():
+    """
+    Two parallel trails of five edges in compression.
+    Two indirect deviation edges tie the top of each trail to the bottom of the other one,
+    which makes the nodes of the two ends of the trails depend on each other.
+    """
+    topology = TopologyDiagram()
+
+    # add nodes and trail edges
+    for trail in range(2):
+        for i in range(6):
+            topology.add_node(Node(trail * 6 + i, [2.0 * trail, 0.0, 5.0 - i]))
+        for i in range(5):
+            topology.add_edge(TrailEdge(trail * 6 + i, trail * 6 + i + 1, length=-1.0))
+        # add support
+        topology.add_support(NodeSupport(trail * 6 + 5))
+        # add load
+        topology.add_load(NodeLoad(trail * 6, [0.3, 0.0, -1.0]))
+
+    # add direct deviation edges
+    for i in range(5):
+        topology.add_edge(DeviationEdge(i, 6 + i, force=-0.2))
+
+    # add indirect deviation edges
+    topology.add_edge(DeviationEdge(0, 10, force=4.0))
+    topology.add_edge(DeviationEdge(6, 4, force=4.0))
+
+    return topology
+
+# ==============================================================================
+# Optimizers
+# ==============================================================================
+
+
+@pytest.fixture
+def braced_tower_optimizer(braced_tower_2d):
+    """
+    A braced tower with trails, and an optimizer with parameters of every kind on it, but no constraints.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+
+    optimizer = Optimizer()
+
+    for edge in topology.trail_edges():
+        optimizer.add_parameter(TrailEdgeParameter(edge, 0.5, 0.5))
+
+    for edge in topology.deviation_edges():
+        optimizer.add_parameter(DeviationEdgeParameter(edge, 1.0, 1.0))
+
+    for node in topology.origin_nodes():
+        optimizer.add_parameter(OriginNodeXParameter(node, 0.5, 0.5))
+        optimizer.add_parameter(NodeLoadYParameter(node, 0.5, 0.5))
+
+    return topology, optimizer
+
+
+@pytest.fixture
+def strut_problem(compression_strut):
+    """
+    A compression strut, a point constraint and the parameters of its trail edge.
+    """
+    compression_strut.build_trails()
+    constraints = [PointConstraint(0, Point(0.0, 0.5, 0.0))]
+    parameters = [TrailEdgeParameter((0, 1), 1.0, 1.0)]
+    return compression_strut, constraints, parameters
@@ -0,0 +1,52 @@
+import pytest
+
+from compas_cem.diagrams import FormDiagram
+
+
+# ==============================================================================
+# Tests - Form Diagram from Topology Diagram
+# ==============================================================================
+
+@pytest.mark.parametrize("topology",
+                         [pytest.lazy_fixture("threebar_funicular"),
+                          pytest.lazy_fixture("braced_tower_2d")])
+def test_form_from_topology_copy_on_write(topology):
+    """
+    Checks that a form diagram and its topology diagram do not see each other's changes.
+    """
+    topology.build_trails()
+    form = FormDiagram.from_topology_diagram(topology)
+    copy = topology.copy(cls=FormDiagram)
+
+    assert set(form.nodes()) == set(copy.nodes())
+    assert set(form.edges()) == set(copy.edges())
+    assert "_trails" not in form.attributes
+
+    for node in form.nodes():
+        assert form.node_attributes(node) == copy.node_attributes(node)
+        assert sorted(form.neighbors(node)) == sorted(copy.neighbors(node))
+
+    # attribute changes
+    node = next(iter(form.nodes()))
+    form.node_attribute(node, "x", 100.0)
+    assert topology.node_attribute(node, "x") != 100.0
+
+    # changes to mutable attribute values
+    edge = next(iter(topology.trail_edges()))
+    plane = ([0.0, 0.0, 0.0], [0.0, 0.0, 1.0])
+    topology.edge_attribute(edge, "plane", plane)
+    form = FormDiagram.from_topology_diagram(topology)
+    form.edge_attribute(edge, "plane")[0][0] = 100.0
+    assert topology.edge_attribute(edge, "plane")[0][0] == 0.0
+    form = FormDiagram.from_topology_diagram(topology)
+
+    # structural changes
+    u, v = next(iter(form.edges()))
+    form.delete_edge(u, v)
+    assert topology.has_edge(u, v)
+    assert v in topology.neighbors(u)
+
+    form = FormDiagram.from_topology_diagram(topology)
+    topology.delete_edge(u, v)
+    assert form.has_edge(u, v)
+    assert v in form.neighbors(u)
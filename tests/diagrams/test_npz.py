@@ -0,0 +1,129 @@
+import io
+
+import numpy as np
+
+import pytest
+
+from compas_cem.diagrams import TopologyDiagram
+from compas_cem.diagrams import FormDiagram
+from compas_cem.diagrams import read_diagram_arrays
+
+from compas_cem.elements import Node
+from compas_cem.elements import TrailEdge
+
+from compas_cem.equilibrium import static_equilibrium
+
+
+# ==============================================================================
+# Tests - Binary serialization
+# ==============================================================================
+
+@pytest.mark.parametrize("topology",
+                         [pytest.lazy_fixture("tension_chain"),
+                          pytest.lazy_fixture("threebar_funicular"),
+                          pytest.lazy_fixture("braced_tower_2d")])
+def test_npz_round_trip(topology, tmp_path):
+    """
+    Checks that topology and form diagrams survive a round trip through an npz file.
+    """
+    topology.build_trails()
+    form = static_equilibrium(topology)
+
+    for diagram in (topology, form):
+        filepath = str(tmp_path / "diagram.npz")
+        diagram.to_npz(filepath)
+
+        for mmap in (False, True):
+            other = type(diagram).from_npz(filepath, mmap=mmap)
+            assert type(other) is type(diagram)
+            assert other.data == diagram.data
+            assert list(other.adjacency[0]) == list(diagram.adjacency[0])
+
+    # trails keep their integer keys and tuples of nodes, unlike a round trip through JSON
+    filepath = str(tmp_path / "topology.npz")
+    topology.to_npz(filepath)
+    other = TopologyDiagram.from_npz(filepath)
+    assert dict(other.trails(keys=True)) == dict(topology.trails(keys=True))
+
+
+def test_npz_mixed_attributes(tmp_path):
+    """
+    Checks that missing, None and non-numeric attribute values are kept as they are.
+    """
+    topology = TopologyDiagram()
+    topology.add_node(Node(0, [0.0, 0.0, 0.0]))
+    topology.add_node(Node(1, [0.0, 1.0, 0.0]))
+    topology.add_edge(TrailEdge(0, 1, length=-1.0))
+    topology.node_attribute(0, "tag", "a")
+    topology.node_attribute(1, "weights", [1.0, 2.0])
+    topology.edge_attribute((0, 1), "active", True)
+
+    stream = io.BytesIO()
+    topology.to_npz(stream, compressed=True)
+    stream.seek(0)
+    other = TopologyDiagram.from_npz(stream)
+
+    assert other.data == topology.data
+    assert "tag" not in other.node[1]
+    assert other.node_attribute(0, "_k") is None
+    assert other.node_attribute(1, "weights") == [1.0, 2.0]
+    assert other.edge_attribute((0, 1), "active") is True
+
+
+def test_npz_integer_coordinates():
+    """
+    Checks that integer coordinates, loads, reactions and attributes keep their type, also next to floats.
+    """
+    topology = TopologyDiagram()
+    topology.add_node(Node(0, [0, 1, 2]))
+    topology.add_node(Node(1, [3, 4, 2 ** 60]))
+    topology.node_attribute(0, "qx", 3)
+    topology.node_attribute(0, "weight", 1)
+    topology.node_attribute(1, "weight", 1.5)
+
+    stream = io.BytesIO()
+    topology.to_npz(stream)
+    stream.seek(0)
+    other = TopologyDiagram.from_npz(stream)
+
+    assert other.data == topology.data
+    for node in topology.nodes():
+        for name in ("x", "y", "z", "qx", "weight"):
+            value = other.node_attribute(node, name)
+            assert type(value) is type(topology.node_attribute(node, name))
+
+    # a coordinate column that mixes integers and floats
+    topology = TopologyDiagram()
+    topology.add_node(Node(0, [0, 0.5, 1]))
+    topology.add_node(Node(1, [1.5, 0, 1]))
+
+    stream = io.BytesIO()
+    topology.to_npz(stream)
+    stream.seek(0)
+    other = TopologyDiagram.from_npz(stream)
+
+    for node in topology.nodes():
+        xyz = other.node_coordinates(node)
+        assert xyz == topology.node_coordinates(node)
+        assert [type(c) for c in xyz] == [type(c) for c in topology.node_coordinates(node)]
+
+
+def test_npz_mmap_coordinates(braced_tower_2d, tmp_path):
+    """
+    Checks that the node coordinates can be memory-mapped without building a diagram.
+    """
+    filepath = str(tmp_path / "tower.npz")
+    braced_tower_2d.to_npz(filepath)
+
+    arrays = read_diagram_arrays(filepath, mmap=True)
+    assert isinstance(arrays["node_xyz"], np.memmap)
+
+    keys = arrays["node_keys"].tolist()
+    xyz = [braced_tower_2d.node_coordinates(key) for key in keys]
+    assert np.allclose(arrays["node_xyz"], xyz)
+
+    edges = [(keys[u], keys[v]) for u, v in arrays["edge_index"].tolist()]
+    assert edges == list(braced_tower_2d.edges())
+
+    assert arrays["header"]["class"] == "TopologyDiagram"
+    assert isinstance(FormDiagram.from_npz(filepath), FormDiagram)
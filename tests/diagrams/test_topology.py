@@ -180,3 +180,54 @@ def test_num_direct_indirect_deviation_edges(topology, node_key, num_deviation):
     indirect = topology._connected_indirect_deviation_edges(node_key)
     direct = topology._connected_direct_deviation_edges(node_key)
     assert len(indirect) + len(direct) == num_deviation
+
+
+# ==============================================================================
+# Tests - Edge Indexes
+# ==============================================================================
+
+def test_edge_indexes_follow_sequences(braced_tower_2d):
+    """
+    Checks that the direct and indirect deviation edges follow a trail shift and a new edge.
+    """
+    from compas_cem.elements import DeviationEdge
+
+    topology = braced_tower_2d
+
+    with pytest.raises(ValueError):
+        topology.number_of_direct_deviation_edges()
+
+    topology.build_trails()
+    assert set(topology.direct_deviation_edges()) == {(1, 4), (2, 5)}
+    assert topology.number_of_indirect_deviation_edges() == 3
+
+    topology.shift_trail(5, 1)
+    assert set(topology.direct_deviation_edges()) == {(1, 5)}
+    assert set(topology.indirect_deviation_edges()) == {(1, 4), (2, 5), (1, 3), (2, 4)}
+    assert topology._connected_direct_deviation_edges(1) == [(1, 5)]
+    assert topology.is_indirect_deviation_edge((1, 4))
+
+    topology.add_edge(DeviationEdge(0, 3, force=-1.0))
+    assert topology.number_of_deviation_edges() == 6
+    assert topology.number_of_indirect_deviation_edges() == 5
+    assert topology.connected_deviation_edges(0) == [(0, 3)]
+    assert topology.connected_trail_edges(0) == [(0, 1)]
+
+
+def test_indexes_follow_unset_attributes(braced_tower_2d):
+    """
+    Checks that unsetting sequences and assigning new data outdate the trails and the indexes.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    assert topology.number_of_sequences() == 3
+
+    topology.unset_node_attribute(3, "_k")
+    with pytest.raises(ValueError):
+        list(topology.sequences())
+
+    other = braced_tower_2d.copy()
+    topology.build_trails()
+    topology.data = other.data
+    topology.build_trails()
+    assert topology.number_of_sequences() == 3
@@ -102,3 +102,58 @@ def test_auxiliary_trails_empty(topology):
     assert topology.number_of_auxiliary_trails() == 0
     assert len(list(topology.auxiliary_trails())) == 0
     assert len(list(topology.auxiliary_trail_edges())) == 0
+
+
+# ==============================================================================
+# Tests - Sequence indexes
+# ==============================================================================
+
+@pytest.mark.parametrize("topology",
+                         [(pytest.lazy_fixture("threebar_funicular")),
+                          (pytest.lazy_fixture("braced_tower_2d"))])
+def test_sequence_indexes_shift_trail(topology):
+    """
+    Checks that the cached sequence indexes follow a trail shift.
+    """
+    topology.build_trails()
+
+    origin = next(iter(topology.origin_nodes()))
+    trail = topology.trail(origin)
+    assert topology.number_of_sequences() == len(trail)
+
+    topology.shift_trail(origin, 2)
+
+    assert topology.number_of_sequences() == len(trail) + 2
+    assert topology.trail_sequences(origin) == {k + 2: node for k, node in enumerate(trail)}
+
+    for k, sequence in topology.sequences(keys=True):
+        expected = tuple(node for node in topology.nodes() if topology.node_sequence(node) == k)
+        assert sequence == expected
+
+    for node in trail:
+        assert topology.node_trail(node) == origin
+
+
+def test_build_trails_unchanged(braced_tower_2d):
+    """
+    Tests that trails are only built again after the diagram changes.
+    """
+    from compas_cem.elements import Node
+    from compas_cem.elements import TrailEdge
+
+    topology = braced_tower_2d
+    topology.build_trails()
+    trails = topology.attributes["_trails"]
+
+    topology.build_trails()
+    assert topology.attributes["_trails"] is trails
+
+    topology.add_node(Node(6, [1.0, 3.0, 0.0]))
+    topology.add_edge(TrailEdge(6, 5, length=-1.0))
+    topology.node_attribute(5, "type", None)
+    topology.build_trails()
+
+    assert topology.attributes["_trails"] is not trails
+    assert topology.trail(6) == (6, 5, 4, 3)
+    assert topology.number_of_sequences() == 4
+    assert topology.sequence_nodes(3) == (3, )
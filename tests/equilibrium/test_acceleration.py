@@ -0,0 +1,80 @@
+import pytest
+
+import numpy as np
+
+from compas_cem.equilibrium import EquilibriumProblem
+from compas_cem.equilibrium import AndersonAcceleration
+from compas_cem.equilibrium import static_equilibrium
+from compas_cem.equilibrium import static_equilibrium_numpy
+from compas_cem.equilibrium import static_equilibrium_vectorized
+from compas_cem.equilibrium import static_equilibrium_forward
+from compas_cem.equilibrium.force_vectorized import equilibrium_vectorized
+
+from compas_cem.profiling import Profiler
+
+
+# ==============================================================================
+# Tests - Accelerated Equilibrium
+# ==============================================================================
+
+@pytest.mark.parametrize("solver", [static_equilibrium_numpy, static_equilibrium_vectorized, static_equilibrium_forward])
+@pytest.mark.parametrize("acceleration", ["anderson", "aitken", AndersonAcceleration(memory=3)])
+def test_accelerated_equilibrium(crossed_trails, solver, acceleration):
+    """
+    Checks that accelerated iterations reach the same equilibrium state in fewer iterations.
+    """
+    topology = crossed_trails
+    topology.build_trails()
+
+    profiler = Profiler()
+    form = static_equilibrium(topology, tmax=200, eta=1e-9, profiler=profiler)
+    iterations = profiler.stats.series["iterations"][-1]
+
+    profiler = Profiler()
+    form_accelerated = solver(topology, tmax=200, eta=1e-9, profiler=profiler, acceleration=acceleration)
+    assert profiler.stats.series["iterations"][-1] < iterations
+    assert profiler.stats.counters["accelerated_steps"] > 0
+
+    for node in form.nodes():
+        assert np.allclose(form.node_coordinates(node), form_accelerated.node_coordinates(node))
+
+    for edge in form.edges():
+        assert np.allclose(form.edge_force(edge), form_accelerated.edge_force(edge))
+
+
+def test_accelerated_equilibrium_fails(crossed_trails):
+    """
+    Checks that unsupported accelerations and taped accelerated calculations raise errors.
+    """
+    topology = crossed_trails
+    topology.build_trails()
+    problem = EquilibriumProblem.from_topology_diagram(topology)
+
+    with pytest.raises(ValueError):
+        equilibrium_vectorized(problem, acceleration="newton")
+
+    with pytest.raises(ValueError):
+        equilibrium_vectorized(problem, tape=[], acceleration="anderson")
+
+
+def test_accelerated_equilibrium_python(crossed_trails):
+    """
+    Checks that the pure python solver reaches the same equilibrium state in fewer iterations with aitken.
+    """
+    topology = crossed_trails
+    topology.build_trails()
+
+    profiler = Profiler()
+    form = static_equilibrium(topology, tmax=200, eta=1e-9, profiler=profiler)
+    iterations = profiler.stats.series["iterations"][-1]
+
+    profiler = Profiler()
+    form_accelerated = static_equilibrium(topology, tmax=200, eta=1e-9, profiler=profiler, acceleration="aitken")
+    assert profiler.stats.series["iterations"][-1] < iterations
+    assert profiler.stats.counters["accelerated_steps"] > 0
+
+    for node in form.nodes():
+        assert np.allclose(form.node_coordinates(node), form_accelerated.node_coordinates(node), atol=1e-6)
+
+    with pytest.raises(ValueError):
+        static_equilibrium(topology, acceleration="anderson")
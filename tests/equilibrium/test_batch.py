@@ -0,0 +1,95 @@
+import pytest
+
+import numpy as np
+
+from compas_cem.loads import NodeLoad
+
+from compas_cem.equilibrium import static_equilibrium_numpy
+from compas_cem.equilibrium import static_equilibrium_batch
+
+
+# ==============================================================================
+# Tests - Batch Equilibrium
+# ==============================================================================
+
+@pytest.mark.parametrize("topology",
+                         [(pytest.lazy_fixture("threebar_funicular")),
+                          (pytest.lazy_fixture("braced_tower_2d"))])
+def test_batch_equilibrium_scenarios(topology):
+    """
+    Checks that every scenario in a batch matches its own static equilibrium.
+    """
+    topology.build_trails()
+    nodes = list(topology.nodes())
+
+    loads = np.array([topology.node_load(node) for node in nodes])
+    loads = np.stack([loads * factor for factor in (0.5, 1.0, 2.0)])
+
+    eq_states = static_equilibrium_batch(topology, loads=loads, eta=1e-9)
+    assert np.all(eq_states["converged"])
+
+    for i, scenario_loads in enumerate(loads):
+        for node, load in zip(nodes, scenario_loads):
+            if np.any(load):
+                topology.add_load(NodeLoad(node, load.tolist()))
+
+        form = static_equilibrium_numpy(topology, eta=1e-9)
+
+        for j, node in enumerate(nodes):
+            assert np.allclose(form.node_coordinates(node), eq_states["node_xyz"][i, j])
+            assert np.allclose(form.reaction_force(node), eq_states["reaction_forces"][i, j])
+
+        for j, edge in enumerate(topology.edges()):
+            assert np.allclose(form.edge_force(edge), eq_states["edge_forces"][i, j])
+
+
+def test_batch_equilibrium_convergence_mask(braced_tower_2d):
+    """
+    Tests that scenarios that run out of iterations are flagged, not raised.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+
+    forces = np.array([[topology.edge_force(edge) for edge in topology.edges()]] * 2)
+    forces[1] *= 0.0
+
+    eq_states = static_equilibrium_batch(topology, forces=forces, tmax=3, eta=1e-9)
+
+    assert eq_states["node_xyz"].shape == (2, topology.number_of_nodes(), 3)
+    assert list(eq_states["converged"]) == [False, True]
+    assert eq_states["residuals"][0] > 1e-9
+    assert eq_states["iterations"][1] < eq_states["iterations"][0]
+
+
+def test_batch_equilibrium_nan_residuals(braced_tower_2d):
+    """
+    Tests that single iterations and diverged scenarios are not flagged as converged.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+
+    eq_states = static_equilibrium_batch(topology, tmax=1)
+    assert list(eq_states["converged"]) == [False]
+    assert np.isnan(eq_states["residuals"][0])
+
+    forces = np.array([[topology.edge_force(edge) for edge in topology.edges()]] * 2)
+    forces[1] = np.nan
+
+    eq_states = static_equilibrium_batch(topology, forces=forces, tmax=100, eta=1e-6)
+    assert list(eq_states["converged"]) == [True, False]
+    assert np.isnan(eq_states["residuals"][1])
+    assert eq_states["iterations"][1] == 2
+
+
+def test_batch_equilibrium_shape_mismatch(braced_tower_2d):
+    """
+    Verifies that inconsistent numbers of scenarios raise an error.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+
+    loads = np.zeros((2, topology.number_of_nodes(), 3))
+    lengths = np.ones((3, topology.number_of_edges()))
+
+    with pytest.raises(ValueError):
+        static_equilibrium_batch(topology, loads=loads, lengths=lengths)
@@ -4,8 +4,17 @@ import pytest
 
 import numpy as np
 
+from compas_cem.equilibrium import EquilibriumProblem
+from compas_cem.equilibrium import EquilibriumResult
 from compas_cem.equilibrium import static_equilibrium
 from compas_cem.equilibrium.force_numpy import static_equilibrium_numpy
+from compas_cem.equilibrium.force_numpy import equilibrium_state_numpy
+from compas_cem.equilibrium.force_vectorized import static_equilibrium_vectorized
+from compas_cem.equilibrium.force_forward import static_equilibrium_forward
+from compas_cem.equilibrium.force_forward import equilibrium_state_forward
+from compas_cem.equilibrium.force_vectorized import equilibrium_vectorized
+from compas_cem.equilibrium.force_vectorized import equilibrium_state_vectorized
+from compas_cem.equilibrium.force_vectorized import iter_equilibrium
 
 
 # ==============================================================================
@@ -174,6 +183,56 @@ def test_force_equilibrium_numpy_output(topology, output):
     check_edges_lengths(form, edge_length_out)
     check_nodes_reactions(form, support_residual_out)
 
+
+@pytest.mark.parametrize("topology, output",
+                         [(pytest.lazy_fixture("compression_strut"), cs_out()),
+                          (pytest.lazy_fixture("threebar_funicular"), tf_out()),
+                          (pytest.lazy_fixture("braced_tower_2d"), bt2_out()),
+                          (pytest.lazy_fixture("tension_chain"), tc_out()),
+                          (pytest.lazy_fixture("compression_chain"), cc_out())
+                          ])
+def test_force_equilibrium_vectorized_output(topology, output):
+    """
+    Minute testing of forces and geometric outputs post force equilibrium.
+    """
+    node_xyz_out = output["xyz"]
+    edge_force_out = output["force"]
+    edge_length_out = output["length"]
+    support_residual_out = output["residual"]
+
+    topology.build_trails()
+    form = static_equilibrium_vectorized(topology, eta=1e-5, tmax=100, verbose=False)
+
+    check_nodes_xyz(form, node_xyz_out)
+    check_edges_forces(form, edge_force_out)
+    check_edges_lengths(form, edge_length_out)
+    check_nodes_reactions(form, support_residual_out)
+
+
+@pytest.mark.parametrize("topology, output",
+                         [(pytest.lazy_fixture("compression_strut"), cs_out()),
+                          (pytest.lazy_fixture("threebar_funicular"), tf_out()),
+                          (pytest.lazy_fixture("braced_tower_2d"), bt2_out()),
+                          (pytest.lazy_fixture("tension_chain"), tc_out()),
+                          (pytest.lazy_fixture("compression_chain"), cc_out())
+                          ])
+def test_force_equilibrium_forward_output(topology, output):
+    """
+    Minute testing of forces and geometric outputs post force equilibrium.
+    """
+    node_xyz_out = output["xyz"]
+    edge_force_out = output["force"]
+    edge_length_out = output["length"]
+    support_residual_out = output["residual"]
+
+    topology.build_trails()
+    form = static_equilibrium_forward(topology, eta=1e-5, tmax=100, verbose=False)
+
+    check_nodes_xyz(form, node_xyz_out)
+    check_edges_forces(form, edge_force_out)
+    check_edges_lengths(form, edge_length_out)
+    check_nodes_reactions(form, support_residual_out)
+
 # ==============================================================================
 # Tests - Force Equilibrium Queries
 # ==============================================================================
@@ -204,3 +263,72 @@ def check_nodes_reactions(form, support_residual_out):
         residual = support_residual_out.get(node, [0.0, 0.0, 0.0])
         test_residual = form.reaction_force(node)
         assert np.allclose(residual, test_residual)
+
+
+def test_force_equilibrium_vectorized_warm_start(braced_tower_2d):
+    """
+    Checks that a warm start reaches the same equilibrium state in fewer iterations.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    problem = EquilibriumProblem.from_topology_diagram(topology)
+
+    tape_cold = []
+    xyz_cold = equilibrium_vectorized(problem, eta=1e-9, tape=tape_cold)[0]
+
+    tape_warm = []
+    xyz_warm = equilibrium_vectorized(problem, eta=1e-9, tape=tape_warm, xyz=xyz_cold)[0]
+
+    assert np.allclose(xyz_cold, xyz_warm)
+    assert len(tape_warm) < len(tape_cold)
+
+
+@pytest.mark.parametrize("equilibrium_state", [equilibrium_state_numpy, equilibrium_state_vectorized, equilibrium_state_forward])
+def test_force_equilibrium_compact_result(braced_tower_2d, equilibrium_state):
+    """
+    Checks that a compact result matches the form diagram of the same equilibrium state.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    form = static_equilibrium(topology)
+
+    result = equilibrium_state(topology, compact=True)
+    assert isinstance(result, EquilibriumResult)
+
+    for node in form.nodes():
+        assert np.allclose(form.node_coordinates(node), result.node_coordinates(node))
+        assert np.allclose(form.reaction_force(node), result.reaction_force(node))
+
+    for edge in form.edges():
+        assert np.allclose(form.edge_force(edge), result.edge_force(edge))
+        assert np.allclose(form.edge_length_2(edge), result.edge_length_2(edge))
+
+    # materialise the form diagram through the network api
+    assert result.number_of_support_nodes() == form.number_of_support_nodes()
+    for edge in form.edges():
+        assert np.allclose(form.edge_length_2(edge), result.form.edge_length_2(edge))
+
+
+def test_iter_equilibrium(braced_tower_2d):
+    """
+    Checks that the iterations stream residuals down to the equilibrium state.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    form = static_equilibrium(topology)
+
+    snapshots = list(iter_equilibrium(topology, eta=1e-6, positions=True))
+    assert [snapshot.t for snapshot in snapshots] == list(range(len(snapshots)))
+    assert snapshots[0].residual is None
+    assert snapshots[-1].residual < 1e-6
+
+    result = snapshots[-1].result()
+    for node in form.nodes():
+        assert np.allclose(form.node_coordinates(node), result.node_coordinates(node))
+        index = result.problem.node_index[node]
+        assert np.allclose(form.node_coordinates(node), snapshots[-1].xyz[index])
+
+    # the caller decides when to stop
+    for snapshot in iter_equilibrium(topology, eta=None, tmax=3):
+        assert snapshot.xyz is None
+    assert snapshot.t == 2
@@ -0,0 +1,98 @@
+import pytest
+
+import numpy as np
+
+from compas_cem.equilibrium import EquilibriumProblem
+from compas_cem.equilibrium import PartialSolver
+from compas_cem.equilibrium import changed_nodes
+from compas_cem.equilibrium import influenced_nodes
+
+from compas_cem.equilibrium.force_vectorized import equilibrium_vectorized
+
+
+# ==============================================================================
+# Tests - Partial Equilibrium
+# ==============================================================================
+
+@pytest.mark.parametrize("topology",
+                         [(pytest.lazy_fixture("compression_chain")),
+                          (pytest.lazy_fixture("threebar_funicular")),
+                          (pytest.lazy_fixture("braced_tower_2d")),
+                          (pytest.lazy_fixture("crossed_trails"))])
+def test_partial_equilibrium_perturbations(topology):
+    """
+    Checks that re-solving the nodes influenced by a perturbation matches a full solve.
+    """
+    topology.build_trails()
+    problem = EquilibriumProblem.from_topology_diagram(topology)
+
+    solver = PartialSolver(eta=1e-12)
+    solver.solve(problem)
+
+    for edge in range(problem.number_of_edges()):
+        lengths = np.array(problem.lengths)
+        forces = np.array(problem.forces)
+        lengths[edge] += 0.1
+        forces[edge] += 0.1
+
+        perturbed = problem.replace(lengths=lengths, forces=forces)
+        arrays = solver.solve(perturbed)
+
+        for array, other in zip(arrays, equilibrium_vectorized(perturbed, eta=1e-12)):
+            assert np.allclose(array, other)
+
+
+def test_partial_equilibrium_region(compression_chain):
+    """
+    Tests that changing the last edge of a chain only re-solves the nodes after it.
+    """
+    topology = compression_chain
+    topology.build_trails()
+    problem = EquilibriumProblem.from_topology_diagram(topology)
+
+    lengths = np.array(problem.lengths)
+    lengths[problem.edge_index[(2, 3)]] = -2.0
+    perturbed = problem.replace(lengths=lengths)
+
+    changed = changed_nodes(perturbed, problem)
+    region = influenced_nodes(problem, changed)
+    assert [problem.nodes[i] for i in np.flatnonzero(region)] == [2, 3]
+
+    solver = PartialSolver()
+    solver.solve(problem)
+    arrays = solver.solve(perturbed)
+
+    assert np.count_nonzero(solver.region) == 2
+    for array, other in zip(arrays, equilibrium_vectorized(perturbed)):
+        assert np.allclose(array, other)
+
+
+def test_partial_equilibrium_reference(crossed_trails):
+    """
+    Checks that the perturbations of a new reference start from its state, not from the last reference.
+    The indirect deviation edges of the crossed trails make stale states converge slowly, if at all.
+    """
+    topology = crossed_trails
+    topology.build_trails()
+    problem = EquilibriumProblem.from_topology_diagram(topology)
+
+    solver = PartialSolver(eta=1e-9)
+    solver.solve(problem)
+
+    # move the origin nodes, like an optimization step
+    xyz = np.array(problem.xyz)
+    xyz[[problem.node_index[0], problem.node_index[6]], 1] += 1.0
+    moved = problem.replace(xyz=xyz)
+
+    arrays = solver.solve(moved, reference=True)
+    for array, other in zip(arrays, equilibrium_vectorized(moved, eta=1e-9)):
+        assert np.allclose(array, other)
+
+    # perturb a force of a direct deviation edge
+    forces = np.array(moved.forces)
+    forces[moved.edge_index[(4, 10)]] += 1e-6
+    perturbed = moved.replace(forces=forces)
+
+    arrays = solver.solve(perturbed)
+    for array, other in zip(arrays, equilibrium_vectorized(perturbed, eta=1e-9)):
+        assert np.allclose(array, other)
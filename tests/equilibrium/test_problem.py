@@ -0,0 +1,89 @@
+import pytest
+
+import numpy as np
+
+from compas_cem.equilibrium import EquilibriumProblem
+from compas_cem.equilibrium.force import equilibrium_state
+from compas_cem.equilibrium.force_numpy import equilibrium_state_numpy
+
+
+# ==============================================================================
+# Tests - Equilibrium Problem
+# ==============================================================================
+
+@pytest.mark.parametrize("topology",
+                         [(pytest.lazy_fixture("compression_strut")),
+                          (pytest.lazy_fixture("threebar_funicular")),
+                          (pytest.lazy_fixture("braced_tower_2d")),
+                          (pytest.lazy_fixture("tension_chain"))])
+def test_problem_nodes_sorted_by_sequence(topology):
+    """
+    Checks that the nodes of a compiled problem are sorted in sequence blocks.
+    """
+    topology.build_trails()
+    problem = EquilibriumProblem.from_topology_diagram(topology)
+
+    assert problem.number_of_nodes() == topology.number_of_nodes()
+    assert problem.number_of_sequences() == topology.number_of_sequences()
+
+    for k, sequence in topology.sequences(keys=True):
+        nodes = [problem.nodes[index] for index in problem.sequence(k)]
+        assert set(nodes) == set(sequence)
+
+
+def test_problem_trail_connectivity(braced_tower_2d):
+    """
+    Verifies that the next node of every node in a compiled problem follows its trail.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    problem = EquilibriumProblem.from_topology_diagram(topology)
+
+    for trail in topology.trails():
+        for u, v in zip(trail[:-1], trail[1:]):
+            index = problem.node_index[u]
+            assert problem.nodes[problem.next_nodes[index]] == v
+            assert set(problem.edges[problem.trail_edges[index]]) == {u, v}
+
+    for support in topology.support_nodes():
+        assert problem.next_nodes[problem.node_index[support]] == -1
+
+    assert problem.number_of_indirect_deviation_edges() == topology.number_of_indirect_deviation_edges()
+
+
+def test_problem_immutable(threebar_funicular):
+    """
+    Tests that a compiled problem can only be modified through replace().
+    """
+    topology = threebar_funicular
+    topology.build_trails()
+    problem = EquilibriumProblem.from_topology_diagram(topology)
+
+    with pytest.raises(AttributeError):
+        problem.xyz = np.zeros((4, 3))
+
+    with pytest.raises(ValueError):
+        problem.xyz[0, 0] = 1.0
+
+    loads = 2.0 * problem.loads
+    other = problem.replace(loads=loads)
+    assert other.loads is loads
+    assert other.next_nodes is problem.next_nodes
+    assert not np.allclose(problem.loads, other.loads)
+
+
+def test_problem_equilibrium_state_numpy(braced_tower_2d):
+    """
+    Checks that the numpy solver with a precompiled problem outputs the same state as the pure python solver.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    problem = EquilibriumProblem.from_topology_diagram(topology)
+
+    eq_state_a = equilibrium_state(topology)
+    eq_state_b = equilibrium_state_numpy(topology, problem=problem)
+
+    for name in ("node_xyz", "trail_forces", "reaction_forces"):
+        assert set(eq_state_a[name]) == set(eq_state_b[name])
+        for key, value in eq_state_a[name].items():
+            assert np.allclose(value, eq_state_b[name][key])
@@ -0,0 +1,161 @@
+import pytest
+
+import numpy as np
+
+from autograd import grad
+from autograd import jacobian
+
+from compas.geometry import Plane
+from compas.geometry import Line
+from compas.geometry import Polyline
+from compas.geometry import closest_point_on_segment
+from compas.geometry import distance_point_point
+
+from compas.datastructures import Mesh
+
+from compas.utilities import pairwise
+
+from compas_cem.equilibrium import EquilibriumProblem
+from compas_cem.equilibrium.force_vectorized import equilibrium_vectorized
+from compas_cem.equilibrium.force_vectorized import equilibrium_state_from_arrays
+
+from compas_cem.optimization import PointConstraint
+from compas_cem.optimization import PlaneConstraint
+from compas_cem.optimization import LineConstraint
+from compas_cem.optimization import PolylineConstraint
+from compas_cem.optimization import PolylineIndex
+from compas_cem.optimization import TrimeshConstraint
+from compas_cem.optimization import MeshIndex
+from compas_cem.optimization import TrailEdgeForceConstraint
+from compas_cem.optimization import ReactionForceConstraint
+from compas_cem.optimization import DeviationEdgeLengthConstraint
+from compas_cem.optimization import EdgeDirectionConstraint
+from compas_cem.optimization import compile_constraints
+
+
+POLYLINE = Polyline([[-0.5, 0.5, 0.0], [0.3, 0.8, 0.1], [0.6, 1.6, 0.0], [2.0, 1.2, -0.3]])
+
+MESH = Mesh.from_vertices_and_faces([[-0.2, 0.3, 0.4], [1.4, 0.5, -0.2], [1.2, 2.2, 0.3], [-0.1, 1.8, -0.5], [0.6, 1.1, 0.8]],
+                                    [[0, 1, 4], [1, 2, 4], [2, 3, 4], [3, 0, 4]])
+
+# ==============================================================================
+# Tests - Constraint groups
+# ==============================================================================
+
+
+@pytest.mark.parametrize("constraints", [[PointConstraint(0, [0.2, 0.1, 0.0]), PointConstraint(4, [1.0, 1.2, 0.0], 2.0)],
+                                         [PlaneConstraint(1, Plane([0.0, 0.5, 0.0], [0.0, 1.0, 1.0]))],
+                                         [LineConstraint(2, Line([0.0, 0.0, 0.0], [1.0, 1.0, 0.0]), 0.5)],
+                                         [PolylineConstraint(1, POLYLINE), PolylineConstraint(4, POLYLINE, 2.0),
+                                          PolylineConstraint(2, Polyline([[0.5, 0.0, 0.2], [0.5, 3.0, 0.2]]), 0.5)],
+                                         [TrimeshConstraint(node, MESH, weight) for node, weight in ((1, 1.0), (2, 0.5), (4, 2.0), (5, 1.0))],
+                                         [TrailEdgeForceConstraint((1, 2), -1.0), TrailEdgeForceConstraint((4, 5), 0.5)],
+                                         [ReactionForceConstraint(3, [0.0, 1.0, 0.0])],
+                                         [DeviationEdgeLengthConstraint((1, 4), 1.5)],
+                                         [EdgeDirectionConstraint((1, 4), [1.0, 0.2, 0.0], 3.0)]])
+def test_constraint_groups(braced_tower_2d, constraints):
+    """
+    Checks the penalty and the gradient of a constraint group against its individual constraints.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    problem = EquilibriumProblem.from_topology_diagram(topology)
+
+    arrays = equilibrium_vectorized(problem)
+    eq_state = equilibrium_state_from_arrays(problem, *arrays)
+
+    groups, ungrouped = compile_constraints(constraints, problem)
+    assert len(groups) == 1 and not ungrouped
+
+    group = groups[0]
+    penalty = sum(constraint.penalty(eq_state) for constraint in constraints)
+    assert np.allclose(group.penalty(arrays), penalty)
+
+    arrays_bar = [np.zeros(np.shape(array)) for array in arrays]
+    group.gradient(arrays, arrays_bar)
+
+    for array_bar, autograd_bar in zip(arrays_bar, grad(group.penalty)(arrays)):
+        assert np.allclose(array_bar, autograd_bar)
+
+
+def test_constraint_groups_subclasses_ungrouped(braced_tower_2d):
+    """
+    Tests that instances of subclasses of the built-in constraints are not grouped.
+    """
+    class OtherPointConstraint(PointConstraint):
+        pass
+
+    topology = braced_tower_2d
+    topology.build_trails()
+    problem = EquilibriumProblem.from_topology_diagram(topology)
+
+    constraint = OtherPointConstraint(0, [0.0, 0.0, 0.0])
+    groups, ungrouped = compile_constraints([PointConstraint(1, [0.0, 0.0, 0.0]), constraint], problem)
+
+    assert len(groups) == 1 and len(groups[0]) == 1
+    assert ungrouped == [constraint]
+
+
+def test_polyline_index_closest_points():
+    """
+    Checks the closest points found with the spatial index of a long polyline against a brute force search.
+    """
+    rng = np.random.default_rng(0)
+    points = np.cumsum(rng.normal(size=(1000, 3)), axis=0)
+    index = PolylineIndex(points)
+
+    queries = points[rng.integers(0, 1000, 300)] + rng.normal(scale=2.0, size=(300, 3))
+    queries = np.concatenate([queries, rng.normal(scale=100.0, size=(10, 3))])
+
+    distances = np.linalg.norm(queries - index.closest_points(queries), axis=1)
+
+    segments = list(pairwise(points.tolist()))
+    for query, distance in zip(queries.tolist(), distances):
+        closest = min(distance_point_point(query, closest_point_on_segment(query, segment)) for segment in segments)
+        assert np.allclose(distance, closest)
+
+
+def test_mesh_index_closest_points():
+    """
+    Checks the closest points found with the hierarchy of a mesh against a brute force search,
+    and their derivatives against finite differences.
+    """
+    rng = np.random.default_rng(0)
+    mesh = Mesh.from_meshgrid(dx=4.0, nx=12)
+    vertices, faces = mesh.to_vertices_and_faces()
+    vertices = np.array(vertices) + rng.normal(scale=0.1, size=(len(vertices), 3))
+    index = MeshIndex((vertices, faces), leaf_size=4)
+
+    queries = rng.uniform(-1.0, 5.0, size=(50, 3))
+    closest = index.closest_points(queries)
+
+    triangles = index.triangles
+    for query, point in zip(queries, closest):
+        brute = [closest_point_on_triangle(query, triangle) for triangle in triangles]
+        assert np.allclose(np.linalg.norm(query - point), np.min(np.linalg.norm(query - brute, axis=1)))
+
+    queries = queries[:10]
+    jacobian_ad = jacobian(index.closest_points)(queries)
+    for i in range(3):
+        step = np.zeros(3)
+        step[i] = 1e-6
+        jacobian_fd = (index.closest_points(queries + step) - index.closest_points(queries - step)) / 2e-6
+        assert np.allclose(jacobian_ad[np.arange(10), :, np.arange(10), i], jacobian_fd, atol=1e-6)
+
+
+def closest_point_on_triangle(point, triangle):
+    """
+    The closest point on a triangle, from its plane or from its edges.
+    """
+    a, b, c = triangle
+    normal = np.cross(b - a, c - a)
+    normal /= np.linalg.norm(normal)
+    projection = point - np.dot(point - a, normal) * normal
+
+    # inside if the projection is on the same side of the three edges
+    sides = [np.dot(np.cross(v - u, projection - u), normal) for u, v in ((a, b), (b, c), (c, a))]
+    if min(sides) >= 0.0:
+        return projection
+
+    return min([closest_point_on_segment(point, segment) for segment in ((a, b), (b, c), (c, a))],
+               key=lambda closest: distance_point_point(point, closest))
@@ -0,0 +1,169 @@
+from functools import partial
+
+import pytest
+
+import numpy as np
+
+from compas.geometry import Point
+
+from compas_cem.equilibrium import EquilibriumProblem
+from compas_cem.equilibrium.force_vectorized import equilibrium_vectorized
+
+from compas_cem.optimization import Optimizer
+from compas_cem.optimization import PointConstraint
+from compas_cem.optimization import TrailEdgeForceConstraint
+from compas_cem.optimization import ReactionForceConstraint
+from compas_cem.optimization import OriginNodeYParameter
+from compas_cem.optimization import grad_finite_differences
+from compas_cem.optimization import value_and_grad_finite_differences
+from compas_cem.optimization import FiniteDifferencesPool
+
+
+# ==============================================================================
+# Fixtures
+# ==============================================================================
+
+@pytest.fixture
+def braced_tower_constrained(braced_tower_optimizer):
+    """
+    The optimizer of a braced tower, with a mix of constraints.
+    """
+    topology, optimizer = braced_tower_optimizer
+
+    optimizer.add_constraint(PointConstraint(0, [0.2, 0.1, 0.0]))
+    optimizer.add_constraint(PointConstraint(4, [1.0, 1.2, 0.0]))
+    optimizer.add_constraint(TrailEdgeForceConstraint((1, 2), -1.0))
+    optimizer.add_constraint(ReactionForceConstraint(3, [0.0, 1.0, 0.0]))
+
+    return topology, optimizer
+
+# ==============================================================================
+# Tests - Gradients
+# ==============================================================================
+
+
+def test_grad_adjoint_finite_differences(braced_tower_constrained):
+    """
+    Validates the gradient of the adjoint method against finite differences.
+    """
+    topology, optimizer = braced_tower_constrained
+    problem = optimizer.equilibrium_problem(topology)
+    x = optimizer.optimization_parameters(topology)
+
+    _, grad_adjoint = optimizer._value_and_gradient_adjoint(x, tmax=100, eta=1e-12, problem=problem)
+
+    x_func = partial(optimizer._optimize_form, topology=topology.copy(), tmax=100, eta=1e-12, problem=problem)
+    grad_fd = grad_finite_differences(x, np.zeros(x.size), x_func, step_size=1e-7)
+
+    assert np.allclose(grad_adjoint, grad_fd, atol=1e-4)
+
+
+@pytest.mark.parametrize("scheme", ["forward", "central"])
+def test_grad_finite_differences_pool(braced_tower_constrained, scheme):
+    """
+    Tests that a pool of processes approximates the same finite differences as a single process.
+    """
+    topology, optimizer = braced_tower_constrained
+    problem = optimizer.equilibrium_problem(topology)
+    x = optimizer.optimization_parameters(topology)
+
+    x_func = partial(optimizer._optimize_form, topology=topology.copy(), tmax=100, eta=1e-6, problem=problem)
+    fx, grad = value_and_grad_finite_differences(x, x_func, 1e-6, scheme)
+
+    with FiniteDifferencesPool(optimizer, topology, problem, 2, 1e-6, scheme, chunksize=3) as pool:
+        fx_pool, grad_pool = pool(x)
+
+    assert np.allclose(fx, fx_pool)
+    assert np.allclose(grad, grad_pool)
+
+
+def test_grad_adjoint_optimization(braced_tower_constrained):
+    """
+    Checks that an optimization driven by the adjoint method converges like the one with autograd.
+    """
+    topology, optimizer = braced_tower_constrained
+
+    optimizer.solve(topology.copy(), grad="AD", iters=20, eta=1e-9)
+    penalty_ad = optimizer.penalty
+
+    optimizer.solve(topology.copy(), grad="ADJOINT", iters=20, eta=1e-9)
+    penalty_adjoint = optimizer.penalty
+
+    assert np.allclose(penalty_ad, penalty_adjoint)
+
+
+def test_grad_finite_differences_optimization_indirect(crossed_trails):
+    """
+    Checks that finite differences converge like autograd with indirect deviation edges.
+    Every unperturbed point is solved from scratch, and only its perturbations re-solve partially.
+    """
+    topology = crossed_trails
+    topology.build_trails()
+
+    optimizer = Optimizer()
+    for node in (0, 6):
+        optimizer.add_parameter(OriginNodeYParameter(node, 1.0, 1.0))
+    optimizer.add_constraint(PointConstraint(5, Point(0.5, 1.0, 0.0)))
+    optimizer.add_constraint(PointConstraint(11, Point(2.5, 1.0, 0.0)))
+
+    optimizer.solve(topology.copy(), algorithm="LBFGS", grad="AD", iters=30)
+    penalty_ad = optimizer.penalty
+
+    optimizer.solve(topology.copy(), algorithm="LBFGS", grad="FD", iters=30)
+    penalty_fd = optimizer.penalty
+
+    assert np.allclose(penalty_ad, penalty_fd, rtol=1e-4)
+
+
+@pytest.mark.parametrize("grad", ["AD", "ADJOINT"])
+def test_grad_single_forward_solve_per_evaluation(braced_tower_constrained, grad):
+    """
+    Tests that the value and the gradient of the objective share a single forward solve.
+    """
+    topology, optimizer = braced_tower_constrained
+
+    optimizer.solve(topology.copy(), algorithm="LBFGS", grad=grad, iters=20)
+
+    assert optimizer.solves == optimizer.evals
+
+
+def test_warm_start_invalidated_by_structure(braced_tower_constrained, threebar_funicular):
+    """
+    Verifies that a warm-start state is discarded when the topology structure changes.
+    """
+    topology, optimizer = braced_tower_constrained
+
+    optimizer.solve(topology.copy(), grad="ADJOINT", iters=20, warm_start=True)
+    warm_problem, _ = optimizer._warm_state
+    assert warm_problem.number_of_nodes() == topology.number_of_nodes()
+
+    other = threebar_funicular
+    other.build_trails()
+    problem = EquilibriumProblem.from_topology_diagram(other)
+
+    assert optimizer._warm_xyz(problem, tmax=100) is None
+    assert optimizer._warm_state is None
+
+
+def test_warm_start_falls_back_to_cold_start(crossed_trails):
+    """
+    Tests that an equilibrium calculation that does not converge from a warm start is repeated from scratch.
+    """
+    topology = crossed_trails
+    topology.build_trails()
+    problem = EquilibriumProblem.from_topology_diagram(topology)
+
+    optimizer = Optimizer()
+    optimizer._warm_start = True
+    warm_xyz, _, _, _ = optimizer._equilibrium(problem, tmax=100, eta=1e-6)
+
+    # move the origin nodes far enough for the warm start not to converge within tmax
+    xyz = np.array(problem.xyz)
+    xyz[[problem.node_index[0], problem.node_index[6]], 1] += 3.0
+    moved = problem.replace(xyz=xyz)
+
+    with pytest.raises(ValueError):
+        equilibrium_vectorized(moved, tmax=100, eta=1e-6, xyz=warm_xyz)
+
+    xyz, _, _, _ = optimizer._equilibrium(moved, tmax=100, eta=1e-6)
+    assert np.allclose(xyz, equilibrium_vectorized(moved, tmax=100, eta=1e-6)[0])
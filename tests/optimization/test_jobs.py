@@ -0,0 +1,139 @@
+import json
+
+import pytest
+
+import numpy as np
+
+from compas.data import DataDecoder
+from compas.data import DataEncoder
+from compas.rpc import Dispatcher
+
+from compas_cem.equilibrium import static_equilibrium
+
+from compas_cem.optimization import Optimizer
+from compas_cem.optimization import OptimizationJob
+from compas_cem.optimization import PointConstraint
+from compas_cem.optimization import DeviationEdgeParameter
+
+
+# ==============================================================================
+# Fixtures
+# ==============================================================================
+
+class LocalProxy(object):
+    """
+    A stand-in for a proxy server, that dispatches calls in process through JSON.
+    """
+    def __init__(self, module):
+        self.module = module
+        self.dispatcher = Dispatcher()
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            idict = json.dumps({"args": args, "kwargs": kwargs}, cls=DataEncoder)
+            odict = json.loads(self.dispatcher._dispatch(self.module + "." + name, [idict]), cls=DataDecoder)
+            if odict["error"]:
+                raise RuntimeError(odict["error"])
+            return odict["data"]
+        return call
+
+# ==============================================================================
+# Tests - Jobs
+# ==============================================================================
+
+
+def test_job_proxy(strut_problem):
+    """
+    Submits a job to a stand-in proxy server, polls it, and fetches its results.
+    """
+    topology, constraints, parameters = strut_problem
+    proxy = LocalProxy("compas_cem.optimization")
+
+    job = proxy.job_submit_proxy(topology, constraints, parameters, "SLSQP", 100)
+    solution = proxy.job_result_proxy(job, timeout=10.0)
+
+    _, form, objective, _, evals, _, status = solution
+    assert np.allclose(form.node_coordinates(0), [0.0, 0.5, 0.0])
+    assert objective < 1e-6 and evals > 0
+
+    with pytest.raises(RuntimeError):
+        proxy.job_poll_proxy(job)
+
+
+def test_job_progress(strut_problem):
+    """
+    Tests that a job publishes the best parameters it found, and the form diagram at them.
+    """
+    topology, constraints, parameters = strut_problem
+
+    optimizer = Optimizer()
+    optimizer.add_constraint(constraints[0])
+    optimizer.add_parameter(parameters[0])
+
+    job = OptimizationJob(optimizer, topology, algorithm="SLSQP", iters=100)
+    assert job.latest() == (None, None, float("inf"))
+
+    job.start()
+    assert job.wait(10.0)
+
+    progress = job.progress()
+    assert progress["status"] == "done"
+    assert progress["evals"] == job.evals > 0
+    assert np.allclose(progress["x"], [-1.5])
+
+    _, form, penalty = job.latest()
+    assert np.allclose(form.node_coordinates(0), [0.0, 0.5, 0.0])
+    assert penalty == progress["penalty"]
+
+
+def test_job_cancel(strut_problem):
+    """
+    Tests that a cancelled job stops after one evaluation, with the results at its best parameters.
+    """
+    topology, constraints, parameters = strut_problem
+
+    optimizer = Optimizer()
+    optimizer.add_constraint(constraints[0])
+    optimizer.add_parameter(parameters[0])
+
+    job = OptimizationJob(optimizer, topology, algorithm="SLSQP", iters=100)
+    job.cancel()
+    job.start()
+    assert job.wait(10.0)
+
+    _, form, objective, _, evals, _, status = job.result()
+    assert status == "cancelled" and evals == 1
+    assert np.allclose(form.node_coordinates(0), [0.0, 1.0, 0.0])
+    assert np.allclose(objective, 0.25)
+    assert optimizer.gradient is None and optimizer.solves == 1
+
+
+def test_optimizer_stop_keeps_best(braced_tower_2d):
+    """
+    Tests that an optimizer stopped from the outside returns its best evaluation, not its last one.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+
+    optimizer = Optimizer()
+    for edge in topology.deviation_edges():
+        optimizer.add_parameter(DeviationEdgeParameter(edge, 1.0, 1.0))
+    optimizer.add_constraint(PointConstraint(0, [0.5, 0.3, 0.0]))
+    optimizer.add_constraint(PointConstraint(4, [1.0, 1.2, 0.0]))
+
+    evals = []
+    optimizer._stop = lambda: len(evals) >= 7
+    solved = topology.copy()
+    form = optimizer.solve(solved, "MMA", iters=100, callback=lambda x, fx: evals.append((np.array(x), fx)))
+
+    x_best, fx_best = min(evals, key=lambda evaluation: evaluation[1])
+    assert evals[-1][1] > fx_best
+    assert np.allclose(optimizer.x_opt, x_best)
+    assert np.allclose(optimizer.penalty, fx_best)
+    assert np.allclose(optimizer.optimization_parameters(solved), x_best)
+
+    other = topology.copy()
+    optimizer._update_parameters(other, x_best)
+    form_best = static_equilibrium(other)
+    for node in form.nodes():
+        assert np.allclose(form.node_coordinates(node), form_best.node_coordinates(node))
@@ -0,0 +1,110 @@
+from functools import partial
+
+import pytest
+
+import numpy as np
+
+from autograd import jacobian
+
+from compas.geometry import Line
+
+from compas_cem.equilibrium import static_equilibrium
+from compas_cem.equilibrium.force_vectorized import equilibrium_vectorized
+
+from compas_cem.optimization import PointConstraint
+from compas_cem.optimization import LineConstraint
+from compas_cem.optimization import TrailEdgeForceConstraint
+from compas_cem.optimization import jacobian_row_groups
+
+
+# ==============================================================================
+# Helpers
+# ==============================================================================
+
+def residuals_function(optimizer, problem, x):
+    """
+    The residuals of the constraints of an optimizer, differentiable with autograd.
+    """
+    problem = optimizer._update_problem(problem, x)
+    arrays = equilibrium_vectorized(problem, eta=1e-12)
+    return optimizer._residuals_arrays(problem, arrays)
+
+# ==============================================================================
+# Tests - Jacobian
+# ==============================================================================
+
+
+def test_residuals_jacobian(braced_tower_optimizer):
+    """
+    Checks the sparse Jacobian of the residuals against autograd.
+    """
+    topology, optimizer = braced_tower_optimizer
+
+    optimizer.add_constraint(PointConstraint(0, [0.2, 0.1, 0.0]))
+    optimizer.add_constraint(PointConstraint(4, [1.0, 1.2, 0.0], 2.0))
+    optimizer.add_constraint(TrailEdgeForceConstraint((1, 2), -1.0))
+    # a subclass is not grouped, and is differentiated one by one
+    optimizer.add_constraint(type("Line", (LineConstraint, ), {})(2, Line([0.0, 0.0, 0.0], [1.0, 1.0, 0.0])))
+
+    residuals, jac = optimizer.residuals_jacobian(topology, eta=1e-12)
+    sparsity, _ = optimizer._jacobian_layout
+
+    problem = optimizer.equilibrium_problem(topology)
+    x = optimizer.optimization_parameters(topology)
+
+    penalty = optimizer._optimize_form(x, topology.copy(), 100, 1e-12, problem)
+    assert np.allclose(residuals @ residuals, penalty)
+
+    jac_ad = jacobian(partial(residuals_function, optimizer, problem))(x)
+    assert np.allclose(jac.toarray(), jac_ad)
+
+    # the jacobian is structurally sparse
+    assert not np.any(jac_ad[np.logical_not(sparsity)])
+    assert jac.nnz < jac_ad.size
+
+
+def test_jacobian_row_groups():
+    """
+    Tests that the rows in a group never share a column.
+    """
+    pattern = np.array([[1, 1, 0, 0],
+                        [0, 0, 1, 0],
+                        [0, 1, 1, 0],
+                        [0, 0, 0, 1]], dtype=bool)
+
+    groups = jacobian_row_groups(pattern)
+
+    assert sorted(np.concatenate(groups).tolist()) == [0, 1, 2, 3]
+    for group in groups:
+        assert np.all(pattern[group].sum(axis=0) <= 1)
+    assert len(groups) == 2
+
+# ==============================================================================
+# Tests - Least squares
+# ==============================================================================
+
+
+@pytest.mark.parametrize("algorithm", ["SLSQP", "LBFGS"])
+def test_least_squares_point_matching(braced_tower_optimizer, algorithm):
+    """
+    Checks that Levenberg-Marquardt matches target points in fewer forward solves than NLopt.
+    """
+    topology, optimizer = braced_tower_optimizer
+
+    # targets from a reachable form
+    x = optimizer.optimization_parameters(topology)
+    target = topology.copy()
+    optimizer._update_parameters(target, x + 0.2)
+    form = static_equilibrium(target)
+
+    for node in topology.nodes():
+        optimizer.add_constraint(PointConstraint(node, form.node_coordinates(node)))
+
+    optimizer.solve(topology.copy(), algorithm=algorithm, grad="ADJOINT", iters=200, eps=1e-8)
+    solves = optimizer.solves
+
+    optimizer.solve(topology.copy(), algorithm="LM", iters=200, eps=1e-8)
+
+    assert optimizer.status == "EPSVAL_REACHED"
+    assert optimizer.penalty <= 1e-8
+    assert optimizer.solves < solves
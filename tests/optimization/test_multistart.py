@@ -0,0 +1,66 @@
+import pytest
+
+import numpy as np
+
+from compas_cem.optimization import Optimizer
+from compas_cem.optimization import PointConstraint
+from compas_cem.optimization import TrailEdgeParameter
+from compas_cem.optimization import DeviationEdgeParameter
+from compas_cem.optimization import latin_hypercube_samples
+
+
+# ==============================================================================
+# Tests - Sampling
+# ==============================================================================
+
+def test_latin_hypercube_samples_stratified():
+    """
+    Checks that every interval of every dimension is sampled exactly once.
+    """
+    bounds_low = np.array([-1.0, 0.0, 2.0])
+    bounds_up = np.array([1.0, 0.5, 4.0])
+
+    samples = latin_hypercube_samples(bounds_low, bounds_up, 10, seed=0)
+    strata = np.floor(10 * (samples - bounds_low) / (bounds_up - bounds_low))
+
+    assert samples.shape == (10, 3)
+    for column in strata.T:
+        assert np.array_equal(np.sort(column), np.arange(10))
+
+    with pytest.raises(ValueError):
+        latin_hypercube_samples([0.0, -np.inf], [1.0, 1.0], 10)
+
+# ==============================================================================
+# Tests - Multi-start
+# ==============================================================================
+
+
+@pytest.mark.parametrize("stop_early", [False, True])
+def test_solve_multistart_best_run(braced_tower_2d, stop_early):
+    """
+    Tests that a multi-start optimization outputs the form of the run with the lowest penalty.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+
+    optimizer = Optimizer()
+    for edge in topology.trail_edges():
+        optimizer.add_parameter(TrailEdgeParameter(edge, 0.5, 0.5))
+    for edge in topology.deviation_edges():
+        optimizer.add_parameter(DeviationEdgeParameter(edge, 1.0, 1.0))
+
+    optimizer.add_constraint(PointConstraint(0, [0.2, 0.1, 0.0]))
+    optimizer.add_constraint(PointConstraint(3, [1.0, 0.0, 0.0]))
+
+    results = []
+    form = optimizer.solve_multistart(topology, starts=4, seed=0, workers=2, stop_early=stop_early,
+                                      callback=results.append, grad="ADJOINT", iters=50, eps=1e-3)
+
+    assert results == optimizer.results
+    assert 0 < len(results) <= 4
+    if not stop_early:
+        assert len(results) == 4
+
+    assert optimizer.penalty == min(result["penalty"] for result in results)
+    assert optimizer.penalty < 1e-3
+    assert np.allclose(form.node_coordinates(0), [0.2, 0.1, 0.0], atol=0.1)
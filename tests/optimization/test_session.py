@@ -0,0 +1,98 @@
+import pytest
+
+import numpy as np
+
+from compas_cem.optimization import Optimizer
+from compas_cem.optimization import OptimizationSession
+from compas_cem.optimization import PointConstraint
+from compas_cem.optimization import TrailEdgeParameter
+
+from compas_cem.optimization import session_start_proxy
+from compas_cem.optimization import session_update_proxy
+from compas_cem.optimization import session_solve_proxy
+from compas_cem.optimization import session_close_proxy
+
+
+# ==============================================================================
+# Tests - Sessions
+# ==============================================================================
+
+
+def test_session_solve(strut_problem):
+    """
+    Checks that a session solves like an optimizer, without modifying its topology diagram.
+    """
+    topology, constraints, parameters = strut_problem
+    length = topology.edge_attribute((0, 1), "length")
+
+    optimizer = Optimizer()
+    optimizer.add_constraint(constraints[0])
+    optimizer.add_parameter(parameters[0])
+    form = optimizer.solve(topology.copy(), "SLSQP", iters=100)
+
+    session = OptimizationSession(topology, constraints, parameters)
+    _, _, session_form = session.solve("SLSQP", iters=100)
+
+    assert np.allclose(session_form.node_coordinates(0), form.node_coordinates(0))
+    assert topology.edge_attribute((0, 1), "length") == length
+
+
+def test_session_update(strut_problem):
+    """
+    Tests that constraints and parameters are replaced and removed by their ids.
+    """
+    topology, constraints, parameters = strut_problem
+
+    session = OptimizationSession(topology, constraints, parameters)
+    session.solve("SLSQP", iters=100)
+    problem = session.problem
+
+    ids = session.update(constraints=[PointConstraint(0, [0.0, 1.5, 0.0])], remove=list(session.constraints))
+    assert len(session.constraints) == 1
+
+    _, _, form = session.solve("SLSQP", iters=100)
+    assert np.allclose(form.node_coordinates(0), [0.0, 1.5, 0.0], atol=1e-3)
+    assert session.problem is problem
+
+    # constraints of the same type on the same node are kept apart
+    session.update(constraints=[PointConstraint(0, [0.0, 1.5, 0.0])])
+    assert len(session.constraints) == 2
+
+    session.update(remove=ids["constraints"])
+    assert len(session.constraints) == 1
+
+
+def test_session_warm_state(strut_problem):
+    """
+    Checks that a session keeps the equilibrium state of its last solve until its topology changes.
+    """
+    topology, constraints, parameters = strut_problem
+
+    session = OptimizationSession(topology, constraints, parameters)
+    optimizer, _, _ = session.solve("SLSQP", iters=100)
+    assert session._warm_state is not None
+    assert session._warm_state is optimizer._warm_state
+
+    session.update(topology=topology)
+    assert session._warm_state is None
+    assert session.x_opt is None
+
+
+def test_session_proxy(strut_problem):
+    """
+    Tests the resident sessions of a proxy server, called in process.
+    """
+    topology, constraints, parameters = strut_problem
+
+    session, ids = session_start_proxy(topology, constraints, parameters)
+    assert len(ids["constraints"]) == 1 and len(ids["parameters"]) == 1
+
+    ids = session_update_proxy(session, parameters=[TrailEdgeParameter((0, 1), 0.1, 0.1)], remove=ids["parameters"])
+    assert len(ids["parameters"]) == 1
+
+    _, form, _, _, _, _, _ = session_solve_proxy(session, "SLSQP", 100)
+    assert np.allclose(form.node_coordinates(0), [0.0, 0.9, 0.0])
+
+    session_close_proxy(session)
+    with pytest.raises(KeyError):
+        session_update_proxy(session)
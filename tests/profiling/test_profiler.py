@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from compas_cem.equilibrium import static_equilibrium
+from compas_cem.equilibrium import static_equilibrium_numpy
+from compas_cem.equilibrium import static_equilibrium_vectorized
+from compas_cem.equilibrium import static_equilibrium_forward
+
+from compas_cem.optimization import Optimizer
+from compas_cem.optimization import PointConstraint
+from compas_cem.optimization import DeviationEdgeParameter
+
+from compas_cem.profiling import Profiler
+from compas_cem.profiling import ChromeTraceSink
+
+
+# ==============================================================================
+# Tests - Equilibrium
+# ==============================================================================
+
+@pytest.mark.parametrize("solver", [static_equilibrium, static_equilibrium_numpy, static_equilibrium_vectorized, static_equilibrium_forward])
+def test_profile_static_equilibrium(braced_tower_2d, solver):
+    """
+    Checks the phases, iterations and residuals recorded while form-finding.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+
+    form = solver(topology)
+    assert form.stats is None
+
+    profiler = Profiler()
+    form = solver(topology, profiler=profiler)
+    stats = form.stats
+
+    assert stats is profiler.stats
+    assert stats.calls(solver.__name__) == 1
+    assert stats.calls("preprocessing") == 1
+    assert stats.calls("form_update") == 1
+
+    # the first iteration does not see the indirect deviation edges
+    iterations = stats.series["iterations"][0]
+    assert stats.calls("iteration") == iterations
+    assert len(stats.series["residual"]) == iterations - 1
+    assert stats.series["residual"][-1] < 1e-6
+
+    assert stats.time(solver.__name__) >= stats.time("iteration")
+
+# ==============================================================================
+# Tests - Optimization
+# ==============================================================================
+
+
+def test_profile_optimizer_solve(braced_tower_2d, tmpdir):
+    """
+    Tests the counters of an optimization run, and its trace in the Chrome format.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+
+    optimizer = Optimizer()
+    for edge in topology.deviation_edges():
+        optimizer.add_parameter(DeviationEdgeParameter(edge, 1.0, 1.0))
+    optimizer.add_constraint(PointConstraint(2, [-0.5, 2.0, 0.0]))
+
+    sink = ChromeTraceSink()
+    profiler = Profiler(sinks=[sink])
+    form = optimizer.solve(topology, grad="ADJOINT", iters=10, profiler=profiler)
+
+    stats = optimizer.stats
+    assert form.stats is stats
+    assert stats.counters["evaluations"] == optimizer.evals
+    # one more gradient evaluation at the optimum
+    assert stats.counters["forward_solves"] == optimizer.solves + 1
+    assert stats.counters["backward_solves"] == stats.calls("backward")
+    assert stats.calls("optimization") == 1
+    assert stats.calls("forward") == stats.counters["forward_solves"]
+
+    filepath = str(tmpdir.join("trace.json"))
+    sink.save(filepath)
+    with open(filepath, "r") as f:
+        trace = json.load(f)
+
+    phases = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+    assert len(phases) == sum(timing[0] for timing in stats.timings.values())
+    assert all(event["dur"] >= 0.0 for event in phases)
+
+    # profiling is off again after solving
+    optimizer.solve(topology, grad="ADJOINT", iters=10)
+    assert optimizer.stats is None
+    assert stats.calls("optimization") == 1